@@ -1,5 +1,14 @@
 from __future__ import annotations
 
-from .main import app, create_app
+from typing import Any
 
 __all__ = ["app", "create_app"]
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved on first access: importing a submodule, as a spawned pool worker does, must not build the app.
+    if name in __all__:
+        from . import main
+
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
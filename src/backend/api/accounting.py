@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..dependencies import get_session, get_session_factory, get_settings
+from ..models import AccountingChart, AccountingExport
+from ..schemas import (
+    AccountingAccount,
+    AccountingChartResponse,
+    AccountingChartUpdate,
+    AccountingExportCreate,
+    AccountingExportResponse,
+)
+from ..services.accounting import (
+    FEC,
+    FILE,
+    POSTINGS,
+    READY,
+    compiled_charts,
+    get_chart,
+    get_export,
+    list_exports,
+    open_export_file,
+    start_file_export,
+    stream_export,
+    update_chart,
+)
+from ..services.exceptions import DomainError
+
+router = APIRouter(prefix="/accounting", tags=["accounting"])
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "fec": "text/plain; charset=utf-8"}
+
+
+def _filename(export: AccountingExport) -> str:
+    if export.format == FEC:
+        return f"FEC-paie-{export.fiscal_year}.txt"
+    return f"journal-paie-{export.fiscal_year}.csv"
+
+
+def _to_chart_response(chart: AccountingChart) -> AccountingChartResponse:
+    compiled = compiled_charts.get(chart)
+    return AccountingChartResponse(
+        journal_code=compiled.journal_code,
+        journal_label=compiled.journal_label,
+        accounts={
+            posting: AccountingAccount(number=number, label=label)
+            for posting, (number, label) in zip(POSTINGS, compiled.accounts)
+        },
+    )
+
+
+def _to_export_response(request: Request, export: AccountingExport, job_id: str | None = None) -> AccountingExportResponse:
+    response = AccountingExportResponse.model_validate(export, from_attributes=True)
+    response.job_id = job_id
+    if export.destination == FILE and export.status == READY:
+        response.download_url = str(request.url_for("download_accounting_export_endpoint", export_id=export.id))
+    return response
+
+
+@router.get("/chart", response_model=AccountingChartResponse)
+def get_chart_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> AccountingChartResponse:
+    try:
+        chart = get_chart(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_chart_response(chart)
+
+
+@router.put("/chart", response_model=AccountingChartResponse)
+def update_chart_endpoint(
+    payload: AccountingChartUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> AccountingChartResponse:
+    try:
+        chart = update_chart(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_chart_response(chart)
+
+
+@router.get("/exports/stream/{export_format}")
+def stream_export_endpoint(
+    export_format: Literal["csv", "fec"],
+    year: int = Query(ge=2000, le=2100),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+) -> StreamingResponse:
+    try:
+        export, chunks = stream_export(db, session_token, session_factory, export_format, year)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{_filename(export)}"',
+            "X-Export-Id": export.id,
+        },
+    )
+
+
+@router.post("/exports", response_model=AccountingExportResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_file_export_endpoint(
+    payload: AccountingExportCreate,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+) -> AccountingExportResponse:
+    try:
+        export, job = start_file_export(
+            db, session_token, session_factory, settings.document_dir, payload.format, payload.fiscal_year
+        )
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_export_response(request, export, job.id)
+
+
+@router.get("/exports", response_model=list[AccountingExportResponse])
+def list_exports_endpoint(
+    request: Request,
+    year: int | None = Query(default=None),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[AccountingExportResponse]:
+    try:
+        exports = list_exports(db, session_token, year)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [_to_export_response(request, export) for export in exports]
+
+
+@router.get("/exports/{export_id}", response_model=AccountingExportResponse)
+def get_export_endpoint(
+    export_id: str,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> AccountingExportResponse:
+    try:
+        export = get_export(db, session_token, export_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_export_response(request, export)
+
+
+@router.get("/exports/{export_id}/file")
+def download_accounting_export_endpoint(
+    export_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        export, chunks = open_export_file(db, session_token, settings.document_dir, export_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export.format],
+        headers={"Content-Disposition": f'attachment; filename="{_filename(export)}"', "ETag": f'"{export.sha256}"'},
+    )
@@ -13,6 +13,8 @@ from ..schemas import (
     MagicLinkRequest,
     MagicLinkResponse,
     MagicLinkVerifyRequest,
+    OrganizationResponse,
+    OrganizationUpdate,
     RegisterRequest,
     SessionEnvelope,
     SwitchOrganisationRequest,
@@ -26,6 +28,7 @@ from ..services.auth import (
     login_user,
     register_user,
     switch_organisation,
+    update_organization,
     verify_magic_link,
 )
 
@@ -143,3 +146,16 @@ def switch_endpoint(
     except AuthError as error:
         raise _handle_auth_error(error) from error
     return _to_session_envelope(session)
+
+
+@router.put("/organization", response_model=OrganizationResponse)
+def organization_update_endpoint(
+    payload: OrganizationUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> OrganizationResponse:
+    try:
+        organization = update_organization(db, session_token, payload)
+    except AuthError as error:
+        raise _handle_auth_error(error) from error
+    return OrganizationResponse.model_validate(organization)
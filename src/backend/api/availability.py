@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..dependencies import get_session
+from ..schemas import AvailabilityInterval, AvailabilityResponse, AvailabilitySubmit, FreePeopleResponse
+from ..services.availability import find_free_people, get_availability, submit_availability
+from ..services.exceptions import DomainError
+
+router = APIRouter(prefix="/availability", tags=["availability"])
+
+
+def _to_response(
+    user_id: str, start_day: date, end_day: date, intervals: list[tuple[datetime, datetime]]
+) -> AvailabilityResponse:
+    return AvailabilityResponse(
+        user_id=user_id,
+        start_day=start_day,
+        end_day=end_day,
+        intervals=[AvailabilityInterval(starts_at=start, ends_at=end) for start, end in intervals],
+    )
+
+
+@router.get("/free", response_model=FreePeopleResponse)
+def find_free_people_endpoint(
+    starts_at: datetime = Query(alias="start"),
+    ends_at: datetime = Query(alias="end"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> FreePeopleResponse:
+    try:
+        user_ids = find_free_people(db, session_token, starts_at, ends_at)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return FreePeopleResponse(starts_at=starts_at, ends_at=ends_at, user_ids=user_ids)
+
+
+@router.put("/people/{user_id}", response_model=AvailabilityResponse)
+def submit_availability_endpoint(
+    user_id: str,
+    payload: AvailabilitySubmit,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> AvailabilityResponse:
+    try:
+        intervals = submit_availability(db, session_token, user_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_response(user_id, payload.start_day, payload.end_day, intervals)
+
+
+@router.get("/people/{user_id}", response_model=AvailabilityResponse)
+def get_availability_endpoint(
+    user_id: str,
+    start_day: date = Query(alias="startDay"),
+    end_day: date = Query(alias="endDay"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> AvailabilityResponse:
+    try:
+        intervals = get_availability(db, session_token, user_id, start_day, end_day)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_response(user_id, start_day, end_day, intervals)
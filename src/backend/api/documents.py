@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..dependencies import get_session, get_session_factory, get_settings
+from ..models import DocumentBatch
+from ..schemas import DocumentBatchCreate, DocumentBatchResponse
+from ..services.documents import SUCCEEDED, get_document_batch, open_archive, start_document_batch
+from ..services.exceptions import DomainError
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+
+def _to_batch_response(request: Request, batch: DocumentBatch) -> DocumentBatchResponse:
+    return DocumentBatchResponse(
+        job_id=batch.id,
+        kind=batch.kind,
+        status=batch.status,
+        progress=1.0 if batch.status == SUCCEEDED else batch.documents / batch.total if batch.total else 0.0,
+        documents=batch.documents,
+        total=batch.total,
+        created_at=batch.created_at,
+        finished_at=batch.finished_at,
+        expires_at=batch.expires_at,
+        error=batch.error,
+        archive_url=(
+            str(request.url_for("download_document_batch_endpoint", job_id=batch.id))
+            if batch.status == SUCCEEDED
+            else None
+        ),
+    )
+
+
+@router.post("/batches", response_model=DocumentBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_document_batch_endpoint(
+    payload: DocumentBatchCreate,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+    settings: Settings = Depends(get_settings),
+) -> DocumentBatchResponse:
+    try:
+        batch = start_document_batch(
+            db,
+            session_token,
+            session_factory,
+            settings,
+            payload.kind,
+            payload.period_start,
+            payload.period_end,
+            payload.user_ids,
+        )
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_batch_response(request, batch)
+
+
+@router.get("/batches/{job_id}", response_model=DocumentBatchResponse)
+def get_document_batch_endpoint(
+    job_id: str,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> DocumentBatchResponse:
+    try:
+        batch = get_document_batch(db, session_token, job_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_batch_response(request, batch)
+
+
+@router.get("/batches/{job_id}/archive")
+def download_document_batch_endpoint(
+    job_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        chunks = open_archive(db, session_token, settings.document_dir, job_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return StreamingResponse(
+        chunks,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="documents-{job_id}.zip"'},
+    )
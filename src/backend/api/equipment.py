@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..config import Settings
+from ..dependencies import get_session, get_settings
+from ..models import EquipmentReservation
+from ..schemas import (
+    ChecklistBatchCreate,
+    ChecklistBatchResponse,
+    ChecklistBundleLink,
+    EquipmentFreeSpan,
+    EquipmentItemAvailabilityResponse,
+    EquipmentItemCreate,
+    EquipmentItemResponse,
+    EquipmentItemStateResponse,
+    EquipmentItemUpdate,
+    EquipmentKitAvailabilityResponse,
+    EquipmentKitCreate,
+    EquipmentKitResponse,
+    EquipmentKitStateResponse,
+    EquipmentKpiResponse,
+    EquipmentMovementCreate,
+    EquipmentMovementResponse,
+    EquipmentReservationCreate,
+    EquipmentReservationResponse,
+)
+from ..services.checklists import (
+    get_checklist_batch,
+    open_checklist_bundle,
+    start_checklist_batch,
+    stream_mission_checklist,
+)
+from ..services.equipment import (
+    Span,
+    cancel_reservation,
+    create_item,
+    create_kit,
+    get_kit,
+    item_availability,
+    kit_availability,
+    list_items,
+    list_kits,
+    list_reservations,
+    reserve_equipment,
+    update_item,
+)
+from ..services.equipment_movements import equipment_kpis, item_state, kit_state, list_movements, record_movements
+from ..services.exceptions import DomainError
+from ..services.jobs import Job
+
+router = APIRouter(prefix="/equipment", tags=["equipment"])
+
+
+def _spans(spans: list[Span]) -> list[EquipmentFreeSpan]:
+    return [EquipmentFreeSpan(starts_at=start, ends_at=end) for start, end in spans]
+
+
+def _to_reservation_response(reservation: EquipmentReservation) -> EquipmentReservationResponse:
+    return EquipmentReservationResponse(
+        id=reservation.id,
+        kit_id=reservation.kit_id,
+        mission_id=reservation.mission_id,
+        venue_id=reservation.venue_id,
+        starts_at=reservation.starts_at,
+        ends_at=reservation.ends_at,
+        notes=reservation.notes,
+        item_ids=[row.item_id for row in reservation.items],
+        created_at=reservation.created_at,
+    )
+
+
+@router.post("/items", response_model=EquipmentItemResponse, status_code=status.HTTP_201_CREATED)
+def create_item_endpoint(
+    payload: EquipmentItemCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentItemResponse:
+    try:
+        item = create_item(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentItemResponse.model_validate(item, from_attributes=True)
+
+
+@router.get("/items", response_model=list[EquipmentItemResponse])
+def list_items_endpoint(
+    category: str | None = Query(default=None),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[EquipmentItemResponse]:
+    try:
+        items = list_items(db, session_token, category)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [EquipmentItemResponse.model_validate(item, from_attributes=True) for item in items]
+
+
+@router.get("/items/availability", response_model=list[EquipmentItemAvailabilityResponse])
+def item_availability_endpoint(
+    start: datetime = Query(),
+    end: datetime = Query(),
+    category: str | None = Query(default=None),
+    only_available: bool = Query(default=False, alias="onlyAvailable"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[EquipmentItemAvailabilityResponse]:
+    try:
+        availability = item_availability(db, session_token, start, end, category, only_available)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [
+        EquipmentItemAvailabilityResponse(
+            item_id=entry.item.id, name=entry.item.name, available=entry.available, free=_spans(entry.free)
+        )
+        for entry in availability
+    ]
+
+
+@router.put("/items/{item_id}", response_model=EquipmentItemResponse)
+def update_item_endpoint(
+    item_id: str,
+    payload: EquipmentItemUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentItemResponse:
+    try:
+        item = update_item(db, session_token, item_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentItemResponse.model_validate(item, from_attributes=True)
+
+
+@router.post("/kits", response_model=EquipmentKitResponse, status_code=status.HTTP_201_CREATED)
+def create_kit_endpoint(
+    payload: EquipmentKitCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentKitResponse:
+    try:
+        kit = create_kit(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentKitResponse.model_validate(kit, from_attributes=True)
+
+
+@router.get("/kits", response_model=list[EquipmentKitResponse])
+def list_kits_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[EquipmentKitResponse]:
+    try:
+        kits = list_kits(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [EquipmentKitResponse.model_validate(kit, from_attributes=True) for kit in kits]
+
+
+@router.get("/kits/{kit_id}", response_model=EquipmentKitResponse)
+def get_kit_endpoint(
+    kit_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentKitResponse:
+    try:
+        kit = get_kit(db, session_token, kit_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentKitResponse.model_validate(kit, from_attributes=True)
+
+
+@router.get("/kits/{kit_id}/availability", response_model=EquipmentKitAvailabilityResponse)
+def kit_availability_endpoint(
+    kit_id: str,
+    start: datetime = Query(),
+    end: datetime = Query(),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentKitAvailabilityResponse:
+    try:
+        availability = kit_availability(db, session_token, kit_id, start, end)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentKitAvailabilityResponse(
+        kit_id=availability.kit.id,
+        available=availability.available,
+        free=_spans(availability.free),
+        busy_item_ids=availability.busy_item_ids,
+    )
+
+
+@router.post("/reservations", response_model=EquipmentReservationResponse, status_code=status.HTTP_201_CREATED)
+def reserve_equipment_endpoint(
+    payload: EquipmentReservationCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentReservationResponse:
+    try:
+        reservation = reserve_equipment(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_reservation_response(reservation)
+
+
+@router.get("/reservations", response_model=list[EquipmentReservationResponse])
+def list_reservations_endpoint(
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    mission_id: str | None = Query(default=None, alias="missionId"),
+    item_id: str | None = Query(default=None, alias="itemId"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[EquipmentReservationResponse]:
+    try:
+        reservations = list_reservations(db, session_token, start, end, mission_id, item_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [_to_reservation_response(reservation) for reservation in reservations]
+
+
+@router.delete("/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_reservation_endpoint(
+    reservation_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> Response:
+    try:
+        cancel_reservation(db, session_token, reservation_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/movements", response_model=list[EquipmentMovementResponse], status_code=status.HTTP_201_CREATED)
+def record_movements_endpoint(
+    payload: EquipmentMovementCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[EquipmentMovementResponse]:
+    try:
+        movements = record_movements(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [EquipmentMovementResponse.model_validate(movement, from_attributes=True) for movement in movements]
+
+
+@router.get("/movements", response_model=list[EquipmentMovementResponse])
+def list_movements_endpoint(
+    item_id: str | None = Query(default=None, alias="itemId"),
+    kit_id: str | None = Query(default=None, alias="kitId"),
+    limit: int = Query(default=100, ge=1, le=500),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[EquipmentMovementResponse]:
+    try:
+        movements = list_movements(db, session_token, item_id, kit_id, limit)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [EquipmentMovementResponse.model_validate(movement, from_attributes=True) for movement in movements]
+
+
+@router.get("/items/{item_id}/state", response_model=EquipmentItemStateResponse)
+def item_state_endpoint(
+    item_id: str,
+    at: datetime | None = Query(default=None),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentItemStateResponse:
+    try:
+        state = item_state(db, session_token, item_id, at)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentItemStateResponse.model_validate(state, from_attributes=True)
+
+
+@router.get("/kits/{kit_id}/state", response_model=EquipmentKitStateResponse)
+def kit_state_endpoint(
+    kit_id: str,
+    at: datetime | None = Query(default=None),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentKitStateResponse:
+    try:
+        state = kit_state(db, session_token, kit_id, at)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentKitStateResponse.model_validate(state, from_attributes=True)
+
+
+@router.get("/kpis", response_model=EquipmentKpiResponse)
+def equipment_kpis_endpoint(
+    start: date = Query(),
+    end: date = Query(),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> EquipmentKpiResponse:
+    try:
+        kpis = equipment_kpis(db, session_token, start, end)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return EquipmentKpiResponse.model_validate(kpis, from_attributes=True)
+
+
+def _to_checklist_batch_response(request: Request, job: Job) -> ChecklistBatchResponse:
+    counts = job.result or {}
+    return ChecklistBatchResponse(
+        job_id=job.id,
+        status=job.status.value,
+        progress=job.progress,
+        missions=counts.get("missions", 0),
+        total=counts.get("total", 0),
+        items=counts.get("items", 0),
+        labels=counts.get("labels", 0),
+        encoded=counts.get("encoded", 0),
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        bundles=[
+            ChecklistBundleLink(
+                mission_id=mission_id,
+                url=str(request.url_for("download_checklist_bundle_endpoint", job_id=job.id, mission_id=mission_id)),
+            )
+            for mission_id in counts.get("ready", ())
+        ],
+    )
+
+
+@router.get("/missions/{mission_id}/checklist")
+def mission_checklist_endpoint(
+    mission_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        filename, chunks = stream_mission_checklist(db, session_token, settings.document_dir, mission_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return StreamingResponse(
+        chunks, media_type="application/zip", headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/checklists", response_model=ChecklistBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_checklist_batch_endpoint(
+    payload: ChecklistBatchCreate,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> ChecklistBatchResponse:
+    try:
+        job = start_checklist_batch(
+            db, session_token, settings.document_dir, payload.mission_ids, payload.start, payload.end
+        )
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_checklist_batch_response(request, job)
+
+
+@router.get("/checklists/{job_id}", response_model=ChecklistBatchResponse)
+def get_checklist_batch_endpoint(
+    job_id: str,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ChecklistBatchResponse:
+    try:
+        job = get_checklist_batch(db, session_token, job_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_checklist_batch_response(request, job)
+
+
+@router.get("/checklists/{job_id}/missions/{mission_id}")
+def download_checklist_bundle_endpoint(
+    job_id: str,
+    mission_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        chunks = open_checklist_bundle(db, session_token, settings.document_dir, job_id, mission_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return StreamingResponse(
+        chunks,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="chargement-{mission_id}.zip"'},
+    )
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..config import Settings
+from ..dependencies import get_session, get_settings
+from ..schemas import IcsFeedCreate, IcsFeedResponse
+from ..services.exceptions import DomainError
+from ..services.ics import issue_feed, open_feed
+
+router = APIRouter(prefix="/ics", tags=["ics"])
+
+FEED_CACHE_CONTROL = "private, max-age=300"
+
+
+@router.post("/feeds", response_model=IcsFeedResponse, status_code=status.HTTP_201_CREATED)
+def create_ics_feed_endpoint(
+    payload: IcsFeedCreate,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> IcsFeedResponse:
+    try:
+        ref, token = issue_feed(db, session_token, settings, payload.scope, payload.scope_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return IcsFeedResponse(
+        scope=ref.scope,
+        scope_id=ref.scope_id,
+        token=token,
+        url=str(request.url_for("ics_feed_endpoint", feed_token=token)),
+    )
+
+
+@router.get("/{feed_token}.ics", name="ics_feed_endpoint")
+def ics_feed_endpoint(
+    feed_token: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> Response:
+    try:
+        feed = open_feed(db, settings, feed_token, if_none_match)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    headers = {"ETag": feed.etag, "Cache-Control": FEED_CACHE_CONTROL}
+    if feed.chunks is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return StreamingResponse(feed.chunks, media_type="text/calendar; charset=utf-8", headers=headers)
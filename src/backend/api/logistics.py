@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..dependencies import get_session, get_session_factory, get_settings
+from ..models import LogisticsPlan
+from ..schemas import LogisticsPlanRequest, LogisticsPlanResponse, TruckCreate, TruckResponse, TruckUpdate
+from ..services.checklists import stream_truck_checklist
+from ..services.exceptions import DomainError
+from ..services.logistics import (
+    READY,
+    create_truck,
+    find_logistics_plan,
+    get_logistics_plan,
+    list_trucks,
+    request_logistics_plan,
+    update_truck,
+)
+
+router = APIRouter(prefix="/logistics", tags=["logistics"])
+
+
+def _to_plan_response(request: Request, plan: LogisticsPlan, job_id: str | None = None) -> LogisticsPlanResponse:
+    response = LogisticsPlanResponse.model_validate(plan, from_attributes=True)
+    response.job_id = job_id
+    if plan.status == READY:
+        for route in response.routes:
+            route.checklist_url = str(
+                request.url_for("truck_checklist_endpoint", plan_id=plan.id, truck_id=route.truck_id)
+            )
+    return response
+
+
+@router.post("/trucks", response_model=TruckResponse, status_code=status.HTTP_201_CREATED)
+def create_truck_endpoint(
+    payload: TruckCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> TruckResponse:
+    try:
+        truck = create_truck(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return TruckResponse.model_validate(truck, from_attributes=True)
+
+
+@router.get("/trucks", response_model=list[TruckResponse])
+def list_trucks_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[TruckResponse]:
+    try:
+        trucks = list_trucks(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [TruckResponse.model_validate(truck, from_attributes=True) for truck in trucks]
+
+
+@router.put("/trucks/{truck_id}", response_model=TruckResponse)
+def update_truck_endpoint(
+    truck_id: str,
+    payload: TruckUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> TruckResponse:
+    try:
+        truck = update_truck(db, session_token, truck_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return TruckResponse.model_validate(truck, from_attributes=True)
+
+
+@router.post("/plans", response_model=LogisticsPlanResponse, status_code=status.HTTP_202_ACCEPTED)
+def request_logistics_plan_endpoint(
+    payload: LogisticsPlanRequest,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+) -> LogisticsPlanResponse:
+    try:
+        plan, job = request_logistics_plan(
+            db,
+            session_token,
+            session_factory,
+            payload.day,
+            payload.time_budget_seconds,
+            payload.kit_id,
+            payload.fresh,
+        )
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_plan_response(request, plan, job.id)
+
+
+@router.get("/plans", response_model=LogisticsPlanResponse)
+def find_logistics_plan_endpoint(
+    request: Request,
+    day: date = Query(),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> LogisticsPlanResponse:
+    try:
+        plan = find_logistics_plan(db, session_token, day)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_plan_response(request, plan)
+
+
+@router.get("/plans/{plan_id}", response_model=LogisticsPlanResponse)
+def get_logistics_plan_endpoint(
+    plan_id: str,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> LogisticsPlanResponse:
+    try:
+        plan = get_logistics_plan(db, session_token, plan_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_plan_response(request, plan)
+
+
+@router.get("/plans/{plan_id}/trucks/{truck_id}/checklist")
+def truck_checklist_endpoint(
+    plan_id: str,
+    truck_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        filename, chunks = stream_truck_checklist(db, session_token, settings.document_dir, plan_id, truck_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return StreamingResponse(
+        chunks, media_type="application/zip", headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
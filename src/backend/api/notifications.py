@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from ..dependencies import get_notifier, get_session
+from ..schemas import (
+    ContactResponse,
+    ContactUpdate,
+    NotificationChannel,
+    NotificationDetailResponse,
+    NotificationResponse,
+    NotificationSend,
+)
+from ..services.exceptions import DomainError
+from ..services.notifications import (
+    NotificationDispatcher,
+    get_notification,
+    list_notifications,
+    send_message,
+    update_contact,
+)
+
+router = APIRouter(prefix="/notifications", tags=["notifications"])
+
+
+@router.post("/", response_model=list[NotificationResponse], status_code=status.HTTP_202_ACCEPTED)
+def send_notification_endpoint(
+    payload: NotificationSend,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    notifier: NotificationDispatcher = Depends(get_notifier),
+) -> list[NotificationResponse]:
+    try:
+        notifications = send_message(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    notifier.wake()
+    return [NotificationResponse.model_validate(notification) for notification in notifications]
+
+
+@router.get("/", response_model=list[NotificationResponse])
+def list_notifications_endpoint(
+    status_filter: str | None = Query(default=None, alias="status"),
+    channel: NotificationChannel | None = Query(default=None),
+    event_id: str | None = Query(default=None, alias="eventId"),
+    limit: int = Query(default=100, ge=1, le=500),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[NotificationResponse]:
+    try:
+        notifications = list_notifications(
+            db, session_token, status=status_filter, channel=channel, event_id=event_id, limit=limit
+        )
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [NotificationResponse.model_validate(notification) for notification in notifications]
+
+
+@router.get("/{notification_id}", response_model=NotificationDetailResponse)
+def get_notification_endpoint(
+    notification_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> NotificationDetailResponse:
+    try:
+        notification = get_notification(db, session_token, notification_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return NotificationDetailResponse.model_validate(notification)
+
+
+@router.put("/contact", response_model=ContactResponse)
+def update_contact_endpoint(
+    payload: ContactUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ContactResponse:
+    try:
+        user = update_contact(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ContactResponse.model_validate(user)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..dependencies import get_session, get_session_factory
+from ..schemas import (
+    PayRateResponse,
+    PayRateSet,
+    PayrollCloseCreate,
+    PayrollCloseResponse,
+    PayrollPolicyResponse,
+    PayrollPolicyUpdate,
+    PayrollSummaryResponse,
+)
+from ..services.exceptions import DomainError
+from ..services.payroll import (
+    get_payroll_policy,
+    list_pay_rates,
+    payroll_summary,
+    set_pay_rate,
+    update_payroll_policy,
+)
+from ..services.payroll_close import get_payroll_close, list_payroll_closes, start_payroll_close
+
+router = APIRouter(prefix="/payroll", tags=["payroll"])
+
+
+@router.get("/policy", response_model=PayrollPolicyResponse)
+def get_payroll_policy_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PayrollPolicyResponse:
+    try:
+        policy = get_payroll_policy(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PayrollPolicyResponse.model_validate(policy, from_attributes=True)
+
+
+@router.put("/policy", response_model=PayrollPolicyResponse)
+def update_payroll_policy_endpoint(
+    payload: PayrollPolicyUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PayrollPolicyResponse:
+    try:
+        policy = update_payroll_policy(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PayrollPolicyResponse.model_validate(policy, from_attributes=True)
+
+
+@router.get("/rates", response_model=list[PayRateResponse])
+def list_pay_rates_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[PayRateResponse]:
+    try:
+        rates = list_pay_rates(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [PayRateResponse.model_validate(rate, from_attributes=True) for rate in rates]
+
+
+@router.put("/rates/{user_id}", response_model=PayRateResponse)
+def set_pay_rate_endpoint(
+    user_id: str,
+    payload: PayRateSet,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PayRateResponse:
+    try:
+        rate = set_pay_rate(db, session_token, user_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PayRateResponse.model_validate(rate, from_attributes=True)
+
+
+@router.get("/summary", response_model=PayrollSummaryResponse)
+def payroll_summary_endpoint(
+    start: date = Query(),
+    end: date = Query(),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PayrollSummaryResponse:
+    try:
+        summary = payroll_summary(db, session_token, start, end)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PayrollSummaryResponse.model_validate(summary, from_attributes=True)
+
+
+@router.post("/closes", response_model=PayrollCloseResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_payroll_close_endpoint(
+    payload: PayrollCloseCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+) -> PayrollCloseResponse:
+    try:
+        close, job = start_payroll_close(db, session_token, payload.month, session_factory)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    response = PayrollCloseResponse.model_validate(close, from_attributes=True)
+    response.job_id = job.id
+    return response
+
+
+@router.get("/closes", response_model=list[PayrollCloseResponse])
+def list_payroll_closes_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[PayrollCloseResponse]:
+    try:
+        closes = list_payroll_closes(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [PayrollCloseResponse.model_validate(close, from_attributes=True) for close in closes]
+
+
+@router.get("/closes/{close_id}", response_model=PayrollCloseResponse)
+def get_payroll_close_endpoint(
+    close_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PayrollCloseResponse:
+    try:
+        close = get_payroll_close(db, session_token, close_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PayrollCloseResponse.model_validate(close, from_attributes=True)
@@ -0,0 +1,675 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+
+from ..dependencies import get_notifier, get_session
+from ..models import Assignment, PlanningScenario
+from ..schemas import (
+    AssignmentCreate,
+    AssignmentMove,
+    AssignmentResponse,
+    AssignmentUpdate,
+    ConflictDeltaResponse,
+    ConflictReportResponse,
+    ConflictResponse,
+    MissionOccurrenceResponse,
+    MissionRecurrenceResponse,
+    MissionRecurrenceSet,
+    OccurrenceExceptionSet,
+    PersonPlanningResponse,
+    PlanningLogCursorResponse,
+    PlanningLogCursorUpdate,
+    PlanningOperationResponse,
+    PersonPlanningUpdate,
+    PlanningWeekResponse,
+    PlanningWeekRowResponse,
+    ProposalCandidate,
+    ProposalReason,
+    ProposalReportResponse,
+    ScenarioAssignmentChange,
+    ScenarioAssignmentCreate,
+    ScenarioChangeResponse,
+    ScenarioCreate,
+    ScenarioMissionChange,
+    ScenarioResponse,
+    ScheduledMissionBulkCreate,
+    ScheduledMissionBulkResponse,
+    ScheduledMissionCreate,
+    ScheduledMissionResponse,
+    ScheduledMissionUpdate,
+    SlotProposalResponse,
+    SolverPlacement,
+    SolverRunCreate,
+    SolverRunResponse,
+    SolverShortfall,
+    SolverSolutionResponse,
+)
+from ..services.conflicts import Conflict
+from ..services.exceptions import DomainError
+from ..services.jobs import Job
+from ..services.notifications import NotificationDispatcher
+from ..services.oplog import get_cursor, list_operations, redo, set_cursor, undo
+from ..services.planning import (
+    create_assignment,
+    create_mission,
+    create_missions_bulk,
+    delete_assignment,
+    delete_mission,
+    delete_recurrence,
+    get_mission,
+    list_conflicts,
+    list_missions,
+    list_occurrences,
+    move_assignment,
+    set_occurrence_exception,
+    set_recurrence,
+    update_assignment,
+    update_mission,
+    update_person_planning,
+)
+from ..services.planning_week import get_week
+from ..services.recurrence import Occurrence
+from ..services.scenarios import (
+    add_assignment,
+    apply_scenario,
+    change_assignment,
+    change_mission,
+    create_scenario,
+    discard_scenario,
+    list_scenarios,
+    scenario_conflicts,
+    scenario_week,
+)
+from ..services.scoring import SlotProposal, propose_assignments
+from ..services.solver import Solution, get_solver_run, start_solver_run
+
+router = APIRouter(prefix="/planning", tags=["planning"])
+
+
+def _to_conflict_response(conflict: Conflict) -> ConflictResponse:
+    return ConflictResponse(
+        kind=conflict.kind,
+        resource_id=conflict.resource_id,
+        first_id=conflict.first_key,
+        second_id=conflict.second_key,
+        overlap_start=conflict.overlap_start,
+        overlap_end=conflict.overlap_end,
+    )
+
+
+def _to_slot_proposal_response(proposal: SlotProposal) -> SlotProposalResponse:
+    return SlotProposalResponse(
+        mission_id=proposal.slot.mission_id,
+        open_seats=proposal.slot.open_seats,
+        candidates=[
+            ProposalCandidate(
+                user_id=candidate.user_id,
+                score=candidate.score,
+                reasons=[
+                    ProposalReason(code=reason.code, contribution=reason.contribution)
+                    for reason in candidate.reasons
+                ],
+            )
+            for candidate in proposal.candidates
+        ],
+    )
+
+
+def _to_solver_run_response(job: Job) -> SolverRunResponse:
+    solution: Solution | None = job.result
+    return SolverRunResponse(
+        job_id=job.id,
+        status=job.status.value,
+        progress=job.progress,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        solution=None
+        if solution is None
+        else SolverSolutionResponse(
+            placements=[
+                SolverPlacement(mission_id=placement.mission_id, user_id=placement.user_id, score=placement.score)
+                for placement in solution.placements
+            ],
+            unfilled=[
+                SolverShortfall(mission_id=mission_id, open_seats=open_seats)
+                for mission_id, open_seats in solution.unfilled.items()
+            ],
+            total_score=solution.total_score,
+            rounds=solution.rounds,
+            complete=solution.complete,
+        ),
+    )
+
+
+def _to_assignment_response(assignment: Assignment, conflicts: list[Conflict]) -> AssignmentResponse:
+    response = AssignmentResponse.model_validate(assignment, from_attributes=True)
+    response.conflicts = [_to_conflict_response(conflict) for conflict in conflicts]
+    return response
+
+
+@router.post("/missions", response_model=ScheduledMissionResponse, status_code=status.HTTP_201_CREATED)
+def create_mission_endpoint(
+    payload: ScheduledMissionCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScheduledMissionResponse:
+    try:
+        mission = create_mission(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScheduledMissionResponse.model_validate(mission, from_attributes=True)
+
+
+@router.post(
+    "/missions/bulk",
+    response_model=ScheduledMissionBulkResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_missions_bulk_endpoint(
+    payload: ScheduledMissionBulkCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScheduledMissionBulkResponse:
+    try:
+        missions, conflicts = create_missions_bulk(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScheduledMissionBulkResponse(
+        created=len(missions),
+        missions=[ScheduledMissionResponse.model_validate(mission, from_attributes=True) for mission in missions],
+        conflicts=[_to_conflict_response(conflict) for conflict in conflicts],
+    )
+
+
+@router.get("/missions", response_model=list[ScheduledMissionResponse])
+def list_missions_endpoint(
+    window_start: datetime = Query(alias="start"),
+    window_end: datetime = Query(alias="end"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[ScheduledMissionResponse]:
+    try:
+        missions = list_missions(db, session_token, window_start, window_end)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [ScheduledMissionResponse.model_validate(mission, from_attributes=True) for mission in missions]
+
+
+@router.get("/missions/{mission_id}", response_model=ScheduledMissionResponse)
+def get_mission_endpoint(
+    mission_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScheduledMissionResponse:
+    try:
+        mission = get_mission(db, session_token, mission_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScheduledMissionResponse.model_validate(mission, from_attributes=True)
+
+
+@router.put("/missions/{mission_id}", response_model=ScheduledMissionResponse)
+def update_mission_endpoint(
+    mission_id: str,
+    payload: ScheduledMissionUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScheduledMissionResponse:
+    try:
+        mission = update_mission(db, session_token, mission_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScheduledMissionResponse.model_validate(mission, from_attributes=True)
+
+
+@router.delete("/missions/{mission_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_mission_endpoint(
+    mission_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> Response:
+    try:
+        delete_mission(db, session_token, mission_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _to_occurrence_response(occurrence: Occurrence, cancelled: bool = False) -> MissionOccurrenceResponse:
+    return MissionOccurrenceResponse(
+        mission_id=occurrence.mission_id,
+        original_start=occurrence.original_start,
+        starts_at=occurrence.starts_at,
+        ends_at=occurrence.ends_at,
+        moved=occurrence.moved,
+        cancelled=cancelled,
+    )
+
+
+@router.put("/missions/{mission_id}/recurrence", response_model=MissionRecurrenceResponse)
+def set_recurrence_endpoint(
+    mission_id: str,
+    payload: MissionRecurrenceSet,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> MissionRecurrenceResponse:
+    try:
+        recurrence = set_recurrence(db, session_token, mission_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return MissionRecurrenceResponse.model_validate(recurrence, from_attributes=True)
+
+
+@router.delete("/missions/{mission_id}/recurrence", status_code=status.HTTP_204_NO_CONTENT)
+def delete_recurrence_endpoint(
+    mission_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> Response:
+    try:
+        delete_recurrence(db, session_token, mission_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/missions/{mission_id}/occurrences", response_model=list[MissionOccurrenceResponse])
+def list_occurrences_endpoint(
+    mission_id: str,
+    window_start: datetime = Query(alias="start"),
+    window_end: datetime = Query(alias="end"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[MissionOccurrenceResponse]:
+    try:
+        occurrences = list_occurrences(db, session_token, mission_id, window_start, window_end)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [_to_occurrence_response(occurrence) for occurrence in occurrences]
+
+
+@router.put("/missions/{mission_id}/occurrences", response_model=MissionOccurrenceResponse)
+def set_occurrence_exception_endpoint(
+    mission_id: str,
+    payload: OccurrenceExceptionSet,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> MissionOccurrenceResponse:
+    try:
+        occurrence, cancelled = set_occurrence_exception(db, session_token, mission_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_occurrence_response(occurrence, cancelled)
+
+
+@router.post(
+    "/missions/{mission_id}/assignments",
+    response_model=AssignmentResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_assignment_endpoint(
+    mission_id: str,
+    payload: AssignmentCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    notifier: NotificationDispatcher = Depends(get_notifier),
+) -> AssignmentResponse:
+    try:
+        assignment, conflicts = create_assignment(db, session_token, mission_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    notifier.wake()
+    return _to_assignment_response(assignment, conflicts)
+
+
+@router.put("/assignments/{assignment_id}", response_model=AssignmentResponse)
+def update_assignment_endpoint(
+    assignment_id: str,
+    payload: AssignmentUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    notifier: NotificationDispatcher = Depends(get_notifier),
+) -> AssignmentResponse:
+    try:
+        assignment, conflicts = update_assignment(db, session_token, assignment_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    notifier.wake()
+    return _to_assignment_response(assignment, conflicts)
+
+
+@router.post("/assignments/{assignment_id}/move", response_model=ConflictDeltaResponse)
+def move_assignment_endpoint(
+    assignment_id: str,
+    payload: AssignmentMove,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    notifier: NotificationDispatcher = Depends(get_notifier),
+) -> ConflictDeltaResponse:
+    try:
+        assignment, delta = move_assignment(db, session_token, assignment_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    notifier.wake()
+    return ConflictDeltaResponse(
+        assignment=_to_assignment_response(assignment, delta.current),
+        added=[_to_conflict_response(conflict) for conflict in delta.added],
+        resolved=[_to_conflict_response(conflict) for conflict in delta.resolved],
+    )
+
+
+@router.delete("/assignments/{assignment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_assignment_endpoint(
+    assignment_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> Response:
+    try:
+        delete_assignment(db, session_token, assignment_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/conflicts", response_model=ConflictReportResponse)
+def list_conflicts_endpoint(
+    week_start: date = Query(alias="weekStart"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ConflictReportResponse:
+    try:
+        window_start, window_end, conflicts = list_conflicts(db, session_token, week_start)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ConflictReportResponse(
+        window_start=window_start,
+        window_end=window_end,
+        conflicts=[_to_conflict_response(conflict) for conflict in conflicts],
+    )
+
+
+@router.get("/week", response_model=PlanningWeekResponse)
+def get_week_endpoint(
+    week_start: date = Query(alias="weekStart"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PlanningWeekResponse:
+    try:
+        monday, rows = get_week(db, session_token, week_start)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PlanningWeekResponse(
+        week_start=monday,
+        rows=[PlanningWeekRowResponse.model_validate(row, from_attributes=True) for row in rows],
+    )
+
+
+@router.put("/people/{user_id}", response_model=PersonPlanningResponse)
+def update_person_planning_endpoint(
+    user_id: str,
+    payload: PersonPlanningUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PersonPlanningResponse:
+    try:
+        membership = update_person_planning(db, session_token, user_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PersonPlanningResponse.model_validate(membership, from_attributes=True)
+
+
+@router.get("/proposals", response_model=ProposalReportResponse)
+def propose_assignments_endpoint(
+    week_start: date = Query(alias="weekStart"),
+    limit: int = Query(default=5, ge=1, le=50),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ProposalReportResponse:
+    try:
+        monday, proposals = propose_assignments(db, session_token, week_start, limit=limit)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ProposalReportResponse(
+        week_start=monday,
+        slots=[_to_slot_proposal_response(proposal) for proposal in proposals],
+    )
+
+
+@router.post("/solver/runs", response_model=SolverRunResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_solver_run_endpoint(
+    payload: SolverRunCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> SolverRunResponse:
+    try:
+        job = start_solver_run(db, session_token, payload.week_start, payload.time_budget_seconds)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_solver_run_response(job)
+
+
+@router.get("/solver/runs/{job_id}", response_model=SolverRunResponse)
+def get_solver_run_endpoint(
+    job_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> SolverRunResponse:
+    try:
+        job = get_solver_run(db, session_token, job_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_solver_run_response(job)
+
+
+def _to_scenario_response(scenario: PlanningScenario) -> ScenarioResponse:
+    return ScenarioResponse(
+        id=scenario.id,
+        name=scenario.name,
+        status=scenario.status,
+        change_count=len(scenario.changes),
+        created_at=scenario.created_at,
+        applied_at=scenario.applied_at,
+    )
+
+
+@router.post("/scenarios", response_model=ScenarioResponse, status_code=status.HTTP_201_CREATED)
+def create_scenario_endpoint(
+    payload: ScenarioCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScenarioResponse:
+    try:
+        scenario = create_scenario(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_scenario_response(scenario)
+
+
+@router.get("/scenarios", response_model=list[ScenarioResponse])
+def list_scenarios_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[ScenarioResponse]:
+    try:
+        scenarios = list_scenarios(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [_to_scenario_response(scenario) for scenario in scenarios]
+
+
+@router.delete("/scenarios/{scenario_id}", status_code=status.HTTP_204_NO_CONTENT)
+def discard_scenario_endpoint(
+    scenario_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> Response:
+    try:
+        discard_scenario(db, session_token, scenario_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.put("/scenarios/{scenario_id}/missions/{mission_id}", response_model=ScenarioChangeResponse)
+def change_scenario_mission_endpoint(
+    scenario_id: str,
+    mission_id: str,
+    payload: ScenarioMissionChange,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScenarioChangeResponse:
+    try:
+        change = change_mission(db, session_token, scenario_id, mission_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScenarioChangeResponse.model_validate(change, from_attributes=True)
+
+
+@router.put("/scenarios/{scenario_id}/assignments/{assignment_id}", response_model=ScenarioChangeResponse)
+def change_scenario_assignment_endpoint(
+    scenario_id: str,
+    assignment_id: str,
+    payload: ScenarioAssignmentChange,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScenarioChangeResponse:
+    try:
+        change = change_assignment(db, session_token, scenario_id, assignment_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScenarioChangeResponse.model_validate(change, from_attributes=True)
+
+
+@router.post(
+    "/scenarios/{scenario_id}/assignments",
+    response_model=ScenarioChangeResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def add_scenario_assignment_endpoint(
+    scenario_id: str,
+    payload: ScenarioAssignmentCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScenarioChangeResponse:
+    try:
+        change = add_assignment(db, session_token, scenario_id, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ScenarioChangeResponse.model_validate(change, from_attributes=True)
+
+
+@router.get("/scenarios/{scenario_id}/conflicts", response_model=ConflictReportResponse)
+def scenario_conflicts_endpoint(
+    scenario_id: str,
+    week_start: date = Query(alias="weekStart"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ConflictReportResponse:
+    try:
+        window_start, window_end, conflicts = scenario_conflicts(db, session_token, scenario_id, week_start)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return ConflictReportResponse(
+        window_start=window_start,
+        window_end=window_end,
+        conflicts=[_to_conflict_response(conflict) for conflict in conflicts],
+    )
+
+
+@router.get("/scenarios/{scenario_id}/week", response_model=PlanningWeekResponse)
+def scenario_week_endpoint(
+    scenario_id: str,
+    week_start: date = Query(alias="weekStart"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PlanningWeekResponse:
+    try:
+        monday, rows = scenario_week(db, session_token, scenario_id, week_start)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PlanningWeekResponse(
+        week_start=monday,
+        rows=[PlanningWeekRowResponse.model_validate(row, from_attributes=True) for row in rows],
+    )
+
+
+@router.post("/scenarios/{scenario_id}/apply", response_model=ScenarioResponse)
+def apply_scenario_endpoint(
+    scenario_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ScenarioResponse:
+    try:
+        scenario = apply_scenario(db, session_token, scenario_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_scenario_response(scenario)
+
+
+@router.post("/undo", response_model=PlanningOperationResponse)
+def undo_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PlanningOperationResponse:
+    try:
+        operation = undo(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PlanningOperationResponse.model_validate(operation, from_attributes=True)
+
+
+@router.post("/redo", response_model=PlanningOperationResponse)
+def redo_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PlanningOperationResponse:
+    try:
+        operation = redo(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PlanningOperationResponse.model_validate(operation, from_attributes=True)
+
+
+@router.get("/log", response_model=list[PlanningOperationResponse])
+def list_operations_endpoint(
+    after: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[PlanningOperationResponse]:
+    try:
+        operations = list_operations(db, session_token, after, limit)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [PlanningOperationResponse.model_validate(operation, from_attributes=True) for operation in operations]
+
+
+@router.get("/log/cursors/{consumer}", response_model=PlanningLogCursorResponse)
+def get_cursor_endpoint(
+    consumer: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PlanningLogCursorResponse:
+    try:
+        cursor = get_cursor(db, session_token, consumer)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PlanningLogCursorResponse.model_validate(cursor, from_attributes=True)
+
+
+@router.put("/log/cursors/{consumer}", response_model=PlanningLogCursorResponse)
+def set_cursor_endpoint(
+    consumer: str,
+    payload: PlanningLogCursorUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> PlanningLogCursorResponse:
+    try:
+        cursor = set_cursor(db, session_token, consumer, payload.sequence)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PlanningLogCursorResponse.model_validate(cursor, from_attributes=True)
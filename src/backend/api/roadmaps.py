@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..dependencies import get_session, get_session_factory, get_settings
+from ..models import Roadmap
+from ..schemas import RoadmapRequest, RoadmapResponse
+from ..services.exceptions import DomainError
+from ..services.roadmaps import READY, get_roadmap, list_roadmaps, open_roadmap, request_roadmap
+
+router = APIRouter(prefix="/roadmaps", tags=["roadmaps"])
+
+
+def _to_roadmap_response(request: Request, roadmap: Roadmap, job_id: str | None = None) -> RoadmapResponse:
+    response = RoadmapResponse.model_validate(roadmap, from_attributes=True)
+    response.job_id = job_id
+    if roadmap.status == READY:
+        response.download_url = str(request.url_for("download_roadmap_endpoint", roadmap_id=roadmap.id))
+    return response
+
+
+@router.post("/", response_model=RoadmapResponse, status_code=status.HTTP_202_ACCEPTED)
+def request_roadmap_endpoint(
+    payload: RoadmapRequest,
+    request: Request,
+    response: Response,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+) -> RoadmapResponse:
+    try:
+        roadmap, job = request_roadmap(
+            db, session_token, settings.document_dir, session_factory, payload.scope, payload.scope_id, payload.day
+        )
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    if job is None:
+        response.status_code = status.HTTP_200_OK
+    return _to_roadmap_response(request, roadmap, job.id if job is not None else None)
+
+
+@router.get("/", response_model=list[RoadmapResponse])
+def list_roadmaps_endpoint(
+    request: Request,
+    scope: Literal["day", "venue", "project"] = Query(),
+    day: date = Query(),
+    scope_id: str | None = Query(default=None, alias="scopeId"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[RoadmapResponse]:
+    try:
+        roadmaps = list_roadmaps(db, session_token, scope, scope_id, day)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [_to_roadmap_response(request, roadmap) for roadmap in roadmaps]
+
+
+@router.get("/{roadmap_id}", response_model=RoadmapResponse)
+def get_roadmap_endpoint(
+    roadmap_id: str,
+    request: Request,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> RoadmapResponse:
+    try:
+        roadmap = get_roadmap(db, session_token, roadmap_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_roadmap_response(request, roadmap)
+
+
+@router.get("/{roadmap_id}/pdf")
+def download_roadmap_endpoint(
+    roadmap_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        roadmap, chunks = open_roadmap(db, session_token, settings.document_dir, roadmap_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    filename = f"feuille-de-route-{roadmap.day:%Y-%m-%d}-{roadmap.scope}-v{roadmap.version}.pdf"
+    return StreamingResponse(
+        chunks,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "ETag": f'"{roadmap.content_hash}"'},
+    )
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..dependencies import get_punch_buffer, get_session, get_session_factory
+from ..schemas import (
+    PunchAcceptedResponse,
+    PunchCreate,
+    ReconciliationRunResponse,
+    TimePunchResponse,
+    TimesheetResponse,
+)
+from ..services.exceptions import DomainError
+from ..services.jobs import Job
+from ..services.timeclock import (
+    PunchBuffer,
+    get_reconciliation,
+    ingest_punches,
+    list_late,
+    list_punches,
+    start_reconciliation,
+)
+
+router = APIRouter(prefix="/timeclock", tags=["timeclock"])
+
+
+def _to_reconciliation_response(job: Job) -> ReconciliationRunResponse:
+    return ReconciliationRunResponse(
+        job_id=job.id,
+        status=job.status.value,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        totals=job.result,
+    )
+
+
+@router.post("/punches", response_model=PunchAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+def punch_endpoint(
+    payload: PunchCreate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    buffer: PunchBuffer = Depends(get_punch_buffer),
+) -> PunchAcceptedResponse:
+    try:
+        accepted = ingest_punches(db, session_token, buffer, [payload])
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PunchAcceptedResponse(accepted=accepted)
+
+
+@router.post("/punches/batch", response_model=PunchAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+def punch_batch_endpoint(
+    payload: list[PunchCreate],
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    buffer: PunchBuffer = Depends(get_punch_buffer),
+) -> PunchAcceptedResponse:
+    try:
+        accepted = ingest_punches(db, session_token, buffer, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return PunchAcceptedResponse(accepted=accepted)
+
+
+@router.get("/punches", response_model=list[TimePunchResponse])
+def list_punches_endpoint(
+    start: datetime = Query(),
+    end: datetime = Query(),
+    user_id: str | None = Query(default=None, alias="userId"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    buffer: PunchBuffer = Depends(get_punch_buffer),
+) -> list[TimePunchResponse]:
+    try:
+        punches = list_punches(db, session_token, buffer, start, end, user_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [TimePunchResponse.model_validate(punch, from_attributes=True) for punch in punches]
+
+
+@router.post("/reconcile", response_model=ReconciliationRunResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_reconciliation_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    buffer: PunchBuffer = Depends(get_punch_buffer),
+    session_factory: sessionmaker[Session] = Depends(get_session_factory),
+) -> ReconciliationRunResponse:
+    try:
+        job = start_reconciliation(db, session_token, buffer, session_factory)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_reconciliation_response(job)
+
+
+@router.get("/reconcile/{job_id}", response_model=ReconciliationRunResponse)
+def get_reconciliation_endpoint(
+    job_id: str,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> ReconciliationRunResponse:
+    try:
+        job = get_reconciliation(db, session_token, job_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return _to_reconciliation_response(job)
+
+
+@router.get("/late", response_model=list[TimesheetResponse])
+def list_late_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+    buffer: PunchBuffer = Depends(get_punch_buffer),
+) -> list[TimesheetResponse]:
+    try:
+        timesheets = list_late(db, session_token, buffer)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [TimesheetResponse.model_validate(timesheet, from_attributes=True) for timesheet in timesheets]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..dependencies import get_session
+from ..schemas import (
+    TimesheetGenerate,
+    TimesheetPolicyResponse,
+    TimesheetPolicyUpdate,
+    TimesheetResponse,
+    TimesheetRunResponse,
+    TimesheetValidate,
+)
+from ..services.exceptions import DomainError
+from ..services.timesheets import (
+    generate_timesheets,
+    get_policy,
+    list_timesheets,
+    update_policy,
+    validate_timesheets,
+)
+
+router = APIRouter(prefix="/timesheets", tags=["timesheets"])
+
+
+@router.get("/policy", response_model=TimesheetPolicyResponse)
+def get_timesheet_policy_endpoint(
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> TimesheetPolicyResponse:
+    try:
+        policy = get_policy(db, session_token)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return TimesheetPolicyResponse.model_validate(policy, from_attributes=True)
+
+
+@router.put("/policy", response_model=TimesheetPolicyResponse)
+def update_timesheet_policy_endpoint(
+    payload: TimesheetPolicyUpdate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> TimesheetPolicyResponse:
+    try:
+        policy = update_policy(db, session_token, payload)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return TimesheetPolicyResponse.model_validate(policy, from_attributes=True)
+
+
+@router.post("/generate", response_model=TimesheetRunResponse)
+def generate_timesheets_endpoint(
+    payload: TimesheetGenerate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> TimesheetRunResponse:
+    try:
+        run = generate_timesheets(db, session_token, payload.period_start, payload.period_end, full=payload.full)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return TimesheetRunResponse.model_validate(run, from_attributes=True)
+
+
+@router.get("/", response_model=list[TimesheetResponse])
+def list_timesheets_endpoint(
+    start: date = Query(),
+    end: date = Query(),
+    user_id: str | None = Query(default=None, alias="userId"),
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[TimesheetResponse]:
+    try:
+        timesheets = list_timesheets(db, session_token, start, end, user_id)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [TimesheetResponse.model_validate(timesheet, from_attributes=True) for timesheet in timesheets]
+
+
+@router.post("/validate", response_model=list[TimesheetResponse])
+def validate_timesheets_endpoint(
+    payload: TimesheetValidate,
+    session_token: str = Header(alias="X-Session-Token"),
+    db: Session = Depends(get_session),
+) -> list[TimesheetResponse]:
+    try:
+        timesheets = validate_timesheets(db, session_token, payload.timesheet_ids, payload.justification)
+    except DomainError as error:
+        raise HTTPException(status_code=error.status_code, detail=error.message) from error
+    return [TimesheetResponse.model_validate(timesheet, from_attributes=True) for timesheet in timesheets]
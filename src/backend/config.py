@@ -21,7 +21,28 @@ class Settings(BaseSettings):
     access_token_ttl_seconds: int = Field(default=3600, ge=60)
     magic_link_ttl_seconds: int = Field(default=900, ge=60)
     invitation_ttl_seconds: int = Field(default=3 * 24 * 3600, ge=3600)
+    ics_feed_ttl_days: int = Field(default=365, ge=1, description="Lifetime of a calendar subscription link.")
+    document_dir: str = Field(
+        default="./var/documents",
+        description="Directory where generated document archives are stored.",
+    )
+    document_ttl_hours: int = Field(default=7 * 24, ge=1, description="How long a document archive stays downloadable.")
     environment: Literal["dev", "test", "prod"] = Field(default="dev")
+    public_base_url: str = Field(
+        default="http://localhost:8000",
+        description="Base URL used for links sent in notifications.",
+    )
+    smtp_host: str | None = Field(default=None, description="SMTP relay for email; email stays queued when unset.")
+    smtp_port: int = Field(default=25, ge=1, le=65535)
+    smtp_sender: str = Field(default="planning@jmd.local")
+    sms_api_url: str | None = Field(default=None, description="HTTP endpoint of the SMS provider.")
+    telegram_api_url: str | None = Field(default=None, description="HTTP endpoint of the Telegram bot gateway.")
+    notification_workers: int = Field(default=2, ge=1, le=16)
+    notification_batch_size: int = Field(default=50, ge=1, le=500)
+    notification_max_attempts: int = Field(default=6, ge=1)
+    notification_backoff_seconds: float = Field(default=2.0, gt=0)
+    notification_poll_seconds: float = Field(default=1.0, gt=0)
+    scheduler_tick_seconds: float = Field(default=1.0, gt=0)
 
     model_config = {
         "env_prefix": "BACKEND_",
@@ -22,18 +22,26 @@ def _sqlite_connect_args(url: str) -> dict[str, Any]:
     return {}
 
 
+def shares_connection(settings: Settings) -> bool:
+    """Whether every session uses the same connection, as with in-memory SQLite."""
+
+    return settings.database_url.startswith("sqlite") and ":memory:" in settings.database_url
+
+
 def build_engine(settings: Settings) -> Engine:
     """Create a SQLAlchemy engine based on the provided settings."""
 
     connect_args = _sqlite_connect_args(settings.database_url)
-    if settings.database_url.startswith("sqlite"):
+    if shares_connection(settings):
+        # One shared connection keeps an in-memory database alive; a file database pools per thread
+        # so the notification workers never share a transaction with a request.
         return create_engine(
             settings.database_url,
             connect_args=connect_args,
             poolclass=StaticPool,
             future=True,
         )
-    return create_engine(settings.database_url, future=True)
+    return create_engine(settings.database_url, connect_args=connect_args, future=True)
 
 
 def build_session_factory(engine: Engine) -> sessionmaker[Session]:
@@ -6,6 +6,8 @@ from fastapi import Request
 from sqlalchemy.orm import Session, sessionmaker
 
 from .config import Settings
+from .services.notifications import NotificationDispatcher
+from .services.timeclock import PunchBuffer
 
 
 def get_settings(request: Request) -> Settings:
@@ -19,3 +21,15 @@ def get_session(request: Request) -> Generator[Session, None, None]:
         yield session
     finally:
         session.close()
+
+
+def get_session_factory(request: Request) -> sessionmaker[Session]:
+    return request.app.state.session_factory  # type: ignore[attr-defined]
+
+
+def get_punch_buffer(request: Request) -> PunchBuffer:
+    return request.app.state.punch_buffer  # type: ignore[attr-defined]
+
+
+def get_notifier(request: Request) -> NotificationDispatcher:
+    return request.app.state.notifier  # type: ignore[attr-defined]
@@ -4,15 +4,32 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from .api.accounting import router as accounting_router
 from .api.auth import router as auth_router
+from .api.availability import router as availability_router
+from .api.documents import router as documents_router
+from .api.equipment import router as equipment_router
+from .api.ics import router as ics_router
+from .api.logistics import router as logistics_router
 from .api.mission_tags import router as mission_tags_router
 from .api.mission_templates import router as mission_templates_router
+from .api.notifications import router as notifications_router
+from .api.payroll import router as payroll_router
+from .api.planning import router as planning_router
 from .api.projects import router as projects_router
+from .api.roadmaps import router as roadmaps_router
+from .api.timeclock import router as timeclock_router
+from .api.timesheets import router as timesheets_router
 from .api.venues import router as venues_router
 from .config import Settings, get_settings
-from .db import Base, build_engine, build_session_factory
+from .db import Base, build_engine, build_session_factory, session_scope, shares_connection
 from .dependencies import get_settings as request_settings  # noqa: F401
 from .schemas import HealthResponse
+from .services.documents import purge_expired_archives
+from .services.notifications import NotificationDispatcher
+from .services.payroll_close import resume_payroll_closes
+from .services.scheduler import TriggerScheduler
+from .services.timeclock import PunchBuffer, flush_punches
 
 
 def create_app(settings: Settings | None = None) -> FastAPI:
@@ -20,18 +37,38 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     engine = build_engine(runtime_settings)
     Base.metadata.create_all(bind=engine)
     session_factory = build_session_factory(engine)
+    punch_buffer = PunchBuffer()
+    notifier = NotificationDispatcher(session_factory, runtime_settings)
+    scheduler = TriggerScheduler(session_factory, runtime_settings, notifier, punch_buffer)
+    # Background workers need connections of their own; a shared in-memory connection would mix transactions.
+    background = not shares_connection(runtime_settings)
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):  # pragma: no cover - simple resource management
+        resume_payroll_closes(session_factory)
+        with session_scope(session_factory) as session:
+            purge_expired_archives(session, runtime_settings.document_dir)
+        if background:
+            punch_buffer.start(session_factory)
+            notifier.start()
+            scheduler.start()
         try:
             yield
         finally:
+            scheduler.stop()
+            notifier.stop()
+            punch_buffer.stop()
+            with session_scope(session_factory) as session:
+                flush_punches(session, punch_buffer)
             engine.dispose()
 
     app = FastAPI(title="JMD Backend", version="0.1.0", lifespan=lifespan)
     app.state.settings = runtime_settings
     app.state.engine = engine
     app.state.session_factory = session_factory
+    app.state.punch_buffer = punch_buffer
+    app.state.notifier = notifier
+    app.state.scheduler = scheduler
 
     @app.get("/api/v1/health", response_model=HealthResponse, tags=["health"])
     def health_check() -> HealthResponse:  # pragma: no cover - trivial
@@ -42,6 +79,18 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     app.include_router(projects_router, prefix="/api/v1")
     app.include_router(mission_tags_router, prefix="/api/v1")
     app.include_router(mission_templates_router, prefix="/api/v1")
+    app.include_router(planning_router, prefix="/api/v1")
+    app.include_router(availability_router, prefix="/api/v1")
+    app.include_router(ics_router, prefix="/api/v1")
+    app.include_router(timesheets_router, prefix="/api/v1")
+    app.include_router(timeclock_router, prefix="/api/v1")
+    app.include_router(payroll_router, prefix="/api/v1")
+    app.include_router(documents_router, prefix="/api/v1")
+    app.include_router(roadmaps_router, prefix="/api/v1")
+    app.include_router(accounting_router, prefix="/api/v1")
+    app.include_router(equipment_router, prefix="/api/v1")
+    app.include_router(logistics_router, prefix="/api/v1")
+    app.include_router(notifications_router, prefix="/api/v1")
 
     return app
 
@@ -4,13 +4,17 @@ import uuid
 from datetime import date, datetime, time
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     JSON,
+    LargeBinary,
     String,
     Table,
     Text,
@@ -31,6 +35,8 @@ class Organization(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String(120), nullable=False)
     slug: Mapped[str] = mapped_column(String(120), nullable=False, unique=True)
+    # IANA zone of the wall-clock rules: night work, weekends and holidays, the D-1 reminder hour.
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False, default="UTC")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
 
     members: Mapped[list["UserOrganization"]] = relationship(
@@ -47,6 +53,8 @@ class User(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String(128), nullable=False)
+    phone: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    telegram_chat_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
 
@@ -71,6 +79,8 @@ class UserOrganization(Base):
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
     role: Mapped[Role] = mapped_column(Enum(Role), nullable=False, default=Role.MEMBER)
+    skills: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    max_weekly_hours: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
 
     user: Mapped[User] = relationship("User", back_populates="memberships")
@@ -151,6 +161,19 @@ mission_template_tags = Table(
 )
 
 
+scheduled_mission_tags = Table(
+    "scheduled_mission_tags",
+    Base.metadata,
+    Column(
+        "scheduled_mission_id",
+        ForeignKey("scheduled_missions.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("mission_tag_id", ForeignKey("mission_tags.id", ondelete="CASCADE"), primary_key=True),
+    UniqueConstraint("scheduled_mission_id", "mission_tag_id", name="uq_scheduled_mission_tag"),
+)
+
+
 class Venue(Base):
     __tablename__ = "venues"
     __table_args__ = (
@@ -166,6 +189,8 @@ class Venue(Base):
     postal_code: Mapped[str | None] = mapped_column(String(20), nullable=True)
     capacity: Mapped[int | None] = mapped_column(Integer, nullable=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=now_utc, onupdate=now_utc
@@ -182,6 +207,21 @@ class Venue(Base):
     )
 
 
+class VenueTravelMatrix(Base):
+    """Travel minutes between an organisation's venues, packed as uint16 row-major bytes."""
+
+    __tablename__ = "venue_travel_matrices"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    venue_ids: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    minutes: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, default=b"")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
 class Project(Base):
     __tablename__ = "projects"
     __table_args__ = (
@@ -257,3 +297,934 @@ class MissionTemplate(Base):
     tags: Mapped[list[MissionTag]] = relationship(
         "MissionTag", secondary=mission_template_tags, back_populates="templates"
     )
+
+
+class ScheduledMission(Base):
+    __tablename__ = "scheduled_missions"
+    __table_args__ = (
+        Index("ix_scheduled_missions_org_start", "organization_id", "starts_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    template_id: Mapped[str] = mapped_column(ForeignKey("mission_templates.id", ondelete="CASCADE"))
+    project_id: Mapped[str | None] = mapped_column(
+        ForeignKey("projects.id", ondelete="SET NULL"), nullable=True
+    )
+    venue_id: Mapped[str | None] = mapped_column(
+        ForeignKey("venues.id", ondelete="SET NULL"), nullable=True
+    )
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    team_size: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+    organization: Mapped[Organization] = relationship("Organization")
+    template: Mapped[MissionTemplate] = relationship("MissionTemplate")
+    project: Mapped[Project | None] = relationship("Project")
+    venue: Mapped[Venue | None] = relationship("Venue")
+    tags: Mapped[list[MissionTag]] = relationship("MissionTag", secondary=scheduled_mission_tags)
+    assignments: Mapped[list["Assignment"]] = relationship(
+        "Assignment", back_populates="mission", cascade="all, delete-orphan"
+    )
+    recurrence: Mapped["MissionRecurrence | None"] = relationship(
+        "MissionRecurrence", back_populates="mission", cascade="all, delete-orphan", uselist=False
+    )
+
+
+class MissionRecurrence(Base):
+    """RRULE-like repetition of a scheduled mission; occurrences are expanded on read, never stored."""
+
+    __tablename__ = "mission_recurrences"
+    __table_args__ = (
+        Index("ix_mission_recurrences_org", "organization_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    mission_id: Mapped[str] = mapped_column(
+        ForeignKey("scheduled_missions.id", ondelete="CASCADE"), unique=True
+    )
+    frequency: Mapped[str] = mapped_column(String(10), nullable=False)
+    interval: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    weekdays: Mapped[list[int]] = mapped_column(JSON, nullable=False, default=list)
+    count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+    mission: Mapped[ScheduledMission] = relationship("ScheduledMission", back_populates="recurrence")
+    exceptions: Mapped[list["MissionOccurrenceException"]] = relationship(
+        "MissionOccurrenceException", back_populates="recurrence", cascade="all, delete-orphan"
+    )
+
+
+class MissionOccurrenceException(Base):
+    """A single occurrence of a recurring mission that was cancelled or moved."""
+
+    __tablename__ = "mission_occurrence_exceptions"
+    __table_args__ = (
+        UniqueConstraint("recurrence_id", "original_start", name="uq_occurrence_exception_start"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    recurrence_id: Mapped[str] = mapped_column(ForeignKey("mission_recurrences.id", ondelete="CASCADE"))
+    original_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    cancelled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    starts_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    ends_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+    recurrence: Mapped[MissionRecurrence] = relationship("MissionRecurrence", back_populates="exceptions")
+
+
+class Assignment(Base):
+    __tablename__ = "assignments"
+    __table_args__ = (
+        UniqueConstraint("mission_id", "user_id", name="uq_assignment_mission_user"),
+        Index("ix_assignments_org_user_start", "organization_id", "user_id", "starts_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    mission_id: Mapped[str] = mapped_column(ForeignKey("scheduled_missions.id", ondelete="CASCADE"))
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+    mission: Mapped[ScheduledMission] = relationship("ScheduledMission", back_populates="assignments")
+    user: Mapped[User] = relationship("User")
+
+
+class PlanningScenario(Base):
+    """What-if branch of an organisation's planning, stored as a delta over the live data."""
+
+    __tablename__ = "planning_scenarios"
+    __table_args__ = (
+        Index("ix_planning_scenarios_org", "organization_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="open")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    applied_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    changes: Mapped[list["ScenarioChange"]] = relationship(
+        "ScenarioChange", back_populates="scenario", cascade="all, delete-orphan"
+    )
+
+
+class ScenarioChange(Base):
+    """Full overridden state of one mission or assignment inside a scenario (or its deletion)."""
+
+    __tablename__ = "scenario_changes"
+    __table_args__ = (
+        UniqueConstraint("scenario_id", "entity", "entity_id", name="uq_scenario_change_entity"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    scenario_id: Mapped[str] = mapped_column(ForeignKey("planning_scenarios.id", ondelete="CASCADE"))
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    mission_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    user_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    venue_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    starts_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    ends_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Live state of the row when the scenario first touched it (None: it did not exist).
+    base: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+    scenario: Mapped[PlanningScenario] = relationship("PlanningScenario", back_populates="changes")
+
+
+class PlanningLogHead(Base):
+    """Per-organisation head of the planning operation log."""
+
+    __tablename__ = "planning_log_heads"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    snapshot_sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class PlanningOperation(Base):
+    """One append-only planning log entry: row states before and after the write."""
+
+    __tablename__ = "planning_operations"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "sequence", name="uq_planning_operation_sequence"),
+        Index("ix_planning_operations_org_state_sequence", "organization_id", "state", "sequence"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False)
+    kind: Mapped[str] = mapped_column(String(40), nullable=False)
+    state: Mapped[str] = mapped_column(String(20), nullable=False, default="active")
+    target_sequence: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    actor_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    changes: Mapped[list[dict]] = mapped_column(JSON, nullable=False, default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+
+class PlanningLogSnapshot(Base):
+    """Full planning state of an organisation at a log sequence, the base for replays."""
+
+    __tablename__ = "planning_log_snapshots"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    sequence: Mapped[int] = mapped_column(Integer, primary_key=True)
+    state: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+
+class PlanningLogCursor(Base):
+    """Last log sequence a named incremental consumer has processed."""
+
+    __tablename__ = "planning_log_cursors"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    consumer: Mapped[str] = mapped_column(String(60), primary_key=True)
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class PlanningWeekRow(Base):
+    """Denormalised read model: one compact row per scheduled mission and week it touches."""
+
+    __tablename__ = "planning_week_rows"
+    __table_args__ = (
+        Index("ix_planning_week_rows_org_week", "organization_id", "week_start"),
+    )
+
+    week_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    mission_id: Mapped[str] = mapped_column(
+        ForeignKey("scheduled_missions.id", ondelete="CASCADE"), primary_key=True
+    )
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    team_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    template_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    template_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    venue_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    venue_name: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    project_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    project_name: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    tags: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    crew: Mapped[list[dict]] = mapped_column(JSON, nullable=False, default=list)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+    # Set on transient rows expanded from a recurring mission, never persisted.
+    occurrence_start = None
+
+
+class AvailabilityDay(Base):
+    """One person's availability for one UTC day as a packed 96-slot (15 min) bitmap."""
+
+    __tablename__ = "availability_days"
+    __table_args__ = (
+        Index("ix_availability_days_org_day", "organization_id", "day"),
+    )
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    slots: Mapped[bytes] = mapped_column(LargeBinary(12), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class TimesheetPolicy(Base):
+    """Organisation rules applied when planned hours are derived from assignments."""
+
+    __tablename__ = "timesheet_policies"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    break_after_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=360)
+    break_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=20)
+    night_start: Mapped[time] = mapped_column(Time, nullable=False, default=time(22, 0))
+    night_end: Mapped[time] = mapped_column(Time, nullable=False, default=time(6, 0))
+    weekend_days: Mapped[list[int]] = mapped_column(JSON, nullable=False, default=lambda: [5, 6])
+    holidays: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class Timesheet(Base):
+    """Planned (and later actual) hours of one assignment occurrence.
+
+    ``entry_key`` is the assignment id, suffixed with the original start for
+    occurrences of recurring missions, so regeneration upserts in place.
+    """
+
+    __tablename__ = "timesheets"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "entry_key", name="uq_timesheet_org_entry"),
+        Index("ix_timesheets_org_planned_start", "organization_id", "planned_start"),
+        Index("ix_timesheets_org_user_day", "organization_id", "user_id", "work_date"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    entry_key: Mapped[str] = mapped_column(String(64), nullable=False)
+    assignment_id: Mapped[str | None] = mapped_column(
+        ForeignKey("assignments.id", ondelete="SET NULL"), nullable=True
+    )
+    mission_id: Mapped[str | None] = mapped_column(
+        ForeignKey("scheduled_missions.id", ondelete="SET NULL"), nullable=True
+    )
+    project_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    work_date: Mapped[date] = mapped_column(Date, nullable=False)
+    planned_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    planned_end: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    break_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    planned_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    night_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    weekend: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    holiday: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="planned")
+    actual_start: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    actual_end: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    late_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    late_detected_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    justification: Mapped[str | None] = mapped_column(Text, nullable=True)
+    validated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    generated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class TimesheetRun(Base):
+    """Progress of planned-hours generation for one period: the log sequence and policy it reflects."""
+
+    __tablename__ = "timesheet_runs"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "period_start", "period_end", name="uq_timesheet_run_period"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    period_end: Mapped[date] = mapped_column(Date, nullable=False)
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    policy_digest: Mapped[str] = mapped_column(String(64), nullable=False)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False, default="full")
+    generated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    removed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+
+class TimePunch(Base):
+    """Raw clock-in/clock-out event, appended in batches and reconciled onto timesheets later."""
+
+    __tablename__ = "time_punches"
+    __table_args__ = (
+        Index("ix_time_punches_org_pending", "organization_id", "reconciled_at"),
+        Index("ix_time_punches_org_user_time", "organization_id", "user_id", "punched_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    kind: Mapped[str] = mapped_column(String(3), nullable=False)
+    punched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    source: Mapped[str] = mapped_column(String(20), nullable=False, default="clock")
+    timesheet_id: Mapped[str | None] = mapped_column(
+        ForeignKey("timesheets.id", ondelete="SET NULL"), nullable=True
+    )
+    reconciled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class PayrollPolicy(Base):
+    """Organisation premium and allowance rules; percentages apply to the hourly rate."""
+
+    __tablename__ = "payroll_policies"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    night_premium_pct: Mapped[int] = mapped_column(Integer, nullable=False, default=25)
+    weekend_premium_pct: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    holiday_premium_pct: Mapped[int] = mapped_column(Integer, nullable=False, default=100)
+    overtime_after_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=35 * 60)
+    overtime_premium_pct: Mapped[int] = mapped_column(Integer, nullable=False, default=25)
+    overtime_high_after_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=43 * 60)
+    overtime_high_premium_pct: Mapped[int] = mapped_column(Integer, nullable=False, default=50)
+    meal_after_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=6 * 60)
+    meal_allowance_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    transport_allowance_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class PayRate(Base):
+    """Rate card of one person: hourly pay, or a flat cachet per timesheet."""
+
+    __tablename__ = "pay_rates"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(10), nullable=False, default="hourly")
+    hourly_rate_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cachet_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class Roadmap(Base):
+    """One stored version of a roadmap PDF; a version is only added when the content hash changes."""
+
+    __tablename__ = "roadmaps"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "scope", "scope_id", "day", "version", name="uq_roadmap_version"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    scope: Mapped[str] = mapped_column(String(10), nullable=False)
+    # Empty for the organisation-wide day scope so the unique constraint applies.
+    scope_id: Mapped[str] = mapped_column(String(36), nullable=False, default="")
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="pending")
+    size: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    requested_by: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    requested_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    generated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class DocumentBatch(Base):
+    """One generated document archive; progress lives here so every worker reports the same status."""
+
+    __tablename__ = "document_batches"
+    __table_args__ = (
+        Index("ix_document_batches_expiry", "status", "expires_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    kind: Mapped[str] = mapped_column(String(10), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="queued")
+    documents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class PayrollClose(Base):
+    """Monthly payroll close; ``checkpoint`` is the last person snapshotted, so a run can resume.
+
+    ``rules`` and ``timesheet_rules`` freeze the pay and hour rules at start;
+    ``claim`` marks the worker driving the run until its lease lapses.
+    """
+
+    __tablename__ = "payroll_closes"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "period_start", name="uq_payroll_close_period"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    period_end: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="running")
+    rules: Mapped[dict] = mapped_column(JSON, nullable=False)
+    timesheet_rules: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    checkpoint: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    claim: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    people_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    people_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lines: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    started_by: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    closed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class PayrollSnapshotPerson(Base):
+    """Frozen monthly pay of one person; ``columns`` holds the priced lines column by column."""
+
+    __tablename__ = "payroll_snapshot_people"
+
+    close_id: Mapped[str] = mapped_column(ForeignKey("payroll_closes.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), index=True)
+    cachet: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    lines: Mapped[int] = mapped_column(Integer, nullable=False)
+    minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    base: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    night_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    weekend_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    holiday_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    overtime_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    allowances: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    gross: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    columns: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+
+class PayrollSnapshotProject(Base):
+    """Frozen monthly totals of one project; an empty ``project_key`` gathers lines without project."""
+
+    __tablename__ = "payroll_snapshot_projects"
+
+    close_id: Mapped[str] = mapped_column(ForeignKey("payroll_closes.id", ondelete="CASCADE"), primary_key=True)
+    project_key: Mapped[str] = mapped_column(String(36), primary_key=True)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), index=True)
+    lines: Mapped[int] = mapped_column(Integer, nullable=False)
+    minutes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    base: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    night_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    weekend_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    holiday_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    overtime_premium: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    allowances: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    gross: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class AccountingChart(Base):
+    """Organisation chart of accounts for payroll exports: account number and label per posting."""
+
+    __tablename__ = "accounting_charts"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    journal_code: Mapped[str] = mapped_column(String(10), nullable=False, default="PAIE")
+    journal_label: Mapped[str] = mapped_column(String(100), nullable=False, default="Journal de paie")
+    accounts: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class AccountingExport(Base):
+    """Record of one produced export with the figures needed to reconcile it."""
+
+    __tablename__ = "accounting_exports"
+    __table_args__ = (
+        Index("ix_accounting_exports_org_year", "organization_id", "fiscal_year"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    format: Mapped[str] = mapped_column(String(10), nullable=False)
+    fiscal_year: Mapped[int] = mapped_column(Integer, nullable=False)
+    destination: Mapped[str] = mapped_column(String(10), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="running")
+    months: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    lines: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    debit_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    credit_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+equipment_kit_items = Table(
+    "equipment_kit_items",
+    Base.metadata,
+    Column("kit_id", ForeignKey("equipment_kits.id", ondelete="CASCADE"), primary_key=True),
+    Column("item_id", ForeignKey("equipment_items.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+class EquipmentItem(Base):
+    """One serialised piece of equipment of the organisation catalogue."""
+
+    __tablename__ = "equipment_items"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "serial_number", name="uq_equipment_item_serial"),
+        Index("ix_equipment_items_org_category", "organization_id", "category"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    category: Mapped[str | None] = mapped_column(String(80), nullable=True)
+    serial_number: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    condition: Mapped[str] = mapped_column(String(20), nullable=False, default="ok")
+    weight_kg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    volume_m3: Mapped[float | None] = mapped_column(Float, nullable=True)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class EquipmentKit(Base):
+    """Named set of items always reserved together, e.g. an HF kit."""
+
+    __tablename__ = "equipment_kits"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "name", name="uq_equipment_kit_org_name"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+    items: Mapped[list[EquipmentItem]] = relationship(
+        "EquipmentItem", secondary=equipment_kit_items, order_by="EquipmentItem.name"
+    )
+
+
+class EquipmentReservation(Base):
+    """Items booked together for a span, for a mission and/or a venue."""
+
+    __tablename__ = "equipment_reservations"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    kit_id: Mapped[str | None] = mapped_column(ForeignKey("equipment_kits.id", ondelete="SET NULL"), nullable=True)
+    mission_id: Mapped[str | None] = mapped_column(
+        ForeignKey("scheduled_missions.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    venue_id: Mapped[str | None] = mapped_column(ForeignKey("venues.id", ondelete="SET NULL"), nullable=True)
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+    items: Mapped[list["EquipmentReservationItem"]] = relationship(
+        "EquipmentReservationItem", cascade="all, delete-orphan"
+    )
+
+
+class EquipmentReservationItem(Base):
+    """One item of a reservation; the span is repeated so per-item overlap probes use one index."""
+
+    __tablename__ = "equipment_reservation_items"
+    __table_args__ = (
+        Index("ix_equipment_reservation_items_item_span", "item_id", "starts_at", "ends_at"),
+        Index("ix_equipment_reservation_items_org_end", "organization_id", "ends_at"),
+    )
+
+    reservation_id: Mapped[str] = mapped_column(
+        ForeignKey("equipment_reservations.id", ondelete="CASCADE"), primary_key=True
+    )
+    item_id: Mapped[str] = mapped_column(ForeignKey("equipment_items.id", ondelete="CASCADE"), primary_key=True)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class EquipmentCalendarHead(Base):
+    """Per-organisation revision of equipment reservations, locked by every booking write."""
+
+    __tablename__ = "equipment_calendar_heads"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class EquipmentMovement(Base):
+    """Append-only ledger entry: one check-out, return or incident of an item.
+
+    Each entry carries the item's running balance after it, so the state at
+    any date is the last entry at or before that date.
+    """
+
+    __tablename__ = "equipment_movements"
+    __table_args__ = (
+        UniqueConstraint("item_id", "sequence", name="uq_equipment_movement_item_sequence"),
+        Index("ix_equipment_movements_item_time", "item_id", "occurred_at", "sequence"),
+        Index("ix_equipment_movements_org_time", "organization_id", "occurred_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    item_id: Mapped[str] = mapped_column(ForeignKey("equipment_items.id", ondelete="CASCADE"))
+    kit_id: Mapped[str | None] = mapped_column(ForeignKey("equipment_kits.id", ondelete="SET NULL"), nullable=True)
+    mission_id: Mapped[str | None] = mapped_column(
+        ForeignKey("scheduled_missions.id", ondelete="SET NULL"), nullable=True
+    )
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    note: Mapped[str | None] = mapped_column(Text, nullable=True)
+    state: Mapped[str] = mapped_column(String(10), nullable=False)
+    since: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    checkouts: Mapped[int] = mapped_column(Integer, nullable=False)
+    returns: Mapped[int] = mapped_column(Integer, nullable=False)
+    incidents: Mapped[int] = mapped_column(Integer, nullable=False)
+    actor_id: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+
+class EquipmentBalance(Base):
+    """Current balance of an item: the running totals of its last movement."""
+
+    __tablename__ = "equipment_balances"
+
+    item_id: Mapped[str] = mapped_column(ForeignKey("equipment_items.id", ondelete="CASCADE"), primary_key=True)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    state: Mapped[str] = mapped_column(String(10), nullable=False, default="in")
+    since: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    checkouts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    returns: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    incidents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_occurred_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class EquipmentKitMovement(Base):
+    """A movement counted in a kit's balance: one row per kit the moved item belongs to."""
+
+    __tablename__ = "equipment_kit_movements"
+    __table_args__ = (
+        Index("ix_equipment_kit_movements_kit_time", "kit_id", "occurred_at"),
+    )
+
+    kit_id: Mapped[str] = mapped_column(ForeignKey("equipment_kits.id", ondelete="CASCADE"), primary_key=True)
+    sequence: Mapped[int] = mapped_column(Integer, primary_key=True)
+    movement_id: Mapped[str] = mapped_column(ForeignKey("equipment_movements.id", ondelete="CASCADE"))
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class EquipmentKitBalance(Base):
+    """Current balance of the movements of a kit's members, whether moved with the kit or alone."""
+
+    __tablename__ = "equipment_kit_balances"
+
+    kit_id: Mapped[str] = mapped_column(ForeignKey("equipment_kits.id", ondelete="CASCADE"), primary_key=True)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    items_out: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    checkouts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    returns: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    incidents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_occurred_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    checkpoint_sequence: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class EquipmentKitCheckpoint(Base):
+    """Periodic copy of a kit balance; as-of reads replay at most one checkpoint interval."""
+
+    __tablename__ = "equipment_kit_checkpoints"
+    __table_args__ = (
+        Index("ix_equipment_kit_checkpoints_kit_time", "kit_id", "occurred_at", "sequence"),
+    )
+
+    kit_id: Mapped[str] = mapped_column(ForeignKey("equipment_kits.id", ondelete="CASCADE"), primary_key=True)
+    sequence: Mapped[int] = mapped_column(Integer, primary_key=True)
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    items_out: Mapped[int] = mapped_column(Integer, nullable=False)
+    checkouts: Mapped[int] = mapped_column(Integer, nullable=False)
+    returns: Mapped[int] = mapped_column(Integer, nullable=False)
+    incidents: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class EquipmentKpiMonth(Base):
+    """Logistics counters of an organisation for one month, bumped by every movement."""
+
+    __tablename__ = "equipment_kpi_months"
+
+    organization_id: Mapped[str] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    checkouts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    returns: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    incidents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Truck(Base):
+    """Vehicle of the organisation fleet, with its payload limits and the venue it leaves from."""
+
+    __tablename__ = "trucks"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "name", name="uq_truck_org_name"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(200), nullable=False)
+    max_weight_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    max_volume_m3: Mapped[float] = mapped_column(Float, nullable=False)
+    depot_venue_id: Mapped[str | None] = mapped_column(
+        ForeignKey("venues.id", ondelete="SET NULL"), nullable=True
+    )
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+
+class LogisticsPlan(Base):
+    """Truck loading and routes of one day; each solve bumps ``revision`` and warm-starts from the last.
+
+    ``assignment`` maps each load (an equipment reservation) to its truck and
+    ``routes`` holds the ordered stops of every used truck.
+    """
+
+    __tablename__ = "logistics_plans"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "day", name="uq_logistics_plan_day"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="pending")
+    time_budget: Mapped[float] = mapped_column(Float, nullable=False)
+    assignment: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    routes: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    unassigned: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    trucks_used: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    complete: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    requested_by: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    requested_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    solved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class Notification(Base):
+    """One message of an event to one target on one channel: the durable dispatch queue.
+
+    ``idempotency_key`` is unique per organisation so an event enqueued twice
+    sends once; ``next_attempt_at`` orders due rows for the workers and
+    ``claim`` marks the batch a worker is sending.
+    """
+
+    __tablename__ = "notifications"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "idempotency_key", name="uq_notification_idempotency"),
+        Index("ix_notifications_status_channel_due", "status", "channel", "next_attempt_at"),
+        Index("ix_notifications_org_created", "organization_id", "created_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    event_id: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
+    idempotency_key: Mapped[str] = mapped_column(String(64), nullable=False)
+    channel: Mapped[str] = mapped_column(String(10), nullable=False)
+    target: Mapped[str] = mapped_column(String(255), nullable=False)
+    user_id: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    template: Mapped[str] = mapped_column(String(40), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
+    claim: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    log: Mapped[list["NotificationAttempt"]] = relationship(
+        "NotificationAttempt",
+        back_populates="notification",
+        cascade="all, delete-orphan",
+        order_by="NotificationAttempt.attempted_at",
+    )
+
+
+class NotificationAttempt(Base):
+    """Delivery log: one row per try with the spec's fields (event, target, channel, status, latency, error)."""
+
+    __tablename__ = "notification_attempts"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    notification_id: Mapped[str] = mapped_column(ForeignKey("notifications.id", ondelete="CASCADE"), index=True)
+    event_id: Mapped[str] = mapped_column(String(120), nullable=False)
+    target: Mapped[str] = mapped_column(String(255), nullable=False)
+    channel: Mapped[str] = mapped_column(String(10), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False)
+    latency_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+
+    notification: Mapped[Notification] = relationship("Notification", back_populates="log")
+
+
+class ScheduledTrigger(Base):
+    """A future reminder or late-punch check of one assignment (spec 6 matrix).
+
+    ``due_at`` is indexed with ``status`` so the scheduler loads the next
+    window incrementally; ``touched_at`` lets it pick up rows written into a
+    window it already holds. A scheduler claims due rows before firing them
+    so several workers never fire the same one, and a trigger is settled in
+    the transaction that queues its notifications, which is what survives a
+    restart.
+    """
+
+    __tablename__ = "scheduled_triggers"
+    __table_args__ = (
+        UniqueConstraint("assignment_id", "kind", name="uq_scheduled_trigger_assignment_kind"),
+        Index("ix_scheduled_triggers_status_due", "status", "due_at"),
+        Index("ix_scheduled_triggers_touched", "touched_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id: Mapped[str] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"))
+    assignment_id: Mapped[str] = mapped_column(ForeignKey("assignments.id", ondelete="CASCADE"))
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    manager_id: Mapped[str | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="pending")
+    touched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=now_utc)
+    fired_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    event_id: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    claim: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -16,6 +16,14 @@ class Permission(Enum):
     VIEW_MISSION_TEMPLATES = "view_mission_templates"
     MANAGE_MISSION_TAGS = "manage_mission_tags"
     VIEW_MISSION_TAGS = "view_mission_tags"
+    MANAGE_PLANNING = "manage_planning"
+    VIEW_PLANNING = "view_planning"
+    MANAGE_TIMESHEETS = "manage_timesheets"
+    VIEW_TIMESHEETS = "view_timesheets"
+    MANAGE_PAYROLL = "manage_payroll"
+    MANAGE_EQUIPMENT = "manage_equipment"
+    VIEW_EQUIPMENT = "view_equipment"
+    MANAGE_NOTIFICATIONS = "manage_notifications"
 
 
 class Role(Enum):
@@ -38,6 +46,14 @@ _ROLE_PERMISSIONS: Final[dict[Role, set[Permission]]] = {
         Permission.VIEW_MISSION_TEMPLATES,
         Permission.MANAGE_MISSION_TAGS,
         Permission.VIEW_MISSION_TAGS,
+        Permission.MANAGE_PLANNING,
+        Permission.VIEW_PLANNING,
+        Permission.MANAGE_TIMESHEETS,
+        Permission.VIEW_TIMESHEETS,
+        Permission.MANAGE_PAYROLL,
+        Permission.MANAGE_EQUIPMENT,
+        Permission.VIEW_EQUIPMENT,
+        Permission.MANAGE_NOTIFICATIONS,
     },
     Role.ADMIN: {
         Permission.MANAGE_INVITATIONS,
@@ -51,6 +67,14 @@ _ROLE_PERMISSIONS: Final[dict[Role, set[Permission]]] = {
         Permission.VIEW_MISSION_TEMPLATES,
         Permission.MANAGE_MISSION_TAGS,
         Permission.VIEW_MISSION_TAGS,
+        Permission.MANAGE_PLANNING,
+        Permission.VIEW_PLANNING,
+        Permission.MANAGE_TIMESHEETS,
+        Permission.VIEW_TIMESHEETS,
+        Permission.MANAGE_PAYROLL,
+        Permission.MANAGE_EQUIPMENT,
+        Permission.VIEW_EQUIPMENT,
+        Permission.MANAGE_NOTIFICATIONS,
     },
     Role.MEMBER: {
         Permission.SWITCH_ORGANISATION,
@@ -59,6 +83,9 @@ _ROLE_PERMISSIONS: Final[dict[Role, set[Permission]]] = {
         Permission.VIEW_PROJECTS,
         Permission.VIEW_MISSION_TEMPLATES,
         Permission.VIEW_MISSION_TAGS,
+        Permission.VIEW_PLANNING,
+        Permission.VIEW_TIMESHEETS,
+        Permission.VIEW_EQUIPMENT,
     },
     Role.VIEWER: {
         Permission.SWITCH_ORGANISATION,
@@ -66,6 +93,9 @@ _ROLE_PERMISSIONS: Final[dict[Role, set[Permission]]] = {
         Permission.VIEW_PROJECTS,
         Permission.VIEW_MISSION_TEMPLATES,
         Permission.VIEW_MISSION_TAGS,
+        Permission.VIEW_PLANNING,
+        Permission.VIEW_TIMESHEETS,
+        Permission.VIEW_EQUIPMENT,
     },
 }
 
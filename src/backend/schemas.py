@@ -33,6 +33,7 @@ class RegisterRequest(BaseModel):
     password: str = Field(min_length=8)
     organization_name: str = Field(alias="organizationName", min_length=1)
     organization_slug: str = Field(alias="organizationSlug", min_length=1)
+    timezone: str = "UTC"
 
     model_config = {"populate_by_name": True}
 
@@ -91,6 +92,20 @@ class SwitchOrganisationRequest(BaseModel):
     model_config = {"populate_by_name": True}
 
 
+class OrganizationUpdate(BaseModel):
+    name: str | None = Field(default=None, min_length=1)
+    timezone: str | None = None
+
+
+class OrganizationResponse(BaseModel):
+    id: str
+    name: str
+    slug: str
+    timezone: str
+
+    model_config = {"from_attributes": True}
+
+
 class VenueBase(BaseModel):
     name: str
     address: str | None = None
@@ -99,6 +114,8 @@ class VenueBase(BaseModel):
     postal_code: str | None = Field(default=None, alias="postalCode")
     capacity: int | None = None
     notes: str | None = None
+    latitude: float | None = Field(default=None, ge=-90, le=90)
+    longitude: float | None = Field(default=None, ge=-180, le=180)
 
     model_config = {"populate_by_name": True}
 
@@ -115,6 +132,8 @@ class VenueUpdate(BaseModel):
     postal_code: str | None = Field(default=None, alias="postalCode")
     capacity: int | None = None
     notes: str | None = None
+    latitude: float | None = Field(default=None, ge=-90, le=90)
+    longitude: float | None = Field(default=None, ge=-180, le=180)
 
     model_config = {"populate_by_name": True}
 
@@ -236,3 +255,1153 @@ class MissionTemplateResponse(MissionTemplateBase):
         "populate_by_name": True,
         "from_attributes": True,
     }
+
+
+class ScheduledMissionCreate(BaseModel):
+    template_id: str = Field(alias="templateId")
+    project_id: str | None = Field(default=None, alias="projectId")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    team_size: int | None = Field(default=None, alias="teamSize")
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class ScheduledMissionUpdate(BaseModel):
+    project_id: str | None = Field(default=None, alias="projectId")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+    team_size: int | None = Field(default=None, alias="teamSize")
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class ScheduledMissionResponse(BaseModel):
+    id: str
+    organization_id: str = Field(alias="organizationId")
+    template_id: str = Field(alias="templateId")
+    project_id: str | None = Field(default=None, alias="projectId")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    team_size: int = Field(alias="teamSize")
+    notes: str | None = None
+    created_at: datetime = Field(alias="createdAt")
+    updated_at: datetime = Field(alias="updatedAt")
+    tags: list[MissionTagResponse] = Field(default_factory=list)
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class ScheduledMissionBulkCreate(BaseModel):
+    template_id: str = Field(alias="templateId")
+    venue_ids: list[str] = Field(alias="venueIds", min_length=1)
+    dates: list[date] = Field(min_length=1)
+    project_id: str | None = Field(default=None, alias="projectId")
+    start_time: time | None = Field(default=None, alias="startTime")
+    end_time: time | None = Field(default=None, alias="endTime")
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class AssignmentCreate(BaseModel):
+    user_id: str = Field(alias="userId")
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class AssignmentUpdate(BaseModel):
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class AssignmentMove(BaseModel):
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class ConflictResponse(BaseModel):
+    kind: Literal["person", "venue", "travel"]
+    resource_id: str = Field(alias="resourceId")
+    first_id: str = Field(alias="firstId")
+    second_id: str = Field(alias="secondId")
+    overlap_start: datetime = Field(alias="overlapStart")
+    overlap_end: datetime = Field(alias="overlapEnd")
+
+    model_config = {"populate_by_name": True}
+
+
+class AssignmentResponse(BaseModel):
+    id: str
+    organization_id: str = Field(alias="organizationId")
+    mission_id: str = Field(alias="missionId")
+    user_id: str = Field(alias="userId")
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    created_at: datetime = Field(alias="createdAt")
+    updated_at: datetime = Field(alias="updatedAt")
+    conflicts: list[ConflictResponse] = Field(default_factory=list)
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class ConflictReportResponse(BaseModel):
+    window_start: datetime = Field(alias="windowStart")
+    window_end: datetime = Field(alias="windowEnd")
+    conflicts: list[ConflictResponse] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class ScheduledMissionBulkResponse(BaseModel):
+    created: int
+    missions: list[ScheduledMissionResponse] = Field(default_factory=list)
+    conflicts: list[ConflictResponse] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class ConflictDeltaResponse(BaseModel):
+    assignment: AssignmentResponse
+    added: list[ConflictResponse] = Field(default_factory=list)
+    resolved: list[ConflictResponse] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class PlanningCrewMember(BaseModel):
+    assignment_id: str = Field(alias="assignmentId")
+    user_id: str = Field(alias="userId")
+    email: str
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class PlanningWeekRowResponse(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    team_size: int = Field(alias="teamSize")
+    template_id: str = Field(alias="templateId")
+    template_name: str = Field(alias="templateName")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    venue_name: str | None = Field(default=None, alias="venueName")
+    project_id: str | None = Field(default=None, alias="projectId")
+    project_name: str | None = Field(default=None, alias="projectName")
+    tags: list[str] = Field(default_factory=list)
+    crew: list[PlanningCrewMember] = Field(default_factory=list)
+    occurrence_start: datetime | None = Field(default=None, alias="occurrenceStart")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PlanningWeekResponse(BaseModel):
+    week_start: date = Field(alias="weekStart")
+    rows: list[PlanningWeekRowResponse] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class AvailabilityInterval(BaseModel):
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class AvailabilitySubmit(BaseModel):
+    start_day: date = Field(alias="startDay")
+    end_day: date = Field(alias="endDay")
+    intervals: list[AvailabilityInterval] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class AvailabilityResponse(BaseModel):
+    user_id: str = Field(alias="userId")
+    start_day: date = Field(alias="startDay")
+    end_day: date = Field(alias="endDay")
+    intervals: list[AvailabilityInterval] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class FreePeopleResponse(BaseModel):
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    user_ids: list[str] = Field(default_factory=list, alias="userIds")
+
+    model_config = {"populate_by_name": True}
+
+
+class PersonPlanningUpdate(BaseModel):
+    skills: list[str] | None = None
+    max_weekly_hours: int | None = Field(default=None, alias="maxWeeklyHours", ge=0, le=168)
+
+    model_config = {"populate_by_name": True}
+
+
+class PersonPlanningResponse(BaseModel):
+    user_id: str = Field(alias="userId")
+    skills: list[str] = Field(default_factory=list)
+    max_weekly_hours: int | None = Field(default=None, alias="maxWeeklyHours")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class ProposalReason(BaseModel):
+    code: Literal["skills", "availability", "familiarity", "workload"]
+    contribution: float
+
+
+class ProposalCandidate(BaseModel):
+    user_id: str = Field(alias="userId")
+    score: float
+    reasons: list[ProposalReason] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class SlotProposalResponse(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    open_seats: int = Field(alias="openSeats")
+    candidates: list[ProposalCandidate] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class ProposalReportResponse(BaseModel):
+    week_start: date = Field(alias="weekStart")
+    slots: list[SlotProposalResponse] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class SolverRunCreate(BaseModel):
+    week_start: date = Field(alias="weekStart")
+    time_budget_seconds: float = Field(default=5.0, alias="timeBudgetSeconds", gt=0, le=60)
+
+    model_config = {"populate_by_name": True}
+
+
+class SolverPlacement(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    user_id: str = Field(alias="userId")
+    score: float
+
+    model_config = {"populate_by_name": True}
+
+
+class SolverShortfall(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    open_seats: int = Field(alias="openSeats")
+
+    model_config = {"populate_by_name": True}
+
+
+class SolverSolutionResponse(BaseModel):
+    placements: list[SolverPlacement] = Field(default_factory=list)
+    unfilled: list[SolverShortfall] = Field(default_factory=list)
+    total_score: float = Field(alias="totalScore")
+    rounds: int
+    complete: bool
+
+    model_config = {"populate_by_name": True}
+
+
+class SolverRunResponse(BaseModel):
+    job_id: str = Field(alias="jobId")
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: float
+    created_at: datetime = Field(alias="createdAt")
+    finished_at: datetime | None = Field(default=None, alias="finishedAt")
+    error: str | None = None
+    solution: SolverSolutionResponse | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class MissionRecurrenceSet(BaseModel):
+    frequency: Literal["daily", "weekly"]
+    interval: int = Field(default=1, ge=1, le=52)
+    weekdays: list[int] = Field(default_factory=list)
+    count: int | None = Field(default=None, ge=1)
+    until: date | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class MissionRecurrenceResponse(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    frequency: Literal["daily", "weekly"]
+    interval: int
+    weekdays: list[int] = Field(default_factory=list)
+    count: int | None = None
+    until: date | None = None
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class OccurrenceExceptionSet(BaseModel):
+    original_start: datetime = Field(alias="originalStart")
+    cancelled: bool = False
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class MissionOccurrenceResponse(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    original_start: datetime = Field(alias="originalStart")
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    moved: bool = False
+    cancelled: bool = False
+
+    model_config = {"populate_by_name": True}
+
+
+class ScenarioCreate(BaseModel):
+    name: str
+
+
+class ScenarioResponse(BaseModel):
+    id: str
+    name: str
+    status: Literal["open", "applied"]
+    change_count: int = Field(alias="changeCount")
+    created_at: datetime = Field(alias="createdAt")
+    applied_at: datetime | None = Field(default=None, alias="appliedAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class ScenarioMissionChange(BaseModel):
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    deleted: bool = False
+
+    model_config = {"populate_by_name": True}
+
+
+class ScenarioAssignmentChange(BaseModel):
+    user_id: str | None = Field(default=None, alias="userId")
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+    deleted: bool = False
+
+    model_config = {"populate_by_name": True}
+
+
+class ScenarioAssignmentCreate(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    user_id: str = Field(alias="userId")
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class ScenarioChangeResponse(BaseModel):
+    entity: Literal["mission", "assignment"]
+    entity_id: str = Field(alias="entityId")
+    deleted: bool
+    mission_id: str | None = Field(default=None, alias="missionId")
+    user_id: str | None = Field(default=None, alias="userId")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PlanningRowChange(BaseModel):
+    entity: Literal["mission", "assignment"]
+    id: str
+    before: dict | None = None
+    after: dict | None = None
+
+
+class PlanningOperationResponse(BaseModel):
+    sequence: int
+    kind: str
+    state: Literal["active", "undone", "discarded", "marker"]
+    target_sequence: int | None = Field(default=None, alias="targetSequence")
+    actor_id: str | None = Field(default=None, alias="actorId")
+    created_at: datetime = Field(alias="createdAt")
+    changes: list[PlanningRowChange] = Field(default_factory=list)
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PlanningLogCursorUpdate(BaseModel):
+    sequence: int = Field(ge=0)
+
+
+class PlanningLogCursorResponse(BaseModel):
+    consumer: str
+    sequence: int
+
+    model_config = {"from_attributes": True}
+
+
+class IcsFeedCreate(BaseModel):
+    scope: Literal["person", "project", "team"]
+    scope_id: str = Field(alias="scopeId")
+
+    model_config = {"populate_by_name": True}
+
+
+class IcsFeedResponse(BaseModel):
+    scope: Literal["person", "project", "team"]
+    scope_id: str = Field(alias="scopeId")
+    token: str
+    url: str
+
+    model_config = {"populate_by_name": True}
+
+
+class TimesheetPolicyUpdate(BaseModel):
+    break_after_minutes: int | None = Field(default=None, alias="breakAfterMinutes", ge=0, le=1440)
+    break_minutes: int | None = Field(default=None, alias="breakMinutes", ge=0, le=240)
+    night_start: time | None = Field(default=None, alias="nightStart")
+    night_end: time | None = Field(default=None, alias="nightEnd")
+    weekend_days: list[int] | None = Field(default=None, alias="weekendDays")
+    holidays: list[date] | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class TimesheetPolicyResponse(BaseModel):
+    break_after_minutes: int = Field(alias="breakAfterMinutes")
+    break_minutes: int = Field(alias="breakMinutes")
+    night_start: time = Field(alias="nightStart")
+    night_end: time = Field(alias="nightEnd")
+    weekend_days: list[int] = Field(alias="weekendDays")
+    holidays: list[date]
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class TimesheetGenerate(BaseModel):
+    period_start: date = Field(alias="periodStart")
+    period_end: date = Field(alias="periodEnd")
+    full: bool = False
+
+    model_config = {"populate_by_name": True}
+
+
+class TimesheetRunResponse(BaseModel):
+    period_start: date = Field(alias="periodStart")
+    period_end: date = Field(alias="periodEnd")
+    sequence: int
+    mode: Literal["full", "incremental"]
+    generated: int
+    removed: int
+    finished_at: datetime = Field(alias="finishedAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class TimesheetResponse(BaseModel):
+    id: str
+    entry_key: str = Field(alias="entryKey")
+    assignment_id: str | None = Field(default=None, alias="assignmentId")
+    mission_id: str | None = Field(default=None, alias="missionId")
+    project_id: str | None = Field(default=None, alias="projectId")
+    user_id: str = Field(alias="userId")
+    work_date: date = Field(alias="workDate")
+    planned_start: datetime = Field(alias="plannedStart")
+    planned_end: datetime = Field(alias="plannedEnd")
+    break_minutes: int = Field(alias="breakMinutes")
+    planned_minutes: int = Field(alias="plannedMinutes")
+    night_minutes: int = Field(alias="nightMinutes")
+    weekend: bool
+    holiday: bool
+    status: str
+    actual_start: datetime | None = Field(default=None, alias="actualStart")
+    actual_end: datetime | None = Field(default=None, alias="actualEnd")
+    late_minutes: int | None = Field(default=None, alias="lateMinutes")
+    late_detected_at: datetime | None = Field(default=None, alias="lateDetectedAt")
+    justification: str | None = None
+    validated_at: datetime | None = Field(default=None, alias="validatedAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PunchCreate(BaseModel):
+    kind: Literal["in", "out"]
+    at: datetime | None = None
+    user_id: str | None = Field(default=None, alias="userId")
+
+    model_config = {"populate_by_name": True}
+
+
+class PunchAcceptedResponse(BaseModel):
+    accepted: int
+
+
+class TimePunchResponse(BaseModel):
+    id: str
+    user_id: str = Field(alias="userId")
+    kind: Literal["in", "out"]
+    punched_at: datetime = Field(alias="punchedAt")
+    source: str
+    timesheet_id: str | None = Field(default=None, alias="timesheetId")
+    reconciled_at: datetime | None = Field(default=None, alias="reconciledAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class ReconciliationRunResponse(BaseModel):
+    job_id: str = Field(alias="jobId")
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: datetime = Field(alias="createdAt")
+    finished_at: datetime | None = Field(default=None, alias="finishedAt")
+    error: str | None = None
+    totals: dict[str, int] | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class TimesheetValidate(BaseModel):
+    timesheet_ids: list[str] = Field(alias="timesheetIds", min_length=1, max_length=1000)
+    justification: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class PayrollPolicyUpdate(BaseModel):
+    night_premium_pct: int | None = Field(default=None, alias="nightPremiumPct", ge=0, le=500)
+    weekend_premium_pct: int | None = Field(default=None, alias="weekendPremiumPct", ge=0, le=500)
+    holiday_premium_pct: int | None = Field(default=None, alias="holidayPremiumPct", ge=0, le=500)
+    overtime_after_minutes: int | None = Field(default=None, alias="overtimeAfterMinutes", ge=0, le=10080)
+    overtime_premium_pct: int | None = Field(default=None, alias="overtimePremiumPct", ge=0, le=500)
+    overtime_high_after_minutes: int | None = Field(default=None, alias="overtimeHighAfterMinutes", ge=0, le=10080)
+    overtime_high_premium_pct: int | None = Field(default=None, alias="overtimeHighPremiumPct", ge=0, le=500)
+    meal_after_minutes: int | None = Field(default=None, alias="mealAfterMinutes", ge=0, le=1440)
+    meal_allowance_cents: int | None = Field(default=None, alias="mealAllowanceCents", ge=0)
+    transport_allowance_cents: int | None = Field(default=None, alias="transportAllowanceCents", ge=0)
+
+    model_config = {"populate_by_name": True}
+
+
+class PayrollPolicyResponse(BaseModel):
+    night_premium_pct: int = Field(alias="nightPremiumPct")
+    weekend_premium_pct: int = Field(alias="weekendPremiumPct")
+    holiday_premium_pct: int = Field(alias="holidayPremiumPct")
+    overtime_after_minutes: int = Field(alias="overtimeAfterMinutes")
+    overtime_premium_pct: int = Field(alias="overtimePremiumPct")
+    overtime_high_after_minutes: int = Field(alias="overtimeHighAfterMinutes")
+    overtime_high_premium_pct: int = Field(alias="overtimeHighPremiumPct")
+    meal_after_minutes: int = Field(alias="mealAfterMinutes")
+    meal_allowance_cents: int = Field(alias="mealAllowanceCents")
+    transport_allowance_cents: int = Field(alias="transportAllowanceCents")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PayRateSet(BaseModel):
+    mode: Literal["hourly", "cachet"] = "hourly"
+    hourly_rate_cents: int = Field(default=0, alias="hourlyRateCents", ge=0)
+    cachet_cents: int = Field(default=0, alias="cachetCents", ge=0)
+
+    model_config = {"populate_by_name": True}
+
+
+class PayRateResponse(BaseModel):
+    user_id: str = Field(alias="userId")
+    mode: Literal["hourly", "cachet"]
+    hourly_rate_cents: int = Field(alias="hourlyRateCents")
+    cachet_cents: int = Field(alias="cachetCents")
+    updated_at: datetime | None = Field(default=None, alias="updatedAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PayrollAmounts(BaseModel):
+    base: int
+    night_premium: int = Field(alias="nightPremium")
+    weekend_premium: int = Field(alias="weekendPremium")
+    holiday_premium: int = Field(alias="holidayPremium")
+    overtime_premium: int = Field(alias="overtimePremium")
+    allowances: int
+    gross: int
+
+    model_config = {"populate_by_name": True}
+
+
+class PayrollTotalsResponse(BaseModel):
+    key: str | None
+    minutes: int
+    amounts: PayrollAmounts
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PayrollSummaryResponse(BaseModel):
+    period_start: date = Field(alias="periodStart")
+    period_end: date = Field(alias="periodEnd")
+    lines: int
+    totals: PayrollAmounts
+    people: list[PayrollTotalsResponse]
+    projects: list[PayrollTotalsResponse]
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class DocumentBatchCreate(BaseModel):
+    kind: Literal["aem", "timesheet"]
+    period_start: date = Field(alias="periodStart")
+    period_end: date = Field(alias="periodEnd")
+    user_ids: list[str] | None = Field(default=None, alias="userIds", max_length=2000)
+
+    model_config = {"populate_by_name": True}
+
+
+class DocumentBatchResponse(BaseModel):
+    job_id: str = Field(alias="jobId")
+    kind: Literal["aem", "timesheet"]
+    status: Literal["queued", "running", "succeeded", "failed", "expired"]
+    progress: float
+    documents: int
+    total: int
+    created_at: datetime = Field(alias="createdAt")
+    finished_at: datetime | None = Field(default=None, alias="finishedAt")
+    expires_at: datetime | None = Field(default=None, alias="expiresAt")
+    error: str | None = None
+    archive_url: str | None = Field(default=None, alias="archiveUrl")
+
+    model_config = {"populate_by_name": True}
+
+
+class RoadmapRequest(BaseModel):
+    scope: Literal["day", "venue", "project"]
+    scope_id: str | None = Field(default=None, alias="scopeId")
+    day: date
+
+    model_config = {"populate_by_name": True}
+
+
+class RoadmapResponse(BaseModel):
+    id: str
+    scope: Literal["day", "venue", "project"]
+    scope_id: str = Field(alias="scopeId")
+    day: date
+    version: int
+    content_hash: str = Field(alias="contentHash")
+    status: Literal["pending", "ready", "failed"]
+    size: int | None = None
+    error: str | None = None
+    requested_at: datetime = Field(alias="requestedAt")
+    generated_at: datetime | None = Field(default=None, alias="generatedAt")
+    job_id: str | None = Field(default=None, alias="jobId")
+    download_url: str | None = Field(default=None, alias="downloadUrl")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class PayrollCloseCreate(BaseModel):
+    month: date
+
+    model_config = {"populate_by_name": True}
+
+
+class PayrollCloseResponse(BaseModel):
+    id: str
+    period_start: date = Field(alias="periodStart")
+    period_end: date = Field(alias="periodEnd")
+    status: Literal["running", "closed", "failed"]
+    people_total: int = Field(alias="peopleTotal")
+    people_done: int = Field(alias="peopleDone")
+    lines: int
+    error: str | None = None
+    started_at: datetime = Field(alias="startedAt")
+    closed_at: datetime | None = Field(default=None, alias="closedAt")
+    job_id: str | None = Field(default=None, alias="jobId")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class AccountingAccount(BaseModel):
+    number: str = Field(min_length=1, max_length=20)
+    label: str = Field(min_length=1, max_length=100)
+
+
+class AccountingChartUpdate(BaseModel):
+    journal_code: str | None = Field(default=None, alias="journalCode", min_length=1, max_length=10)
+    journal_label: str | None = Field(default=None, alias="journalLabel", min_length=1, max_length=100)
+    accounts: dict[str, AccountingAccount] | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class AccountingChartResponse(BaseModel):
+    journal_code: str = Field(alias="journalCode")
+    journal_label: str = Field(alias="journalLabel")
+    accounts: dict[str, AccountingAccount]
+
+    model_config = {"populate_by_name": True}
+
+
+class AccountingExportCreate(BaseModel):
+    format: Literal["csv", "fec"]
+    fiscal_year: int = Field(alias="fiscalYear", ge=2000, le=2100)
+
+    model_config = {"populate_by_name": True}
+
+
+class AccountingExportResponse(BaseModel):
+    id: str
+    format: Literal["csv", "fec"]
+    fiscal_year: int = Field(alias="fiscalYear")
+    destination: Literal["stream", "file"]
+    status: Literal["running", "ready", "failed"]
+    months: int
+    lines: int
+    debit_cents: int = Field(alias="debitCents")
+    credit_cents: int = Field(alias="creditCents")
+    size: int
+    sha256: str | None = None
+    error: str | None = None
+    created_at: datetime = Field(alias="createdAt")
+    finished_at: datetime | None = Field(default=None, alias="finishedAt")
+    job_id: str | None = Field(default=None, alias="jobId")
+    download_url: str | None = Field(default=None, alias="downloadUrl")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+EquipmentCondition = Literal["ok", "damaged", "repair", "retired"]
+
+
+class EquipmentItemCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    category: str | None = Field(default=None, max_length=80)
+    serial_number: str | None = Field(default=None, alias="serialNumber", max_length=120)
+    condition: EquipmentCondition = "ok"
+    weight_kg: float | None = Field(default=None, alias="weightKg", ge=0)
+    volume_m3: float | None = Field(default=None, alias="volumeM3", ge=0)
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentItemUpdate(BaseModel):
+    name: str | None = Field(default=None, min_length=1, max_length=200)
+    category: str | None = Field(default=None, max_length=80)
+    serial_number: str | None = Field(default=None, alias="serialNumber", max_length=120)
+    condition: EquipmentCondition | None = None
+    weight_kg: float | None = Field(default=None, alias="weightKg", ge=0)
+    volume_m3: float | None = Field(default=None, alias="volumeM3", ge=0)
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentItemResponse(BaseModel):
+    id: str
+    name: str
+    category: str | None = None
+    serial_number: str | None = Field(default=None, alias="serialNumber")
+    condition: EquipmentCondition
+    weight_kg: float | None = Field(default=None, alias="weightKg")
+    volume_m3: float | None = Field(default=None, alias="volumeM3")
+    notes: str | None = None
+    created_at: datetime = Field(alias="createdAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class EquipmentKitCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    item_ids: list[str] = Field(alias="itemIds", min_length=1)
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentKitResponse(BaseModel):
+    id: str
+    name: str
+    notes: str | None = None
+    items: list[EquipmentItemResponse]
+    created_at: datetime = Field(alias="createdAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class EquipmentReservationCreate(BaseModel):
+    item_ids: list[str] = Field(default_factory=list, alias="itemIds")
+    kit_id: str | None = Field(default=None, alias="kitId")
+    mission_id: str | None = Field(default=None, alias="missionId")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    starts_at: datetime | None = Field(default=None, alias="startsAt")
+    ends_at: datetime | None = Field(default=None, alias="endsAt")
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentReservationResponse(BaseModel):
+    id: str
+    kit_id: str | None = Field(default=None, alias="kitId")
+    mission_id: str | None = Field(default=None, alias="missionId")
+    venue_id: str | None = Field(default=None, alias="venueId")
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+    notes: str | None = None
+    item_ids: list[str] = Field(alias="itemIds")
+    created_at: datetime = Field(alias="createdAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentFreeSpan(BaseModel):
+    starts_at: datetime = Field(alias="startsAt")
+    ends_at: datetime = Field(alias="endsAt")
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentItemAvailabilityResponse(BaseModel):
+    item_id: str = Field(alias="itemId")
+    name: str
+    available: bool
+    free: list[EquipmentFreeSpan]
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentKitAvailabilityResponse(BaseModel):
+    kit_id: str = Field(alias="kitId")
+    available: bool
+    free: list[EquipmentFreeSpan]
+    busy_item_ids: list[str] = Field(alias="busyItemIds")
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentMovementCreate(BaseModel):
+    kind: Literal["check_out", "return", "incident"]
+    item_ids: list[str] = Field(default_factory=list, alias="itemIds")
+    kit_id: str | None = Field(default=None, alias="kitId")
+    mission_id: str | None = Field(default=None, alias="missionId")
+    occurred_at: datetime | None = Field(default=None, alias="occurredAt")
+    note: str | None = None
+    condition: EquipmentCondition | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentMovementResponse(BaseModel):
+    id: str
+    item_id: str = Field(alias="itemId")
+    kit_id: str | None = Field(default=None, alias="kitId")
+    mission_id: str | None = Field(default=None, alias="missionId")
+    sequence: int
+    kind: Literal["check_out", "return", "incident"]
+    occurred_at: datetime = Field(alias="occurredAt")
+    note: str | None = None
+    state: Literal["in", "out"]
+    checkouts: int
+    returns: int
+    incidents: int
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class EquipmentItemStateResponse(BaseModel):
+    item_id: str = Field(alias="itemId")
+    at: datetime | None = None
+    state: Literal["in", "out"]
+    since: datetime | None = None
+    checkouts: int
+    returns: int
+    incidents: int
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentKitStateResponse(BaseModel):
+    kit_id: str = Field(alias="kitId")
+    at: datetime | None = None
+    items_total: int = Field(alias="itemsTotal")
+    items_out: int = Field(alias="itemsOut")
+    checkouts: int
+    returns: int
+    incidents: int
+
+    model_config = {"populate_by_name": True}
+
+
+class EquipmentKpiResponse(BaseModel):
+    start: date
+    end: date
+    checkouts: int
+    returns: int
+    incidents: int
+    return_rate: float | None = Field(default=None, alias="returnRate")
+    incident_rate: float | None = Field(default=None, alias="incidentRate")
+    items_out: int = Field(alias="itemsOut")
+
+    model_config = {"populate_by_name": True}
+
+
+class ChecklistBatchCreate(BaseModel):
+    mission_ids: list[str] | None = Field(default=None, alias="missionIds", max_length=500)
+    start: datetime | None = None
+    end: datetime | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class ChecklistBundleLink(BaseModel):
+    mission_id: str = Field(alias="missionId")
+    url: str
+
+    model_config = {"populate_by_name": True}
+
+
+class ChecklistBatchResponse(BaseModel):
+    job_id: str = Field(alias="jobId")
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: float
+    missions: int
+    total: int
+    items: int
+    labels: int
+    encoded: int
+    created_at: datetime = Field(alias="createdAt")
+    finished_at: datetime | None = Field(default=None, alias="finishedAt")
+    error: str | None = None
+    bundles: list[ChecklistBundleLink] = Field(default_factory=list)
+
+    model_config = {"populate_by_name": True}
+
+
+class TruckCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+    max_weight_kg: float = Field(alias="maxWeightKg", gt=0)
+    max_volume_m3: float = Field(alias="maxVolumeM3", gt=0)
+    depot_venue_id: str | None = Field(default=None, alias="depotVenueId")
+    active: bool = True
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class TruckUpdate(BaseModel):
+    name: str | None = Field(default=None, min_length=1, max_length=200)
+    max_weight_kg: float | None = Field(default=None, alias="maxWeightKg", gt=0)
+    max_volume_m3: float | None = Field(default=None, alias="maxVolumeM3", gt=0)
+    depot_venue_id: str | None = Field(default=None, alias="depotVenueId")
+    active: bool | None = None
+    notes: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class TruckResponse(BaseModel):
+    id: str
+    name: str
+    max_weight_kg: float = Field(alias="maxWeightKg")
+    max_volume_m3: float = Field(alias="maxVolumeM3")
+    depot_venue_id: str | None = Field(default=None, alias="depotVenueId")
+    active: bool
+    notes: str | None = None
+    created_at: datetime = Field(alias="createdAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class LogisticsPlanRequest(BaseModel):
+    day: date
+    time_budget_seconds: float = Field(default=2.0, alias="timeBudgetSeconds", gt=0, le=30)
+    kit_id: str | None = Field(default=None, alias="kitId")
+    fresh: bool = False
+
+    model_config = {"populate_by_name": True}
+
+
+class TruckRouteResponse(BaseModel):
+    truck_id: str = Field(alias="truckId")
+    loads: list[str]
+    stops: list[str]
+    minutes: int
+    weight_kg: float = Field(alias="weightKg")
+    volume_m3: float = Field(alias="volumeM3")
+    checklist_url: str | None = Field(default=None, alias="checklistUrl")
+
+    model_config = {"populate_by_name": True}
+
+
+class LogisticsPlanResponse(BaseModel):
+    id: str
+    day: date
+    revision: int
+    status: Literal["pending", "ready", "failed"]
+    time_budget: float = Field(alias="timeBudgetSeconds")
+    routes: list[TruckRouteResponse] = Field(default_factory=list)
+    unassigned: list[str] = Field(default_factory=list)
+    trucks_used: int = Field(alias="trucksUsed")
+    total_minutes: int = Field(alias="totalMinutes")
+    complete: bool
+    error: str | None = None
+    requested_at: datetime = Field(alias="requestedAt")
+    solved_at: datetime | None = Field(default=None, alias="solvedAt")
+    job_id: str | None = Field(default=None, alias="jobId")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+NotificationChannel = Literal["email", "sms", "telegram"]
+
+
+class NotificationSend(BaseModel):
+    user_ids: list[str] = Field(alias="userIds", min_length=1, max_length=500)
+    channels: list[NotificationChannel] = Field(default_factory=lambda: ["email"], min_length=1)
+    subject: str = Field(min_length=1, max_length=200)
+    body: str = Field(min_length=1, max_length=4000)
+    idempotency_key: str = Field(alias="idempotencyKey", min_length=1, max_length=100)
+
+    model_config = {"populate_by_name": True}
+
+
+class ContactUpdate(BaseModel):
+    phone: str | None = Field(default=None, max_length=32, pattern=r"^\+?[0-9 .-]*$")
+    telegram_chat_id: str | None = Field(default=None, alias="telegramChatId", max_length=64)
+
+    model_config = {"populate_by_name": True}
+
+
+class ContactResponse(BaseModel):
+    email: str
+    phone: str | None = None
+    telegram_chat_id: str | None = Field(default=None, alias="telegramChatId")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class NotificationAttemptResponse(BaseModel):
+    status: str
+    latency_ms: int = Field(alias="latencyMs")
+    error: str | None = None
+    attempted_at: datetime = Field(alias="attemptedAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class NotificationResponse(BaseModel):
+    id: str
+    event_id: str = Field(alias="eventId")
+    channel: str
+    target: str
+    template: str
+    payload: dict[str, object]
+    status: str
+    attempts: int
+    latency_ms: int | None = Field(default=None, alias="latencyMs")
+    error: str | None = None
+    created_at: datetime = Field(alias="createdAt")
+    next_attempt_at: datetime = Field(alias="nextAttemptAt")
+    sent_at: datetime | None = Field(default=None, alias="sentAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "from_attributes": True,
+    }
+
+
+class NotificationDetailResponse(NotificationResponse):
+    log: list[NotificationAttemptResponse]
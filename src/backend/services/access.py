@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..models import SessionToken, UserOrganization
+from ..models import Organization, SessionToken, UserOrganization
 from ..rbac import Permission, require_permission
 from ..security import now_utc
 from .exceptions import AuthorizationError, DomainError
@@ -40,6 +42,25 @@ def resolve_context(session: Session, token_value: str) -> AuthContext:
     return AuthContext(session_token=token, membership=membership)
 
 
+def organization_zone(session: Session, organization_id: str) -> ZoneInfo:
+    """Zone the organisation's wall-clock rules are expressed in; timestamps themselves stay naive UTC."""
+
+    organization = session.get(Organization, organization_id)
+    return ZoneInfo(organization.timezone if organization is not None else "UTC")
+
+
+def local_time(value: datetime, zone: ZoneInfo) -> datetime:
+    """A naive UTC timestamp on the wall clock of ``zone``, for display."""
+
+    return value.replace(tzinfo=timezone.utc).astimezone(zone)
+
+
+def utc_at(day: date, at: time, zone: ZoneInfo) -> datetime:
+    """Naive UTC instant of the wall-clock time ``at`` on ``day`` in ``zone``, DST included."""
+
+    return datetime.combine(day, at, zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
 def ensure_permission(context: AuthContext, permission: Permission) -> None:
     try:
         require_permission(context.membership.role, permission)
@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import AccountingChart, AccountingExport, PayrollClose, PayrollSnapshotPerson, User
+from ..rbac import Permission
+from ..schemas import AccountingChartUpdate
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .payroll import CLOSED
+
+CSV = "csv"
+FEC = "fec"
+STREAM = "stream"
+FILE = "file"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+EXPORT_JOB_KIND = "accounting.export"
+CURSOR_BATCH = 500
+FLUSH_LINES = 256
+READ_CHUNK = 64 * 1024
+
+# Posting of each payroll component; ``payable`` is the credit balancing the gross.
+POSTINGS = ("salaries", "premiums", "allowances", "payable")
+DEFAULT_ACCOUNTS = {
+    "salaries": ("641100", "Salaires et appointements"),
+    "premiums": ("641300", "Primes et gratifications"),
+    "allowances": ("641400", "Indemnites et avantages divers"),
+    "payable": ("421000", "Personnel - remunerations dues"),
+}
+_PREMIUMS = ("night_premium", "weekend_premium", "holiday_premium", "overtime_premium")
+
+FEC_HEADER = (
+    "JournalCode",
+    "JournalLib",
+    "EcritureNum",
+    "EcritureDate",
+    "CompteNum",
+    "CompteLib",
+    "CompAuxNum",
+    "CompAuxLib",
+    "PieceRef",
+    "PieceDate",
+    "EcritureLib",
+    "Debit",
+    "Credit",
+    "EcritureLet",
+    "DateLet",
+    "ValidDate",
+    "Montantdevise",
+    "Idevise",
+)
+CSV_HEADER = ("Journal", "Date", "Piece", "Compte", "Auxiliaire", "Libelle", "Debit", "Credit", "Solde")
+
+
+@dataclass(frozen=True)
+class CompiledChart:
+    """Chart of accounts resolved once: a tuple lookup indexed like :data:`POSTINGS`."""
+
+    journal_code: str
+    journal_label: str
+    accounts: tuple[tuple[str, str], ...]
+
+    @classmethod
+    def compile(cls, chart: AccountingChart) -> CompiledChart:
+        overrides = chart.accounts or {}
+        return cls(
+            journal_code=chart.journal_code,
+            journal_label=chart.journal_label,
+            accounts=tuple(tuple(overrides.get(posting, DEFAULT_ACCOUNTS[posting])) for posting in POSTINGS),
+        )
+
+
+class CompiledChartCache:
+    """Compiled charts per organisation, reused until the chart's ``updated_at`` moves."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[datetime | None, CompiledChart]] = {}
+
+    def get(self, chart: AccountingChart) -> CompiledChart:
+        with self._lock:
+            cached = self._entries.get(chart.organization_id)
+            if cached is not None and cached[0] == chart.updated_at:
+                return cached[1]
+        compiled = CompiledChart.compile(chart)
+        if chart.updated_at is not None:
+            with self._lock:
+                self._entries[chart.organization_id] = (chart.updated_at, compiled)
+        return compiled
+
+
+compiled_charts = CompiledChartCache()
+
+
+def load_chart(session: Session, organization_id: str) -> AccountingChart:
+    """Stored chart of the organisation, or an unsaved one holding the defaults."""
+
+    chart = session.get(AccountingChart, organization_id)
+    if chart is None:
+        chart = AccountingChart(
+            organization_id=organization_id, journal_code="PAIE", journal_label="Journal de paie", accounts={}
+        )
+    return chart
+
+
+def get_chart(session: Session, token_value: str) -> AccountingChart:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    return load_chart(session, context.membership.organization_id)
+
+
+def update_chart(session: Session, token_value: str, payload: AccountingChartUpdate) -> AccountingChart:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    chart = load_chart(session, context.membership.organization_id)
+    data = payload.model_dump(exclude_unset=True)
+    if data.get("journal_code") is not None:
+        chart.journal_code = data["journal_code"]
+    if data.get("journal_label") is not None:
+        chart.journal_label = data["journal_label"]
+    if data.get("accounts") is not None:
+        unknown = set(data["accounts"]) - set(POSTINGS)
+        if unknown:
+            raise DomainError(f"Unknown postings: {', '.join(sorted(unknown))}", status_code=422)
+        chart.accounts = {
+            **(chart.accounts or {}),
+            **{posting: [item["number"], item["label"]] for posting, item in data["accounts"].items()},
+        }
+    session.add(chart)
+    session.commit()
+    session.refresh(chart)
+    return chart
+
+
+@dataclass(frozen=True, slots=True)
+class LedgerLine:
+    """One posting of the payroll journal; amounts in cents."""
+
+    number: int
+    day: date
+    piece: str
+    account: str
+    account_label: str
+    auxiliary: str
+    auxiliary_label: str
+    label: str
+    debit: int
+    credit: int
+
+
+@dataclass
+class ExportTotals:
+    """Figures accumulated while the export streams, for reconciliation."""
+
+    months: int = 0
+    lines: int = 0
+    debit: int = 0
+    credit: int = 0
+    size: int = 0
+    digest: object = field(default_factory=hashlib.sha256)
+
+    @property
+    def sha256(self) -> str:
+        return self.digest.hexdigest()  # type: ignore[attr-defined]
+
+
+def closed_periods(session: Session, organization_id: str, fiscal_year: int) -> list[tuple[str, date, date]]:
+    return [
+        tuple(row)
+        for row in session.execute(
+            select(PayrollClose.id, PayrollClose.period_start, PayrollClose.period_end)
+            .where(PayrollClose.organization_id == organization_id)
+            .where(PayrollClose.status == CLOSED)
+            .where(PayrollClose.period_start >= date(fiscal_year, 1, 1))
+            .where(PayrollClose.period_start < date(fiscal_year + 1, 1, 1))
+            .order_by(PayrollClose.period_start)
+        )
+    ]
+
+
+def ledger_lines(
+    session: Session, organization_id: str, fiscal_year: int, chart: CompiledChart, totals: ExportTotals
+) -> Iterator[LedgerLine]:
+    """Journal postings of the closed months of the year, read through a server-side cursor.
+
+    Only payroll snapshots are read: one entry per person and month, with
+    a debit per non-zero expense posting and the balancing credit to the
+    personnel account.
+    """
+
+    periods = closed_periods(session, organization_id, fiscal_year)
+    totals.months = len(periods)
+    if not periods:
+        return
+    ends = {close_id: period_end - timedelta(days=1) for close_id, _, period_end in periods}
+    rows = session.execute(
+        select(
+            PayrollSnapshotPerson.close_id,
+            PayrollSnapshotPerson.user_id,
+            User.email,
+            PayrollSnapshotPerson.base,
+            *(getattr(PayrollSnapshotPerson, name) for name in _PREMIUMS),
+            PayrollSnapshotPerson.allowances,
+            PayrollSnapshotPerson.gross,
+        )
+        .join(PayrollClose, PayrollClose.id == PayrollSnapshotPerson.close_id)
+        .join(User, User.id == PayrollSnapshotPerson.user_id)
+        .where(PayrollSnapshotPerson.close_id.in_(list(ends)))
+        .order_by(PayrollClose.period_start, User.email)
+        .execution_options(yield_per=CURSOR_BATCH)
+    )
+    salaries, premiums, allowances, payable = chart.accounts
+    number = 0
+    for close_id, user_id, email, base, *rest in rows:
+        *premium_values, allowance, gross = rest
+        number += 1
+        day = ends[close_id]
+        piece = f"{chart.journal_code}-{day:%Y%m}"
+        label = f"Paie {day:%m/%Y} {email}"
+        for (account, account_label), amount in (
+            (salaries, base),
+            (premiums, sum(premium_values)),
+            (allowances, allowance),
+        ):
+            if amount:
+                yield LedgerLine(number, day, piece, account, account_label, "", "", label, amount, 0)
+        if gross:
+            yield LedgerLine(number, day, piece, payable[0], payable[1], user_id[:8].upper(), email, label, 0, gross)
+
+
+def _amount(cents: int) -> str:
+    units, rest = divmod(cents, 100)
+    return f"{units},{rest:02d}"
+
+
+def _encode(rows: Iterable[Iterable[str]], header: Iterable[str], delimiter: str) -> Iterator[bytes]:
+    """CSV text encoded incrementally: rows are buffered and flushed every ``FLUSH_LINES``."""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\r\n")
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= FLUSH_LINES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def fec_rows(lines: Iterable[LedgerLine], chart: CompiledChart) -> Iterator[tuple[str, ...]]:
+    for line in lines:
+        stamp = f"{line.day:%Y%m%d}"
+        yield (
+            chart.journal_code,
+            chart.journal_label,
+            str(line.number),
+            stamp,
+            line.account,
+            line.account_label,
+            line.auxiliary,
+            line.auxiliary_label,
+            line.piece,
+            stamp,
+            line.label,
+            _amount(line.debit),
+            _amount(line.credit),
+            "",
+            "",
+            stamp,
+            "",
+            "",
+        )
+
+
+def csv_rows(lines: Iterable[LedgerLine], chart: CompiledChart) -> Iterator[tuple[str, ...]]:
+    """Sage/Quadra style rows with the running balance of each account."""
+
+    balances: dict[str, int] = {}
+    for line in lines:
+        balance = balances.get(line.account, 0) + line.debit - line.credit
+        balances[line.account] = balance
+        yield (
+            chart.journal_code,
+            f"{line.day:%d/%m/%Y}",
+            line.piece,
+            line.account,
+            line.auxiliary,
+            line.label,
+            _amount(line.debit),
+            _amount(line.credit),
+            ("-" if balance < 0 else "") + _amount(abs(balance)),
+        )
+
+
+def _counted(lines: Iterable[LedgerLine], totals: ExportTotals) -> Iterator[LedgerLine]:
+    for line in lines:
+        totals.lines += 1
+        totals.debit += line.debit
+        totals.credit += line.credit
+        yield line
+
+
+def _digested(chunks: Iterable[bytes], totals: ExportTotals) -> Iterator[bytes]:
+    for chunk in chunks:
+        totals.digest.update(chunk)  # type: ignore[attr-defined]
+        totals.size += len(chunk)
+        yield chunk
+
+
+def export_chunks(
+    session: Session, organization_id: str, export_format: str, fiscal_year: int, totals: ExportTotals
+) -> Iterator[bytes]:
+    """The export as a generator pipeline: cursor, account mapping, balances, CSV encoding, digest."""
+
+    chart = compiled_charts.get(load_chart(session, organization_id))
+    lines = _counted(ledger_lines(session, organization_id, fiscal_year, chart, totals), totals)
+    if export_format == FEC:
+        # Simplified FEC: pipe separated, one header line, amounts with a decimal comma.
+        chunks = _encode(fec_rows(lines, chart), FEC_HEADER, "|")
+    else:
+        chunks = _encode(csv_rows(lines, chart), CSV_HEADER, ";")
+    return _digested(chunks, totals)
+
+
+def _record(session: Session, export_id: str, status: str, totals: ExportTotals, error: str | None = None) -> None:
+    session.execute(
+        update(AccountingExport)
+        .where(AccountingExport.id == export_id)
+        .values(
+            status=status,
+            months=totals.months,
+            lines=totals.lines,
+            debit_cents=totals.debit,
+            credit_cents=totals.credit,
+            size=totals.size,
+            sha256=totals.sha256 if status == READY else None,
+            error=error,
+            finished_at=now_utc(),
+        )
+    )
+    session.commit()
+
+
+def _open_export(
+    session: Session, token_value: str, export_format: str, fiscal_year: int, destination: str
+) -> AccountingExport:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    export = AccountingExport(
+        organization_id=context.membership.organization_id,
+        format=export_format,
+        fiscal_year=fiscal_year,
+        destination=destination,
+        status=RUNNING,
+        created_by=context.membership.user_id,
+    )
+    session.add(export)
+    session.commit()
+    return export
+
+
+def _run_export(
+    session_factory: sessionmaker[Session], export_id: str, organization_id: str, export_format: str, fiscal_year: int
+) -> Iterator[bytes]:
+    """Stream the export from a session of its own and record its totals once the last byte is out."""
+
+    session = session_factory()
+    totals = ExportTotals()
+    try:
+        try:
+            yield from export_chunks(session, organization_id, export_format, fiscal_year, totals)
+        except Exception as error:
+            session.rollback()
+            _record(session, export_id, FAILED, totals, str(error) or error.__class__.__name__)
+            raise
+        _record(session, export_id, READY, totals)
+    finally:
+        session.close()
+
+
+def stream_export(
+    session: Session,
+    token_value: str,
+    session_factory: sessionmaker[Session],
+    export_format: str,
+    fiscal_year: int,
+) -> tuple[AccountingExport, Iterator[bytes]]:
+    """Authorise now, then stream with constant memory; the record gets its checksum at the end."""
+
+    export = _open_export(session, token_value, export_format, fiscal_year, STREAM)
+    chunks = _run_export(session_factory, export.id, export.organization_id, export_format, fiscal_year)
+    return export, chunks
+
+
+def export_path(storage_dir: str, export: AccountingExport) -> Path:
+    extension = "txt" if export.format == FEC else "csv"
+    return Path(storage_dir) / export.organization_id / "accounting" / f"{export.id}.{extension}"
+
+
+def start_file_export(
+    session: Session,
+    token_value: str,
+    session_factory: sessionmaker[Session],
+    storage_dir: str,
+    export_format: str,
+    fiscal_year: int,
+) -> tuple[AccountingExport, Job]:
+    """Write the export to the storage directory from a background job."""
+
+    export = _open_export(session, token_value, export_format, fiscal_year, FILE)
+    path = export_path(storage_dir, export)
+    export_id, organization_id = export.id, export.organization_id
+
+    def work(job: Job) -> dict[str, int]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".part")
+        written = 0
+        try:
+            with partial.open("wb") as handle:
+                for chunk in _run_export(session_factory, export_id, organization_id, export_format, fiscal_year):
+                    handle.write(chunk)
+                    written += len(chunk)
+            partial.replace(path)
+        finally:
+            partial.unlink(missing_ok=True)
+        return {"bytes": written}
+
+    return export, job_registry.submit(EXPORT_JOB_KIND, organization_id, work)
+
+
+def list_exports(session: Session, token_value: str, fiscal_year: int | None = None) -> list[AccountingExport]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    query = (
+        select(AccountingExport)
+        .where(AccountingExport.organization_id == context.membership.organization_id)
+        .order_by(AccountingExport.created_at.desc())
+    )
+    if fiscal_year is not None:
+        query = query.where(AccountingExport.fiscal_year == fiscal_year)
+    return list(session.scalars(query))
+
+
+def get_export(session: Session, token_value: str, export_id: str) -> AccountingExport:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    export = session.get(AccountingExport, export_id)
+    if export is None or export.organization_id != context.membership.organization_id:
+        raise DomainError("Export not found", status_code=404)
+    return export
+
+
+def open_export_file(
+    session: Session, token_value: str, storage_dir: str, export_id: str
+) -> tuple[AccountingExport, Iterator[bytes]]:
+    export = get_export(session, token_value, export_id)
+    if export.destination != FILE or export.status != READY:
+        raise DomainError("Export file is not available", status_code=409)
+    path = export_path(storage_dir, export)
+    if not path.exists():
+        raise DomainError("Export file is missing", status_code=410)
+
+    def chunks() -> Iterator[bytes]:
+        with path.open("rb") as handle:
+            while chunk := handle.read(READ_CHUNK):
+                yield chunk
+
+    return export, chunks()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -15,6 +16,7 @@ from ..schemas import (
     LoginRequest,
     MagicLinkRequest,
     MagicLinkVerifyRequest,
+    OrganizationUpdate,
     RegisterRequest,
     SwitchOrganisationRequest,
 )
@@ -27,6 +29,8 @@ from ..security import (
     session_expiration,
     verify_password,
 )
+from .oplog import touch
+from .triggers import reschedule_organization
 
 
 class AuthError(Exception):
@@ -55,6 +59,15 @@ def _normalise_slug(value: str) -> str:
     return value.strip().lower()
 
 
+def _normalise_timezone(value: str) -> str:
+    value = value.strip()
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise AuthError("Unknown time zone", status_code=422) from None
+    return value
+
+
 def _get_user(session: Session, email: str) -> User | None:
     return session.scalar(select(User).where(User.email == _normalise_email(email)))
 
@@ -88,7 +101,9 @@ def register_user(session: Session, payload: RegisterRequest, settings: Settings
 
     _ensure_unique_organization_slug(session, slug)
 
-    organization = Organization(name=payload.organization_name, slug=slug)
+    organization = Organization(
+        name=payload.organization_name, slug=slug, timezone=_normalise_timezone(payload.timezone)
+    )
     user = User(email=email, hashed_password=hash_password(payload.password))
     membership = UserOrganization(user=user, organization=organization, role=Role.OWNER)
 
@@ -275,6 +290,7 @@ def accept_invitation(
         role=invitation.role,
     )
     session.add(membership)
+    touch(session, invitation.organization_id, "member.join", actor_id=user.id)
 
     invitation.accepted_at = now_utc()
 
@@ -317,6 +333,35 @@ def switch_organisation(
     )
 
 
+def update_organization(session: Session, session_token_value: str, payload: OrganizationUpdate) -> Organization:
+    """Rename the current organisation or change its time zone.
+
+    A new zone shifts every wall-clock rule: it bumps the planning log so
+    timesheets regenerate in full, and pending reminders are re-armed.
+    """
+
+    session_token = _get_active_session(session, session_token_value)
+    membership = _resolve_membership(session, session_token.user_id, session_token.organization_id)
+    try:
+        require_permission(membership.role, Permission.MANAGE_INVITATIONS)
+    except PermissionError as error:
+        raise AuthError("Insufficient permissions", status_code=403) from error
+
+    organization = membership.organization
+    if payload.name is not None:
+        organization.name = payload.name.strip() or organization.name
+    if payload.timezone is not None:
+        timezone = _normalise_timezone(payload.timezone)
+        if timezone != organization.timezone:
+            organization.timezone = timezone
+            session.flush()
+            reschedule_organization(session, organization.id)
+            touch(session, organization.id, "organization.timezone", actor_id=membership.user_id)
+    session.commit()
+    session.refresh(organization)
+    return organization
+
+
 def resolve_default_role(session: Session, user_id: str) -> Role:
     memberships = _get_memberships(session, user_id)
     if not memberships:
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..models import AvailabilityDay, UserOrganization
+from ..rbac import Permission
+from ..schemas import AvailabilitySubmit
+from .access import AuthContext, ensure_permission, resolve_context
+from .exceptions import DomainError
+from .oplog import touch
+from .planning import as_utc, ensure_member
+from .planning_cache import log_version
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = SLOTS_PER_DAY // 8
+MAX_SUBMIT_DAYS = 62
+
+_SLOT = timedelta(minutes=SLOT_MINUTES)
+_CacheKey = tuple[str, date, date]
+
+
+def _slot_offset(origin: datetime, moment: datetime, *, round_up: bool) -> int:
+    """Number of whole slots between ``origin`` and ``moment``, rounded towards the requested side."""
+
+    slots, remainder = divmod(moment - origin, _SLOT)
+    return slots + (1 if round_up and remainder else 0)
+
+
+def intervals_to_bitmap(
+    first_day: date, days: int, intervals: Iterable[tuple[datetime, datetime]]
+) -> np.ndarray:
+    """Rasterise intervals onto a ``(days, 96)`` boolean grid starting at ``first_day``.
+
+    A slot is only marked free when the interval covers it entirely, so a
+    person available 08:10-09:00 is free from 08:15. Parts of intervals that
+    fall outside the grid are clipped.
+    """
+
+    origin = datetime.combine(first_day, time.min)
+    flat = np.zeros(days * SLOTS_PER_DAY, dtype=bool)
+    for start, end in intervals:
+        first = max(_slot_offset(origin, start, round_up=True), 0)
+        last = min(_slot_offset(origin, end, round_up=False), flat.size)
+        if last > first:
+            flat[first:last] = True
+    return flat.reshape(days, SLOTS_PER_DAY)
+
+
+def bitmap_to_intervals(first_day: date, bits: np.ndarray) -> list[tuple[datetime, datetime]]:
+    """Inverse of :func:`intervals_to_bitmap`; runs spanning midnight come back as one interval."""
+
+    flat = np.asarray(bits, dtype=np.int8).reshape(-1)
+    edges = np.diff(np.concatenate(([0], flat, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    origin = datetime.combine(first_day, time.min)
+    return [(origin + int(start) * _SLOT, origin + int(end) * _SLOT) for start, end in zip(starts, ends)]
+
+
+def pack_day(bits: np.ndarray) -> bytes:
+    return np.packbits(np.asarray(bits, dtype=bool)).tobytes()
+
+
+def unpack_days(payloads: Sequence[bytes]) -> np.ndarray:
+    """Unpack many stored day bitmaps at once into a ``(len(payloads), 96)`` boolean array."""
+
+    if not payloads:
+        return np.zeros((0, SLOTS_PER_DAY), dtype=bool)
+    packed = np.frombuffer(b"".join(payloads), dtype=np.uint8).reshape(len(payloads), BITMAP_BYTES)
+    return np.unpackbits(packed, axis=1).astype(bool)
+
+
+class AvailabilityMatrix:
+    """Availability of many people over consecutive days as a ``(people, slots)`` bit grid.
+
+    A running count of free slots per person is kept alongside the grid so a
+    range check costs two column reads whatever the span length, and the
+    same trick scores many spans against every person in one NumPy pass.
+    """
+
+    __slots__ = ("user_ids", "first_day", "bits", "_rows", "_counts")
+
+    def __init__(self, user_ids: Sequence[str], first_day: date, bits: np.ndarray) -> None:
+        if bits.ndim != 2 or bits.shape[0] != len(user_ids) or bits.shape[1] % SLOTS_PER_DAY:
+            raise ValueError("Availability grid does not match its people and days")
+        self.user_ids = list(user_ids)
+        self.first_day = first_day
+        self.bits = bits
+        self._rows = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        self._counts = np.zeros((bits.shape[0], bits.shape[1] + 1), dtype=np.int32)
+        np.cumsum(bits, axis=1, out=self._counts[:, 1:])
+
+    @property
+    def days(self) -> int:
+        return self.bits.shape[1] // SLOTS_PER_DAY
+
+    def row_of(self, user_id: str) -> int | None:
+        return self._rows.get(user_id)
+
+    def coverage(self, spans: Sequence[tuple[datetime, datetime]]) -> np.ndarray:
+        """Fraction of each span's slots each person is free for, shaped ``(spans, people)``.
+
+        A span touches every slot it overlaps, even partially; slots outside
+        the loaded days count as busy.
+        """
+
+        if not spans:
+            return np.zeros((0, len(self.user_ids)))
+        origin = np.datetime64(datetime.combine(self.first_day, time.min), "m")
+        starts = np.array([start for start, _ in spans], dtype="datetime64[m]")
+        ends = np.array([end for _, end in spans], dtype="datetime64[m]")
+        first = (starts - origin).astype(np.int64) // SLOT_MINUTES
+        last = -((origin - ends).astype(np.int64) // SLOT_MINUTES)
+        wanted = np.maximum(last - first, 1)
+        size = self.bits.shape[1]
+        free = self._counts[:, np.clip(last, 0, size)] - self._counts[:, np.clip(first, 0, size)]
+        return (free / wanted).T
+
+    def free_mask(self, start: datetime, end: datetime) -> np.ndarray:
+        """Boolean vector over people: free for every slot touched by ``[start, end)``."""
+
+        return self.coverage([(start, end)])[0] >= 1.0
+
+    def free_people(self, start: datetime, end: datetime) -> list[str]:
+        return [self.user_ids[row] for row in np.flatnonzero(self.free_mask(start, end))]
+
+    def common_slots(self, user_ids: Iterable[str]) -> np.ndarray:
+        """Slots where every listed person is free (bitwise AND across the team)."""
+
+        rows = [self._rows[user_id] for user_id in user_ids if user_id in self._rows]
+        if not rows:
+            return np.zeros(self.bits.shape[1], dtype=bool)
+        return np.logical_and.reduce(self.bits[rows], axis=0)
+
+
+class AvailabilityCache:
+    """Process-local LRU of availability matrices keyed by organisation and day range.
+
+    Entries remember the planning log version they were built at; availability
+    submissions and new members bump it, so a matrix is rebuilt after a write
+    made by any process.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self._lock = threading.RLock()
+        self._max_entries = max_entries
+        self._entries: OrderedDict[_CacheKey, tuple[int, AvailabilityMatrix]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(
+        self, key: _CacheKey, version: int, loader: Callable[[], AvailabilityMatrix]
+    ) -> AvailabilityMatrix:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(key)
+                return cached[1]
+            matrix = loader()
+            self._entries[key] = (version, matrix)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return matrix
+
+    def invalidate(self, organization_id: str, first_day: date | None = None, last_day: date | None = None) -> None:
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if key[0] == organization_id
+                and (first_day is None or key[2] >= first_day)
+                and (last_day is None or key[1] <= last_day)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+availability_cache = AvailabilityCache()
+
+
+def load_availability_matrix(
+    session: Session,
+    organization_id: str,
+    first_day: date,
+    last_day: date,
+    user_ids: Sequence[str] | None = None,
+) -> AvailabilityMatrix:
+    """Build the grid of every member (or ``user_ids``) from ``first_day`` to ``last_day`` inclusive.
+
+    Days nobody submitted stay busy: availability is opt-in.
+    """
+
+    if user_ids is None:
+        user_ids = session.scalars(
+            select(UserOrganization.user_id)
+            .where(UserOrganization.organization_id == organization_id)
+            .order_by(UserOrganization.user_id)
+        ).all()
+    days = (last_day - first_day).days + 1
+    grid = np.zeros((len(user_ids), days, SLOTS_PER_DAY), dtype=bool)
+    rows = {user_id: row for row, user_id in enumerate(user_ids)}
+
+    query = (
+        select(AvailabilityDay.user_id, AvailabilityDay.day, AvailabilityDay.slots)
+        .where(AvailabilityDay.organization_id == organization_id)
+        .where(AvailabilityDay.day >= first_day)
+        .where(AvailabilityDay.day <= last_day)
+    )
+    records = [record for record in session.execute(query) if record[0] in rows]
+    if records:
+        person = np.fromiter((rows[record[0]] for record in records), dtype=np.intp, count=len(records))
+        offset = np.fromiter(((record[1] - first_day).days for record in records), dtype=np.intp, count=len(records))
+        grid[person, offset] = unpack_days([record[2] for record in records])
+    return AvailabilityMatrix(user_ids, first_day, grid.reshape(len(user_ids), days * SLOTS_PER_DAY))
+
+
+def cached_availability_matrix(
+    session: Session, organization_id: str, first_day: date, last_day: date
+) -> AvailabilityMatrix:
+    return availability_cache.get_or_load(
+        (organization_id, first_day, last_day),
+        log_version(session, organization_id),
+        lambda: load_availability_matrix(session, organization_id, first_day, last_day),
+    )
+
+
+def _validate_days(start_day: date, end_day: date) -> int:
+    days = (end_day - start_day).days + 1
+    if days < 1:
+        raise DomainError("End day must not be before start day", status_code=422)
+    if days > MAX_SUBMIT_DAYS:
+        raise DomainError(f"Availability spans at most {MAX_SUBMIT_DAYS} days", status_code=422)
+    return days
+
+
+def _ensure_can_edit(session: Session, token_value: str, user_id: str) -> AuthContext:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    if user_id != context.membership.user_id:
+        ensure_permission(context, Permission.MANAGE_PLANNING)
+    ensure_member(session, context.membership.organization_id, user_id)
+    return context
+
+
+def submit_availability(
+    session: Session, token_value: str, user_id: str, payload: AvailabilitySubmit
+) -> list[tuple[datetime, datetime]]:
+    """Replace a person's availability for ``[startDay, endDay]`` with the submitted intervals.
+
+    People edit their own availability; editing someone else's needs the
+    planning management permission.
+    """
+
+    context = _ensure_can_edit(session, token_value, user_id)
+    organization_id = context.membership.organization_id
+    days = _validate_days(payload.start_day, payload.end_day)
+    window_start = datetime.combine(payload.start_day, time.min)
+    window_end = window_start + timedelta(days=days)
+    intervals = []
+    for interval in payload.intervals:
+        start, end = as_utc(interval.starts_at), as_utc(interval.ends_at)
+        if end <= start:
+            raise DomainError("End must be after start", status_code=422)
+        if start < window_start or end > window_end:
+            raise DomainError("Interval lies outside the submitted days", status_code=422)
+        intervals.append((start, end))
+
+    bits = intervals_to_bitmap(payload.start_day, days, intervals)
+    session.execute(
+        delete(AvailabilityDay)
+        .where(AvailabilityDay.organization_id == organization_id)
+        .where(AvailabilityDay.user_id == user_id)
+        .where(AvailabilityDay.day >= payload.start_day)
+        .where(AvailabilityDay.day <= payload.end_day)
+    )
+    values = [
+        {
+            "organization_id": organization_id,
+            "user_id": user_id,
+            "day": payload.start_day + timedelta(days=offset),
+            "slots": pack_day(bits[offset]),
+        }
+        for offset in np.flatnonzero(bits.any(axis=1)).tolist()
+    ]
+    if values:
+        session.execute(insert(AvailabilityDay), values)
+    touch(session, organization_id, "availability.update", actor_id=context.membership.user_id)
+    session.commit()
+    availability_cache.invalidate(organization_id, payload.start_day, payload.end_day)
+    return bitmap_to_intervals(payload.start_day, bits)
+
+
+def get_availability(
+    session: Session, token_value: str, user_id: str, start_day: date, end_day: date
+) -> list[tuple[datetime, datetime]]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    organization_id = context.membership.organization_id
+    ensure_member(session, organization_id, user_id)
+    _validate_days(start_day, end_day)
+    matrix = load_availability_matrix(session, organization_id, start_day, end_day, [user_id])
+    return bitmap_to_intervals(start_day, matrix.bits[0])
+
+
+def find_free_people(session: Session, token_value: str, starts_at: datetime, ends_at: datetime) -> list[str]:
+    """Members free for the whole span, answered from the cached grid of the days it touches."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    start, end = as_utc(starts_at), as_utc(ends_at)
+    if end <= start:
+        raise DomainError("End must be after start", status_code=422)
+    first_day = start.date()
+    last_day = (end - timedelta(microseconds=1)).date()
+    _validate_days(first_day, last_day)
+    matrix = cached_availability_matrix(session, context.membership.organization_id, first_day, last_day)
+    return matrix.free_people(start, end)
@@ -0,0 +1,469 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+import zipfile
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from ..models import (
+    EquipmentItem,
+    EquipmentKit,
+    EquipmentReservation,
+    EquipmentReservationItem,
+    LogisticsPlan,
+    MissionTemplate,
+    ScheduledMission,
+    Truck,
+    Venue,
+)
+from ..rbac import Permission
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .documents import READ_CHUNK, DocumentRenderer, document_renderer, slug
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .planning import as_utc
+from .qr import QrRows, qr_png
+
+CHECKLIST = "checklist"
+CHECKLIST_JOB_KIND = "equipment.checklists"
+QR_PAYLOAD_PREFIX = "jmd:equipment:"
+# Part of every label key: bump it when the encoder output changes so stale files are never served.
+QR_ENCODER_VERSION = 1
+MAX_CHECKLIST_MISSIONS = 500
+MAX_CHECKLIST_WINDOW = timedelta(days=31)
+
+
+def item_payload(item_id: str) -> str:
+    """Text encoded in an item's QR label: stable for the life of the item."""
+
+    return f"{QR_PAYLOAD_PREFIX}{item_id}"
+
+
+def label_key(payload: str) -> str:
+    return hashlib.sha256(f"{QR_ENCODER_VERSION}:{payload}".encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class QrLabel:
+    rows: QrRows
+    png: bytes
+
+
+class QrLabelCache:
+    """Content-addressed QR labels: an in-process LRU in front of files named by the payload digest.
+
+    A label depends on its payload only, so entries never need invalidation
+    and equal payloads are encoded once whatever mission or organisation asks.
+    Only the module rows are stored on disk; the PNG is cheap to redraw.
+    """
+
+    def __init__(self, max_entries: int = 20000) -> None:
+        self.lock = threading.RLock()
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, QrLabel] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def path(storage_dir: str, key: str) -> Path:
+        return Path(storage_dir) / "qr" / key[:2] / f"{key}.txt"
+
+    def _put(self, key: str, label: QrLabel) -> None:
+        self._entries[key] = label
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _lookup(self, storage_dir: str, key: str) -> QrLabel | None:
+        with self.lock:
+            label = self._entries.get(key)
+            if label is not None:
+                self._entries.move_to_end(key)
+                return label
+        path = self.path(storage_dir, key)
+        if not path.exists():
+            return None
+        rows = tuple(path.read_text().split())
+        label = QrLabel(rows, qr_png(rows))
+        with self.lock:
+            self._put(key, label)
+        return label
+
+    def labels(
+        self, payloads: Iterable[str], storage_dir: str, renderer: DocumentRenderer
+    ) -> tuple[dict[str, QrLabel], int]:
+        """Label of every distinct payload by key, and how many had to be encoded.
+
+        Misses are encoded together on the renderer's process pool.
+        """
+
+        found: dict[str, QrLabel] = {}
+        missing: dict[str, str] = {}
+        for payload in payloads:
+            key = label_key(payload)
+            if key in found or key in missing:
+                continue
+            label = self._lookup(storage_dir, key)
+            if label is None:
+                missing[key] = payload
+            else:
+                found[key] = label
+        if missing:
+            for key, (rows, png) in zip(missing, renderer.qr_labels(list(missing.values()))):
+                path = self.path(storage_dir, key)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                partial = path.with_suffix(".part")
+                partial.write_text("\n".join(rows))
+                partial.replace(path)
+                found[key] = QrLabel(rows, png)
+                with self.lock:
+                    self._put(key, found[key])
+        with self.lock:
+            self.hits += len(found) - len(missing)
+            self.misses += len(missing)
+        return found, len(missing)
+
+    def clear(self) -> None:
+        with self.lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+qr_label_cache = QrLabelCache()
+
+
+@dataclass(frozen=True)
+class ChecklistEntry:
+    item_id: str
+    name: str
+    serial_number: str | None
+    kit: str | None
+
+    @property
+    def key(self) -> str:
+        return label_key(item_payload(self.item_id))
+
+    @property
+    def image_name(self) -> str:
+        return f"qr/{slug(self.serial_number or self.name)}-{self.item_id[:8]}.png"
+
+
+@dataclass(frozen=True)
+class MissionChecklist:
+    """Plain data of one checklist (a mission's, or a truck's): its header, entries and bundle name."""
+
+    bundle_id: str
+    filename: str
+    header: dict
+    entries: tuple[ChecklistEntry, ...]
+
+    def context(self, labels: dict[str, QrLabel]) -> dict:
+        items = [
+            {
+                "qr": entry.key,
+                "name": entry.name,
+                "serial": entry.serial_number or "-",
+                "kit": entry.kit or "-",
+            }
+            for entry in self.entries
+        ]
+        codes = {entry.key: labels[entry.key].rows for entry in self.entries}
+        return {**self.header, "count": len(items), "items": items, "qr_codes": codes}
+
+
+def _reserved_entries(
+    session: Session, organization_id: str, column: InstrumentedAttribute[str | None], keys: Iterable[str]
+) -> Iterator[tuple[str, ChecklistEntry]]:
+    """Reserved items of the reservations whose ``column`` is in ``keys``, by kit then name."""
+
+    rows = session.execute(
+        select(column, EquipmentItem.id, EquipmentItem.name, EquipmentItem.serial_number, EquipmentKit.name)
+        .join(EquipmentReservationItem, EquipmentReservationItem.reservation_id == EquipmentReservation.id)
+        .join(EquipmentItem, EquipmentItem.id == EquipmentReservationItem.item_id)
+        .outerjoin(EquipmentKit, EquipmentKit.id == EquipmentReservation.kit_id)
+        .where(EquipmentReservation.organization_id == organization_id)
+        .where(column.in_(list(keys)))
+        .order_by(EquipmentKit.name, EquipmentItem.name, EquipmentItem.id)
+    )
+    for key, item_id, name, serial_number, kit in rows:
+        yield key, ChecklistEntry(item_id, name, serial_number, kit)
+
+
+def load_checklists(
+    session: Session, organization_id: str, mission_ids: Sequence[str], generated: datetime
+) -> list[MissionChecklist]:
+    """Checklists of the given missions, in mission start order: every item reserved for each."""
+
+    missions = session.execute(
+        select(ScheduledMission.id, ScheduledMission.starts_at, ScheduledMission.ends_at, MissionTemplate.name, Venue.name)
+        .join(MissionTemplate, MissionTemplate.id == ScheduledMission.template_id)
+        .outerjoin(Venue, Venue.id == ScheduledMission.venue_id)
+        .where(ScheduledMission.organization_id == organization_id)
+        .where(ScheduledMission.id.in_(list(mission_ids)))
+        .order_by(ScheduledMission.starts_at, ScheduledMission.id)
+    ).all()
+    entries: dict[str, dict[str, ChecklistEntry]] = {mission.id: {} for mission in missions}
+    for mission_id, entry in _reserved_entries(session, organization_id, EquipmentReservation.mission_id, entries):
+        entries[mission_id].setdefault(entry.item_id, entry)
+
+    checklists = []
+    for mission_id, starts_at, ends_at, title, venue in missions:
+        header = {
+            "title": f"Liste de chargement {title} {starts_at:%d/%m/%Y}",
+            "mission": title,
+            "day": f"{starts_at:%d/%m/%Y}",
+            "time": f"{starts_at:%H:%M}-{ends_at:%H:%M}",
+            "venue": venue or "-",
+            "generated": f"{generated:%d/%m/%Y %H:%M} UTC",
+        }
+        filename = f"chargement-{starts_at:%Y-%m-%d}-{slug(title)}-{mission_id[:8]}"
+        checklists.append(MissionChecklist(mission_id, filename, header, tuple(entries[mission_id].values())))
+    return checklists
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target: ``zipfile`` then emits data descriptors and never seeks back."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def bundle_chunks(
+    checklist: MissionChecklist, pdf: bytes, labels: dict[str, QrLabel], created: datetime
+) -> Iterator[bytes]:
+    """ZIP of the checklist PDF and one PNG label per item, yielded entry by entry."""
+
+    sink = _ChunkSink()
+    stamp = created.timetuple()[:6]
+    # PDF streams and PNG data are already deflated: store them as they are.
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr(zipfile.ZipInfo(f"{checklist.filename}.pdf", stamp), pdf)
+        yield sink.drain()
+        for entry in checklist.entries:
+            archive.writestr(zipfile.ZipInfo(entry.image_name, stamp), labels[entry.key].png)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _render(
+    checklists: Sequence[MissionChecklist], storage_dir: str, created: datetime, renderer: DocumentRenderer
+) -> tuple[dict[str, QrLabel], int, Iterator[bytes]]:
+    payloads = (item_payload(entry.item_id) for checklist in checklists for entry in checklist.entries)
+    labels, encoded = qr_label_cache.labels(payloads, storage_dir, renderer)
+    pdfs = renderer.render(CHECKLIST, [checklist.context(labels) for checklist in checklists], created)
+    return labels, encoded, pdfs
+
+
+def stream_mission_checklist(
+    session: Session,
+    token_value: str,
+    storage_dir: str,
+    mission_id: str,
+    renderer: DocumentRenderer | None = None,
+) -> tuple[str, Iterator[bytes]]:
+    """File name and chunks of one mission's bundle, rendered now and zipped while it is sent."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    created = now_utc().replace(microsecond=0)
+    checklists = load_checklists(session, context.membership.organization_id, [mission_id], created)
+    if not checklists:
+        raise DomainError("Mission not found", status_code=404)
+    labels, _, pdfs = _render(checklists, storage_dir, created, renderer or document_renderer)
+    [pdf] = list(pdfs)
+    return f"{checklists[0].filename}.zip", bundle_chunks(checklists[0], pdf, labels, created)
+
+
+def stream_truck_checklist(
+    session: Session,
+    token_value: str,
+    storage_dir: str,
+    plan_id: str,
+    truck_id: str,
+    renderer: DocumentRenderer | None = None,
+) -> tuple[str, Iterator[bytes]]:
+    """Bundle of everything a truck of a solved logistics plan carries, with its stops in order."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    plan = session.get(LogisticsPlan, plan_id)
+    if plan is None or plan.organization_id != organization_id:
+        raise DomainError("Logistics plan not found", status_code=404)
+    route = next((route for route in plan.routes if route["truck_id"] == truck_id), None)
+    truck = session.get(Truck, truck_id)
+    if route is None or truck is None:
+        raise DomainError("Truck has no route in this plan", status_code=404)
+    created = now_utc().replace(microsecond=0)
+    entries: dict[str, ChecklistEntry] = {}
+    for _, entry in _reserved_entries(session, organization_id, EquipmentReservation.id, route["loads"]):
+        entries.setdefault(entry.item_id, entry)
+    names = dict(session.execute(select(Venue.id, Venue.name).where(Venue.id.in_(route["stops"]))).all())
+    header = {
+        "title": f"Liste de chargement {truck.name} {plan.day:%d/%m/%Y}",
+        "mission": f"Camion {truck.name}",
+        "day": f"{plan.day:%d/%m/%Y}",
+        "time": f"- plan v{plan.revision}",
+        "venue": " > ".join(names.get(stop, "?") for stop in route["stops"]) or "-",
+        "generated": f"{created:%d/%m/%Y %H:%M} UTC",
+    }
+    filename = f"chargement-{plan.day:%Y-%m-%d}-{slug(truck.name)}-{truck.id[:8]}"
+    checklist = MissionChecklist(truck_id, filename, header, tuple(entries.values()))
+    labels, _, pdfs = _render([checklist], storage_dir, created, renderer or document_renderer)
+    [pdf] = list(pdfs)
+    return f"{filename}.zip", bundle_chunks(checklist, pdf, labels, created)
+
+
+def bundle_path(storage_dir: str, organization_id: str, job_id: str, mission_id: str) -> Path:
+    return Path(storage_dir) / organization_id / "checklists" / job_id / f"{mission_id}.zip"
+
+
+def write_bundles(
+    job: Job,
+    checklists: Sequence[MissionChecklist],
+    storage_dir: str,
+    organization_id: str,
+    created: datetime,
+    renderer: DocumentRenderer,
+) -> dict:
+    """Encode the batch's distinct labels once, then write one ZIP per mission as its PDF comes back."""
+
+    total, size = len(checklists), 0
+    ready: list[str] = []
+    job.publish({"missions": 0, "total": total, "ready": []}, progress=0.0)
+    labels, encoded, pdfs = _render(checklists, storage_dir, created, renderer)
+    for done, (checklist, pdf) in enumerate(zip(checklists, pdfs), start=1):
+        target = bundle_path(storage_dir, organization_id, job.id, checklist.bundle_id)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_suffix(".part")
+        try:
+            with partial.open("wb") as handle:
+                for chunk in bundle_chunks(checklist, pdf, labels, created):
+                    handle.write(chunk)
+                    size += len(chunk)
+            partial.replace(target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        ready.append(checklist.bundle_id)
+        job.publish({"missions": done, "total": total, "ready": list(ready)}, progress=done / total)
+    items = sum(len(checklist.entries) for checklist in checklists)
+    return {
+        "missions": total,
+        "total": total,
+        "ready": ready,
+        "items": items,
+        "labels": len(labels),
+        "encoded": encoded,
+        "bytes": size,
+    }
+
+
+def _window_missions(session: Session, organization_id: str, start: datetime, end: datetime) -> list[str]:
+    """Missions starting in the window that have equipment reserved for them."""
+
+    return list(
+        session.scalars(
+            select(ScheduledMission.id)
+            .where(ScheduledMission.organization_id == organization_id)
+            .where(ScheduledMission.starts_at >= start)
+            .where(ScheduledMission.starts_at < end)
+            .where(
+                select(EquipmentReservation.id)
+                .where(EquipmentReservation.mission_id == ScheduledMission.id)
+                .exists()
+            )
+            .order_by(ScheduledMission.starts_at)
+        )
+    )
+
+
+def start_checklist_batch(
+    session: Session,
+    token_value: str,
+    storage_dir: str,
+    mission_ids: Sequence[str] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    renderer: DocumentRenderer | None = None,
+) -> Job:
+    """Checklist bundles of the given missions, or of every equipped mission starting in the window."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    if not mission_ids:
+        if start is None or end is None:
+            raise DomainError("Give mission ids or a window", status_code=422)
+        start, end = as_utc(start), as_utc(end)
+        if end <= start:
+            raise DomainError("Window end must be after its start", status_code=422)
+        if end - start > MAX_CHECKLIST_WINDOW:
+            raise DomainError(f"Window cannot exceed {MAX_CHECKLIST_WINDOW.days} days", status_code=422)
+        mission_ids = _window_missions(session, organization_id, start, end)
+    unique_ids = list(dict.fromkeys(mission_ids))
+    if len(unique_ids) > MAX_CHECKLIST_MISSIONS:
+        raise DomainError(f"A batch cannot exceed {MAX_CHECKLIST_MISSIONS} missions", status_code=422)
+    created = now_utc().replace(microsecond=0)
+    checklists = load_checklists(session, organization_id, unique_ids, created)
+    if len(checklists) != len(unique_ids):
+        raise DomainError("Mission not found" if unique_ids else "No equipped missions in this window", status_code=404)
+    pool = renderer or document_renderer
+
+    def work(job: Job) -> dict:
+        return write_bundles(job, checklists, storage_dir, organization_id, created, pool)
+
+    return job_registry.submit(CHECKLIST_JOB_KIND, organization_id, work)
+
+
+def get_checklist_batch(session: Session, token_value: str, job_id: str) -> Job:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    job = job_registry.get(context.membership.organization_id, job_id)
+    if job is None or job.kind != CHECKLIST_JOB_KIND:
+        raise DomainError("Checklist batch not found", status_code=404)
+    return job
+
+
+def open_checklist_bundle(
+    session: Session, token_value: str, storage_dir: str, job_id: str, mission_id: str
+) -> Iterator[bytes]:
+    """Chunks of one mission's bundle from a batch, available as soon as that mission is written."""
+
+    job = get_checklist_batch(session, token_value, job_id)
+    if mission_id not in (job.result or {}).get("ready", ()):
+        raise DomainError("Checklist bundle is not ready", status_code=409)
+    path = bundle_path(storage_dir, job.organization_id, job.id, mission_id)
+    if not path.exists():
+        raise DomainError("Checklist bundle has expired", status_code=410)
+
+    def chunks() -> Iterator[bytes]:
+        with path.open("rb") as handle:
+            while chunk := handle.read(READ_CHUNK):
+                yield chunk
+
+    return chunks()
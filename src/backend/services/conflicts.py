@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Literal
+
+ConflictKind = Literal["person", "venue", "travel"]
+TravelLookup = Callable[[str | None, str | None], int]
+
+
+@dataclass(frozen=True, slots=True)
+class Interval:
+    """A half-open ``[start, end)`` time span tracked by the conflict engine."""
+
+    key: str
+    start: datetime
+    end: datetime
+    mission_id: str
+    person_id: str | None = None
+    venue_id: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Conflict:
+    kind: ConflictKind
+    resource_id: str
+    first_key: str
+    second_key: str
+    overlap_start: datetime
+    overlap_end: datetime
+
+    @property
+    def identity(self) -> tuple[str, str, str, str]:
+        return self.kind, self.resource_id, self.first_key, self.second_key
+
+
+@dataclass(frozen=True, slots=True)
+class ConflictDelta:
+    """Outcome of moving one interval: what appeared, what went away, what remains."""
+
+    added: list[Conflict]
+    resolved: list[Conflict]
+    current: list[Conflict]
+
+    @classmethod
+    def between(cls, before: list[Conflict], after: list[Conflict]) -> "ConflictDelta":
+        before_ids = {conflict.identity for conflict in before}
+        after_ids = {conflict.identity for conflict in after}
+        return cls(
+            added=[conflict for conflict in after if conflict.identity not in before_ids],
+            resolved=[conflict for conflict in before if conflict.identity not in after_ids],
+            current=after,
+        )
+
+    @classmethod
+    def merge(cls, deltas: Iterable["ConflictDelta"]) -> "ConflictDelta":
+        added: dict[tuple[str, str, str, str], Conflict] = {}
+        resolved: dict[tuple[str, str, str, str], Conflict] = {}
+        current: dict[tuple[str, str, str, str], Conflict] = {}
+        for delta in deltas:
+            added.update((conflict.identity, conflict) for conflict in delta.added)
+            resolved.update((conflict.identity, conflict) for conflict in delta.resolved)
+            current.update((conflict.identity, conflict) for conflict in delta.current)
+        return cls(added=list(added.values()), resolved=list(resolved.values()), current=list(current.values()))
+
+
+def _dedupe(conflicts: Iterable[Conflict]) -> list[Conflict]:
+    return list({conflict.identity: conflict for conflict in conflicts}.values())
+
+
+def _make_conflict(kind: ConflictKind, resource_id: str, left: Interval, right: Interval) -> Conflict:
+    first, second = (left, right) if left.key <= right.key else (right, left)
+    return Conflict(
+        kind=kind,
+        resource_id=resource_id,
+        first_key=first.key,
+        second_key=second.key,
+        overlap_start=max(left.start, right.start),
+        overlap_end=min(left.end, right.end),
+    )
+
+
+class IntervalIndex:
+    """Intervals of one resource kept sorted by start.
+
+    A running maximum of end times lets an overlap probe bisect on the start
+    column and walk backwards only while an earlier interval can still reach
+    the probe, so single checks stay logarithmic for non-nested schedules.
+    """
+
+    __slots__ = ("_starts", "_ends", "_max_ends", "_items")
+
+    def __init__(self) -> None:
+        self._starts: list[datetime] = []
+        self._ends: list[datetime] = []
+        self._max_ends: list[datetime] = []
+        self._items: list[Interval] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return iter(self._items)
+
+    def _refresh_max_ends(self, position: int) -> None:
+        del self._max_ends[position:]
+        running = self._max_ends[-1] if self._max_ends else None
+        for end in self._ends[position:]:
+            running = end if running is None or end > running else running
+            self._max_ends.append(running)
+
+    def add(self, interval: Interval) -> None:
+        position = bisect_right(self._starts, interval.start)
+        self._starts.insert(position, interval.start)
+        self._ends.insert(position, interval.end)
+        self._items.insert(position, interval)
+        self._refresh_max_ends(position)
+
+    def remove(self, interval: Interval) -> bool:
+        position = bisect_left(self._starts, interval.start)
+        while position < len(self._items) and self._starts[position] == interval.start:
+            if self._items[position].key == interval.key:
+                del self._starts[position]
+                del self._ends[position]
+                del self._items[position]
+                self._refresh_max_ends(position)
+                return True
+            position += 1
+        return False
+
+    def overlapping(self, start: datetime, end: datetime, *, exclude: str | None = None) -> list[Interval]:
+        """Return indexed intervals intersecting ``[start, end)``."""
+
+        matches: list[Interval] = []
+        position = bisect_left(self._starts, end) - 1
+        while position >= 0 and self._max_ends[position] > start:
+            item = self._items[position]
+            if self._ends[position] > start and item.key != exclude:
+                matches.append(item)
+            position -= 1
+        return matches
+
+    def neighbours(self, interval: Interval) -> tuple[Interval | None, Interval | None]:
+        """Closest non-overlapping intervals before and after ``interval``."""
+
+        previous: Interval | None = None
+        position = bisect_right(self._starts, interval.start) - 1
+        while position >= 0:
+            item = self._items[position]
+            if item.key != interval.key and self._ends[position] <= interval.start:
+                previous = item
+                break
+            position -= 1
+
+        following: Interval | None = None
+        position = bisect_left(self._starts, interval.end)
+        while position < len(self._items):
+            item = self._items[position]
+            if item.key != interval.key:
+                following = item
+                break
+            position += 1
+        return previous, following
+
+    def adjacent_pairs(
+        self, start: datetime | None = None, end: datetime | None = None, *, margin: int = 2
+    ) -> Iterator[tuple[Interval, Interval]]:
+        """Consecutive pairs by start, optionally only around ``[start, end)``."""
+
+        low, high = 0, len(self._items)
+        if start is not None and end is not None:
+            low = max(bisect_left(self._starts, start) - margin, 0)
+            high = min(bisect_right(self._starts, end) + margin, high)
+        for position in range(low, high - 1):
+            yield self._items[position], self._items[position + 1]
+
+    def sweep(self) -> Iterator[tuple[Interval, Interval]]:
+        """Yield every overlapping pair with a single sweep over the sorted intervals."""
+
+        active: list[tuple[datetime, int, Interval]] = []
+        for order, item in enumerate(self._items):
+            while active and active[0][0] <= item.start:
+                heapq.heappop(active)
+            for _, _, other in active:
+                yield other, item
+            heapq.heappush(active, (item.end, order, item))
+
+
+class ConflictEngine:
+    """Per-person and per-venue interval indexes for a planning window.
+
+    Assignments are indexed by person to detect double booking; missions are
+    indexed by venue to detect two missions occupying the same place. With a
+    ``travel`` lookup, consecutive assignments of one person at different
+    venues must also leave enough time to get from one to the other.
+    """
+
+    def __init__(self, travel: TravelLookup | None = None) -> None:
+        self._travel = travel
+        self._people: dict[str, IntervalIndex] = {}
+        self._venues: dict[str, IntervalIndex] = {}
+        self._assignments: dict[str, Interval] = {}
+        self._missions: dict[str, Interval] = {}
+
+    @classmethod
+    def from_intervals(
+        cls,
+        assignments: Iterable[Interval],
+        missions: Iterable[Interval] = (),
+        travel: TravelLookup | None = None,
+    ) -> "ConflictEngine":
+        engine = cls(travel)
+        for interval in assignments:
+            engine.add_assignment(interval)
+        for interval in missions:
+            engine.add_mission(interval)
+        return engine
+
+    @property
+    def assignment_count(self) -> int:
+        return len(self._assignments)
+
+    def get_assignment(self, key: str) -> Interval | None:
+        return self._assignments.get(key)
+
+    def get_mission(self, key: str) -> Interval | None:
+        return self._missions.get(key)
+
+    def add_assignment(self, interval: Interval) -> None:
+        if interval.person_id is None:
+            raise ValueError("Assignment intervals require a person")
+        self.remove_assignment(interval.key)
+        self._assignments[interval.key] = interval
+        self._people.setdefault(interval.person_id, IntervalIndex()).add(interval)
+
+    def remove_assignment(self, key: str) -> Interval | None:
+        interval = self._assignments.pop(key, None)
+        if interval is not None and interval.person_id is not None:
+            self._people[interval.person_id].remove(interval)
+        return interval
+
+    def add_mission(self, interval: Interval) -> None:
+        self.remove_mission(interval.key)
+        self._missions[interval.key] = interval
+        if interval.venue_id is not None:
+            self._venues.setdefault(interval.venue_id, IntervalIndex()).add(interval)
+
+    def remove_mission(self, key: str) -> Interval | None:
+        interval = self._missions.pop(key, None)
+        if interval is not None and interval.venue_id is not None:
+            self._venues[interval.venue_id].remove(interval)
+        return interval
+
+    def _travel_conflict(self, person_id: str, before: Interval, after: Interval) -> Conflict | None:
+        if self._travel is None or before.venue_id == after.venue_id or before.end > after.start:
+            return None
+        required = timedelta(minutes=self._travel(before.venue_id, after.venue_id))
+        if after.start - before.end >= required:
+            return None
+        first, second = (before, after) if before.key <= after.key else (after, before)
+        return Conflict(
+            kind="travel",
+            resource_id=person_id,
+            first_key=first.key,
+            second_key=second.key,
+            overlap_start=after.start,
+            overlap_end=before.end + required,
+        )
+
+    def _local_travel(self, person_id: str, spans: Iterable[tuple[datetime, datetime]]) -> list[Conflict]:
+        index = self._people.get(person_id)
+        if index is None or self._travel is None:
+            return []
+        found = []
+        for start, end in spans:
+            for before, after in index.adjacent_pairs(start, end):
+                conflict = self._travel_conflict(person_id, before, after)
+                if conflict is not None:
+                    found.append(conflict)
+        return found
+
+    def check_assignment(self, interval: Interval) -> list[Conflict]:
+        """Conflicts ``interval`` has with the indexed assignments of the same person."""
+
+        if interval.person_id is None:
+            return []
+        index = self._people.get(interval.person_id)
+        if index is None:
+            return []
+        conflicts = [
+            _make_conflict("person", interval.person_id, interval, other)
+            for other in index.overlapping(interval.start, interval.end, exclude=interval.key)
+        ]
+        if self._travel is not None:
+            previous, following = index.neighbours(interval)
+            for before, after in ((previous, interval), (interval, following)):
+                if before is not None and after is not None:
+                    conflict = self._travel_conflict(interval.person_id, before, after)
+                    if conflict is not None:
+                        conflicts.append(conflict)
+        return conflicts
+
+    def check_mission(self, interval: Interval) -> list[Conflict]:
+        """Conflicts ``interval`` has with other missions held at the same venue."""
+
+        if interval.venue_id is None:
+            return []
+        index = self._venues.get(interval.venue_id)
+        if index is None:
+            return []
+        return [
+            _make_conflict("venue", interval.venue_id, interval, other)
+            for other in index.overlapping(interval.start, interval.end, exclude=interval.key)
+        ]
+
+    def move_assignment(self, key: str, interval: Interval | None) -> ConflictDelta:
+        """Replace the assignment ``key`` with ``interval`` and report the conflict delta.
+
+        Only the person index holding the assignment is probed, before and after
+        the move, together with the adjacent pairs around the old and new spans
+        whose travel gaps may have changed. Passing ``None`` drops the
+        assignment (it left the window).
+        """
+
+        previous = self._assignments.get(key)
+        spans = [(item.start, item.end) for item in (previous, interval) if item is not None]
+        people = {item.person_id for item in (previous, interval) if item is not None and item.person_id}
+
+        before = self.check_assignment(previous) if previous is not None else []
+        for person_id in people:
+            before.extend(self._local_travel(person_id, spans))
+        self.remove_assignment(key)
+        after: list[Conflict] = []
+        if interval is not None:
+            self.add_assignment(interval)
+            after = self.check_assignment(interval)
+        for person_id in people:
+            after.extend(self._local_travel(person_id, spans))
+
+        delta = ConflictDelta.between(_dedupe(before), _dedupe(after))
+        current = [conflict for conflict in delta.current if interval is not None and key in conflict.identity]
+        return ConflictDelta(added=delta.added, resolved=delta.resolved, current=current)
+
+    def audit(self) -> list[Conflict]:
+        """Every person and venue conflict in the engine, in O(n log n + k)."""
+
+        conflicts: list[Conflict] = []
+        for person_id, index in self._people.items():
+            conflicts.extend(_make_conflict("person", person_id, a, b) for a, b in index.sweep())
+            if self._travel is not None:
+                for before, after in index.adjacent_pairs():
+                    conflict = self._travel_conflict(person_id, before, after)
+                    if conflict is not None:
+                        conflicts.append(conflict)
+        for venue_id, index in self._venues.items():
+            conflicts.extend(_make_conflict("venue", venue_id, a, b) for a, b in index.sweep())
+        return conflicts
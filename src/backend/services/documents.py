@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..models import DocumentBatch, Organization, PayrollClose, PayrollSnapshotPerson, Timesheet, User
+from ..rbac import Permission
+from ..security import now_utc
+from .access import ensure_permission, local_time, organization_zone, resolve_context
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .payroll import compiled_rules, compute_payroll, covering_closes, load_batch, load_payroll_policy
+from .pdf import load_templates, render_document
+from .planning import ensure_member
+from .qr import QrRows, qr_label
+from .timesheets import MAX_PERIOD_DAYS, local_minutes
+
+AEM = "aem"
+TIMESHEET = "timesheet"
+JOB_KIND_PREFIX = "documents."
+MAX_DOCUMENTS = 2000
+READ_CHUNK = 64 * 1024
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+EXPIRED = "expired"
+
+# Permission needed to produce each kind of document for other people.
+KIND_PERMISSIONS = {AEM: Permission.MANAGE_PAYROLL, TIMESHEET: Permission.MANAGE_TIMESHEETS}
+
+
+def _hours(minutes: int) -> str:
+    return f"{minutes // 60}h{minutes % 60:02d}"
+
+
+def _euros(cents: int) -> str:
+    units, rest = divmod(int(cents), 100)
+    return f"{units:,}".replace(",", " ") + f",{rest:02d} €"
+
+
+def slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-") or "document"
+
+
+class DocumentRenderer:
+    """Process pool rendering documents off the request and job threads.
+
+    Workers parse every template once in their initializer, so a task only
+    carries the document context. The pool starts on first use from a
+    ``forkserver`` (``spawn`` where there is none) rather than by forking a
+    process whose request, job and scheduler threads may hold locks. Workers
+    import the rendering modules only: the package builds no application on
+    import, and the fork server preloads those modules once.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self._max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                if context.get_start_method() == "forkserver":
+                    context.set_forkserver_preload([render_document.__module__, qr_label.__module__])
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers, mp_context=context, initializer=load_templates
+                )
+            return self._executor
+
+    def render(self, kind: str, contexts: Sequence[dict], created: datetime) -> Iterator[bytes]:
+        """PDFs in the order of ``contexts``, yielded as soon as each one is ready."""
+
+        chunksize = max(1, len(contexts) // (self._max_workers * 4))
+        return self._pool().map(render_document, repeat(kind), contexts, repeat(created), chunksize=chunksize)
+
+    def qr_labels(self, payloads: Sequence[str]) -> Iterator[tuple[QrRows, bytes]]:
+        """QR module rows and PNG image of each payload, in order."""
+
+        chunksize = max(1, len(payloads) // (self._max_workers * 4))
+        return self._pool().map(qr_label, payloads, chunksize=chunksize)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+document_renderer = DocumentRenderer()
+
+
+@dataclass(frozen=True)
+class DocumentSpec:
+    """Plain data of one document: handed to the pool, never a session object."""
+
+    filename: str
+    context: dict
+
+
+def _period_check(kind: str, period_start: date, period_end: date) -> None:
+    if period_end <= period_start:
+        raise DomainError("Period end must be after its start", status_code=422)
+    if (period_end - period_start).days > MAX_PERIOD_DAYS:
+        raise DomainError(f"Period cannot exceed {MAX_PERIOD_DAYS} days", status_code=422)
+    if kind == AEM:
+        following = (period_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if period_start.day != 1 or period_end != following:
+            raise DomainError("An AEM covers exactly one calendar month", status_code=422)
+
+
+def _base_context(employer: str, employee: str, period_start: date, period_end: date, generated: datetime) -> dict:
+    return {
+        "employer": employer,
+        "employee": employee,
+        "period_start": period_start.strftime("%d/%m/%Y"),
+        "period_end": (period_end - timedelta(days=1)).strftime("%d/%m/%Y"),
+        "generated": generated.strftime("%d/%m/%Y %H:%M UTC"),
+    }
+
+
+@dataclass(frozen=True)
+class PersonPay:
+    """Priced lines of one person for a month, column by column; ``zone`` is the clock they were priced on."""
+
+    user_id: str
+    cachet: bool
+    zone: str
+    work_day: list[int]
+    start: list[int]
+    minutes: list[int]
+    gross: list[int]
+
+
+def _live_pay(session: Session, organization_id: str, period_start: date, period_end: date) -> list[PersonPay]:
+    zone = organization_zone(session, organization_id).key
+    batch = load_batch(session, organization_id, period_start, period_end)
+    result = compute_payroll(batch, compiled_rules.get(load_payroll_policy(session, organization_id)))
+    people = []
+    for index, user_id in enumerate(batch.person_ids):
+        rows = np.flatnonzero(batch.person == index)
+        people.append(
+            PersonPay(
+                user_id,
+                bool(batch.cachet[rows[0]]),
+                zone,
+                batch.work_day[rows].tolist(),
+                batch.start[rows].tolist(),
+                batch.minutes[rows].tolist(),
+                result.lines["gross"][rows].tolist(),
+            )
+        )
+    return people
+
+
+def _snapshot_pay(session: Session, close_ids: Sequence[str], default_zone: str) -> list[PersonPay]:
+    """Snapshot lines, on the clock frozen with their close."""
+
+    return [
+        PersonPay(row.user_id, row.cachet, (rules or {}).get("timezone", default_zone), **row.columns)
+        for row, rules in session.execute(
+            select(PayrollSnapshotPerson, PayrollClose.timesheet_rules)
+            .join(PayrollClose, PayrollClose.id == PayrollSnapshotPerson.close_id)
+            .where(PayrollSnapshotPerson.close_id.in_(close_ids))
+        )
+    ]
+
+
+def aem_specs(
+    session: Session,
+    organization_id: str,
+    period_start: date,
+    period_end: date,
+    user_ids: Sequence[str] | None,
+    generated: datetime,
+) -> list[DocumentSpec]:
+    """One AEM per person with validated hours in the month.
+
+    A closed month is read from its payroll snapshots only; an open one is
+    priced by the payroll engine from the validated timesheets.
+    """
+
+    organization = session.get(Organization, organization_id)
+    close_ids = covering_closes(session, organization_id, period_start, period_end)
+    people = (
+        _snapshot_pay(session, close_ids, organization.timezone)
+        if close_ids is not None
+        else _live_pay(session, organization_id, period_start, period_end)
+    )
+    if user_ids:
+        wanted = set(user_ids)
+        people = [person for person in people if person.user_id in wanted]
+    emails = dict(
+        session.execute(select(User.id, User.email).where(User.id.in_([person.user_id for person in people]))).all()
+    )
+    specs = []
+    for person in sorted(people, key=lambda item: emails[item.user_id]):
+        order = sorted(range(len(person.start)), key=person.start.__getitem__)
+        # ``work_day`` is already the local day; the start is UTC and is shifted to the same clock.
+        starts = local_minutes(np.asarray(person.start, dtype=np.int64), person.zone).tolist()
+        lines = [
+            {
+                "date": (date(1970, 1, 1) + timedelta(days=person.work_day[row])).strftime("%d/%m/%Y"),
+                "start": f"{starts[row] % 1440 // 60:02d}:{starts[row] % 60:02d}",
+                "hours": _hours(person.minutes[row]),
+                "gross": _euros(person.gross[row]),
+            }
+            for row in order
+        ]
+        email = emails[person.user_id]
+        context = _base_context(organization.name, email, period_start, period_end, generated)
+        context.update(
+            title=f"AEM {period_start:%m/%Y} {email}",
+            contract="Cachets" if person.cachet else "Heures",
+            lines=lines,
+            days=len(set(person.work_day)),
+            hours=_hours(sum(person.minutes)),
+            gross=_euros(sum(person.gross)),
+            cachets=len(lines) if person.cachet else 0,
+        )
+        filename = f"aem-{period_start:%Y-%m}-{slug(email.split('@')[0])}-{person.user_id[:8]}.pdf"
+        specs.append(DocumentSpec(filename, context))
+    return specs
+
+
+def timesheet_specs(
+    session: Session,
+    organization_id: str,
+    period_start: date,
+    period_end: date,
+    user_ids: Sequence[str] | None,
+    generated: datetime,
+) -> list[DocumentSpec]:
+    """One signable timesheet per person with sheets in the period."""
+
+    organization = session.get(Organization, organization_id)
+    query = (
+        select(Timesheet, User.email)
+        .join(User, User.id == Timesheet.user_id)
+        .where(Timesheet.organization_id == organization_id)
+        .where(Timesheet.work_date >= period_start)
+        .where(Timesheet.work_date < period_end)
+        .order_by(Timesheet.user_id, Timesheet.planned_start)
+    )
+    if user_ids:
+        query = query.where(Timesheet.user_id.in_(list(user_ids)))
+    people: dict[str, tuple[str, list[Timesheet]]] = {}
+    for timesheet, email in session.execute(query):
+        people.setdefault(timesheet.user_id, (email, []))[1].append(timesheet)
+
+    zone = organization_zone(session, organization_id)
+    specs = []
+    for user_id, (email, sheets) in people.items():
+        lines = [
+            {
+                "date": sheet.work_date.strftime("%d/%m/%Y"),
+                "planned": f"{local_time(sheet.planned_start, zone):%H:%M}-{local_time(sheet.planned_end, zone):%H:%M}",
+                "actual": (
+                    f"{local_time(sheet.actual_start, zone):%H:%M}-{local_time(sheet.actual_end, zone):%H:%M}"
+                    if sheet.actual_start is not None and sheet.actual_end is not None
+                    else "-"
+                ),
+                "pause": _hours(sheet.break_minutes),
+                "hours": _hours(sheet.planned_minutes),
+                "night": _hours(sheet.night_minutes),
+                "status": sheet.status,
+            }
+            for sheet in sheets
+        ]
+        context = _base_context(organization.name, email, period_start, period_end, generated)
+        context.update(
+            title=f"Feuille d'heures {email}",
+            lines=lines,
+            hours=_hours(sum(sheet.planned_minutes for sheet in sheets)),
+            night=_hours(sum(sheet.night_minutes for sheet in sheets)),
+        )
+        filename = f"heures-{period_start:%Y-%m-%d}-{slug(email.split('@')[0])}-{user_id[:8]}.pdf"
+        specs.append(DocumentSpec(filename, context))
+    return specs
+
+
+SPEC_LOADERS = {AEM: aem_specs, TIMESHEET: timesheet_specs}
+
+
+def archive_path(storage_dir: str, organization_id: str, job_id: str) -> Path:
+    return Path(storage_dir) / organization_id / f"{job_id}.zip"
+
+
+def write_archive(
+    report: Callable[[dict[str, int]], None],
+    specs: Sequence[DocumentSpec],
+    kind: str,
+    target: Path,
+    created: datetime,
+    renderer: DocumentRenderer,
+) -> dict[str, int]:
+    """Stream rendered PDFs into a ZIP as they come back from the pool, reporting the counts so far.
+
+    The archive is written under a temporary name and renamed once complete,
+    so a reader never sees a partial file.
+    """
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix(".part")
+    total, size = len(specs), 0
+    report({"documents": 0, "total": total, "bytes": 0})
+    try:
+        # Page streams are already deflated: store them as they are.
+        with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_STORED) as archive:
+            rendered = renderer.render(kind, [spec.context for spec in specs], created)
+            for done, (spec, pdf) in enumerate(zip(specs, rendered), start=1):
+                archive.writestr(zipfile.ZipInfo(spec.filename, created.timetuple()[:6]), pdf)
+                size += len(pdf)
+                report({"documents": done, "total": total, "bytes": size})
+        partial.replace(target)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return {"documents": total, "total": total, "bytes": size}
+
+
+def _set_batch(session: Session, batch_id: str, **values: object) -> None:
+    session.execute(update(DocumentBatch).where(DocumentBatch.id == batch_id).values(**values))
+    session.commit()
+
+
+def render_batch(
+    session: Session,
+    job: Job,
+    batch_id: str,
+    specs: Sequence[DocumentSpec],
+    kind: str,
+    target: Path,
+    created: datetime,
+    renderer: DocumentRenderer,
+    ttl: timedelta,
+) -> dict[str, int]:
+    """Write a batch archive, recording its progress on the batch row for every worker to read.
+
+    Progress is written at most every ``PROGRESS_INTERVAL_SECONDS``; the
+    final counts, the outcome and the expiry are written when it ends.
+    """
+
+    _set_batch(session, batch_id, status=RUNNING)
+    written = 0.0
+
+    def report(counts: dict[str, int]) -> None:
+        nonlocal written
+        job.publish(counts, progress=counts["documents"] / counts["total"])
+        if time.monotonic() - written >= PROGRESS_INTERVAL_SECONDS:
+            written = time.monotonic()
+            _set_batch(session, batch_id, documents=counts["documents"], size=counts["bytes"])
+
+    try:
+        totals = write_archive(report, specs, kind, target, created, renderer)
+    except Exception as error:
+        session.rollback()
+        _set_batch(
+            session, batch_id, status=FAILED, error=str(error) or error.__class__.__name__, finished_at=now_utc()
+        )
+        raise
+    finished = now_utc()
+    _set_batch(
+        session,
+        batch_id,
+        status=SUCCEEDED,
+        documents=totals["documents"],
+        size=totals["bytes"],
+        finished_at=finished,
+        expires_at=finished + ttl,
+    )
+    return totals
+
+
+def purge_expired_archives(session: Session, storage_dir: str, now: datetime | None = None) -> int:
+    """Delete the archives past their expiry and mark their batches expired; the number purged."""
+
+    expired = session.execute(
+        select(DocumentBatch.id, DocumentBatch.organization_id)
+        .where(DocumentBatch.status == SUCCEEDED)
+        .where(DocumentBatch.expires_at <= (now or now_utc()))
+    ).all()
+    if not expired:
+        return 0
+    for batch_id, organization_id in expired:
+        archive_path(storage_dir, organization_id, batch_id).unlink(missing_ok=True)
+    session.execute(
+        update(DocumentBatch).where(DocumentBatch.id.in_([batch_id for batch_id, _ in expired])).values(status=EXPIRED)
+    )
+    session.commit()
+    return len(expired)
+
+
+def start_document_batch(
+    session: Session,
+    token_value: str,
+    session_factory: sessionmaker[Session],
+    settings: Settings,
+    kind: str,
+    period_start: date,
+    period_end: date,
+    user_ids: Sequence[str] | None = None,
+    renderer: DocumentRenderer | None = None,
+) -> DocumentBatch:
+    """Load every document context now, then render them on the process pool from a job.
+
+    The batch row is committed before the job is queued, so its status is
+    readable from any worker; expired archives are purged on the way.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, KIND_PERMISSIONS[kind])
+    _period_check(kind, period_start, period_end)
+    organization_id = context.membership.organization_id
+    for user_id in set(user_ids or ()):
+        ensure_member(session, organization_id, user_id)
+    created = now_utc().replace(microsecond=0)
+    specs = SPEC_LOADERS[kind](session, organization_id, period_start, period_end, user_ids, created)
+    if not specs:
+        raise DomainError("No documents to generate for this period", status_code=404)
+    if len(specs) > MAX_DOCUMENTS:
+        raise DomainError(f"A batch cannot exceed {MAX_DOCUMENTS} documents", status_code=422)
+    purge_expired_archives(session, settings.document_dir)
+    batch = DocumentBatch(
+        organization_id=organization_id,
+        kind=kind,
+        status=QUEUED,
+        total=len(specs),
+        created_by=context.membership.user_id,
+        created_at=created,
+    )
+    session.add(batch)
+    session.commit()
+    batch_id = batch.id
+    target = archive_path(settings.document_dir, organization_id, batch_id)
+    ttl = timedelta(hours=settings.document_ttl_hours)
+    pool = renderer or document_renderer
+
+    def work(job: Job) -> dict[str, int]:
+        worker_session = session_factory()
+        try:
+            return render_batch(worker_session, job, batch_id, specs, kind, target, created, pool, ttl)
+        finally:
+            worker_session.close()
+
+    job_registry.submit(JOB_KIND_PREFIX + kind, organization_id, work, job_id=batch_id)
+    return batch
+
+
+def get_document_batch(session: Session, token_value: str, batch_id: str) -> DocumentBatch:
+    context = resolve_context(session, token_value)
+    batch = session.get(DocumentBatch, batch_id)
+    if batch is None or batch.organization_id != context.membership.organization_id:
+        raise DomainError("Document batch not found", status_code=404)
+    ensure_permission(context, KIND_PERMISSIONS[batch.kind])
+    return batch
+
+
+def open_archive(session: Session, token_value: str, storage_dir: str, batch_id: str) -> Iterator[bytes]:
+    """Chunks of a finished batch archive, read lazily from the storage directory."""
+
+    batch = get_document_batch(session, token_value, batch_id)
+    if batch.status == EXPIRED or (batch.expires_at is not None and batch.expires_at <= now_utc()):
+        raise DomainError("Document batch archive has expired", status_code=410)
+    if batch.status != SUCCEEDED:
+        raise DomainError("Document batch is not ready", status_code=409)
+    path = archive_path(storage_dir, batch.organization_id, batch.id)
+    if not path.exists():
+        raise DomainError("Document batch archive has expired", status_code=410)
+
+    def chunks() -> Iterator[bytes]:
+        with path.open("rb") as handle:
+            while chunk := handle.read(READ_CHUNK):
+                yield chunk
+
+    return chunks()
@@ -0,0 +1,587 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from ..models import (
+    EquipmentCalendarHead,
+    EquipmentItem,
+    EquipmentKit,
+    EquipmentReservation,
+    EquipmentReservationItem,
+    ScheduledMission,
+    Venue,
+)
+from ..rbac import Permission
+from ..schemas import EquipmentItemCreate, EquipmentItemUpdate, EquipmentKitCreate, EquipmentReservationCreate
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .planning import as_utc
+
+# Items in these conditions cannot be booked and never show as available.
+UNAVAILABLE_CONDITIONS = frozenset({"repair", "retired"})
+INDEX_HISTORY = timedelta(days=7)
+MAX_WINDOW = timedelta(days=366)
+MAX_RESERVATION_ITEMS = 2000
+
+Span = tuple[datetime, datetime]
+
+
+class ItemCalendar:
+    """Reservations of one item, sorted by start.
+
+    Reservations of an item never overlap, so the end column is sorted too:
+    a free check is a single bisect on the ends and the free spans of a
+    window are one walk over the reservations it touches.
+    """
+
+    __slots__ = ("_starts", "_ends", "_keys")
+
+    def __init__(self) -> None:
+        self._starts: list[datetime] = []
+        self._ends: list[datetime] = []
+        self._keys: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, start: datetime, end: datetime, key: str) -> None:
+        position = bisect_left(self._starts, start)
+        self._starts.insert(position, start)
+        self._ends.insert(position, end)
+        self._keys.insert(position, key)
+
+    def remove(self, key: str) -> bool:
+        try:
+            position = self._keys.index(key)
+        except ValueError:
+            return False
+        del self._starts[position], self._ends[position], self._keys[position]
+        return True
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        position = bisect_right(self._ends, start)
+        return position == len(self._keys) or self._starts[position] >= end
+
+    def free(self, start: datetime, end: datetime) -> list[Span]:
+        """Free spans within ``[start, end)``, in order."""
+
+        spans: list[Span] = []
+        cursor = start
+        position = bisect_right(self._ends, start)
+        while position < len(self._keys) and self._starts[position] < end:
+            if self._starts[position] > cursor:
+                spans.append((cursor, self._starts[position]))
+            cursor = max(cursor, self._ends[position])
+            position += 1
+        if cursor < end:
+            spans.append((cursor, end))
+        return spans
+
+
+_NO_RESERVATIONS = ItemCalendar()
+
+
+def intersect(left: list[Span], right: list[Span]) -> list[Span]:
+    """Intersection of two sorted lists of disjoint spans, by a linear merge."""
+
+    spans: list[Span] = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        end = min(left[i][1], right[j][1])
+        if start < end:
+            spans.append((start, end))
+        if left[i][1] <= right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return spans
+
+
+@dataclass
+class InventoryIndex:
+    """Per-item calendars of an organisation at one calendar revision.
+
+    Only reservations ending after ``horizon`` are held; windows starting
+    earlier are answered from a transient index loaded for them.
+    """
+
+    revision: int
+    horizon: datetime
+    calendars: dict[str, ItemCalendar] = field(default_factory=dict)
+
+    def calendar(self, item_id: str) -> ItemCalendar:
+        return self.calendars.get(item_id, _NO_RESERVATIONS)
+
+    def busy(self, item_ids: Iterable[str], start: datetime, end: datetime) -> list[str]:
+        return [item_id for item_id in item_ids if not self.calendar(item_id).is_free(start, end)]
+
+    def common_free(self, item_ids: Iterable[str], start: datetime, end: datetime) -> list[Span]:
+        """Spans of ``[start, end)`` during which every item is free.
+
+        The busiest calendars are merged first, so the running intersection
+        shrinks quickly and the loop stops as soon as it is empty.
+        """
+
+        free = [(start, end)]
+        for calendar in sorted((self.calendar(item_id) for item_id in item_ids), key=len, reverse=True):
+            if not calendar:
+                break
+            free = intersect(free, calendar.free(start, end))
+            if not free:
+                break
+        return free
+
+    def add(self, reservation_id: str, item_ids: Iterable[str], start: datetime, end: datetime) -> None:
+        for item_id in item_ids:
+            self.calendars.setdefault(item_id, ItemCalendar()).add(start, end, reservation_id)
+
+    def discard(self, reservation_id: str, item_ids: Iterable[str]) -> None:
+        for item_id in item_ids:
+            calendar = self.calendars.get(item_id)
+            if calendar is not None:
+                calendar.remove(reservation_id)
+
+
+def load_inventory_index(session: Session, organization_id: str, revision: int, horizon: datetime) -> InventoryIndex:
+    index = InventoryIndex(revision=revision, horizon=horizon)
+    rows = session.execute(
+        select(
+            EquipmentReservationItem.item_id,
+            EquipmentReservationItem.reservation_id,
+            EquipmentReservationItem.starts_at,
+            EquipmentReservationItem.ends_at,
+        )
+        .where(EquipmentReservationItem.organization_id == organization_id)
+        .where(EquipmentReservationItem.ends_at > horizon)
+        .order_by(EquipmentReservationItem.item_id, EquipmentReservationItem.starts_at)
+    )
+    calendars = index.calendars
+    for item_id, reservation_id, starts_at, ends_at in rows:
+        calendar = calendars.get(item_id)
+        if calendar is None:
+            calendar = calendars[item_id] = ItemCalendar()
+        calendar.add(starts_at, ends_at, reservation_id)
+    return index
+
+
+class InventoryIndexCache:
+    """Process-local inventory indexes, checked against the organisation's calendar revision.
+
+    Every booking write locks the calendar head and bumps its revision, so a
+    cached index whose revision matches the head is exact. Writers hold
+    ``lock`` from their check until the cached index is updated.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._entries: dict[str, InventoryIndex] = {}
+
+    def get(self, session: Session, organization_id: str, revision: int, start: datetime) -> InventoryIndex:
+        with self.lock:
+            cached = self._entries.get(organization_id)
+            if cached is not None and cached.revision == revision and start >= cached.horizon:
+                return cached
+            horizon = now_utc() - INDEX_HISTORY
+            if start < horizon:
+                return load_inventory_index(session, organization_id, revision, start)
+            index = load_inventory_index(session, organization_id, revision, horizon)
+            self._entries[organization_id] = index
+            return index
+
+    def advance(self, organization_id: str, revision: int, index: InventoryIndex) -> None:
+        """Record that ``index`` was brought from ``revision`` to the next one in place."""
+
+        with self.lock:
+            if self._entries.get(organization_id) is index and index.revision == revision:
+                index.revision = revision + 1
+            else:
+                self._entries.pop(organization_id, None)
+
+    def invalidate(self, organization_id: str) -> None:
+        with self.lock:
+            self._entries.pop(organization_id, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self._entries.clear()
+
+
+inventory_index_cache = InventoryIndexCache()
+
+
+def calendar_revision(session: Session, organization_id: str) -> int:
+    return session.scalar(
+        select(EquipmentCalendarHead.revision).where(EquipmentCalendarHead.organization_id == organization_id)
+    ) or 0
+
+
+def _lock_head(session: Session, organization_id: str) -> EquipmentCalendarHead:
+    head = session.scalar(
+        select(EquipmentCalendarHead)
+        .where(EquipmentCalendarHead.organization_id == organization_id)
+        .with_for_update()
+    )
+    if head is None:
+        head = EquipmentCalendarHead(organization_id=organization_id, revision=0)
+        session.add(head)
+    return head
+
+
+def _commit_booking(session: Session) -> None:
+    try:
+        session.commit()
+    except IntegrityError as error:
+        # Another writer created the calendar head first; nothing was booked.
+        session.rollback()
+        raise DomainError("Equipment calendar changed, please retry", status_code=409) from error
+
+
+def _validate_window(start: datetime, end: datetime) -> None:
+    if end <= start:
+        raise DomainError("End must be after start", status_code=422)
+    if end - start > MAX_WINDOW:
+        raise DomainError("Window cannot exceed 366 days", status_code=422)
+
+
+def get_item_for_org(session: Session, organization_id: str, item_id: str) -> EquipmentItem:
+    item = session.get(EquipmentItem, item_id)
+    if item is None or item.organization_id != organization_id:
+        raise DomainError("Equipment item not found", status_code=404)
+    return item
+
+
+def get_kit_for_org(session: Session, organization_id: str, kit_id: str) -> EquipmentKit:
+    kit = session.get(EquipmentKit, kit_id)
+    if kit is None or kit.organization_id != organization_id:
+        raise DomainError("Equipment kit not found", status_code=404)
+    return kit
+
+
+def _ensure_unique_serial(session: Session, organization_id: str, serial_number: str | None, item_id: str | None) -> None:
+    if not serial_number:
+        return
+    query = (
+        select(EquipmentItem.id)
+        .where(EquipmentItem.organization_id == organization_id)
+        .where(EquipmentItem.serial_number == serial_number)
+    )
+    if item_id is not None:
+        query = query.where(EquipmentItem.id != item_id)
+    if session.scalar(query) is not None:
+        raise DomainError("Equipment item with this serial number already exists", status_code=409)
+
+
+def create_item(session: Session, token_value: str, payload: EquipmentItemCreate) -> EquipmentItem:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    _ensure_unique_serial(session, organization_id, payload.serial_number, None)
+    item = EquipmentItem(
+        organization_id=organization_id,
+        name=payload.name.strip(),
+        category=payload.category,
+        serial_number=payload.serial_number,
+        condition=payload.condition,
+        weight_kg=payload.weight_kg,
+        volume_m3=payload.volume_m3,
+        notes=payload.notes,
+    )
+    session.add(item)
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def list_items(session: Session, token_value: str, category: str | None = None) -> list[EquipmentItem]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    query = (
+        select(EquipmentItem)
+        .where(EquipmentItem.organization_id == context.membership.organization_id)
+        .order_by(EquipmentItem.name, EquipmentItem.serial_number)
+    )
+    if category is not None:
+        query = query.where(EquipmentItem.category == category)
+    return list(session.scalars(query))
+
+
+def update_item(session: Session, token_value: str, item_id: str, payload: EquipmentItemUpdate) -> EquipmentItem:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    item = get_item_for_org(session, context.membership.organization_id, item_id)
+    data = payload.model_dump(exclude_unset=True)
+    if "serial_number" in data:
+        _ensure_unique_serial(session, item.organization_id, data["serial_number"], item.id)
+    if data.get("name") is not None:
+        data["name"] = data["name"].strip()
+    for name in ("name", "category", "serial_number", "condition", "weight_kg", "volume_m3", "notes"):
+        if name not in data or (data[name] is None and name in ("name", "condition")):
+            continue
+        setattr(item, name, data[name])
+    session.commit()
+    session.refresh(item)
+    return item
+
+
+def create_kit(session: Session, token_value: str, payload: EquipmentKitCreate) -> EquipmentKit:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    name = payload.name.strip()
+    existing = session.scalar(
+        select(EquipmentKit.id).where(EquipmentKit.organization_id == organization_id).where(EquipmentKit.name == name)
+    )
+    if existing is not None:
+        raise DomainError("Equipment kit with this name already exists", status_code=409)
+    kit = EquipmentKit(
+        organization_id=organization_id,
+        name=name,
+        notes=payload.notes,
+        items=load_items(session, organization_id, dict.fromkeys(payload.item_ids)),
+    )
+    session.add(kit)
+    session.commit()
+    session.refresh(kit)
+    return kit
+
+
+def list_kits(session: Session, token_value: str) -> list[EquipmentKit]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    return list(
+        session.scalars(
+            select(EquipmentKit)
+            .where(EquipmentKit.organization_id == context.membership.organization_id)
+            .options(selectinload(EquipmentKit.items))
+            .order_by(EquipmentKit.name)
+        )
+    )
+
+
+def get_kit(session: Session, token_value: str, kit_id: str) -> EquipmentKit:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    return get_kit_for_org(session, context.membership.organization_id, kit_id)
+
+
+def load_items(session: Session, organization_id: str, item_ids: Iterable[str]) -> list[EquipmentItem]:
+    """Items in the requested order; 404 when any of them is not in the organisation."""
+
+    wanted = list(item_ids)
+    items = {
+        item.id: item
+        for item in session.scalars(
+            select(EquipmentItem)
+            .where(EquipmentItem.organization_id == organization_id)
+            .where(EquipmentItem.id.in_(wanted))
+        )
+    }
+    if len(items) != len(wanted):
+        raise DomainError("Equipment item not found", status_code=404)
+    return [items[item_id] for item_id in wanted]
+
+
+@dataclass(frozen=True, slots=True)
+class ItemAvailability:
+    item: EquipmentItem
+    free: list[Span]
+    available: bool
+
+
+@dataclass(frozen=True, slots=True)
+class KitAvailability:
+    kit: EquipmentKit
+    start: datetime
+    end: datetime
+    free: list[Span]
+    busy_item_ids: list[str]
+
+    @property
+    def available(self) -> bool:
+        return self.free == [(self.start, self.end)]
+
+
+def item_availability(
+    session: Session,
+    token_value: str,
+    start: datetime,
+    end: datetime,
+    category: str | None = None,
+    only_available: bool = False,
+) -> list[ItemAvailability]:
+    """Free spans of every catalogue item (of a category) within ``[start, end)``."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    start, end = as_utc(start), as_utc(end)
+    _validate_window(start, end)
+    index = inventory_index_cache.get(session, organization_id, calendar_revision(session, organization_id), start)
+    query = (
+        select(EquipmentItem)
+        .where(EquipmentItem.organization_id == organization_id)
+        .order_by(EquipmentItem.name, EquipmentItem.serial_number)
+    )
+    if category is not None:
+        query = query.where(EquipmentItem.category == category)
+    result = []
+    for item in session.scalars(query):
+        calendar = index.calendar(item.id)
+        available = item.condition not in UNAVAILABLE_CONDITIONS and calendar.is_free(start, end)
+        if only_available and not available:
+            continue
+        free = [] if item.condition in UNAVAILABLE_CONDITIONS else calendar.free(start, end)
+        result.append(ItemAvailability(item, free, available))
+    return result
+
+
+def kit_availability(session: Session, token_value: str, kit_id: str, start: datetime, end: datetime) -> KitAvailability:
+    """When within ``[start, end)`` every item of the kit is free, and which items block the whole window."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    kit = get_kit_for_org(session, organization_id, kit_id)
+    start, end = as_utc(start), as_utc(end)
+    _validate_window(start, end)
+    index = inventory_index_cache.get(session, organization_id, calendar_revision(session, organization_id), start)
+    item_ids = [item.id for item in kit.items]
+    unusable = [item.id for item in kit.items if item.condition in UNAVAILABLE_CONDITIONS]
+    free = [] if unusable else index.common_free(item_ids, start, end)
+    busy = sorted(set(unusable) | set(index.busy(item_ids, start, end)))
+    return KitAvailability(kit, start, end, free, busy)
+
+
+def reserve_equipment(session: Session, token_value: str, payload: EquipmentReservationCreate) -> EquipmentReservation:
+    """Book items and/or a whole kit for a span, all or nothing.
+
+    The span defaults to the mission's, the venue to the mission's venue.
+    The calendar head is locked and checked against the index at its exact
+    revision, so two bookings cannot both take an item.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+
+    mission = None
+    if payload.mission_id is not None:
+        mission = session.get(ScheduledMission, payload.mission_id)
+        if mission is None or mission.organization_id != organization_id:
+            raise DomainError("Mission not found", status_code=404)
+    start = as_utc(payload.starts_at) if payload.starts_at is not None else mission and mission.starts_at
+    end = as_utc(payload.ends_at) if payload.ends_at is not None else mission and mission.ends_at
+    if start is None or end is None:
+        raise DomainError("A reservation needs a span or a mission", status_code=422)
+    _validate_window(start, end)
+    venue_id = payload.venue_id or (mission.venue_id if mission is not None else None)
+    if payload.venue_id is not None:
+        venue = session.get(Venue, payload.venue_id)
+        if venue is None or venue.organization_id != organization_id:
+            raise DomainError("Venue not found", status_code=404)
+
+    wanted = dict.fromkeys(payload.item_ids)
+    kit = None
+    if payload.kit_id is not None:
+        kit = get_kit_for_org(session, organization_id, payload.kit_id)
+        wanted.update(dict.fromkeys(item.id for item in kit.items))
+    if not wanted:
+        raise DomainError("Select at least one item or a kit", status_code=422)
+    if len(wanted) > MAX_RESERVATION_ITEMS:
+        raise DomainError(f"Cannot reserve more than {MAX_RESERVATION_ITEMS} items at once", status_code=422)
+    items = load_items(session, organization_id, wanted)
+    unusable = [item.name for item in items if item.condition in UNAVAILABLE_CONDITIONS]
+    if unusable:
+        raise DomainError(f"Equipment not in service: {', '.join(unusable)}", status_code=409)
+
+    item_ids = list(wanted)
+    with inventory_index_cache.lock:
+        head = _lock_head(session, organization_id)
+        revision = head.revision
+        index = inventory_index_cache.get(session, organization_id, revision, start)
+        busy = index.busy(item_ids, start, end)
+        if busy:
+            session.rollback()
+            names = ", ".join(item.name for item in items if item.id in set(busy))
+            raise DomainError(f"Equipment already reserved: {names}", status_code=409)
+        reservation = EquipmentReservation(
+            organization_id=organization_id,
+            kit_id=kit.id if kit is not None else None,
+            mission_id=mission.id if mission is not None else None,
+            venue_id=venue_id,
+            starts_at=start,
+            ends_at=end,
+            notes=payload.notes,
+            created_by=context.membership.user_id,
+            items=[
+                EquipmentReservationItem(item_id=item_id, organization_id=organization_id, starts_at=start, ends_at=end)
+                for item_id in item_ids
+            ],
+        )
+        session.add(reservation)
+        head.revision = revision + 1
+        _commit_booking(session)
+        index.add(reservation.id, item_ids, start, end)
+        inventory_index_cache.advance(organization_id, revision, index)
+    session.refresh(reservation)
+    return reservation
+
+
+def cancel_reservation(session: Session, token_value: str, reservation_id: str) -> None:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    with inventory_index_cache.lock:
+        reservation = session.get(EquipmentReservation, reservation_id)
+        if reservation is None or reservation.organization_id != organization_id:
+            raise DomainError("Reservation not found", status_code=404)
+        item_ids = [row.item_id for row in reservation.items]
+        head = _lock_head(session, organization_id)
+        revision = head.revision
+        index = inventory_index_cache.get(session, organization_id, revision, now_utc())
+        session.delete(reservation)
+        head.revision = revision + 1
+        _commit_booking(session)
+        index.discard(reservation_id, item_ids)
+        inventory_index_cache.advance(organization_id, revision, index)
+
+
+def list_reservations(
+    session: Session,
+    token_value: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    mission_id: str | None = None,
+    item_id: str | None = None,
+) -> list[EquipmentReservation]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    query = (
+        select(EquipmentReservation)
+        .where(EquipmentReservation.organization_id == context.membership.organization_id)
+        .options(selectinload(EquipmentReservation.items))
+        .order_by(EquipmentReservation.starts_at, EquipmentReservation.id)
+    )
+    if start is not None:
+        query = query.where(EquipmentReservation.ends_at > as_utc(start))
+    if end is not None:
+        query = query.where(EquipmentReservation.starts_at < as_utc(end))
+    if mission_id is not None:
+        query = query.where(EquipmentReservation.mission_id == mission_id)
+    if item_id is not None:
+        query = query.where(
+            EquipmentReservation.id.in_(
+                select(EquipmentReservationItem.reservation_id).where(EquipmentReservationItem.item_id == item_id)
+            )
+        )
+    return list(session.scalars(query))
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import (
+    EquipmentBalance,
+    EquipmentKitBalance,
+    EquipmentKitCheckpoint,
+    EquipmentKitMovement,
+    EquipmentKpiMonth,
+    EquipmentMovement,
+    ScheduledMission,
+    equipment_kit_items,
+)
+from ..rbac import Permission
+from ..schemas import EquipmentMovementCreate
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .equipment import UNAVAILABLE_CONDITIONS, get_item_for_org, get_kit_for_org, load_items
+from .exceptions import DomainError
+from .planning import as_utc
+
+CHECK_OUT = "check_out"
+RETURN = "return"
+INCIDENT = "incident"
+IN = "in"
+OUT = "out"
+KIT_CHECKPOINT_EVERY = 64
+MAX_LIST_LIMIT = 500
+
+# State an item must be in for each kind of movement, and the state it leaves it in.
+TRANSITIONS = {CHECK_OUT: (IN, OUT), RETURN: (OUT, IN), INCIDENT: (None, None)}
+
+
+@dataclass(frozen=True, slots=True)
+class ItemState:
+    item_id: str
+    at: datetime | None
+    state: str
+    since: datetime | None
+    checkouts: int
+    returns: int
+    incidents: int
+
+
+@dataclass(frozen=True, slots=True)
+class KitState:
+    kit_id: str
+    at: datetime | None
+    items_total: int
+    items_out: int
+    checkouts: int
+    returns: int
+    incidents: int
+
+
+@dataclass(frozen=True, slots=True)
+class EquipmentKpis:
+    start: date
+    end: date
+    checkouts: int
+    returns: int
+    incidents: int
+    items_out: int
+
+    @property
+    def return_rate(self) -> float | None:
+        return self.returns / self.checkouts if self.checkouts else None
+
+    @property
+    def incident_rate(self) -> float | None:
+        return self.incidents / self.checkouts if self.checkouts else None
+
+
+def _counts(kind: str) -> tuple[int, int, int]:
+    return int(kind == CHECK_OUT), int(kind == RETURN), int(kind == INCIDENT)
+
+
+def _locked_balances(session: Session, organization_id: str, item_ids: list[str]) -> dict[str, EquipmentBalance]:
+    balances = {
+        balance.item_id: balance
+        for balance in session.scalars(
+            select(EquipmentBalance).where(EquipmentBalance.item_id.in_(item_ids)).with_for_update()
+        )
+    }
+    for item_id in item_ids:
+        if item_id not in balances:
+            balances[item_id] = EquipmentBalance(
+                item_id=item_id, organization_id=organization_id, sequence=0, state=IN, checkouts=0, returns=0, incidents=0
+            )
+            session.add(balances[item_id])
+    return balances
+
+
+def _kit_memberships(session: Session, item_ids: list[str]) -> dict[str, list[str]]:
+    """Kits each item belongs to; an item moved alone still counts in its kits' balances."""
+
+    kits: dict[str, list[str]] = {}
+    for kit_id, item_id in session.execute(
+        select(equipment_kit_items.c.kit_id, equipment_kit_items.c.item_id)
+        .where(equipment_kit_items.c.item_id.in_(item_ids))
+        .order_by(equipment_kit_items.c.kit_id)
+    ):
+        kits.setdefault(item_id, []).append(kit_id)
+    return kits
+
+
+def _members_out(session: Session, kit_ids: list[str]) -> dict[str, tuple[int, datetime | None]]:
+    """Per kit, how many members are out and when the last of them moved."""
+
+    return {
+        kit_id: (count, since)
+        for kit_id, count, since in session.execute(
+            select(equipment_kit_items.c.kit_id, func.count(), func.max(EquipmentBalance.last_occurred_at))
+            .join(EquipmentBalance, EquipmentBalance.item_id == equipment_kit_items.c.item_id)
+            .where(equipment_kit_items.c.kit_id.in_(kit_ids))
+            .where(EquipmentBalance.state == OUT)
+            .group_by(equipment_kit_items.c.kit_id)
+        )
+    }
+
+
+def _locked_kit_balances(
+    session: Session, organization_id: str, kit_ids: list[str]
+) -> dict[str, EquipmentKitBalance]:
+    """Lock the kits' balances, creating missing ones from their members' current state.
+
+    A kit made of items already out starts with those items counted out,
+    and a checkpoint at sequence 0 carries that start to as-of reads.
+    """
+
+    balances = {
+        balance.kit_id: balance
+        for balance in session.scalars(
+            select(EquipmentKitBalance).where(EquipmentKitBalance.kit_id.in_(kit_ids)).with_for_update()
+        )
+    }
+    missing = [kit_id for kit_id in kit_ids if kit_id not in balances]
+    if not missing:
+        return balances
+    already_out = _members_out(session, missing)
+    for kit_id in missing:
+        items_out, since = already_out.get(kit_id, (0, None))
+        balances[kit_id] = EquipmentKitBalance(
+            kit_id=kit_id,
+            organization_id=organization_id,
+            sequence=0,
+            items_out=items_out,
+            checkouts=0,
+            returns=0,
+            incidents=0,
+            last_occurred_at=since,
+            checkpoint_sequence=0,
+        )
+        session.add(balances[kit_id])
+        if items_out:
+            session.add(
+                EquipmentKitCheckpoint(
+                    kit_id=kit_id,
+                    sequence=0,
+                    organization_id=organization_id,
+                    occurred_at=since,
+                    items_out=items_out,
+                    checkouts=0,
+                    returns=0,
+                    incidents=0,
+                )
+            )
+    return balances
+
+
+def _bump_kpis(session: Session, organization_id: str, occurred_at: datetime, kind: str, count: int) -> None:
+    month = occurred_at.date().replace(day=1)
+    kpis = session.scalar(
+        select(EquipmentKpiMonth)
+        .where(EquipmentKpiMonth.organization_id == organization_id)
+        .where(EquipmentKpiMonth.month == month)
+        .with_for_update()
+    )
+    if kpis is None:
+        kpis = EquipmentKpiMonth(organization_id=organization_id, month=month, checkouts=0, returns=0, incidents=0)
+        session.add(kpis)
+    checkouts, returns, incidents = _counts(kind)
+    kpis.checkouts += checkouts * count
+    kpis.returns += returns * count
+    kpis.incidents += incidents * count
+
+
+def record_movements(session: Session, token_value: str, payload: EquipmentMovementCreate) -> list[EquipmentMovement]:
+    """Append one movement per item (or per item of a kit), all or nothing.
+
+    The balances of the items, of every kit they belong to and the month's
+    KPI counters are locked and advanced in the same transaction as the
+    ledger entries, so reads never replay history. A kit counts its members
+    only, whether they move with the kit or alone; extra items moved along
+    with a kit do not. Movements of an item, and of a kit, must be recorded
+    in time order.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    occurred_at = as_utc(payload.occurred_at) if payload.occurred_at is not None else now_utc()
+    if payload.mission_id is not None:
+        mission = session.get(ScheduledMission, payload.mission_id)
+        if mission is None or mission.organization_id != organization_id:
+            raise DomainError("Mission not found", status_code=404)
+
+    wanted = dict.fromkeys(payload.item_ids)
+    kit = None
+    if payload.kit_id is not None:
+        kit = get_kit_for_org(session, organization_id, payload.kit_id)
+        wanted.update(dict.fromkeys(item.id for item in kit.items))
+    if not wanted:
+        raise DomainError("Select at least one item or a kit", status_code=422)
+    items = load_items(session, organization_id, wanted)
+    required, after = TRANSITIONS[payload.kind]
+    if payload.kind == CHECK_OUT:
+        unusable = [item.name for item in items if item.condition in UNAVAILABLE_CONDITIONS]
+        if unusable:
+            raise DomainError(f"Equipment not in service: {', '.join(unusable)}", status_code=409)
+
+    balances = _locked_balances(session, organization_id, list(wanted))
+    memberships = _kit_memberships(session, list(wanted))
+    kit_balances = _locked_kit_balances(
+        session, organization_id, sorted({kit_id for kit_ids in memberships.values() for kit_id in kit_ids})
+    )
+    late = [
+        item.name
+        for item in items
+        if balances[item.id].last_occurred_at is not None and occurred_at < balances[item.id].last_occurred_at
+    ]
+    if late or any(
+        balance.last_occurred_at is not None and occurred_at < balance.last_occurred_at
+        for balance in kit_balances.values()
+    ):
+        session.rollback()
+        raise DomainError("Movements must be recorded in time order", status_code=422)
+    if required is not None:
+        wrong = [item.name for item in items if balances[item.id].state != required]
+        if wrong:
+            session.rollback()
+            verb = "already out" if required == IN else "not out"
+            raise DomainError(f"Equipment {verb}: {', '.join(wrong)}", status_code=409)
+
+    checkouts, returns, incidents = _counts(payload.kind)
+    movements = []
+    kit_entries: list[tuple[EquipmentMovement, str, int]] = []
+    for item in items:
+        balance = balances[item.id]
+        balance.sequence += 1
+        if after is not None:
+            balance.state, balance.since = after, occurred_at
+        balance.checkouts += checkouts
+        balance.returns += returns
+        balance.incidents += incidents
+        balance.last_occurred_at = occurred_at
+        if payload.kind == INCIDENT and payload.condition is not None:
+            item.condition = payload.condition
+        movement = EquipmentMovement(
+            organization_id=organization_id,
+            item_id=item.id,
+            kit_id=kit.id if kit is not None and kit.id in memberships.get(item.id, ()) else None,
+            mission_id=payload.mission_id,
+            sequence=balance.sequence,
+            kind=payload.kind,
+            occurred_at=occurred_at,
+            note=payload.note,
+            state=balance.state,
+            since=balance.since,
+            checkouts=balance.checkouts,
+            returns=balance.returns,
+            incidents=balance.incidents,
+            actor_id=context.membership.user_id,
+        )
+        for kit_id in memberships.get(item.id, ()):
+            kit_balance = kit_balances[kit_id]
+            kit_balance.sequence += 1
+            kit_balance.items_out += checkouts - returns
+            kit_balance.checkouts += checkouts
+            kit_balance.returns += returns
+            kit_balance.incidents += incidents
+            kit_balance.last_occurred_at = occurred_at
+            kit_entries.append((movement, kit_id, kit_balance.sequence))
+            if kit_balance.sequence - kit_balance.checkpoint_sequence >= KIT_CHECKPOINT_EVERY:
+                session.add(
+                    EquipmentKitCheckpoint(
+                        kit_id=kit_balance.kit_id,
+                        sequence=kit_balance.sequence,
+                        organization_id=organization_id,
+                        occurred_at=occurred_at,
+                        items_out=kit_balance.items_out,
+                        checkouts=kit_balance.checkouts,
+                        returns=kit_balance.returns,
+                        incidents=kit_balance.incidents,
+                    )
+                )
+                kit_balance.checkpoint_sequence = kit_balance.sequence
+        movements.append(movement)
+    session.add_all(movements)
+    _bump_kpis(session, organization_id, occurred_at, payload.kind, len(movements))
+    try:
+        session.flush()
+        session.add_all(
+            EquipmentKitMovement(
+                kit_id=kit_id, sequence=sequence, movement_id=movement.id, kind=payload.kind, occurred_at=occurred_at
+            )
+            for movement, kit_id, sequence in kit_entries
+        )
+        session.commit()
+    except IntegrityError as error:
+        # A concurrent movement took the same sequence first; nothing was recorded.
+        session.rollback()
+        raise DomainError("Equipment ledger changed, please retry", status_code=409) from error
+    return movements
+
+
+def item_state(session: Session, token_value: str, item_id: str, at: datetime | None = None) -> ItemState:
+    """State of an item now (its balance row) or as of ``at`` (one seek on the ledger index)."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    item = get_item_for_org(session, context.membership.organization_id, item_id)
+    if at is None:
+        source = session.get(EquipmentBalance, item.id)
+    else:
+        at = as_utc(at)
+        source = session.scalar(
+            select(EquipmentMovement)
+            .where(EquipmentMovement.item_id == item.id)
+            .where(EquipmentMovement.occurred_at <= at)
+            .order_by(EquipmentMovement.occurred_at.desc(), EquipmentMovement.sequence.desc())
+            .limit(1)
+        )
+    if source is None:
+        return ItemState(item.id, at, IN, None, 0, 0, 0)
+    return ItemState(item.id, at, source.state, source.since, source.checkouts, source.returns, source.incidents)
+
+
+def kit_state(session: Session, token_value: str, kit_id: str, at: datetime | None = None) -> KitState:
+    """Balance of a kit now, or as of ``at`` from the last checkpoint plus the movements after it."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    kit = get_kit_for_org(session, context.membership.organization_id, kit_id)
+    total = len(kit.items)
+    if at is None:
+        balance = session.get(EquipmentKitBalance, kit.id)
+        if balance is None:
+            items_out = _members_out(session, [kit.id]).get(kit.id, (0, None))[0]
+            return KitState(kit.id, None, total, items_out, 0, 0, 0)
+        return KitState(kit.id, None, total, balance.items_out, balance.checkouts, balance.returns, balance.incidents)
+
+    at = as_utc(at)
+    checkpoint = session.scalar(
+        select(EquipmentKitCheckpoint)
+        .where(EquipmentKitCheckpoint.kit_id == kit.id)
+        .where(EquipmentKitCheckpoint.occurred_at <= at)
+        .order_by(EquipmentKitCheckpoint.occurred_at.desc(), EquipmentKitCheckpoint.sequence.desc())
+        .limit(1)
+    )
+    sequence, items_out, checkouts, returns, incidents = (
+        (checkpoint.sequence, checkpoint.items_out, checkpoint.checkouts, checkpoint.returns, checkpoint.incidents)
+        if checkpoint is not None
+        else (0, 0, 0, 0, 0)
+    )
+    # At most one checkpoint interval of movements lies between the checkpoint and ``at``.
+    for kind, count in session.execute(
+        select(EquipmentKitMovement.kind, func.count())
+        .where(EquipmentKitMovement.kit_id == kit.id)
+        .where(EquipmentKitMovement.sequence > sequence)
+        .where(EquipmentKitMovement.occurred_at <= at)
+        .group_by(EquipmentKitMovement.kind)
+    ):
+        added_checkouts, added_returns, added_incidents = _counts(kind)
+        checkouts += added_checkouts * count
+        returns += added_returns * count
+        incidents += added_incidents * count
+        items_out += (added_checkouts - added_returns) * count
+    return KitState(kit.id, at, total, items_out, checkouts, returns, incidents)
+
+
+def list_movements(
+    session: Session,
+    token_value: str,
+    item_id: str | None = None,
+    kit_id: str | None = None,
+    limit: int = 100,
+) -> list[EquipmentMovement]:
+    """Latest movements first."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    query = (
+        select(EquipmentMovement)
+        .where(EquipmentMovement.organization_id == context.membership.organization_id)
+        .order_by(EquipmentMovement.occurred_at.desc(), EquipmentMovement.sequence.desc())
+        .limit(min(max(limit, 1), MAX_LIST_LIMIT))
+    )
+    if item_id is not None:
+        query = query.where(EquipmentMovement.item_id == item_id)
+    if kit_id is not None:
+        query = query.where(EquipmentMovement.kit_id == kit_id)
+    return list(session.scalars(query))
+
+
+def equipment_kpis(session: Session, token_value: str, start: date, end: date) -> EquipmentKpis:
+    """Return and incident rates over the months from ``start``'s to before ``end``, read from the counters."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    if end <= start:
+        raise DomainError("End must be after start", status_code=422)
+    organization_id = context.membership.organization_id
+    checkouts, returns, incidents = session.execute(
+        select(
+            func.coalesce(func.sum(EquipmentKpiMonth.checkouts), 0),
+            func.coalesce(func.sum(EquipmentKpiMonth.returns), 0),
+            func.coalesce(func.sum(EquipmentKpiMonth.incidents), 0),
+        )
+        .where(EquipmentKpiMonth.organization_id == organization_id)
+        .where(EquipmentKpiMonth.month >= start.replace(day=1))
+        .where(EquipmentKpiMonth.month < end)
+    ).one()
+    items_out = session.scalar(
+        select(func.count())
+        .select_from(EquipmentBalance)
+        .where(EquipmentBalance.organization_id == organization_id)
+        .where(EquipmentBalance.state == OUT)
+    )
+    return EquipmentKpis(start, end, int(checkouts), int(returns), int(incidents), items_out or 0)
+
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from ..config import Settings
+from ..models import (
+    Assignment,
+    MissionTag,
+    MissionTemplate,
+    Project,
+    ScheduledMission,
+    UserOrganization,
+    Venue,
+)
+from ..rbac import Permission, require_permission
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .planning_cache import log_version
+from .recurrence import Series, load_series, occurrence_key, shift_into
+
+FeedScope = Literal["person", "project", "team"]
+SCOPES: tuple[FeedScope, ...] = ("person", "project", "team")
+
+FEED_PAST = timedelta(days=31)
+FEED_FUTURE = timedelta(days=366)
+LINE_LIMIT = 75
+PRODUCT_ID = "-//JMD//Planning//FR"
+UID_DOMAIN = "jmd"
+
+
+@dataclass(frozen=True)
+class FeedRef:
+    """What a calendar link shows, who issued it and when.
+
+    The issuer is re-checked on every read, so a link dies with its
+    issuer's membership; ``issued_on`` bounds its lifetime.
+    """
+
+    organization_id: str
+    scope: FeedScope
+    scope_id: str
+    issuer_id: str
+    issued_on: date
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return (self.organization_id, self.scope, self.scope_id)
+
+
+@dataclass(frozen=True, slots=True)
+class FeedEvent:
+    uid: str
+    starts_at: datetime
+    ends_at: datetime
+    summary: str
+    location: str | None
+    description: str | None
+
+
+@dataclass
+class Feed:
+    """A resolved feed: ``chunks`` is ``None`` when the client copy is current."""
+
+    etag: str
+    chunks: Iterator[bytes] | None
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _signature(settings: Settings, payload: str) -> str:
+    digest = hmac.new(settings.secret_key.encode(), f"ics:{payload}".encode(), hashlib.sha256).digest()
+    return _b64(digest[:18])
+
+
+def sign_feed(settings: Settings, ref: FeedRef) -> str:
+    """URL-safe ``payload.signature`` token; calendar clients present it instead of a session."""
+
+    fields = (ref.organization_id, ref.scope, ref.scope_id, ref.issuer_id, ref.issued_on.isoformat())
+    payload = _b64(":".join(fields).encode())
+    return f"{payload}.{_signature(settings, payload)}"
+
+
+def verify_feed(settings: Settings, token: str, today: date | None = None) -> FeedRef:
+    """Decode a token signed by :func:`sign_feed`; 404 when forged, 410 once expired."""
+
+    payload, _, signature = token.partition(".")
+    if not signature or not hmac.compare_digest(signature, _signature(settings, payload)):
+        raise DomainError("Invalid calendar link", status_code=404)
+    fields = _unb64(payload).decode().split(":")
+    if len(fields) != 5:
+        raise DomainError("Invalid calendar link", status_code=404)
+    organization_id, scope, scope_id, issuer_id, issued_on = fields
+    ref = FeedRef(organization_id, scope, scope_id, issuer_id, date.fromisoformat(issued_on))  # type: ignore[arg-type]
+    if (today or now_utc().date()) - ref.issued_on > timedelta(days=settings.ics_feed_ttl_days):
+        raise DomainError("Calendar link expired", status_code=410)
+    return ref
+
+
+def escape_text(value: str) -> str:
+    """RFC 5545 TEXT escaping."""
+
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> bytes:
+    """Encode one content line, folded at 75 octets without splitting UTF-8 sequences."""
+
+    encoded = line.encode()
+    if len(encoded) <= LINE_LIMIT:
+        return encoded + b"\r\n"
+    parts = []
+    start, limit = 0, LINE_LIMIT
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end])
+        start, limit = end, LINE_LIMIT - 1
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def _stamp(value: datetime) -> str:
+    return f"{value:%Y%m%dT%H%M%S}Z"
+
+
+def render_event(event: FeedEvent, dtstamp: str) -> bytes:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.uid}@{UID_DOMAIN}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART:{_stamp(event.starts_at)}",
+        f"DTEND:{_stamp(event.ends_at)}",
+        f"SUMMARY:{escape_text(event.summary)}",
+    ]
+    if event.location:
+        lines.append(f"LOCATION:{escape_text(event.location)}")
+    if event.description:
+        lines.append(f"DESCRIPTION:{escape_text(event.description)}")
+    lines.append("END:VEVENT")
+    return b"".join(fold(line) for line in lines)
+
+
+def render_calendar(name: str, events: Iterable[FeedEvent], dtstamp: str) -> Iterator[bytes]:
+    """Yield the calendar one VEVENT at a time so large feeds are never built in one piece."""
+
+    yield b"".join(
+        fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODUCT_ID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(name)}",
+        )
+    )
+    for event in events:
+        yield render_event(event, dtstamp)
+    yield fold("END:VCALENDAR")
+
+
+class IcsFeedCache:
+    """Process-local LRU of rendered feeds keyed by scope and version stamp.
+
+    An entry is only served while its stamp equals the current one, so no
+    explicit invalidation is needed: any planning write moves the stamp.
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.lock = threading.RLock()
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, str], tuple[str, list[bytes]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[str, str, str], etag: str) -> list[bytes] | None:
+        with self.lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def put(self, key: tuple[str, str, str], etag: str, chunks: list[bytes]) -> None:
+        with self.lock:
+            self._entries[key] = (etag, chunks)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self._entries.clear()
+
+
+ics_feed_cache = IcsFeedCache()
+
+
+def feed_etag(ref: FeedRef, version: int, today: date) -> str:
+    """Strong validator of a feed: scope, planning log head and the day that anchors the window."""
+
+    digest = hashlib.sha256(f"{ref.organization_id}:{ref.scope}:{ref.scope_id}:{version}:{today}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _check_issuer(session: Session, ref: FeedRef) -> None:
+    """Ensure the issuer could still issue the link: a member seeing the planning, managing it for others' feeds."""
+
+    role = session.scalar(
+        select(UserOrganization.role)
+        .where(UserOrganization.organization_id == ref.organization_id)
+        .where(UserOrganization.user_id == ref.issuer_id)
+    )
+    try:
+        if role is None:
+            raise PermissionError("Issuer left the organisation")
+        require_permission(role, Permission.VIEW_PLANNING)
+        if ref.scope == "person" and ref.scope_id != ref.issuer_id:
+            require_permission(role, Permission.MANAGE_PLANNING)
+    except PermissionError as error:
+        raise DomainError("Calendar link revoked", status_code=410) from error
+
+
+def _check_scope(session: Session, ref: FeedRef) -> str:
+    """Ensure the scope exists in the organisation and return the calendar name."""
+
+    if ref.scope == "person":
+        membership = session.scalar(
+            select(UserOrganization)
+            .where(UserOrganization.organization_id == ref.organization_id)
+            .where(UserOrganization.user_id == ref.scope_id)
+        )
+        if membership is None:
+            raise DomainError("Member not found", status_code=404)
+        return f"Planning – {membership.user.email}"
+    model = Project if ref.scope == "project" else MissionTag
+    item = session.get(model, ref.scope_id)
+    if item is None or item.organization_id != ref.organization_id:
+        raise DomainError(f"{'Project' if ref.scope == 'project' else 'Team'} not found", status_code=404)
+    return f"Planning – {item.name if ref.scope == 'project' else item.label}"
+
+
+def issue_feed(
+    session: Session, token_value: str, settings: Settings, scope: FeedScope, scope_id: str
+) -> tuple[FeedRef, str]:
+    """Signed token of a person, project or team (mission tag) feed.
+
+    Anyone viewing the planning may subscribe to a project or team; person
+    feeds are limited to oneself unless the caller manages the planning.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    if scope not in SCOPES:
+        raise DomainError("Unknown calendar scope", status_code=422)
+    ref = FeedRef(context.membership.organization_id, scope, scope_id, context.membership.user_id, now_utc().date())
+    if scope == "person" and scope_id != context.membership.user_id:
+        ensure_permission(context, Permission.MANAGE_PLANNING)
+    _check_scope(session, ref)
+    return ref, sign_feed(settings, ref)
+
+
+def _location(name: str | None, *parts: str | None) -> str | None:
+    address = ", ".join(part for part in parts if part)
+    if name and address:
+        return f"{name}, {address}"
+    return name or address or None
+
+
+def _description(project_name: str | None, notes: str | None) -> str | None:
+    lines = [f"Projet : {project_name}"] if project_name else []
+    if notes:
+        lines.append(notes)
+    return "\n".join(lines) or None
+
+
+def load_events(session: Session, ref: FeedRef, window_start: datetime, window_end: datetime) -> list[FeedEvent]:
+    """Events of the feed in the window, recurring missions expanded, in start order.
+
+    Person feeds carry each assignment's own shift; project and team feeds
+    carry the mission span. Rows are read as plain tuples in one query.
+    """
+
+    columns = [
+        ScheduledMission.id,
+        ScheduledMission.starts_at,
+        ScheduledMission.ends_at,
+        ScheduledMission.notes,
+        MissionTemplate.name,
+        Venue.name,
+        Venue.address,
+        Venue.postal_code,
+        Venue.city,
+        Venue.country,
+        Project.name,
+    ]
+    person = ref.scope == "person"
+    if person:
+        columns += [Assignment.id, Assignment.starts_at, Assignment.ends_at]
+    query = (
+        select(*columns)
+        .join(MissionTemplate, MissionTemplate.id == ScheduledMission.template_id)
+        .outerjoin(Venue, Venue.id == ScheduledMission.venue_id)
+        .outerjoin(Project, Project.id == ScheduledMission.project_id)
+        .where(ScheduledMission.organization_id == ref.organization_id)
+    )
+    if person:
+        query = query.join(Assignment, Assignment.mission_id == ScheduledMission.id).where(
+            Assignment.user_id == ref.scope_id
+        )
+    elif ref.scope == "project":
+        query = query.where(ScheduledMission.project_id == ref.scope_id)
+    else:
+        query = query.where(ScheduledMission.tags.any(MissionTag.id == ref.scope_id))
+
+    series = {
+        item.mission_id: item for item in load_series(session, ref.organization_id, window_start, window_end)
+    }
+    in_window = (ScheduledMission.starts_at < window_end) & (ScheduledMission.ends_at > window_start)
+    query = query.where(or_(in_window, ScheduledMission.id.in_(list(series))) if series else in_window)
+
+    events: list[FeedEvent] = []
+    for row in session.execute(query):
+        mission_id, starts_at, ends_at, notes, title, venue, address, postal_code, city, country, project = row[:11]
+        uid, span = (row[11], (row[12], row[13])) if person else (mission_id, (starts_at, ends_at))
+        location = _location(venue, address, " ".join(part for part in (postal_code, city) if part), country)
+        description = _description(project, notes)
+        recurring: Series | None = series.get(mission_id)
+        if recurring is None:
+            events.append(FeedEvent(uid, span[0], span[1], title, location, description))
+            continue
+        for occurrence in recurring.expand(window_start, window_end, include_first=True):
+            shifted = shift_into(occurrence, recurring, *span)
+            if shifted[0] >= shifted[1]:
+                continue
+            events.append(
+                FeedEvent(occurrence_key(uid, occurrence.original_start), *shifted, title, location, description)
+            )
+    events.sort(key=lambda event: (event.starts_at, event.uid))
+    return events
+
+
+def _caching(key: tuple[str, str, str], etag: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    rendered = []
+    for chunk in chunks:
+        rendered.append(chunk)
+        yield chunk
+    ics_feed_cache.put(key, etag, rendered)
+
+
+def open_feed(session: Session, settings: Settings, token: str, if_none_match: str | None = None) -> Feed:
+    """Resolve a signed feed against the current planning version.
+
+    A client already holding the current version gets no body and the only
+    queries are the issuer's membership and the log head; a cached
+    rendering is replayed as is; otherwise events are loaded once and
+    rendered lazily while streaming.
+    """
+
+    now = now_utc()
+    ref = verify_feed(settings, token, now.date())
+    _check_issuer(session, ref)
+    etag = feed_etag(ref, log_version(session, ref.organization_id), now.date())
+    if etag_matches(if_none_match, etag):
+        return Feed(etag=etag, chunks=None)
+    cached = ics_feed_cache.get(ref.key, etag)
+    if cached is not None:
+        return Feed(etag=etag, chunks=iter(cached))
+
+    name = _check_scope(session, ref)
+    today = datetime.combine(now.date(), datetime.min.time())
+    events = load_events(session, ref, today - FEED_PAST, today + FEED_FUTURE)
+    return Feed(etag=etag, chunks=_caching(ref.key, etag, render_calendar(name, events, _stamp(now))))
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from ..security import now_utc
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A unit of background work and the latest result it published.
+
+    Long-running jobs call :meth:`publish` whenever they have a better
+    partial answer, so readers always see the best result found so far.
+    """
+
+    id: str
+    kind: str
+    organization_id: str
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    result: Any = None
+    error: str | None = None
+    created_at: datetime = field(default_factory=now_utc)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    def publish(self, result: Any, progress: float | None = None) -> None:
+        self.result = result
+        if progress is not None:
+            self.progress = min(max(progress, 0.0), 1.0)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobRegistry:
+    """Process-local worker pool plus a bounded index of recent jobs.
+
+    Work functions receive their :class:`Job` and must not touch the request
+    session: callers load what the job needs up front and hand it plain data.
+    """
+
+    def __init__(self, max_workers: int = 2, retention: int = 256) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jmd-job")
+        self._lock = threading.Lock()
+        self._retention = retention
+        self._jobs: OrderedDict[str, tuple[Job, Future]] = OrderedDict()
+
+    def submit(
+        self, kind: str, organization_id: str, work: Callable[[Job], Any], job_id: str | None = None
+    ) -> Job:
+        """Queue ``work``; ``job_id`` lets a job share the id of the row that records it."""
+
+        job = Job(id=job_id or str(uuid.uuid4()), kind=kind, organization_id=organization_id)
+        future = self._executor.submit(self._run, job, work)
+        with self._lock:
+            self._jobs[job.id] = (job, future)
+            while len(self._jobs) > self._retention:
+                oldest_id, (oldest, _) = next(iter(self._jobs.items()))
+                if not oldest.done:
+                    break
+                del self._jobs[oldest_id]
+        return job
+
+    @staticmethod
+    def _run(job: Job, work: Callable[[Job], Any]) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = now_utc()
+        try:
+            result = work(job)
+        except Exception as error:  # noqa: BLE001 - surfaced through the job status
+            job.error = str(error) or error.__class__.__name__
+            job.status = JobStatus.FAILED
+        else:
+            job.publish(result, progress=1.0)
+            job.status = JobStatus.SUCCEEDED
+        finally:
+            job.finished_at = now_utc()
+
+    def get(self, organization_id: str, job_id: str) -> Job | None:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        if entry is None or entry[0].organization_id != organization_id:
+            return None
+        return entry[0]
+
+    def jobs(self, kind: str) -> list[Job]:
+        """Retained jobs of one kind, oldest first."""
+
+        with self._lock:
+            return [job for job, _ in self._jobs.values() if job.kind == kind]
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Job:
+        with self._lock:
+            job, future = self._jobs[job_id]
+        future.result(timeout=timeout)
+        return job
+
+
+job_registry = JobRegistry()
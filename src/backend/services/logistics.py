@@ -0,0 +1,612 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import (
+    EquipmentItem,
+    EquipmentReservation,
+    EquipmentReservationItem,
+    LogisticsPlan,
+    Truck,
+    Venue,
+)
+from ..rbac import Permission
+from ..schemas import TruckCreate, TruckUpdate
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .travel import TravelMatrix, load_travel_matrix
+
+LOGISTICS_JOB_KIND = "logistics.plan"
+MAX_TIME_BUDGET_SECONDS = 30.0
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+_EPSILON = 1e-9
+
+
+@dataclass(frozen=True)
+class Load:
+    """Equipment leaving together for one reservation: a kit or a set of loose items."""
+
+    key: str
+    kit_id: str | None
+    venue_id: str | None
+    weight: float
+    volume: float
+
+
+@dataclass(frozen=True)
+class TruckSpec:
+    truck_id: str
+    depot_id: str | None
+    max_weight: float
+    max_volume: float
+
+
+class RoutePlanner:
+    """Stop order of one truck: a nearest-neighbour tour from its depot, improved by 2-opt.
+
+    The tour leaves from the depot and comes back to it; a truck without a
+    depot drives an open path with free ends (the missing depot costs
+    nothing). Travel minutes come from the organisation's venue matrix,
+    which is symmetric. Tours are memoised on (depot, stops) because the
+    packing search asks for the same stop sets over and over; a tour cut
+    short by its deadline is returned as it stands but not memoised.
+    """
+
+    def __init__(self, travel: TravelMatrix | None = None) -> None:
+        self._travel = travel or TravelMatrix()
+        self._tours: dict[tuple[str | None, frozenset[str]], tuple[tuple[str, ...], int]] = {}
+
+    def minutes(self, origin: str | None, destination: str | None) -> int:
+        return self._travel.minutes_between(origin, destination)
+
+    def length(self, depot: str | None, order: Sequence[str]) -> int:
+        nodes = [depot, *order, depot]
+        return sum(self.minutes(a, b) for a, b in zip(nodes, nodes[1:]))
+
+    def tour(
+        self, depot: str | None, stops: frozenset[str], deadline: float | None = None
+    ) -> tuple[tuple[str, ...], int]:
+        key = (depot, stops)
+        cached = self._tours.get(key)
+        if cached is None:
+            order, finished = self._two_opt(depot, self._nearest_neighbour(depot, stops), deadline)
+            cached = (tuple(order), self.length(depot, order))
+            if finished:
+                self._tours[key] = cached
+        return cached
+
+    def _nearest_neighbour(self, depot: str | None, stops: Iterable[str]) -> list[str]:
+        remaining = sorted(stops)
+        order: list[str] = []
+        current = depot
+        while remaining:
+            # Sorted ids break ties, so equal inputs always give the same tour.
+            following = min(remaining, key=lambda venue: self.minutes(current, venue))
+            remaining.remove(following)
+            order.append(following)
+            current = following
+        return order
+
+    def _two_opt(self, depot: str | None, order: list[str], deadline: float | None = None) -> tuple[list[str], bool]:
+        """The improved order, and whether 2-opt converged before ``deadline``."""
+
+        nodes = [depot, *order, depot]
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, len(nodes) - 2):
+                if deadline is not None and time.monotonic() >= deadline:
+                    return nodes[1:-1], False
+                for j in range(i + 1, len(nodes) - 1):
+                    a, b, c, d = nodes[i - 1], nodes[i], nodes[j], nodes[j + 1]
+                    delta = self.minutes(a, c) + self.minutes(b, d) - self.minutes(a, b) - self.minutes(c, d)
+                    if delta < 0:
+                        nodes[i : j + 1] = reversed(nodes[i : j + 1])
+                        improved = True
+        return nodes[1:-1], True
+
+
+@dataclass(frozen=True)
+class TruckRoute:
+    truck_id: str
+    loads: list[str]
+    stops: list[str]
+    minutes: int
+    weight_kg: float
+    volume_m3: float
+
+
+@dataclass
+class LoadingPlan:
+    routes: list[TruckRoute] = field(default_factory=list)
+    unassigned: list[str] = field(default_factory=list)
+    trucks_used: int = 0
+    total_minutes: int = 0
+    passes: int = 0
+    complete: bool = True
+
+    @property
+    def assignment(self) -> dict[str, str]:
+        return {load: route.truck_id for route in self.routes for load in route.loads}
+
+
+class TruckLoadingSolver:
+    """Pack loads into trucks under weight and volume limits, then order each truck's stops.
+
+    Construction is first-fit decreasing on each load's largest share of the
+    fleet's biggest payload, trying trucks that already stop at the load's
+    venue first. Local search then relocates single loads and swaps pairs
+    between trucks while the objective improves: fewest unplaced loads,
+    then fewest trucks, then fewest driving minutes.
+
+    A warm start keeps the loads of a previous assignment on their trucks
+    and packs only the others, so re-solving after one kit changed moves
+    little else.
+    """
+
+    def __init__(
+        self,
+        loads: Sequence[Load],
+        trucks: Sequence[TruckSpec],
+        travel: TravelMatrix | None = None,
+        warm_start: Mapping[str, str] | None = None,
+    ) -> None:
+        self.loads = {load.key: load for load in loads}
+        # Biggest trucks first: first fit then opens as few trucks as it can.
+        self.trucks = sorted(trucks, key=lambda truck: (-truck.max_weight, -truck.max_volume, truck.truck_id))
+        self._positions = {truck.truck_id: position for position, truck in enumerate(self.trucks)}
+        self._routes = RoutePlanner(travel)
+        self._warm_start = dict(warm_start or {})
+        count = len(self.trucks)
+        self._members: list[set[str]] = [set() for _ in range(count)]
+        self._weight = [0.0] * count
+        self._volume = [0.0] * count
+        self._stops: list[Counter[str]] = [Counter() for _ in range(count)]
+        self._unassigned: set[str] = set()
+
+    def _fits(self, truck: int, load: Load, leaving: Load | None = None) -> bool:
+        spec = self.trucks[truck]
+        weight = self._weight[truck] + load.weight - (leaving.weight if leaving else 0.0)
+        volume = self._volume[truck] + load.volume - (leaving.volume if leaving else 0.0)
+        return weight <= spec.max_weight + _EPSILON and volume <= spec.max_volume + _EPSILON
+
+    def _add(self, truck: int, load: Load) -> None:
+        self._members[truck].add(load.key)
+        self._weight[truck] += load.weight
+        self._volume[truck] += load.volume
+        if load.venue_id is not None:
+            self._stops[truck][load.venue_id] += 1
+
+    def _remove(self, truck: int, load: Load) -> None:
+        self._members[truck].discard(load.key)
+        self._weight[truck] -= load.weight
+        self._volume[truck] -= load.volume
+        if load.venue_id is not None:
+            self._stops[truck][load.venue_id] -= 1
+            if not self._stops[truck][load.venue_id]:
+                del self._stops[truck][load.venue_id]
+
+    def _cost(
+        self, truck: int, adding: Load | None = None, leaving: Load | None = None, deadline: float | None = None
+    ) -> tuple[int, int]:
+        """(used, driving minutes) of ``truck``, as it would be after the given change.
+
+        Raises ``TimeoutError`` rather than price a move on a tour cut short by ``deadline``.
+        """
+
+        members = len(self._members[truck]) + (adding is not None) - (leaving is not None)
+        if not members:
+            return 0, 0
+        stops = Counter(self._stops[truck])
+        if leaving is not None and leaving.venue_id is not None:
+            stops[leaving.venue_id] -= 1
+        if adding is not None and adding.venue_id is not None:
+            stops[adding.venue_id] += 1
+        venues = frozenset(venue for venue, count in stops.items() if count > 0)
+        minutes = self._routes.tour(self.trucks[truck].depot_id, venues, deadline)[1]
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError
+        return 1, minutes
+
+    def _candidates(self, load: Load) -> list[int]:
+        opened = [truck for truck in range(len(self.trucks)) if self._members[truck]]
+        visiting = [truck for truck in opened if load.venue_id in self._stops[truck]]
+        others = [truck for truck in opened if truck not in visiting]
+        idle = [truck for truck in range(len(self.trucks)) if not self._members[truck]]
+        return visiting + others + idle
+
+    def _place(self, load: Load) -> bool:
+        for truck in self._candidates(load):
+            if self._fits(truck, load):
+                self._add(truck, load)
+                return True
+        return False
+
+    def _construct(self, deadline: float | None) -> None:
+        """Warm-start loads back on their trucks, then first-fit decreasing for the rest.
+
+        Loads still pending when ``deadline`` passes are left unassigned; the
+        retry pass of the search places them if any budget remains.
+        """
+
+        pending = []
+        for key, load in self.loads.items():
+            truck = self._positions.get(self._warm_start.get(key, ""))
+            if truck is not None and self._fits(truck, load):
+                self._add(truck, load)
+            else:
+                pending.append(load)
+        max_weight = max((truck.max_weight for truck in self.trucks), default=1.0) or 1.0
+        max_volume = max((truck.max_volume for truck in self.trucks), default=1.0) or 1.0
+        pending.sort(key=lambda load: (-max(load.weight / max_weight, load.volume / max_volume), load.key))
+        for load in pending:
+            if (deadline is not None and time.monotonic() >= deadline) or not self._place(load):
+                self._unassigned.add(load.key)
+
+    def _relocate(self, deadline: float | None) -> bool:
+        improved = False
+        # Lightest trucks first: emptying one saves a whole truck.
+        for source in sorted(range(len(self.trucks)), key=lambda truck: len(self._members[truck])):
+            for key in sorted(self._members[source]):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError
+                load = self.loads[key]
+                before = self._cost(source, deadline=deadline)
+                after = self._cost(source, leaving=load, deadline=deadline)
+                best, best_delta = None, (0, 0)
+                for target in range(len(self.trucks)):
+                    if target == source or not self._fits(target, load):
+                        continue
+                    gained = self._cost(target, adding=load, deadline=deadline)
+                    current = self._cost(target, deadline=deadline)
+                    delta = (
+                        after[0] + gained[0] - before[0] - current[0],
+                        after[1] + gained[1] - before[1] - current[1],
+                    )
+                    if delta < best_delta:
+                        best, best_delta = target, delta
+                if best is not None:
+                    self._remove(source, load)
+                    self._add(best, load)
+                    improved = True
+        return improved
+
+    def _swap(self, deadline: float | None) -> bool:
+        improved = False
+        used = [truck for truck in range(len(self.trucks)) if self._members[truck]]
+        for index, first in enumerate(used):
+            for second in used[index + 1 :]:
+                for key in sorted(self._members[first]):
+                    for other_key in sorted(self._members[second]):
+                        if deadline is not None and time.monotonic() >= deadline:
+                            raise TimeoutError
+                        if key not in self._members[first]:
+                            break
+                        load, other = self.loads[key], self.loads[other_key]
+                        if load.venue_id == other.venue_id:
+                            continue
+                        if not (self._fits(first, other, leaving=load) and self._fits(second, load, leaving=other)):
+                            continue
+                        before = self._cost(first, deadline=deadline)[1] + self._cost(second, deadline=deadline)[1]
+                        self._remove(first, load)
+                        self._remove(second, other)
+                        self._add(first, other)
+                        self._add(second, load)
+                        after = self._cost(first, deadline=deadline)[1] + self._cost(second, deadline=deadline)[1]
+                        if after < before:
+                            improved = True
+                            break
+                        self._remove(first, other)
+                        self._remove(second, load)
+                        self._add(first, load)
+                        self._add(second, other)
+        return improved
+
+    def _retry_unassigned(self, deadline: float | None) -> bool:
+        placed = []
+        for key in sorted(self._unassigned):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if self._place(self.loads[key]):
+                placed.append(key)
+        self._unassigned.difference_update(placed)
+        return bool(placed)
+
+    def _placed_share(self) -> float:
+        return 1.0 - len(self._unassigned) / len(self.loads) if self.loads else 1.0
+
+    def _snapshot(self, passes: int, complete: bool, deadline: float | None = None) -> LoadingPlan:
+        routes = []
+        for truck, spec in enumerate(self.trucks):
+            if not self._members[truck]:
+                continue
+            stops, minutes = self._routes.tour(spec.depot_id, frozenset(self._stops[truck]), deadline)
+            routes.append(
+                TruckRoute(
+                    truck_id=spec.truck_id,
+                    loads=sorted(self._members[truck]),
+                    stops=list(stops),
+                    minutes=minutes,
+                    weight_kg=round(self._weight[truck], 3),
+                    volume_m3=round(self._volume[truck], 3),
+                )
+            )
+        return LoadingPlan(
+            routes=routes,
+            unassigned=sorted(self._unassigned),
+            trucks_used=len(routes),
+            total_minutes=sum(route.minutes for route in routes),
+            passes=passes,
+            complete=complete,
+        )
+
+    def solve(
+        self,
+        deadline: float | None = None,
+        on_progress: Callable[[LoadingPlan, float], None] | None = None,
+    ) -> LoadingPlan:
+        """Construct a packing, then improve it until no move helps or ``deadline`` (``time.monotonic``) passes.
+
+        ``on_progress`` receives the plan after construction and after every
+        improving pass, so an interrupted run still leaves a usable plan.
+        """
+
+        self._construct(deadline)
+        passes = 0
+        if on_progress is not None:
+            on_progress(self._snapshot(passes, False, deadline), self._placed_share())
+        try:
+            while True:
+                passes += 1
+                improved = self._retry_unassigned(deadline) | self._relocate(deadline) | self._swap(deadline)
+                if not improved:
+                    break
+                if on_progress is not None:
+                    on_progress(self._snapshot(passes, False, deadline), self._placed_share())
+        except TimeoutError:
+            return self._snapshot(passes, False, deadline)
+        return self._snapshot(passes, True)
+
+
+def load_day_loads(session: Session, organization_id: str, day: date) -> list[Load]:
+    """One load per equipment reservation starting on ``day``, weighed from its items."""
+
+    start = datetime.combine(day, datetime.min.time())
+    rows = session.execute(
+        select(
+            EquipmentReservation.id,
+            EquipmentReservation.kit_id,
+            EquipmentReservation.venue_id,
+            func.coalesce(func.sum(EquipmentItem.weight_kg), 0.0),
+            func.coalesce(func.sum(EquipmentItem.volume_m3), 0.0),
+        )
+        .join(EquipmentReservationItem, EquipmentReservationItem.reservation_id == EquipmentReservation.id)
+        .join(EquipmentItem, EquipmentItem.id == EquipmentReservationItem.item_id)
+        .where(EquipmentReservation.organization_id == organization_id)
+        .where(EquipmentReservation.starts_at >= start)
+        .where(EquipmentReservation.starts_at < start + timedelta(days=1))
+        .group_by(EquipmentReservation.id, EquipmentReservation.kit_id, EquipmentReservation.venue_id)
+        .order_by(EquipmentReservation.id)
+    )
+    return [Load(key, kit_id, venue_id, float(weight), float(volume)) for key, kit_id, venue_id, weight, volume in rows]
+
+
+def load_fleet(session: Session, organization_id: str) -> list[TruckSpec]:
+    rows = session.execute(
+        select(Truck.id, Truck.depot_venue_id, Truck.max_weight_kg, Truck.max_volume_m3)
+        .where(Truck.organization_id == organization_id)
+        .where(Truck.active.is_(True))
+        .order_by(Truck.name)
+    )
+    return [TruckSpec(*row) for row in rows]
+
+
+def _ensure_venue(session: Session, organization_id: str, venue_id: str | None) -> None:
+    if venue_id is None:
+        return
+    venue = session.get(Venue, venue_id)
+    if venue is None or venue.organization_id != organization_id:
+        raise DomainError("Venue not found", status_code=404)
+
+
+def _ensure_unique_name(session: Session, organization_id: str, name: str, truck_id: str | None) -> None:
+    query = select(Truck.id).where(Truck.organization_id == organization_id).where(Truck.name == name)
+    if truck_id is not None:
+        query = query.where(Truck.id != truck_id)
+    if session.scalar(query) is not None:
+        raise DomainError("A truck with this name already exists", status_code=409)
+
+
+def get_truck_for_org(session: Session, organization_id: str, truck_id: str) -> Truck:
+    truck = session.get(Truck, truck_id)
+    if truck is None or truck.organization_id != organization_id:
+        raise DomainError("Truck not found", status_code=404)
+    return truck
+
+
+def create_truck(session: Session, token_value: str, payload: TruckCreate) -> Truck:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    organization_id = context.membership.organization_id
+    name = payload.name.strip()
+    _ensure_unique_name(session, organization_id, name, None)
+    _ensure_venue(session, organization_id, payload.depot_venue_id)
+    truck = Truck(
+        organization_id=organization_id,
+        name=name,
+        max_weight_kg=payload.max_weight_kg,
+        max_volume_m3=payload.max_volume_m3,
+        depot_venue_id=payload.depot_venue_id,
+        active=payload.active,
+        notes=payload.notes,
+    )
+    session.add(truck)
+    session.commit()
+    session.refresh(truck)
+    return truck
+
+
+def list_trucks(session: Session, token_value: str) -> list[Truck]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    return list(
+        session.scalars(
+            select(Truck).where(Truck.organization_id == context.membership.organization_id).order_by(Truck.name)
+        )
+    )
+
+
+def update_truck(session: Session, token_value: str, truck_id: str, payload: TruckUpdate) -> Truck:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    truck = get_truck_for_org(session, context.membership.organization_id, truck_id)
+    data = payload.model_dump(exclude_unset=True)
+    if data.get("name") is not None:
+        data["name"] = data["name"].strip()
+        _ensure_unique_name(session, truck.organization_id, data["name"], truck.id)
+    if "depot_venue_id" in data:
+        _ensure_venue(session, truck.organization_id, data["depot_venue_id"])
+    for name in ("name", "max_weight_kg", "max_volume_m3", "depot_venue_id", "active", "notes"):
+        if name not in data or (data[name] is None and name not in ("depot_venue_id", "notes")):
+            continue
+        setattr(truck, name, data[name])
+    session.commit()
+    session.refresh(truck)
+    return truck
+
+
+def _plan_for_day(session: Session, organization_id: str, day: date) -> LogisticsPlan | None:
+    return session.scalar(
+        select(LogisticsPlan).where(LogisticsPlan.organization_id == organization_id).where(LogisticsPlan.day == day)
+    )
+
+
+def _store_plan(
+    session_factory: sessionmaker[Session],
+    plan_id: str,
+    revision: int,
+    result: LoadingPlan | None = None,
+    error: str | None = None,
+) -> None:
+    """Write a solve's outcome unless a later revision was requested in the meantime."""
+
+    session = session_factory()
+    try:
+        plan = session.get(LogisticsPlan, plan_id, with_for_update=True)
+        if plan is None or plan.revision != revision:
+            return
+        if result is None:
+            plan.status, plan.error = FAILED, error
+        else:
+            plan.status, plan.error = READY, None
+            plan.assignment = result.assignment
+            plan.routes = [
+                {
+                    "truck_id": route.truck_id,
+                    "loads": route.loads,
+                    "stops": route.stops,
+                    "minutes": route.minutes,
+                    "weight_kg": route.weight_kg,
+                    "volume_m3": route.volume_m3,
+                }
+                for route in result.routes
+            ]
+            plan.unassigned = result.unassigned
+            plan.trucks_used = result.trucks_used
+            plan.total_minutes = result.total_minutes
+            plan.complete = result.complete
+        plan.solved_at = now_utc()
+        session.commit()
+    finally:
+        session.close()
+
+
+def request_logistics_plan(
+    session: Session,
+    token_value: str,
+    session_factory: sessionmaker[Session],
+    day: date,
+    time_budget: float,
+    changed_kit_id: str | None = None,
+    fresh: bool = False,
+) -> tuple[LogisticsPlan, Job]:
+    """Queue a solve of the day's truck loading and routes as a new revision of its plan.
+
+    Inputs are loaded in the request. Unless ``fresh`` is set, the previous
+    revision's assignment is the warm start; the loads of ``changed_kit_id``
+    are dropped from it so only they are packed again.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_EQUIPMENT)
+    if not 0 < time_budget <= MAX_TIME_BUDGET_SECONDS:
+        raise DomainError(f"Time budget must be within (0, {MAX_TIME_BUDGET_SECONDS:g}] seconds", status_code=422)
+    organization_id = context.membership.organization_id
+    fleet = load_fleet(session, organization_id)
+    if not fleet:
+        raise DomainError("No active truck to plan with", status_code=422)
+    loads = load_day_loads(session, organization_id, day)
+    travel = load_travel_matrix(session, organization_id)
+
+    plan = _plan_for_day(session, organization_id, day)
+    warm_start: dict[str, str] = {}
+    if plan is None:
+        plan = LogisticsPlan(organization_id=organization_id, day=day, revision=1)
+        session.add(plan)
+    else:
+        plan.revision += 1
+        if not fresh:
+            changed = {load.key for load in loads if changed_kit_id is not None and load.kit_id == changed_kit_id}
+            warm_start = {key: truck_id for key, truck_id in plan.assignment.items() if key not in changed}
+    plan.status, plan.error, plan.time_budget = PENDING, None, time_budget
+    plan.requested_by = context.membership.user_id
+    plan.requested_at = now_utc()
+    try:
+        session.commit()
+    except IntegrityError as error:
+        session.rollback()
+        raise DomainError("A plan for this day is being created, retry", status_code=409) from error
+    plan_id, revision = plan.id, plan.revision
+
+    def work(job: Job) -> LoadingPlan:
+        deadline = time.monotonic() + time_budget
+        try:
+            result = TruckLoadingSolver(loads, fleet, travel, warm_start).solve(deadline, on_progress=job.publish)
+        except Exception as error:
+            _store_plan(session_factory, plan_id, revision, error=str(error) or error.__class__.__name__)
+            raise
+        _store_plan(session_factory, plan_id, revision, result)
+        return result
+
+    return plan, job_registry.submit(LOGISTICS_JOB_KIND, organization_id, work)
+
+
+def get_logistics_plan(session: Session, token_value: str, plan_id: str) -> LogisticsPlan:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    plan = session.get(LogisticsPlan, plan_id)
+    if plan is None or plan.organization_id != context.membership.organization_id:
+        raise DomainError("Logistics plan not found", status_code=404)
+    return plan
+
+
+def find_logistics_plan(session: Session, token_value: str, day: date) -> LogisticsPlan:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_EQUIPMENT)
+    plan = _plan_for_day(session, context.membership.organization_id, day)
+    if plan is None:
+        raise DomainError("No logistics plan for this day", status_code=404)
+    return plan
@@ -3,11 +3,13 @@ from __future__ import annotations
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..models import MissionTag
+from ..models import MissionTag, scheduled_mission_tags
 from ..rbac import Permission
 from ..schemas import MissionTagCreate, MissionTagUpdate
 from .access import ensure_permission, resolve_context
 from .exceptions import DomainError
+from .oplog import touch
+from .planning_week import refresh_week_rows
 
 
 def _normalise_slug(value: str) -> str:
@@ -25,6 +27,14 @@ def _get_tag_for_org(session: Session, organization_id: str, tag_id: str) -> Mis
     return tag
 
 
+def _tagged_missions(session: Session, tag_id: str) -> list[str]:
+    return list(
+        session.scalars(
+            select(scheduled_mission_tags.c.scheduled_mission_id).where(scheduled_mission_tags.c.mission_tag_id == tag_id)
+        )
+    )
+
+
 def create_tag(session: Session, token_value: str, payload: MissionTagCreate) -> MissionTag:
     context = resolve_context(session, token_value)
     ensure_permission(context, Permission.MANAGE_MISSION_TAGS)
@@ -81,6 +91,7 @@ def update_tag(session: Session, token_value: str, tag_id: str, payload: Mission
 
     tag = _get_tag_for_org(session, context.membership.organization_id, tag_id)
     data = payload.model_dump(exclude_unset=True)
+    changed = False
 
     if "slug" in data:
         slug = _normalise_slug(data["slug"])
@@ -94,15 +105,22 @@ def update_tag(session: Session, token_value: str, tag_id: str, payload: Mission
         )
         if duplicate:
             raise DomainError("Tag with this slug already exists", status_code=409)
-        tag.slug = slug
+        if slug != tag.slug:
+            tag.slug = slug
+            session.flush()
+            refresh_week_rows(session, _tagged_missions(session, tag.id))
+            changed = True
 
     if "label" in data:
         label = _normalise_label(data["label"])
         if not label:
             raise DomainError("Tag label cannot be empty", status_code=422)
+        changed = changed or label != tag.label
         tag.label = label
 
     session.add(tag)
+    if changed:
+        touch(session, tag.organization_id, "tag.update", actor_id=context.membership.user_id)
     session.commit()
     session.refresh(tag)
     return tag
@@ -113,5 +131,9 @@ def delete_tag(session: Session, token_value: str, tag_id: str) -> None:
     ensure_permission(context, Permission.MANAGE_MISSION_TAGS)
 
     tag = _get_tag_for_org(session, context.membership.organization_id, tag_id)
+    missions = _tagged_missions(session, tag.id)
     session.delete(tag)
+    session.flush()
+    refresh_week_rows(session, missions)
+    touch(session, tag.organization_id, "tag.delete", actor_id=context.membership.user_id)
     session.commit()
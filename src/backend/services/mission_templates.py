@@ -5,11 +5,13 @@ from datetime import time
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..models import MissionTag, MissionTemplate, Venue
+from ..models import MissionTag, MissionTemplate, ScheduledMission, Venue
 from ..rbac import Permission
 from ..schemas import MissionTemplateCreate, MissionTemplateUpdate
 from .access import ensure_permission, resolve_context
 from .exceptions import DomainError
+from .oplog import touch
+from .planning_week import refresh_week_rows_where
 
 
 def _normalise_name(value: str) -> str:
@@ -143,6 +145,8 @@ def update_template(
         if duplicate:
             raise DomainError("Mission template with this name already exists", status_code=409)
         template.name = name
+        refresh_week_rows_where(session, ScheduledMission.template_id == template.id)
+        touch(session, template.organization_id, "template.update", actor_id=context.membership.user_id)
 
     if "team_size" in data:
         _validate_team_size(data["team_size"])
@@ -183,4 +187,5 @@ def delete_template(session: Session, token_value: str, template_id: str) -> Non
 
     template = _get_template_for_org(session, context.membership.organization_id, template_id)
     session.delete(template)
+    touch(session, template.organization_id, "template.delete", actor_id=context.membership.user_id)
     session.commit()
@@ -0,0 +1,632 @@
+from __future__ import annotations
+
+import hashlib
+import http.client
+import itertools
+import json
+import smtplib
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Protocol
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..models import Assignment, Notification, NotificationAttempt, User, UserOrganization
+from ..rbac import Permission
+from ..schemas import ContactUpdate, NotificationSend
+from ..security import now_utc
+from .access import ensure_permission, local_time, organization_zone, resolve_context
+from .exceptions import DomainError
+from .ics import FeedRef, sign_feed
+
+EMAIL = "email"
+SMS = "sms"
+TELEGRAM = "telegram"
+CHANNELS = (EMAIL, SMS, TELEGRAM)
+
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+RETRY = "retry"
+
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=1)
+RESCHEDULE_THRESHOLD = timedelta(minutes=15)
+SMS_LIMIT = 480
+MAX_LOG_ROWS = 500
+
+TEMPLATES: dict[str, tuple[str, str]] = {
+    "assignment.created": (
+        "Affectation: {mission} le {day}",
+        "{person} est affecte(e) a {mission} ({venue}) du {starts} au {ends}.\nCalendrier: {ics}",
+    ),
+    "assignment.rescheduled": (
+        "Changement horaire: {mission} le {day}",
+        "{person}: {mission} ({venue}) passe du {previous} au {starts} - {ends}.\nCalendrier: {ics}",
+    ),
+    "reminder.d1": ("Rappel: {count} mission(s) le {day}", "Programme du {day}:\n{lines}\nCalendrier: {ics}"),
+    "reminder.d0": ("Aujourd'hui: {count} mission(s)", "Programme du {day}:\n{lines}"),
+    "late.punch": ("Retard de pointage: {count} arrivee(s) manquante(s)", "Pas de pointage d'arrivee:\n{lines}"),
+    "message": ("{subject}", "{body}"),
+}
+
+
+@dataclass(frozen=True)
+class Message:
+    """A rendered notification handed to a provider; ``key`` lets the provider drop a resend."""
+
+    key: str
+    target: str
+    subject: str
+    body: str
+
+
+@dataclass(frozen=True)
+class Delivery:
+    ok: bool
+    error: str | None = None
+    permanent: bool = False
+
+
+class Provider(Protocol):
+    def send_batch(self, messages: Sequence[Message]) -> list[Delivery]: ...
+
+    def close(self) -> None: ...
+
+
+class SmtpProvider:
+    """Email over one SMTP session kept open across batches; a NOOP checks it before each batch."""
+
+    def __init__(self, host: str, port: int, sender: str, timeout: float = 10.0) -> None:
+        self.host, self.port, self.sender, self.timeout = host, port, sender, timeout
+        self.connections = 0
+        self._connection: smtplib.SMTP | None = None
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._connection is not None:
+            try:
+                if self._connection.noop()[0] == 250:
+                    return self._connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        self._connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        self._connection.ehlo_or_helo_if_needed()
+        self.connections += 1
+        return self._connection
+
+    def send_batch(self, messages: Sequence[Message]) -> list[Delivery]:
+        try:
+            connection = self._connect()
+        except (smtplib.SMTPException, OSError) as error:
+            return [Delivery(False, f"connect: {error}")] * len(messages)
+        results: list[Delivery] = []
+        for message in messages:
+            email = EmailMessage()
+            email["From"] = self.sender
+            email["To"] = message.target
+            email["Subject"] = message.subject
+            email["Message-ID"] = f"<{message.key}@jmd>"
+            email.set_content(message.body)
+            try:
+                connection.send_message(email)
+            except smtplib.SMTPRecipientsRefused as error:
+                refused = "; ".join(
+                    f"{address}: {code} {reply.decode(errors='replace')}" for address, (code, reply) in error.recipients.items()
+                )
+                results.append(Delivery(False, f"refused {refused}", permanent=True))
+            except smtplib.SMTPResponseException as error:
+                detail = error.smtp_error.decode(errors="replace") if isinstance(error.smtp_error, bytes) else error.smtp_error
+                results.append(Delivery(False, f"{error.smtp_code} {detail}", permanent=error.smtp_code >= 500))
+            except (smtplib.SMTPException, OSError) as error:
+                self.close()
+                lost = Delivery(False, f"connection lost: {error}")
+                results.extend([lost] * (len(messages) - len(results)))
+                break
+            else:
+                results.append(Delivery(True))
+        return results
+
+    def close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+
+class HttpProvider:
+    """SMS or Telegram gateway: one JSON ``POST`` per message over a single keep-alive connection.
+
+    The idempotency key travels as the ``Idempotency-Key`` header, so a
+    request replayed after a dropped connection is not delivered twice.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0, limit: int | None = None) -> None:
+        parts = urlsplit(url)
+        self.secure = parts.scheme == "https"
+        self.host, self.port = parts.hostname or "localhost", parts.port
+        self.path = parts.path or "/"
+        self.timeout, self.limit = timeout, limit
+        self.connections = 0
+        self._connection: http.client.HTTPConnection | None = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            factory = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+            self._connection = factory(self.host, self.port, timeout=self.timeout)
+            self.connections += 1
+        return self._connection
+
+    def _post(self, message: Message) -> Delivery:
+        text = f"{message.subject}\n{message.body}" if message.subject else message.body
+        if self.limit is not None:
+            text = text[: self.limit]
+        body = json.dumps({"to": message.target, "text": text}).encode()
+        headers = {"Content-Type": "application/json", "Idempotency-Key": message.key}
+        for replay in (True, False):
+            try:
+                connection = self._connect()
+                connection.request("POST", self.path, body, headers)
+                response = connection.getresponse()
+                detail = response.read()
+            except (http.client.HTTPException, OSError) as error:
+                self.close()
+                if replay and isinstance(error, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    continue  # the pooled connection went stale between batches
+                return Delivery(False, str(error) or error.__class__.__name__)
+            if response.will_close:
+                self.close()
+            if 200 <= response.status < 300:
+                return Delivery(True)
+            permanent = 400 <= response.status < 500 and response.status not in (408, 429)
+            return Delivery(False, f"HTTP {response.status} {detail[:200].decode(errors='replace')}".strip(), permanent)
+        return Delivery(False, "connection lost")
+
+    def send_batch(self, messages: Sequence[Message]) -> list[Delivery]:
+        return [self._post(message) for message in messages]
+
+    def close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+
+
+def build_providers(settings: Settings) -> dict[str, Provider]:
+    """Providers of the configured channels; rows of other channels wait in the queue."""
+
+    providers: dict[str, Provider] = {}
+    if settings.smtp_host:
+        providers[EMAIL] = SmtpProvider(settings.smtp_host, settings.smtp_port, settings.smtp_sender)
+    if settings.sms_api_url:
+        providers[SMS] = HttpProvider(settings.sms_api_url, limit=SMS_LIMIT)
+    if settings.telegram_api_url:
+        providers[TELEGRAM] = HttpProvider(settings.telegram_api_url)
+    return providers
+
+
+def idempotency_key(event_id: str, channel: str, target: str) -> str:
+    return hashlib.sha256(f"{event_id}\x1f{channel}\x1f{target}".encode()).hexdigest()
+
+
+def contact_targets(user: User, channels: Iterable[str]) -> list[tuple[str, str, str]]:
+    """``(channel, target, user_id)`` for each channel the user has an address on."""
+
+    addresses = {EMAIL: user.email, SMS: user.phone, TELEGRAM: user.telegram_chat_id}
+    return [(channel, addresses[channel], user.id) for channel in channels if addresses.get(channel)]
+
+
+def enqueue(
+    session: Session,
+    organization_id: str,
+    event_id: str,
+    template: str,
+    payload: dict[str, Any],
+    targets: Iterable[tuple[str, str, str | None]],
+) -> list[Notification]:
+    """Queue one row per ``(channel, target)`` of an event in the caller's transaction.
+
+    Rows whose idempotency key is already queued are dropped, so replaying an
+    event (a retried request, a re-fired trigger) never sends twice. The
+    unique constraint backs this up against concurrent writers.
+    """
+
+    if template not in TEMPLATES:
+        raise DomainError("Unknown notification template", status_code=422)
+    wanted: dict[str, tuple[str, str, str | None]] = {}
+    for channel, target, user_id in targets:
+        if channel not in CHANNELS:
+            raise DomainError(f"Unknown notification channel {channel}", status_code=422)
+        wanted.setdefault(idempotency_key(event_id, channel, target), (channel, target, user_id))
+    if not wanted:
+        return []
+    existing = set(
+        session.scalars(
+            select(Notification.idempotency_key)
+            .where(Notification.organization_id == organization_id)
+            .where(Notification.idempotency_key.in_(list(wanted)))
+        )
+    )
+    rows = [
+        Notification(
+            organization_id=organization_id,
+            event_id=event_id,
+            idempotency_key=key,
+            channel=channel,
+            target=target,
+            user_id=user_id,
+            template=template,
+            payload=payload,
+        )
+        for key, (channel, target, user_id) in wanted.items()
+        if key not in existing
+    ]
+    session.add_all(rows)
+    return rows
+
+
+def _when(value: datetime, zone: ZoneInfo) -> str:
+    return f"{local_time(value, zone):%d/%m/%Y %H:%M}"
+
+
+def _assignment_payload(assignment: Assignment, zone: ZoneInfo) -> dict[str, Any]:
+    """Message variables, with times on the organisation's clock like the scheduled reminders."""
+
+    mission = assignment.mission
+    return {
+        "person": assignment.user.email,
+        "userId": assignment.user_id,
+        "mission": mission.template.name,
+        "venue": mission.venue.name if mission.venue is not None else "lieu a confirmer",
+        "day": f"{local_time(assignment.starts_at, zone):%d/%m/%Y}",
+        "starts": _when(assignment.starts_at, zone),
+        "ends": _when(assignment.ends_at, zone),
+    }
+
+
+def _crew_and_manager(session: Session, assignment: Assignment, actor_id: str | None) -> tuple[User, User | None]:
+    person = session.get(User, assignment.user_id)
+    manager = session.get(User, actor_id) if actor_id and actor_id != assignment.user_id else None
+    return person, manager
+
+
+def notify_assignment_created(session: Session, assignment: Assignment, actor_id: str | None) -> list[Notification]:
+    """Affectation creee: email and Telegram to the technician, copy by email to the manager (spec 6)."""
+
+    person, manager = _crew_and_manager(session, assignment, actor_id)
+    targets = contact_targets(person, (EMAIL, TELEGRAM))
+    if manager is not None:
+        targets += contact_targets(manager, (EMAIL,))
+    return enqueue(
+        session,
+        assignment.organization_id,
+        f"assignment.created:{assignment.id}",
+        "assignment.created",
+        _assignment_payload(assignment, organization_zone(session, assignment.organization_id)),
+        targets,
+    )
+
+
+def notify_assignment_rescheduled(
+    session: Session, assignment: Assignment, previous: tuple[datetime, datetime], actor_id: str | None
+) -> list[Notification]:
+    """Changement horaire > 15 min: email, plus SMS when the work starts by tomorrow (spec 6)."""
+
+    starts_at, ends_at = previous
+    if abs(assignment.starts_at - starts_at) <= RESCHEDULE_THRESHOLD and abs(assignment.ends_at - ends_at) <= RESCHEDULE_THRESHOLD:
+        return []
+    person, _ = _crew_and_manager(session, assignment, actor_id)
+    zone = organization_zone(session, assignment.organization_id)
+    channels = [EMAIL]
+    tomorrow = local_time(now_utc(), zone).date() + timedelta(days=1)
+    if local_time(min(assignment.starts_at, starts_at), zone).date() <= tomorrow:
+        channels.append(SMS)
+    payload = {
+        **_assignment_payload(assignment, zone),
+        "previous": f"{_when(starts_at, zone)} - {_when(ends_at, zone)}",
+    }
+    event_id = f"assignment.rescheduled:{assignment.id}:{assignment.starts_at:%Y%m%d%H%M}:{assignment.ends_at:%Y%m%d%H%M}"
+    return enqueue(
+        session, assignment.organization_id, event_id, "assignment.rescheduled", payload, contact_targets(person, channels)
+    )
+
+
+def render(settings: Settings, notification: Notification) -> Message:
+    subject, body = TEMPLATES[notification.template]
+    variables = dict(notification.payload)
+    if "userId" in variables:
+        user_id = variables["userId"]
+        token = sign_feed(settings, FeedRef(notification.organization_id, "person", user_id, user_id, now_utc().date()))
+        variables["ics"] = f"{settings.public_base_url.rstrip('/')}/api/v1/ics/{token}.ics"
+    return Message(
+        key=notification.idempotency_key,
+        target=notification.target,
+        subject=subject.format(**variables),
+        body=body.format(**variables),
+    )
+
+
+def backoff(settings: Settings, attempts: int) -> timedelta:
+    """Delay before retry ``attempts + 1``: the base doubled per failed attempt, capped."""
+
+    return min(timedelta(seconds=settings.notification_backoff_seconds * 2 ** (attempts - 1)), MAX_BACKOFF)
+
+
+def claim_batch(session: Session, channel: str, size: int, now: datetime | None = None) -> list[Notification]:
+    """Flip up to ``size`` due rows of one channel to ``sending`` under a fresh claim and return them.
+
+    An idle poll only reads the status index; the conditional update keeps
+    two workers from claiming the same row.
+    """
+
+    now = now or now_utc()
+    due = list(
+        session.scalars(
+            select(Notification.id)
+            .where(Notification.status == QUEUED)
+            .where(Notification.channel == channel)
+            .where(Notification.next_attempt_at <= now)
+            .order_by(Notification.next_attempt_at)
+            .limit(size)
+        )
+    )
+    if not due:
+        session.rollback()
+        return []
+    claim = str(uuid.uuid4())
+    session.execute(
+        update(Notification)
+        .where(Notification.id.in_(due))
+        .where(Notification.status == QUEUED)
+        .values(status=SENDING, claim=claim, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return list(session.scalars(select(Notification).where(Notification.claim == claim).order_by(Notification.next_attempt_at)))
+
+
+def record_deliveries(
+    session: Session, settings: Settings, rows: Sequence[Notification], results: Sequence[Delivery]
+) -> None:
+    """Settle a sent batch and append one log row per attempt."""
+
+    now = now_utc()
+    for row, result in zip(rows, results):
+        latency = max(int((now - row.created_at).total_seconds() * 1000), 0)
+        row.attempts += 1
+        row.claim = row.claimed_at = None
+        if result.ok:
+            row.status, row.sent_at, row.latency_ms, row.error = SENT, now, latency, None
+            outcome = SENT
+        elif result.permanent or row.attempts >= settings.notification_max_attempts:
+            row.status, row.error = FAILED, result.error
+            outcome = FAILED
+        else:
+            row.status, row.error = QUEUED, result.error
+            row.next_attempt_at = now + backoff(settings, row.attempts)
+            outcome = RETRY
+        session.add(
+            NotificationAttempt(
+                notification_id=row.id,
+                event_id=row.event_id,
+                target=row.target,
+                channel=row.channel,
+                status=outcome,
+                latency_ms=latency,
+                error=result.error,
+                attempted_at=now,
+            )
+        )
+    session.commit()
+
+
+def release_stale_claims(session: Session, lease: timedelta = CLAIM_LEASE) -> int:
+    """Requeue rows left ``sending`` by a worker that died; providers drop the replay by key."""
+
+    result = session.execute(
+        update(Notification)
+        .where(Notification.status == SENDING)
+        .where(Notification.claimed_at <= now_utc() - lease)
+        .values(status=QUEUED, claim=None, claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount
+
+
+class NotificationDispatcher:
+    """Worker pool draining the queue, batched by channel.
+
+    A worker takes the next channel whose provider is idle, claims a batch of
+    its due rows and sends it over that provider's pooled connection; one
+    batch per provider is in flight at a time. Workers sleep until
+    :meth:`wake` is called after an enqueue, or until the poll interval for
+    retries coming due.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session],
+        settings: Settings,
+        providers: dict[str, Provider] | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._settings = settings
+        self.providers = build_providers(settings) if providers is None else providers
+        self._busy = {channel: threading.Lock() for channel in self.providers}
+        self._turn = itertools.count()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lease = CLAIM_LEASE
+        self._next_release = 0.0
+
+    def start(self, lease: timedelta = CLAIM_LEASE) -> None:
+        if self._threads or not self.providers:
+            return
+        self._lease, self._next_release = lease, 0.0
+        self._release()
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"jmd-notify-{index}", daemon=True)
+            for index in range(self._settings.notification_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        for provider in self.providers.values():
+            provider.close()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _release(self) -> None:
+        """Requeue claims past their lease, at most once per lease period."""
+
+        if time.monotonic() < self._next_release:
+            return
+        self._next_release = time.monotonic() + self._lease.total_seconds()
+        session = self._session_factory()
+        try:
+            release_stale_claims(session, self._lease)
+        finally:
+            session.close()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self._release()
+                sent = self.run_once()
+            except Exception:  # noqa: BLE001 - keep the worker alive; claimed rows are requeued once their lease ends
+                sent = 0
+            if not sent:
+                self._wake.wait(self._settings.notification_poll_seconds)
+
+    def run_once(self) -> int:
+        """Send one batch of the first channel with due rows and an idle provider; the number of rows tried."""
+
+        channels = list(self.providers)
+        if not channels:
+            return 0
+        start = next(self._turn) % len(channels)
+        for channel in channels[start:] + channels[:start]:
+            if not self._busy[channel].acquire(blocking=False):
+                continue
+            try:
+                sent = self._dispatch(channel)
+            finally:
+                self._busy[channel].release()
+            if sent:
+                return sent
+        return 0
+
+    def _dispatch(self, channel: str) -> int:
+        session = self._session_factory()
+        try:
+            rows = claim_batch(session, channel, self._settings.notification_batch_size)
+            if not rows:
+                return 0
+            messages: list[Message] = []
+            results: list[Delivery | None] = []
+            for row in rows:
+                try:
+                    messages.append(render(self._settings, row))
+                    results.append(None)
+                except (KeyError, ValueError) as error:
+                    results.append(Delivery(False, f"template: {error}", permanent=True))
+            delivered = iter(self.providers[channel].send_batch(messages) if messages else [])
+            record_deliveries(session, self._settings, rows, [result or next(delivered) for result in results])
+            return len(rows)
+        finally:
+            session.close()
+
+
+def send_message(session: Session, token_value: str, payload: NotificationSend) -> list[Notification]:
+    """Queue a free-form message to members; the caller's idempotency key makes a retried request a no-op."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_NOTIFICATIONS)
+    organization_id = context.membership.organization_id
+    user_ids = set(payload.user_ids)
+    users = list(
+        session.scalars(
+            select(User)
+            .join(UserOrganization, UserOrganization.user_id == User.id)
+            .where(UserOrganization.organization_id == organization_id)
+            .where(User.id.in_(user_ids))
+            .order_by(User.email)
+        )
+    )
+    if len(users) != len(user_ids):
+        raise DomainError("Recipient is not a member of the organization", status_code=404)
+    targets = [target for user in users for target in contact_targets(user, payload.channels)]
+    rows = enqueue(
+        session,
+        organization_id,
+        f"message:{payload.idempotency_key}",
+        "message",
+        {"subject": payload.subject, "body": payload.body},
+        targets,
+    )
+    session.commit()
+    return rows
+
+
+def list_notifications(
+    session: Session,
+    token_value: str,
+    *,
+    status: str | None = None,
+    channel: str | None = None,
+    event_id: str | None = None,
+    limit: int = 100,
+) -> list[Notification]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_NOTIFICATIONS)
+    query = select(Notification).where(Notification.organization_id == context.membership.organization_id)
+    if status is not None:
+        query = query.where(Notification.status == status)
+    if channel is not None:
+        query = query.where(Notification.channel == channel)
+    if event_id is not None:
+        query = query.where(Notification.event_id == event_id)
+    return list(session.scalars(query.order_by(Notification.created_at.desc()).limit(min(limit, MAX_LOG_ROWS))))
+
+
+def get_notification(session: Session, token_value: str, notification_id: str) -> Notification:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_NOTIFICATIONS)
+    notification = session.get(Notification, notification_id)
+    if notification is None or notification.organization_id != context.membership.organization_id:
+        raise DomainError("Notification not found", status_code=404)
+    return notification
+
+
+def update_contact(session: Session, token_value: str, payload: ContactUpdate) -> User:
+    """Set one's own phone number and Telegram chat, the SMS and Telegram targets."""
+
+    context = resolve_context(session, token_value)
+    user = session.get(User, context.membership.user_id)
+    for field, value in payload.model_dump(exclude_unset=True).items():
+        setattr(user, field, value or None)
+    session.commit()
+    session.refresh(user)
+    return user
@@ -0,0 +1,456 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+
+from ..models import (
+    Assignment,
+    MissionTag,
+    PlanningLogCursor,
+    PlanningLogHead,
+    PlanningLogSnapshot,
+    PlanningOperation,
+    ScheduledMission,
+)
+from ..rbac import Permission
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .planning_cache import conflict_index_cache, log_version
+from .planning_week import refresh_week_rows
+from .triggers import sync_assignment
+
+MISSION = "mission"
+ASSIGNMENT = "assignment"
+
+ACTIVE = "active"
+UNDONE = "undone"
+DISCARDED = "discarded"
+MARKER = "marker"
+
+SNAPSHOT_EVERY = 500
+UNDO_DEPTH = 100
+MAX_READ_LIMIT = 500
+SNAPSHOT_JOB_KIND = "planning.snapshot"
+
+RowState = dict[str, Any]
+RowChange = dict[str, Any]
+
+_DATETIME_FIELDS = ("starts_at", "ends_at")
+
+
+def mission_state(mission: ScheduledMission) -> RowState:
+    return {
+        "organization_id": mission.organization_id,
+        "template_id": mission.template_id,
+        "project_id": mission.project_id,
+        "venue_id": mission.venue_id,
+        "starts_at": mission.starts_at.isoformat(),
+        "ends_at": mission.ends_at.isoformat(),
+        "team_size": mission.team_size,
+        "notes": mission.notes,
+        "tag_ids": sorted(tag.id for tag in mission.tags),
+    }
+
+
+def assignment_state(assignment: Assignment) -> RowState:
+    return {
+        "organization_id": assignment.organization_id,
+        "mission_id": assignment.mission_id,
+        "user_id": assignment.user_id,
+        "starts_at": assignment.starts_at.isoformat(),
+        "ends_at": assignment.ends_at.isoformat(),
+    }
+
+
+def row_change(entity: str, entity_id: str, before: RowState | None, after: RowState | None) -> RowChange:
+    """One row of a log entry. ``before`` is the inverse delta, ``after`` the forward one."""
+
+    return {"entity": entity, "id": entity_id, "before": before, "after": after}
+
+
+def invert(changes: list[RowChange]) -> list[RowChange]:
+    return [row_change(change["entity"], change["id"], change["after"], change["before"]) for change in reversed(changes)]
+
+
+def _head(session: Session, organization_id: str) -> PlanningLogHead:
+    head = session.scalar(
+        select(PlanningLogHead).where(PlanningLogHead.organization_id == organization_id).with_for_update()
+    )
+    if head is None:
+        head = PlanningLogHead(organization_id=organization_id, sequence=0, snapshot_sequence=0)
+        session.add(head)
+    return head
+
+
+def _append(
+    session: Session,
+    organization_id: str,
+    kind: str,
+    changes: list[RowChange],
+    *,
+    actor_id: str | None,
+    state: str = ACTIVE,
+    target_sequence: int | None = None,
+) -> PlanningOperation:
+    head = _head(session, organization_id)
+    head.sequence += 1
+    operation = PlanningOperation(
+        organization_id=organization_id,
+        sequence=head.sequence,
+        kind=kind,
+        state=state,
+        target_sequence=target_sequence,
+        actor_id=actor_id,
+        changes=changes,
+    )
+    session.add(operation)
+    if head.sequence - head.snapshot_sequence >= SNAPSHOT_EVERY:
+        _snapshot_after_commit(session, organization_id)
+    return operation
+
+
+def _snapshot_after_commit(session: Session, organization_id: str) -> None:
+    """Queue a snapshot job for when the writing transaction commits.
+
+    Snapshotting reads the whole planning of the organisation; doing it on
+    the job pool keeps that cost out of the write that crossed the threshold.
+    """
+
+    due = session.info.setdefault("snapshots_due", set())
+    if not due:
+        event.listen(session, "after_commit", _submit_snapshots, once=True)
+    due.add(organization_id)
+
+
+def _submit_snapshots(session: Session) -> None:
+    session_factory = sessionmaker(bind=session.get_bind(), expire_on_commit=False)
+    for organization_id in session.info.pop("snapshots_due", set()):
+
+        def work(job: Job, organization_id: str = organization_id) -> int | None:
+            worker_session = session_factory()
+            try:
+                head = _head(worker_session, organization_id)
+                if head.sequence - head.snapshot_sequence < SNAPSHOT_EVERY:
+                    return None  # another job got there first
+                snapshot = take_snapshot(worker_session, organization_id, head)
+                worker_session.commit()
+                return snapshot.sequence
+            finally:
+                worker_session.close()
+
+        job_registry.submit(SNAPSHOT_JOB_KIND, organization_id, work)
+
+
+def record(
+    session: Session,
+    organization_id: str,
+    kind: str,
+    changes: Iterable[RowChange],
+    *,
+    actor_id: str | None = None,
+) -> PlanningOperation | None:
+    """Append a planning write to the log inside the caller's transaction.
+
+    Rows whose state did not change are dropped; a write that changed nothing
+    is not logged. A new write empties the redo stack.
+    """
+
+    effective = [change for change in changes if change["before"] != change["after"]]
+    if not effective:
+        return None
+    session.execute(
+        update(PlanningOperation)
+        .where(PlanningOperation.organization_id == organization_id)
+        .where(PlanningOperation.state == UNDONE)
+        .values(state=DISCARDED)
+    )
+    return _append(session, organization_id, kind, effective, actor_id=actor_id)
+
+
+def touch(session: Session, organization_id: str, kind: str, *, actor_id: str | None = None) -> PlanningOperation:
+    """Bump the log head for a planning-visible write the log does not journal.
+
+    Recurrence rules, occurrence exceptions, availability, new members and
+    venue, template or project edits change what planning reads show
+    without being undoable. The change-less marker keeps
+    :func:`log_version` a complete version stamp.
+    """
+
+    return _append(session, organization_id, kind, [], actor_id=actor_id, state=MARKER)
+
+
+def _parse(state: RowState) -> RowState:
+    return {
+        name: datetime.fromisoformat(value) if name in _DATETIME_FIELDS else value
+        for name, value in state.items()
+    }
+
+
+def row_state(session: Session, entity: str, entity_id: str) -> RowState | None:
+    if entity == MISSION:
+        mission = session.get(ScheduledMission, entity_id)
+        return mission_state(mission) if mission is not None else None
+    assignment = session.get(Assignment, entity_id)
+    return assignment_state(assignment) if assignment is not None else None
+
+
+def _write(
+    session: Session, entity: str, entity_id: str, state: RowState | None, *, actor_id: str | None = None
+) -> str | None:
+    """Bring one row to ``state`` and return the mission whose read model it touches.
+
+    Assignment writes run the planning hooks, so an undone shift has its
+    reminders cancelled and a restored or moved one is notified and re-armed.
+    """
+
+    model = ScheduledMission if entity == MISSION else Assignment
+    row = session.get(model, entity_id)
+    previous = (row.user_id, row.starts_at, row.ends_at) if entity == ASSIGNMENT and row is not None else None
+    if state is None:
+        if row is None:
+            return None
+        mission_id = row.id if entity == MISSION else row.mission_id
+        session.delete(row)
+        session.flush()
+        if entity == ASSIGNMENT:
+            sync_assignment(session, entity_id, previous, actor_id)
+        return mission_id
+
+    values = _parse(state)
+    tag_ids = values.pop("tag_ids", None)
+    if row is None:
+        row = model(id=entity_id)
+        session.add(row)
+    for name, value in values.items():
+        setattr(row, name, value)
+    if tag_ids is not None:
+        row.tags = list(session.scalars(select(MissionTag).where(MissionTag.id.in_(tag_ids)))) if tag_ids else []
+    session.flush()
+    if entity == ASSIGNMENT:
+        sync_assignment(session, entity_id, previous, actor_id)
+    return entity_id if entity == MISSION else values["mission_id"]
+
+
+def apply_changes(
+    session: Session, changes: list[RowChange], *, expect: str, actor_id: str | None = None
+) -> set[str]:
+    """Write the ``after`` state of every change, checking rows still hold ``expect`` first.
+
+    The check makes undo/redo refuse to overwrite rows modified outside the
+    log (e.g. a venue deleted under a mission) instead of silently losing data.
+    """
+
+    for change in changes:
+        if row_state(session, change["entity"], change["id"]) != change[expect]:
+            raise DomainError("Planning changed since this operation", status_code=409)
+    touched = set()
+    for change in changes:
+        mission_id = _write(session, change["entity"], change["id"], change["after"], actor_id=actor_id)
+        if mission_id is not None:
+            touched.add(mission_id)
+    return touched
+
+
+def _step(session: Session, token_value: str, *, redo: bool) -> PlanningOperation:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+
+    query = select(PlanningOperation).where(PlanningOperation.organization_id == organization_id)
+    if redo:
+        query = query.where(PlanningOperation.state == UNDONE).order_by(PlanningOperation.sequence.asc())
+    else:
+        query = query.where(PlanningOperation.state == ACTIVE).order_by(PlanningOperation.sequence.desc())
+    target = session.scalar(query.limit(1))
+    if target is None:
+        raise DomainError("Nothing to redo" if redo else "Nothing to undo", status_code=409)
+
+    changes = target.changes if redo else invert(target.changes)
+    try:
+        touched = apply_changes(session, changes, expect="before", actor_id=context.membership.user_id)
+        target.state = ACTIVE if redo else UNDONE
+        marker = _append(
+            session,
+            organization_id,
+            "redo" if redo else "undo",
+            changes,
+            actor_id=context.membership.user_id,
+            state=MARKER,
+            target_sequence=target.sequence,
+        )
+        refresh_week_rows(session, touched)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    conflict_index_cache.invalidate(organization_id)
+    session.refresh(marker)
+    return marker
+
+
+def undo(session: Session, token_value: str) -> PlanningOperation:
+    """Revert the latest active write of the organisation by applying its stored inverse."""
+
+    return _step(session, token_value, redo=False)
+
+
+def redo(session: Session, token_value: str) -> PlanningOperation:
+    """Re-apply the most recently undone write, unless a new write happened since."""
+
+    return _step(session, token_value, redo=True)
+
+
+def current_state(session: Session, organization_id: str) -> dict[str, dict[str, RowState]]:
+    missions = session.scalars(
+        select(ScheduledMission)
+        .where(ScheduledMission.organization_id == organization_id)
+        .options(selectinload(ScheduledMission.tags))
+    )
+    assignments = session.scalars(select(Assignment).where(Assignment.organization_id == organization_id))
+    return {
+        MISSION: {mission.id: mission_state(mission) for mission in missions},
+        ASSIGNMENT: {assignment.id: assignment_state(assignment) for assignment in assignments},
+    }
+
+
+def take_snapshot(session: Session, organization_id: str, head: PlanningLogHead | None = None) -> PlanningLogSnapshot:
+    """Store the full state at the head sequence, then compact the log behind it."""
+
+    head = head or _head(session, organization_id)
+    session.execute(delete(PlanningLogSnapshot).where(PlanningLogSnapshot.organization_id == organization_id))
+    snapshot = PlanningLogSnapshot(
+        organization_id=organization_id, sequence=head.sequence, state=current_state(session, organization_id)
+    )
+    session.add(snapshot)
+    head.snapshot_sequence = head.sequence
+    compact(session, organization_id, head)
+    return snapshot
+
+
+def compact(session: Session, organization_id: str, head: PlanningLogHead) -> None:
+    """Drop entries already covered by the snapshot, keeping the last ``UNDO_DEPTH`` undoable writes."""
+
+    oldest_undoable = session.scalar(
+        select(PlanningOperation.sequence)
+        .where(PlanningOperation.organization_id == organization_id)
+        .where(PlanningOperation.state.in_((ACTIVE, UNDONE)))
+        .order_by(PlanningOperation.sequence.desc())
+        .offset(UNDO_DEPTH - 1)
+        .limit(1)
+    )
+    if oldest_undoable is None:
+        return
+    upto = min(head.snapshot_sequence, oldest_undoable - 1)
+    if upto <= 0:
+        return
+    session.execute(
+        delete(PlanningOperation)
+        .where(PlanningOperation.organization_id == organization_id)
+        .where(PlanningOperation.sequence <= upto)
+    )
+
+
+def replay(session: Session, organization_id: str, upto: int | None = None) -> dict[str, dict[str, RowState]]:
+    """Rebuild the planning state at ``upto`` (default: head) from the snapshot plus the log tail."""
+
+    snapshot = session.scalar(
+        select(PlanningLogSnapshot).where(PlanningLogSnapshot.organization_id == organization_id)
+    )
+    base = snapshot.sequence if snapshot is not None else 0
+    if upto is not None and upto < base:
+        raise DomainError("Sequence is behind the latest snapshot", status_code=410)
+    state = {
+        MISSION: dict(snapshot.state.get(MISSION, {})) if snapshot else {},
+        ASSIGNMENT: dict(snapshot.state.get(ASSIGNMENT, {})) if snapshot else {},
+    }
+    query = (
+        select(PlanningOperation.changes)
+        .where(PlanningOperation.organization_id == organization_id)
+        .where(PlanningOperation.sequence > base)
+        .order_by(PlanningOperation.sequence)
+    )
+    if upto is not None:
+        query = query.where(PlanningOperation.sequence <= upto)
+    for changes in session.scalars(query):
+        for change in changes:
+            if change["after"] is None:
+                state[change["entity"]].pop(change["id"], None)
+            else:
+                state[change["entity"]][change["id"]] = change["after"]
+    return state
+
+
+def read_operations(
+    session: Session, organization_id: str, after: int, limit: int = MAX_READ_LIMIT
+) -> list[PlanningOperation]:
+    """Entries after ``after`` in sequence order; 410 once that part of the log was compacted."""
+
+    earliest = session.scalar(
+        select(PlanningOperation.sequence)
+        .where(PlanningOperation.organization_id == organization_id)
+        .order_by(PlanningOperation.sequence)
+        .limit(1)
+    )
+    if earliest is not None and after < earliest - 1:
+        raise DomainError("Cursor is behind the compacted log; resync from a snapshot", status_code=410)
+    return list(
+        session.scalars(
+            select(PlanningOperation)
+            .where(PlanningOperation.organization_id == organization_id)
+            .where(PlanningOperation.sequence > after)
+            .order_by(PlanningOperation.sequence)
+            .limit(min(limit, MAX_READ_LIMIT))
+        )
+    )
+
+
+def consume(
+    session: Session, organization_id: str, consumer: str, limit: int = MAX_READ_LIMIT
+) -> list[PlanningOperation]:
+    """Entries a named consumer has not processed yet; call :func:`acknowledge` once handled."""
+
+    cursor = session.get(PlanningLogCursor, (organization_id, consumer))
+    return read_operations(session, organization_id, cursor.sequence if cursor else 0, limit)
+
+
+def acknowledge(session: Session, organization_id: str, consumer: str, sequence: int) -> PlanningLogCursor:
+    if not consumer or len(consumer) > 60:
+        raise DomainError("Consumer name must be 1 to 60 characters", status_code=422)
+    cursor = session.get(PlanningLogCursor, (organization_id, consumer))
+    if cursor is None:
+        cursor = PlanningLogCursor(organization_id=organization_id, consumer=consumer, sequence=0)
+        session.add(cursor)
+    if sequence < cursor.sequence:
+        raise DomainError("Cursor cannot move backwards", status_code=409)
+    if sequence > log_version(session, organization_id):
+        raise DomainError("Cursor cannot move past the head of the log", status_code=422)
+    cursor.sequence = sequence
+    return cursor
+
+
+def list_operations(session: Session, token_value: str, after: int, limit: int) -> list[PlanningOperation]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    return read_operations(session, context.membership.organization_id, after, limit)
+
+
+def get_cursor(session: Session, token_value: str, consumer: str) -> PlanningLogCursor:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    organization_id = context.membership.organization_id
+    cursor = session.get(PlanningLogCursor, (organization_id, consumer))
+    return cursor or PlanningLogCursor(organization_id=organization_id, consumer=consumer, sequence=0)
+
+
+def set_cursor(session: Session, token_value: str, consumer: str, sequence: int) -> PlanningLogCursor:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    cursor = acknowledge(session, context.membership.organization_id, consumer, sequence)
+    session.commit()
+    session.refresh(cursor)
+    return cursor
@@ -0,0 +1,540 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import (
+    PayRate,
+    PayrollClose,
+    PayrollPolicy,
+    PayrollSnapshotPerson,
+    PayrollSnapshotProject,
+    Timesheet,
+    User,
+)
+from ..rbac import Permission
+from ..schemas import PayRateSet, PayrollPolicyUpdate
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .planning import ensure_member
+from .timesheets import VALIDATED, PolicyRules, compute_planned, epoch_minutes, load_rules
+
+MAX_PERIOD_DAYS = 62
+HOURLY = "hourly"
+CACHET = "cachet"
+CLOSED = "closed"
+
+# Epoch day 0 (1970-01-01) was a Thursday; shifting by 3 makes weeks start on Monday.
+_MONDAY_SHIFT = 3
+
+COMPONENTS = (
+    "base",
+    "night_premium",
+    "weekend_premium",
+    "holiday_premium",
+    "overtime_premium",
+    "allowances",
+    "gross",
+)
+
+
+@dataclass(frozen=True)
+class PayrollRules:
+    """Premium and allowance rules compiled once per organisation policy version."""
+
+    night: float
+    weekend: float
+    holiday: float
+    overtime_after: int
+    overtime: float
+    overtime_high_after: int
+    overtime_high: float
+    meal_after: int
+    meal_cents: int
+    transport_cents: int
+
+    @classmethod
+    def compile(cls, policy: PayrollPolicy) -> PayrollRules:
+        return cls(
+            night=policy.night_premium_pct / 100,
+            weekend=policy.weekend_premium_pct / 100,
+            holiday=policy.holiday_premium_pct / 100,
+            overtime_after=policy.overtime_after_minutes,
+            overtime=policy.overtime_premium_pct / 100,
+            overtime_high_after=max(policy.overtime_high_after_minutes, policy.overtime_after_minutes),
+            overtime_high=policy.overtime_high_premium_pct / 100,
+            meal_after=policy.meal_after_minutes,
+            meal_cents=policy.meal_allowance_cents,
+            transport_cents=policy.transport_allowance_cents,
+        )
+
+
+class CompiledRulesCache:
+    """Compiled rules per organisation, reused until the policy's ``updated_at`` moves."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[datetime | None, PayrollRules]] = {}
+
+    def get(self, policy: PayrollPolicy) -> PayrollRules:
+        with self._lock:
+            cached = self._entries.get(policy.organization_id)
+            if cached is not None and cached[0] == policy.updated_at:
+                return cached[1]
+        rules = PayrollRules.compile(policy)
+        if policy.updated_at is not None:
+            with self._lock:
+                self._entries[policy.organization_id] = (policy.updated_at, rules)
+        return rules
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_rules = CompiledRulesCache()
+
+
+@dataclass
+class PayrollBatch:
+    """Columnar payroll input: one position per timesheet line, ids factorised to indices."""
+
+    person_ids: list[str]
+    project_ids: list[str | None]
+    person: np.ndarray
+    project: np.ndarray
+    start: np.ndarray
+    minutes: np.ndarray
+    night_minutes: np.ndarray
+    weekend: np.ndarray
+    holiday: np.ndarray
+    work_day: np.ndarray
+    hourly_cents: np.ndarray
+    cachet_cents: np.ndarray
+    cachet: np.ndarray
+    # Minutes the line's person worked earlier in the same ISO week, before the period started.
+    carried: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return int(self.minutes.size)
+
+
+@dataclass
+class PayrollResult:
+    lines: dict[str, np.ndarray]
+    per_person: dict[str, np.ndarray]
+    per_project: dict[str, np.ndarray]
+    person_minutes: np.ndarray
+    project_minutes: np.ndarray
+
+
+def _weekly_overtime(batch: PayrollBatch, rules: PayrollRules) -> tuple[np.ndarray, np.ndarray]:
+    """Minutes of each line beyond the first and second weekly thresholds of its person.
+
+    Lines are ordered by (person, week, start) with one lexsort; a running
+    total per group is a global cumulative sum minus its value at the group
+    start, so no Python loop runs over people or weeks. A week straddling
+    the period start opens at the minutes ``carried`` from before it.
+    """
+
+    size = len(batch)
+    if size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    week = (batch.work_day + _MONDAY_SHIFT) // 7
+    order = np.lexsort((batch.start, week, batch.person))
+    minutes = batch.minutes[order]
+    person, week = batch.person[order], week[order]
+    group_start = np.ones(size, dtype=bool)
+    group_start[1:] = (person[1:] != person[:-1]) | (week[1:] != week[:-1])
+    running = np.cumsum(minutes)
+    offsets = np.maximum.accumulate(np.where(group_start, running - minutes, 0))
+    cumulative = running - offsets
+    if batch.carried is not None:
+        cumulative = cumulative + batch.carried[order]
+
+    beyond = np.clip(cumulative - rules.overtime_after, 0, minutes)
+    beyond_high = np.clip(cumulative - rules.overtime_high_after, 0, minutes)
+    first, high = np.empty(size, dtype=np.int64), np.empty(size, dtype=np.int64)
+    first[order] = beyond - beyond_high
+    high[order] = beyond_high
+    return first, high
+
+
+def compute_payroll(batch: PayrollBatch, rules: PayrollRules) -> PayrollResult:
+    """Price every line and aggregate per person and per project in one vectorised pass.
+
+    Hourly lines earn the rate on paid minutes plus night, weekend, holiday
+    and weekly overtime premiums; cachet lines earn their flat cachet. Both
+    get the meal allowance past ``meal_after`` minutes and the transport
+    allowance. Amounts are in cents, rounded per line.
+    """
+
+    hourly = ~batch.cachet
+    per_minute = np.where(hourly, batch.hourly_cents / 60.0, 0.0)
+    overtime, overtime_high = _weekly_overtime(batch, rules)
+
+    base = np.where(batch.cachet, batch.cachet_cents, np.rint(batch.minutes * per_minute)).astype(np.int64)
+    night = np.rint(batch.night_minutes * per_minute * rules.night).astype(np.int64)
+    weekend = np.rint(np.where(batch.weekend, batch.minutes, 0) * per_minute * rules.weekend).astype(np.int64)
+    holiday = np.rint(np.where(batch.holiday, batch.minutes, 0) * per_minute * rules.holiday).astype(np.int64)
+    overtime_premium = np.rint(
+        (overtime * rules.overtime + overtime_high * rules.overtime_high) * per_minute
+    ).astype(np.int64)
+    allowances = np.where(batch.minutes >= rules.meal_after, rules.meal_cents, 0) + rules.transport_cents
+    allowances = np.broadcast_to(allowances, batch.minutes.shape).astype(np.int64)
+    gross = base + night + weekend + holiday + overtime_premium + allowances
+
+    lines = {
+        "base": base,
+        "night_premium": night,
+        "weekend_premium": weekend,
+        "holiday_premium": holiday,
+        "overtime_premium": overtime_premium,
+        "allowances": allowances,
+        "gross": gross,
+    }
+    people, projects = len(batch.person_ids), len(batch.project_ids)
+    return PayrollResult(
+        lines=lines,
+        per_person={
+            name: np.bincount(batch.person, weights=values, minlength=people).astype(np.int64)
+            for name, values in lines.items()
+        },
+        per_project={
+            name: np.bincount(batch.project, weights=values, minlength=projects).astype(np.int64)
+            for name, values in lines.items()
+        },
+        person_minutes=np.bincount(batch.person, weights=batch.minutes, minlength=people).astype(np.int64),
+        project_minutes=np.bincount(batch.project, weights=batch.minutes, minlength=projects).astype(np.int64),
+    )
+
+
+def _factorise(values: Sequence) -> tuple[list, np.ndarray]:
+    index: dict = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64, count=len(values))
+    return list(index), codes
+
+
+def load_pay_rates(
+    session: Session, organization_id: str, user_ids: Collection[str]
+) -> dict[str, tuple[str, int, int]]:
+    """Pay card ``(mode, hourly, cachet)`` of each person; anyone without a rate fails the run.
+
+    Pricing someone with no rate at zero would close a month with people
+    paid nothing, so the missing people are named instead.
+    """
+
+    rates = {
+        user_id: (mode, hourly_cents, cachet_cents)
+        for user_id, mode, hourly_cents, cachet_cents in session.execute(
+            select(PayRate.user_id, PayRate.mode, PayRate.hourly_rate_cents, PayRate.cachet_cents)
+            .where(PayRate.organization_id == organization_id)
+            .where(PayRate.user_id.in_(list(user_ids)))
+        )
+    }
+    missing = [user_id for user_id in user_ids if user_id not in rates]
+    if missing:
+        emails = session.scalars(select(User.email).where(User.id.in_(missing)).order_by(User.email))
+        raise DomainError(f"No pay rate set for {', '.join(emails)}", status_code=422)
+    return rates
+
+
+def _carried_minutes(
+    session: Session,
+    organization_id: str,
+    period_start: date,
+    person_ids: list[str],
+    person: np.ndarray,
+    work_day: np.ndarray,
+    rules: PolicyRules,
+) -> np.ndarray:
+    """Per line, the validated minutes of its person earlier in the week the period starts in.
+
+    Only that lead-in matters: lines after the period start later than every
+    line inside it, so they never add to an in-period running total.
+    """
+
+    carried = np.zeros(person.size, dtype=np.int64)
+    week_start = period_start - timedelta(days=period_start.weekday())
+    if week_start == period_start or not person_ids:
+        return carried
+    rows = session.execute(
+        select(
+            Timesheet.user_id,
+            Timesheet.planned_start,
+            Timesheet.planned_end,
+            Timesheet.actual_start,
+            Timesheet.actual_end,
+        )
+        .where(Timesheet.organization_id == organization_id)
+        .where(Timesheet.status == VALIDATED)
+        .where(Timesheet.work_date >= week_start)
+        .where(Timesheet.work_date < period_start)
+        .where(Timesheet.user_id.in_(person_ids))
+    ).all()
+    if not rows:
+        return carried
+    starts = epoch_minutes([row[3] if row[3] is not None and row[4] is not None else row[1] for row in rows])
+    ends = epoch_minutes([row[4] if row[3] is not None and row[4] is not None else row[2] for row in rows])
+    hours = compute_planned(starts, ends, rules)
+    index = {user_id: position for position, user_id in enumerate(person_ids)}
+    lead_in = np.bincount(
+        [index[row[0]] for row in rows], weights=hours.planned_minutes, minlength=len(person_ids)
+    ).astype(np.int64)
+    first_week = ((period_start - date(1970, 1, 1)).days + _MONDAY_SHIFT) // 7
+    return np.where((work_day + _MONDAY_SHIFT) // 7 == first_week, lead_in[person], 0)
+
+
+def load_batch(
+    session: Session,
+    organization_id: str,
+    period_start: date,
+    period_end: date,
+    user_ids: Collection[str] | None = None,
+    rules: PolicyRules | None = None,
+) -> PayrollBatch:
+    """Validated sheets of the period as columns; clocked spans replace planned ones when complete.
+
+    Paid, night and calendar minutes of clocked spans are recomputed with the
+    organisation's timesheet rules in the same vectorised pass as 038. The
+    week the period starts in is read from its Monday for the overtime
+    running totals, but only lines inside the period are priced. ``rules``
+    defaults to the organisation's current timesheet rules; a close passes
+    the ones it froze.
+    """
+
+    query = (
+        select(
+            Timesheet.user_id,
+            Timesheet.project_id,
+            Timesheet.planned_start,
+            Timesheet.planned_end,
+            Timesheet.actual_start,
+            Timesheet.actual_end,
+        )
+        .where(Timesheet.organization_id == organization_id)
+        .where(Timesheet.status == VALIDATED)
+        .where(Timesheet.work_date >= period_start)
+        .where(Timesheet.work_date < period_end)
+        .order_by(Timesheet.planned_start)
+    )
+    if user_ids is not None:
+        query = query.where(Timesheet.user_id.in_(list(user_ids)))
+    rows = session.execute(query).all()
+    person_ids, person = _factorise([row[0] for row in rows])
+    project_ids, project = _factorise([row[1] for row in rows])
+    starts = epoch_minutes([row[4] if row[4] is not None and row[5] is not None else row[2] for row in rows])
+    ends = epoch_minutes([row[5] if row[4] is not None and row[5] is not None else row[3] for row in rows])
+    rules = rules or load_rules(session, organization_id)
+    hours = compute_planned(starts, ends, rules)
+
+    rates = load_pay_rates(session, organization_id, person_ids)
+    card = [rates[user_id] for user_id in person_ids]
+    cachet_people = np.array([mode == CACHET for mode, _, _ in card], dtype=bool)
+    hourly_people = np.array([cents for _, cents, _ in card], dtype=np.int64)
+    cachet_cents_people = np.array([cents for _, _, cents in card], dtype=np.int64)
+    return PayrollBatch(
+        person_ids=person_ids,
+        project_ids=project_ids,
+        person=person,
+        project=project,
+        start=starts,
+        minutes=hours.planned_minutes,
+        night_minutes=hours.night_minutes,
+        weekend=hours.weekend,
+        holiday=hours.holiday,
+        work_day=hours.work_day,
+        hourly_cents=hourly_people[person] if person_ids else np.zeros(0, dtype=np.int64),
+        cachet_cents=cachet_cents_people[person] if person_ids else np.zeros(0, dtype=np.int64),
+        cachet=cachet_people[person] if person_ids else np.zeros(0, dtype=bool),
+        carried=_carried_minutes(session, organization_id, period_start, person_ids, person, hours.work_day, rules),
+    )
+
+
+def load_payroll_policy(session: Session, organization_id: str) -> PayrollPolicy:
+    """Stored payroll policy of the organisation, or an unsaved one holding the defaults."""
+
+    policy = session.get(PayrollPolicy, organization_id)
+    if policy is None:
+        policy = PayrollPolicy(
+            organization_id=organization_id,
+            night_premium_pct=25,
+            weekend_premium_pct=0,
+            holiday_premium_pct=100,
+            overtime_after_minutes=35 * 60,
+            overtime_premium_pct=25,
+            overtime_high_after_minutes=43 * 60,
+            overtime_high_premium_pct=50,
+            meal_after_minutes=6 * 60,
+            meal_allowance_cents=0,
+            transport_allowance_cents=0,
+        )
+    return policy
+
+
+def get_payroll_policy(session: Session, token_value: str) -> PayrollPolicy:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    return load_payroll_policy(session, context.membership.organization_id)
+
+
+def update_payroll_policy(session: Session, token_value: str, payload: PayrollPolicyUpdate) -> PayrollPolicy:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    policy = load_payroll_policy(session, context.membership.organization_id)
+    data = payload.model_dump(exclude_unset=True)
+    for field, value in data.items():
+        if value is not None:
+            setattr(policy, field, value)
+    if policy.overtime_high_after_minutes < policy.overtime_after_minutes:
+        raise DomainError("The second overtime tier must start after the first", status_code=422)
+    session.add(policy)
+    session.commit()
+    session.refresh(policy)
+    return policy
+
+
+def list_pay_rates(session: Session, token_value: str) -> list[PayRate]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    return list(
+        session.scalars(
+            select(PayRate)
+            .where(PayRate.organization_id == context.membership.organization_id)
+            .order_by(PayRate.user_id)
+        )
+    )
+
+
+def set_pay_rate(session: Session, token_value: str, user_id: str, payload: PayRateSet) -> PayRate:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    organization_id = context.membership.organization_id
+    ensure_member(session, organization_id, user_id)
+    rate = session.get(PayRate, (organization_id, user_id))
+    if rate is None:
+        rate = PayRate(organization_id=organization_id, user_id=user_id)
+        session.add(rate)
+    if payload.mode == CACHET and payload.cachet_cents == 0:
+        raise DomainError("A cachet rate needs a cachet amount", status_code=422)
+    rate.mode = payload.mode
+    rate.hourly_rate_cents = payload.hourly_rate_cents
+    rate.cachet_cents = payload.cachet_cents
+    session.commit()
+    session.refresh(rate)
+    return rate
+
+
+@dataclass(frozen=True)
+class PayrollTotals:
+    key: str | None
+    minutes: int
+    amounts: dict[str, int]
+
+
+@dataclass(frozen=True)
+class PayrollSummary:
+    period_start: date
+    period_end: date
+    lines: int
+    totals: dict[str, int]
+    people: list[PayrollTotals]
+    projects: list[PayrollTotals]
+
+
+def summarise(batch: PayrollBatch, result: PayrollResult, period_start: date, period_end: date) -> PayrollSummary:
+    def rows(keys: list, minutes: np.ndarray, amounts: dict[str, np.ndarray]) -> list[PayrollTotals]:
+        return [
+            PayrollTotals(key, int(minutes[index]), {name: int(amounts[name][index]) for name in COMPONENTS})
+            for index, key in enumerate(keys)
+        ]
+
+    return PayrollSummary(
+        period_start=period_start,
+        period_end=period_end,
+        lines=len(batch),
+        totals={name: int(result.lines[name].sum()) for name in COMPONENTS},
+        people=sorted(
+            rows(batch.person_ids, result.person_minutes, result.per_person), key=lambda item: item.key or ""
+        ),
+        projects=sorted(
+            rows(batch.project_ids, result.project_minutes, result.per_project), key=lambda item: item.key or ""
+        ),
+    )
+
+
+def payroll_summary(session: Session, token_value: str, period_start: date, period_end: date) -> PayrollSummary:
+    """Gross pay of the validated sheets of a period, per person and per project (WF-03 step 4)."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    if period_end <= period_start:
+        raise DomainError("Period end must be after its start", status_code=422)
+    if (period_end - period_start).days > MAX_PERIOD_DAYS:
+        raise DomainError(f"Period cannot exceed {MAX_PERIOD_DAYS} days", status_code=422)
+    organization_id = context.membership.organization_id
+    snapshot = snapshot_summary(session, organization_id, period_start, period_end)
+    if snapshot is not None:
+        return snapshot
+    rules = compiled_rules.get(load_payroll_policy(session, organization_id))
+    batch = load_batch(session, organization_id, period_start, period_end)
+    return summarise(batch, compute_payroll(batch, rules), period_start, period_end)
+
+
+def covering_closes(session: Session, organization_id: str, period_start: date, period_end: date) -> list[str] | None:
+    """Ids of the closed months tiling the period exactly, or ``None`` if any part is still open."""
+
+    closes = session.execute(
+        select(PayrollClose.id, PayrollClose.period_start, PayrollClose.period_end)
+        .where(PayrollClose.organization_id == organization_id)
+        .where(PayrollClose.status == CLOSED)
+        .where(PayrollClose.period_start >= period_start)
+        .where(PayrollClose.period_end <= period_end)
+        .order_by(PayrollClose.period_start)
+    ).all()
+    cursor = period_start
+    for _, close_start, close_end in closes:
+        if close_start != cursor:
+            return None
+        cursor = close_end
+    return [close_id for close_id, _, _ in closes] if closes and cursor == period_end else None
+
+
+def snapshot_summary(
+    session: Session, organization_id: str, period_start: date, period_end: date
+) -> PayrollSummary | None:
+    """Summary of a fully closed period read from its snapshots alone, without touching timesheets."""
+
+    close_ids = covering_closes(session, organization_id, period_start, period_end)
+    if close_ids is None:
+        return None
+
+    def totals(model: type, key_column: str) -> list[PayrollTotals]:
+        merged: dict[str, PayrollTotals] = {}
+        for row in session.scalars(select(model).where(model.close_id.in_(close_ids))):
+            key = getattr(row, key_column)
+            amounts = {name: getattr(row, name) for name in COMPONENTS}
+            previous = merged.get(key)
+            if previous is not None:
+                amounts = {name: previous.amounts[name] + value for name, value in amounts.items()}
+            minutes = row.minutes + (previous.minutes if previous is not None else 0)
+            merged[key] = PayrollTotals(key or None, minutes, amounts)
+        return sorted(merged.values(), key=lambda item: item.key or "")
+
+    people = totals(PayrollSnapshotPerson, "user_id")
+    lines = sum(session.scalars(select(PayrollClose.lines).where(PayrollClose.id.in_(close_ids))))
+    return PayrollSummary(
+        period_start=period_start,
+        period_end=period_end,
+        lines=lines,
+        totals={name: sum(item.amounts[name] for item in people) for name in COMPONENTS},
+        people=people,
+        projects=totals(PayrollSnapshotProject, "project_key"),
+    )
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import dataclasses
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import Select, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import PayrollClose, PayrollSnapshotPerson, PayrollSnapshotProject, Timesheet
+from ..rbac import Permission
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .payroll import (
+    CLOSED,
+    COMPONENTS,
+    PayrollRules,
+    compiled_rules,
+    compute_payroll,
+    load_batch,
+    load_pay_rates,
+    load_payroll_policy,
+)
+from .timesheets import VALIDATED, PolicyRules, load_rules
+
+RUNNING = "running"
+FAILED = "failed"
+CLOSE_CHUNK = 200
+# A worker renews its claim with every chunk; one silent for longer is presumed dead.
+CLOSE_LEASE = timedelta(minutes=5)
+CLOSE_JOB_KIND = "payroll.close"
+
+
+def month_bounds(month: date) -> tuple[date, date]:
+    first = month.replace(day=1)
+    return first, (first + timedelta(days=32)).replace(day=1)
+
+
+def _validated_people(close: PayrollClose) -> Select:
+    return (
+        select(Timesheet.user_id)
+        .distinct()
+        .where(Timesheet.organization_id == close.organization_id)
+        .where(Timesheet.status == VALIDATED)
+        .where(Timesheet.work_date >= close.period_start)
+        .where(Timesheet.work_date < close.period_end)
+    )
+
+
+def claim_close(session: Session, close_id: str, lease: timedelta = CLOSE_LEASE) -> str | None:
+    """Take a running close for this worker; the claim, or ``None`` while another worker holds it.
+
+    Every worker resumes running closes at start-up; the conditional update
+    lets only one of them drive each close. A claim left by a worker that
+    died is taken over once ``lease`` has passed since its last chunk.
+    """
+
+    claimed_at = now_utc()
+    claim = str(uuid.uuid4())
+    result = session.execute(
+        update(PayrollClose)
+        .where(PayrollClose.id == close_id)
+        .where(PayrollClose.status == RUNNING)
+        .where(or_(PayrollClose.claim.is_(None), PayrollClose.claimed_at <= claimed_at - lease))
+        .values(claim=claim, claimed_at=claimed_at)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return claim if result.rowcount else None
+
+
+def close_step(session: Session, close_id: str, chunk_size: int = CLOSE_CHUNK, claim: str | None = None) -> bool:
+    """Snapshot the next chunk of people after the checkpoint; ``True`` once the close is complete.
+
+    People are taken in ``user_id`` order, so the checkpoint is a keyset
+    cursor. Overtime is weekly per person, which makes a chunk of people an
+    exact unit of work. Person rows, the project partial sums and the
+    checkpoint are committed together: an interrupted run resumes after the
+    last committed chunk without counting anything twice. With a ``claim``
+    the row is locked for the chunk and its lease renewed; a worker whose
+    claim was taken over stops there and also gets ``True``.
+    """
+
+    close = session.get(PayrollClose, close_id, with_for_update=claim is not None, populate_existing=True)
+    if close is None or close.status == CLOSED:
+        return True
+    if claim is not None:
+        if close.claim != claim:
+            session.rollback()
+            return True
+        close.claimed_at = now_utc()
+    query = _validated_people(close).order_by(Timesheet.user_id).limit(chunk_size)
+    if close.checkpoint is not None:
+        query = query.where(Timesheet.user_id > close.checkpoint)
+    people = list(session.scalars(query))
+    if not people:
+        close.status, close.closed_at, close.error = CLOSED, now_utc(), None
+        close.claim = close.claimed_at = None
+        session.commit()
+        return True
+
+    timesheet_rules = PolicyRules.from_dict(close.timesheet_rules) if close.timesheet_rules is not None else None
+    batch = load_batch(session, close.organization_id, close.period_start, close.period_end, people, timesheet_rules)
+    result = compute_payroll(batch, PayrollRules(**close.rules))
+    lines_per_person = np.bincount(batch.person, minlength=len(batch.person_ids))
+    lines_per_project = np.bincount(batch.project, minlength=len(batch.project_ids))
+    rows = []
+    for index, user_id in enumerate(batch.person_ids):
+        own = np.flatnonzero(batch.person == index)
+        rows.append(
+            {
+                "close_id": close.id,
+                "user_id": user_id,
+                "organization_id": close.organization_id,
+                "cachet": bool(batch.cachet[own[0]]),
+                "lines": int(lines_per_person[index]),
+                "minutes": int(result.person_minutes[index]),
+                **{name: int(result.per_person[name][index]) for name in COMPONENTS},
+                "columns": {
+                    "work_day": batch.work_day[own].tolist(),
+                    "start": batch.start[own].tolist(),
+                    "minutes": batch.minutes[own].tolist(),
+                    "gross": result.lines["gross"][own].tolist(),
+                },
+            }
+        )
+    session.execute(insert(PayrollSnapshotPerson), rows)
+
+    keys = [project_id or "" for project_id in batch.project_ids]
+    existing = {
+        row.project_key: row
+        for row in session.scalars(
+            select(PayrollSnapshotProject)
+            .where(PayrollSnapshotProject.close_id == close.id)
+            .where(PayrollSnapshotProject.project_key.in_(keys))
+        )
+    }
+    additions, updates = [], []
+    for index, key in enumerate(keys):
+        values = {
+            "lines": int(lines_per_project[index]),
+            "minutes": int(result.project_minutes[index]),
+            **{name: int(result.per_project[name][index]) for name in COMPONENTS},
+        }
+        previous = existing.get(key)
+        if previous is None:
+            additions.append(
+                {"close_id": close.id, "project_key": key, "organization_id": close.organization_id, **values}
+            )
+        else:
+            updates.append(
+                {
+                    "close_id": close.id,
+                    "project_key": key,
+                    **{name: getattr(previous, name) + value for name, value in values.items()},
+                }
+            )
+    if additions:
+        session.execute(insert(PayrollSnapshotProject), additions)
+    if updates:
+        session.execute(update(PayrollSnapshotProject), updates)
+
+    close.checkpoint = people[-1]
+    close.people_done += len(people)
+    close.lines += len(batch)
+    session.commit()
+    return False
+
+
+def run_close(
+    job: Job, session_factory: sessionmaker[Session], close_id: str, chunk_size: int = CLOSE_CHUNK
+) -> dict[str, int]:
+    """Claim a close, then drive it chunk by chunk in a session of its own, publishing progress from the row.
+
+    A close another worker holds is left alone: the result reports the row as it stands.
+    """
+
+    session = session_factory()
+    try:
+        claim = claim_close(session, close_id)
+        try:
+            while claim is not None and not close_step(session, close_id, chunk_size, claim):
+                close = session.get(PayrollClose, close_id)
+                job.publish(None, progress=close.people_done / max(close.people_total, 1))
+        except Exception as error:
+            session.rollback()
+            session.execute(
+                update(PayrollClose)
+                .where(PayrollClose.id == close_id)
+                .where(PayrollClose.claim == claim)
+                .values(status=FAILED, error=str(error) or error.__class__.__name__, claim=None, claimed_at=None)
+            )
+            session.commit()
+            raise
+        close = session.get(PayrollClose, close_id)
+        return {"people": close.people_done, "lines": close.lines}
+    finally:
+        session.close()
+
+
+def _submit(session_factory: sessionmaker[Session], close: PayrollClose) -> Job:
+    close_id = close.id
+    return job_registry.submit(
+        CLOSE_JOB_KIND, close.organization_id, lambda job: run_close(job, session_factory, close_id)
+    )
+
+
+def start_payroll_close(
+    session: Session, token_value: str, month: date, session_factory: sessionmaker[Session]
+) -> tuple[PayrollClose, Job]:
+    """Freeze a month: the pay and timesheet rules are captured now and people are snapshotted by a background job.
+
+    Closing a month whose close failed resumes it from its checkpoint; one
+    interrupted by a restart is resumed at start-up. A closed month is
+    immutable. Every person to snapshot must have a pay rate before the job starts.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    organization_id = context.membership.organization_id
+    period_start, period_end = month_bounds(month)
+    close = session.scalar(
+        select(PayrollClose)
+        .where(PayrollClose.organization_id == organization_id)
+        .where(PayrollClose.period_start == period_start)
+    )
+    if close is not None and close.status == CLOSED:
+        raise DomainError("Payroll period is already closed", status_code=409)
+    if close is not None and close.status == RUNNING:
+        raise DomainError("Payroll period is already being closed", status_code=409)
+    if close is None:
+        rules = compiled_rules.get(load_payroll_policy(session, organization_id))
+        close = PayrollClose(
+            organization_id=organization_id,
+            period_start=period_start,
+            period_end=period_end,
+            status=RUNNING,
+            rules=dataclasses.asdict(rules),
+            timesheet_rules=load_rules(session, organization_id).as_dict(),
+            started_by=context.membership.user_id,
+        )
+        load_pay_rates(session, organization_id, list(session.scalars(_validated_people(close))))
+        close.people_total = session.scalar(select(func.count()).select_from(_validated_people(close).subquery()))
+        session.add(close)
+        try:
+            session.commit()
+        except IntegrityError as error:
+            session.rollback()
+            raise DomainError("Payroll period is already being closed", status_code=409) from error
+    else:
+        load_pay_rates(session, organization_id, list(session.scalars(_validated_people(close))))
+        close.status, close.error = RUNNING, None
+        session.commit()
+    return close, _submit(session_factory, close)
+
+
+def resume_payroll_closes(session_factory: sessionmaker[Session], lease: timedelta = CLOSE_LEASE) -> list[Job]:
+    """Resubmit closes left running by a process that stopped, e.g. after a restart.
+
+    Closes a live worker still holds are skipped; two workers starting
+    together may both submit one, and :func:`claim_close` lets one run it.
+    """
+
+    session = session_factory()
+    try:
+        closes = list(
+            session.scalars(
+                select(PayrollClose)
+                .where(PayrollClose.status == RUNNING)
+                .where(or_(PayrollClose.claim.is_(None), PayrollClose.claimed_at <= now_utc() - lease))
+            )
+        )
+        return [_submit(session_factory, close) for close in closes]
+    finally:
+        session.close()
+
+
+def list_payroll_closes(session: Session, token_value: str) -> list[PayrollClose]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    return list(
+        session.scalars(
+            select(PayrollClose)
+            .where(PayrollClose.organization_id == context.membership.organization_id)
+            .order_by(PayrollClose.period_start.desc())
+        )
+    )
+
+
+def get_payroll_close(session: Session, token_value: str, close_id: str) -> PayrollClose:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PAYROLL)
+    close = session.get(PayrollClose, close_id)
+    if close is None or close.organization_id != context.membership.organization_id:
+        raise DomainError("Payroll close not found", status_code=404)
+    return close
+
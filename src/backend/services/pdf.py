@@ -0,0 +1,341 @@
+"""Minimal PDF writer and the line templates of generated documents.
+
+Only the standard library is used so pool workers stay cheap: text is set
+in the base-14 Helvetica faces with WinAnsi encoding, page streams are
+deflated, and the output is byte-for-byte deterministic for a given
+input and creation date.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+import zlib
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+
+from .qr import QrRows
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 50
+USABLE_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+REGULAR = "F1"
+BOLD = "F2"
+QR_SIZE = 48  # side of a QR code drawn in a ``@`` row, in points
+
+# Style of each line directive: (font, size, leading).
+STYLES = {
+    "#": (BOLD, 16, 26),
+    "##": (BOLD, 12, 20),
+    "!": (BOLD, 9, 14),
+    "|": (REGULAR, 9, 13),
+    "": (REGULAR, 10, 15),
+    "_": (REGULAR, 10, 34),
+    "@": (REGULAR, 9, QR_SIZE + 8),
+}
+
+_ESCAPES = {ord("("): b"\\(", ord(")"): b"\\)", ord("\\"): b"\\\\"}
+_BYTE_TABLE = [
+    _ESCAPES.get(code, bytes([code]) if 32 <= code < 127 else b"\\%03o" % code) for code in range(256)
+]
+_FORMATTER = string.Formatter()
+_DARK_RUN = re.compile("1+")
+
+
+class TemplateError(ValueError):
+    """Raised when a document template does not parse."""
+
+
+def encode_text(text: str) -> bytes:
+    """Text as a PDF literal string body in WinAnsi (cp1252), escaped."""
+
+    return b"".join(_BYTE_TABLE[byte] for byte in text.encode("cp1252", errors="replace"))
+
+
+def _pdf_date(value: datetime) -> str:
+    return value.strftime("D:%Y%m%d%H%M%SZ")
+
+
+@dataclass(frozen=True, slots=True)
+class Run:
+    """One positioned piece of text.
+
+    ``rule`` draws a line of that width instead, or a filled box when ``height`` is set too.
+    """
+
+    x: float
+    y: float
+    font: str
+    size: int
+    text: str = ""
+    rule: float = 0.0
+    height: float = 0.0
+
+
+def _content(runs: Iterable[Run]) -> bytes:
+    parts = []
+    for run in runs:
+        if run.height:
+            parts.append(b"%.2f %.2f %.2f %.2f re f" % (run.x, run.y, run.rule, run.height))
+        elif run.rule:
+            parts.append(b"0.5 w %.1f %.1f m %.1f %.1f l S" % (run.x, run.y, run.x + run.rule, run.y))
+        else:
+            parts.append(
+                b"BT /%s %d Tf %.1f %.1f Td (%s) Tj ET"
+                % (run.font.encode(), run.size, run.x, run.y, encode_text(run.text))
+            )
+    return b"\n".join(parts)
+
+
+def write_pdf(pages: Sequence[Sequence[Run]], *, title: str, created: datetime) -> bytes:
+    """Serialise pages of runs into a PDF 1.4 file with a correct cross-reference table."""
+
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Title (%s) /Producer (JMD) /CreationDate (%s) >>" % (encode_text(title), _pdf_date(created).encode()),
+    ]
+    kids = []
+    for runs in pages or [[]]:
+        stream = zlib.compress(_content(runs), 6)
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>" % (PAGE_WIDTH, PAGE_HEIGHT, len(objects))
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+@dataclass(frozen=True, slots=True)
+class Line:
+    """A parsed template line: its style directive and one format string per cell."""
+
+    style: str
+    cells: tuple[str, ...]
+
+    def fill(self, values: Mapping[str, object]) -> tuple[str, ...]:
+        return tuple(cell.format_map(values) for cell in self.cells)
+
+
+@dataclass(frozen=True, slots=True)
+class Loop:
+    """Lines repeated for each mapping of a list in the context."""
+
+    key: str
+    lines: tuple[Line, ...]
+
+
+@dataclass(frozen=True)
+class Template:
+    name: str
+    blocks: tuple[Line | Loop, ...]
+
+    def lines(self, context: Mapping[str, object]) -> Iterable[tuple[str, tuple[str, ...]]]:
+        for block in self.blocks:
+            if isinstance(block, Loop):
+                for item in context[block.key]:  # type: ignore[attr-defined]
+                    values = {**context, **item}
+                    for line in block.lines:
+                        yield line.style, line.fill(values)
+            else:
+                yield block.style, block.fill(context)
+
+
+def _parse_line(source: str, number: int) -> Line:
+    directive, _, rest = source.partition(" ")
+    if directive not in STYLES or not directive:
+        directive, rest = "", source
+    cells = tuple(cell.strip() for cell in rest.split("|")) if directive in ("|", "!", "@") else (rest,)
+    for cell in cells:
+        try:
+            list(_FORMATTER.parse(cell))
+        except ValueError as error:
+            raise TemplateError(f"line {number}: {error}") from error
+    return Line(directive, cells)
+
+
+def parse_template(name: str, source: str) -> Template:
+    """Parse a line template.
+
+    Each line starts with a style directive (``#`` title, ``##`` section,
+    ``!`` table header, ``|`` table row, ``@`` table row whose first cell
+    names a QR code of ``context["qr_codes"]``, ``_`` signature line, none
+    for body text). Cells of table lines are separated by ``|``; ``[each key]``
+    ... ``[end]`` repeats the enclosed lines for every item of
+    ``context[key]``. Fields use ``str.format`` syntax.
+    """
+
+    blocks: list[Line | Loop] = []
+    loop: tuple[str, list[Line]] | None = None
+    for number, raw in enumerate(source.strip("\n").splitlines(), start=1):
+        text = raw.strip()
+        if not text:
+            continue
+        if text.startswith("[each ") and text.endswith("]"):
+            if loop is not None:
+                raise TemplateError(f"line {number}: nested [each] blocks are not supported")
+            loop = (text[6:-1].strip(), [])
+        elif text == "[end]":
+            if loop is None:
+                raise TemplateError(f"line {number}: [end] without [each]")
+            blocks.append(Loop(loop[0], tuple(loop[1])))
+            loop = None
+        elif loop is not None:
+            loop[1].append(_parse_line(text, number))
+        else:
+            blocks.append(_parse_line(text, number))
+    if loop is not None:
+        raise TemplateError(f"[each {loop[0]}] is never closed")
+    return Template(name, tuple(blocks))
+
+
+def _fit(text: str, width: float, size: int) -> str:
+    limit = max(int(width / (size * 0.5)), 1)
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _qr_runs(rows: QrRows, x: float, y: float) -> Iterator[Run]:
+    """One filled box per horizontal run of dark modules, the code's bottom-left corner at (x, y)."""
+
+    module = QR_SIZE / len(rows)
+    for index, row in enumerate(rows):
+        bottom = y + QR_SIZE - (index + 1) * module
+        for match in _DARK_RUN.finditer(row):
+            yield Run(x + match.start() * module, bottom, REGULAR, 0, rule=len(match[0]) * module, height=module)
+
+
+def layout(
+    lines: Iterable[tuple[str, tuple[str, ...]]], qr_codes: Mapping[str, QrRows] | None = None
+) -> list[list[Run]]:
+    """Flow styled lines onto A4 pages; table cells share the width evenly."""
+
+    pages: list[list[Run]] = [[]]
+    y = PAGE_HEIGHT - MARGIN
+    for style, cells in lines:
+        font, size, leading = STYLES[style]
+        if y - leading < MARGIN:
+            pages.append([])
+            y = PAGE_HEIGHT - MARGIN
+        y -= leading
+        page = pages[-1]
+        if style == "_":
+            page.append(Run(MARGIN, y, font, size, cells[0]))
+            page.append(Run(MARGIN + 180, y - 2, font, size, rule=USABLE_WIDTH - 180))
+            continue
+        width = USABLE_WIDTH / len(cells)
+        baseline = y
+        if style == "@":
+            rows = (qr_codes or {}).get(cells[0])
+            if rows:
+                page.extend(_qr_runs(rows, MARGIN, y))
+            cells, baseline = ("", *cells[1:]), y + QR_SIZE / 2 - size / 3
+        for index, cell in enumerate(cells):
+            if cell:
+                page.append(Run(MARGIN + index * width, baseline, font, size, _fit(cell, width - 4, size)))
+        if style in ("#", "!"):
+            page.append(Run(MARGIN, y - 4, font, size, rule=USABLE_WIDTH))
+    return pages
+
+
+TEMPLATE_SOURCES = {
+    "aem": """
+# Attestation employeur mensuelle
+## {employer}
+Salarié : {employee}
+Période d'emploi : du {period_start} au {period_end}
+Nature du contrat : {contract}
+! Date | Début | Heures | Salaire brut
+[each lines]
+| {date} | {start} | {hours} | {gross}
+[end]
+! Total | {days} jour(s) | {hours} | {gross}
+Cachets : {cachets}
+Document établi le {generated}
+_ Signature de l'employeur
+""",
+    "timesheet": """
+# Feuille d'heures
+## {employer}
+Salarié : {employee}
+Période : du {period_start} au {period_end}
+! Date | Prévu | Pointé | Pause | Heures | Nuit | Statut
+[each lines]
+| {date} | {planned} | {actual} | {pause} | {hours} | {night} | {status}
+[end]
+! Total | | | | {hours} | {night} |
+Document établi le {generated}
+_ Signature du salarié
+_ Signature de l'employeur
+""",
+    "roadmap": """
+# Feuille de route
+## {scope_label}
+Date : {day}
+Version {version} établie le {generated}
+! Horaires | Mission | Lieu | Projet
+[each missions]
+| {time} | {title} | {venue} | {project}
+[end]
+[each notes]
+{title} : {notes}
+[end]
+## Lieux et accès
+[each venues]
+! {name}
+{address}
+Accès : {access}
+[end]
+## Contacts
+! Personne | Horaires | Mission
+[each crew]
+| {email} | {time} | {title}
+[end]
+""",
+    "checklist": """
+# Liste de chargement
+## {mission}
+Date : {day} {time}
+Lieu : {venue}
+{count} article(s) - document établi le {generated}
+! QR | Article | N° de série | Kit | Chargé | Retour
+[each items]
+@ {qr} | {name} | {serial} | {kit} | [   ] | [   ]
+[end]
+_ Chargement vérifié par
+_ Retour vérifié par
+""",
+}
+
+_templates: dict[str, Template] | None = None
+
+
+def load_templates() -> dict[str, Template]:
+    """Parse every template once for this process; pool workers call it at start-up."""
+
+    global _templates
+    if _templates is None:
+        _templates = {name: parse_template(name, source) for name, source in TEMPLATE_SOURCES.items()}
+    return _templates
+
+
+def render_document(kind: str, context: Mapping[str, object], created: datetime) -> bytes:
+    template = load_templates()[kind]
+    lines = template.lines(context)
+    return write_pdf(layout(lines, context.get("qr_codes")), title=str(context.get("title", kind)), created=created)
@@ -0,0 +1,848 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Assignment,
+    MissionOccurrenceException,
+    MissionRecurrence,
+    MissionTemplate,
+    Project,
+    ScheduledMission,
+    UserOrganization,
+    Venue,
+)
+from ..rbac import Permission
+from ..schemas import (
+    AssignmentCreate,
+    AssignmentMove,
+    AssignmentUpdate,
+    MissionRecurrenceSet,
+    OccurrenceExceptionSet,
+    PersonPlanningUpdate,
+    ScheduledMissionBulkCreate,
+    ScheduledMissionCreate,
+    ScheduledMissionUpdate,
+)
+from .access import ensure_permission, organization_zone, resolve_context, utc_at
+from .conflicts import Conflict, ConflictDelta, ConflictEngine, Interval
+from .exceptions import DomainError
+from .notifications import notify_assignment_created, notify_assignment_rescheduled
+from .oplog import ASSIGNMENT, MISSION, assignment_state, mission_state, record, row_change, touch
+from .planning_cache import conflict_index_cache, log_version, weeks_touched
+from .planning_week import refresh_week_rows
+from .recurrence import (
+    Occurrence,
+    RecurrenceRule,
+    Series,
+    load_series,
+    load_series_crews,
+    occurrence_key,
+    rule_of,
+    shift_into,
+)
+from .travel import load_travel_matrix
+from .triggers import cancel_assignment, schedule_assignment
+
+TRAVEL_LOOKAROUND = timedelta(hours=24)
+MAX_OCCURRENCE_WINDOW = timedelta(days=366)
+MAX_BULK_MISSIONS = 2000
+
+
+def as_utc(value: datetime) -> datetime:
+    """Return ``value`` as a naive UTC datetime, matching how timestamps are stored."""
+
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def week_window(week_start: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(week_start, time.min)
+    return start, start + timedelta(days=7)
+
+
+def _validate_span(start: datetime, end: datetime) -> None:
+    if end <= start:
+        raise DomainError("End must be after start", status_code=422)
+
+
+def _validate_team_size(value: int) -> None:
+    if value < 1:
+        raise DomainError("Team size must be at least 1", status_code=422)
+
+
+def _get_mission_for_org(session: Session, organization_id: str, mission_id: str) -> ScheduledMission:
+    mission = session.get(ScheduledMission, mission_id)
+    if mission is None or mission.organization_id != organization_id:
+        raise DomainError("Scheduled mission not found", status_code=404)
+    return mission
+
+
+def _get_assignment_for_org(session: Session, organization_id: str, assignment_id: str) -> Assignment:
+    assignment = session.get(Assignment, assignment_id)
+    if assignment is None or assignment.organization_id != organization_id:
+        raise DomainError("Assignment not found", status_code=404)
+    return assignment
+
+
+def _load_template(session: Session, organization_id: str, template_id: str) -> MissionTemplate:
+    template = session.get(MissionTemplate, template_id)
+    if template is None or template.organization_id != organization_id:
+        raise DomainError("Mission template not found", status_code=404)
+    return template
+
+
+def _load_project(session: Session, organization_id: str, project_id: str | None) -> Project | None:
+    if project_id is None:
+        return None
+    project = session.get(Project, project_id)
+    if project is None or project.organization_id != organization_id:
+        raise DomainError("Project not found", status_code=404)
+    return project
+
+
+def _load_venue(session: Session, organization_id: str, venue_id: str | None) -> Venue | None:
+    if venue_id is None:
+        return None
+    venue = session.get(Venue, venue_id)
+    if venue is None or venue.organization_id != organization_id:
+        raise DomainError("Venue not found", status_code=404)
+    return venue
+
+
+def _load_venues(session: Session, organization_id: str, venue_ids: list[str]) -> list[Venue]:
+    if not venue_ids:
+        return []
+    venues = session.scalars(
+        select(Venue)
+        .where(Venue.organization_id == organization_id)
+        .where(Venue.id.in_(venue_ids))
+    )
+    resolved = {venue.id: venue for venue in venues}
+    missing = [venue_id for venue_id in venue_ids if venue_id not in resolved]
+    if missing:
+        raise DomainError("Venue not found", status_code=404)
+    return [resolved[venue_id] for venue_id in venue_ids]
+
+
+def ensure_member(session: Session, organization_id: str, user_id: str) -> UserOrganization:
+    membership = session.scalar(
+        select(UserOrganization)
+        .where(UserOrganization.organization_id == organization_id)
+        .where(UserOrganization.user_id == user_id)
+    )
+    if membership is None:
+        raise DomainError("Person not found", status_code=404)
+    return membership
+
+
+def assignment_interval(assignment: Assignment, venue_id: str | None) -> Interval:
+    return Interval(
+        key=assignment.id,
+        start=assignment.starts_at,
+        end=assignment.ends_at,
+        mission_id=assignment.mission_id,
+        person_id=assignment.user_id,
+        venue_id=venue_id,
+    )
+
+
+def mission_interval(mission: ScheduledMission) -> Interval:
+    return Interval(
+        key=mission.id,
+        start=mission.starts_at,
+        end=mission.ends_at,
+        mission_id=mission.id,
+        venue_id=mission.venue_id,
+    )
+
+
+def load_conflict_engine(
+    session: Session, organization_id: str, window_start: datetime, window_end: datetime
+) -> ConflictEngine:
+    """Build a conflict engine for every assignment and mission touching the window.
+
+    Only the columns needed by the indexes are selected so large weeks avoid
+    ORM hydration. The organisation's travel matrix, when present, turns
+    too-short hops between venues into ``travel`` conflicts. Recurring
+    missions contribute the occurrences expanded for the window only, keyed
+    ``<mission or assignment id>@<original start>``.
+    """
+
+    assignment_rows = session.execute(
+        select(
+            Assignment.id,
+            Assignment.starts_at,
+            Assignment.ends_at,
+            Assignment.mission_id,
+            Assignment.user_id,
+            ScheduledMission.venue_id,
+        )
+        .join(ScheduledMission, ScheduledMission.id == Assignment.mission_id)
+        .where(Assignment.organization_id == organization_id)
+        .where(Assignment.starts_at < window_end)
+        .where(Assignment.ends_at > window_start)
+    )
+    mission_rows = session.execute(
+        select(
+            ScheduledMission.id,
+            ScheduledMission.starts_at,
+            ScheduledMission.ends_at,
+            ScheduledMission.venue_id,
+        )
+        .where(ScheduledMission.organization_id == organization_id)
+        .where(ScheduledMission.venue_id.is_not(None))
+        .where(ScheduledMission.starts_at < window_end)
+        .where(ScheduledMission.ends_at > window_start)
+    )
+    assignments = [
+        Interval(key=row[0], start=row[1], end=row[2], mission_id=row[3], person_id=row[4], venue_id=row[5])
+        for row in assignment_rows
+    ]
+    missions = [
+        Interval(key=row[0], start=row[1], end=row[2], mission_id=row[0], venue_id=row[3])
+        for row in mission_rows
+    ]
+    series = load_series(session, organization_id, window_start, window_end)
+    if series:
+        crews = load_series_crews(session, [item.mission_id for item in series])
+        for item in series:
+            for occurrence in item.expand(window_start, window_end):
+                assignments.extend(_occurrence_crew(item, occurrence, crews.get(item.mission_id, ())))
+                if item.venue_id is not None:
+                    missions.append(
+                        Interval(
+                            key=occurrence.key,
+                            start=occurrence.starts_at,
+                            end=occurrence.ends_at,
+                            mission_id=item.mission_id,
+                            venue_id=item.venue_id,
+                        )
+                    )
+    matrix = load_travel_matrix(session, organization_id)
+    return ConflictEngine.from_intervals(
+        assignments,
+        missions,
+        travel=matrix.minutes_between if matrix is not None else None,
+    )
+
+
+def _occurrence_crew(
+    series: Series, occurrence: Occurrence, crew: Iterable[tuple[str, str, datetime, datetime]]
+) -> Iterator[Interval]:
+    """The series crew carried onto one occurrence: same people, same offsets."""
+
+    for assignment_id, user_id, starts_at, ends_at in crew:
+        start, end = shift_into(occurrence, series, starts_at, ends_at)
+        if end <= start:
+            continue
+        yield Interval(
+            key=occurrence_key(assignment_id, occurrence.original_start),
+            start=start,
+            end=end,
+            mission_id=series.mission_id,
+            person_id=user_id,
+            venue_id=series.venue_id,
+        )
+
+
+def _invalidate_for(mission: ScheduledMission, start: datetime, end: datetime) -> None:
+    """Drop the cached windows a crew change on ``mission`` can affect."""
+
+    if mission.recurrence is not None:
+        conflict_index_cache.invalidate(mission.organization_id)
+    else:
+        conflict_index_cache.invalidate(mission.organization_id, start, end)
+
+
+def _assignment_conflicts(session: Session, assignment: Assignment) -> list[Conflict]:
+    engine = load_conflict_engine(
+        session,
+        assignment.organization_id,
+        assignment.starts_at - TRAVEL_LOOKAROUND,
+        assignment.ends_at + TRAVEL_LOOKAROUND,
+    )
+    return engine.check_assignment(assignment_interval(assignment, assignment.mission.venue_id))
+
+
+def create_mission(session: Session, token_value: str, payload: ScheduledMissionCreate) -> ScheduledMission:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+
+    template = _load_template(session, organization_id, payload.template_id)
+    project = _load_project(session, organization_id, payload.project_id)
+    venue_id = payload.venue_id if payload.venue_id is not None else template.default_venue_id
+    venue = _load_venue(session, organization_id, venue_id)
+
+    starts_at = as_utc(payload.starts_at)
+    ends_at = as_utc(payload.ends_at)
+    _validate_span(starts_at, ends_at)
+    team_size = payload.team_size if payload.team_size is not None else template.team_size
+    _validate_team_size(team_size)
+
+    mission = ScheduledMission(
+        organization_id=organization_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        team_size=team_size,
+        notes=payload.notes,
+    )
+    mission.template = template
+    mission.project = project
+    mission.venue = venue
+    mission.tags = list(template.tags)
+
+    session.add(mission)
+    session.flush()
+    record(
+        session,
+        organization_id,
+        "mission.create",
+        [row_change(MISSION, mission.id, None, mission_state(mission))],
+        actor_id=context.membership.user_id,
+    )
+    refresh_week_rows(session, [mission.id])
+    session.commit()
+    conflict_index_cache.invalidate(organization_id, starts_at, ends_at)
+    session.refresh(mission)
+    return mission
+
+
+def create_missions_bulk(
+    session: Session, token_value: str, payload: ScheduledMissionBulkCreate
+) -> tuple[list[ScheduledMission], list[Conflict]]:
+    """Instantiate a template once per venue and date in a single transaction.
+
+    Times, team size and tags come from the template (times can be overridden
+    for the whole batch); they are wall-clock times of the organisation, so
+    each day is converted to UTC on its own. Venues are validated with one
+    ``IN`` query and the venue conflicts of the whole batch are computed
+    against a single conflict engine covering the batch span.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+
+    template = _load_template(session, organization_id, payload.template_id)
+    project = _load_project(session, organization_id, payload.project_id)
+    venues = _load_venues(session, organization_id, list(dict.fromkeys(payload.venue_ids)))
+    days = sorted(set(payload.dates))
+    if len(venues) * len(days) > MAX_BULK_MISSIONS:
+        raise DomainError(f"A batch cannot create more than {MAX_BULK_MISSIONS} missions", status_code=422)
+
+    start_time = payload.start_time or template.default_start_time
+    end_time = payload.end_time or template.default_end_time
+    if start_time is None or end_time is None:
+        raise DomainError("Start and end times are required when the template has no defaults", status_code=422)
+    zone = organization_zone(session, organization_id)
+    spans = {day: (utc_at(day, start_time, zone), utc_at(day, end_time, zone)) for day in days}
+    for starts_at, ends_at in spans.values():
+        _validate_span(starts_at, ends_at)
+
+    tags = list(template.tags)
+    missions = [
+        ScheduledMission(
+            organization_id=organization_id,
+            template=template,
+            project=project,
+            venue=venue,
+            starts_at=spans[day][0],
+            ends_at=spans[day][1],
+            team_size=template.team_size,
+            notes=payload.notes,
+            tags=list(tags),
+        )
+        for day in days
+        for venue in venues
+    ]
+    session.add_all(missions)
+    session.flush()
+    record(
+        session,
+        organization_id,
+        "mission.bulk_create",
+        [row_change(MISSION, mission.id, None, mission_state(mission)) for mission in missions],
+        actor_id=context.membership.user_id,
+    )
+    refresh_week_rows(session, [mission.id for mission in missions])
+    session.commit()
+
+    window_start = min(mission.starts_at for mission in missions)
+    window_end = max(mission.ends_at for mission in missions)
+    conflict_index_cache.invalidate(organization_id, window_start, window_end)
+    engine = load_conflict_engine(session, organization_id, window_start, window_end)
+    seen: set[tuple[str, str, str, str]] = set()
+    conflicts = []
+    for mission in missions:
+        for conflict in engine.check_mission(mission_interval(mission)):
+            if conflict.identity not in seen:
+                seen.add(conflict.identity)
+                conflicts.append(conflict)
+    return missions, conflicts
+
+
+def list_missions(
+    session: Session, token_value: str, window_start: datetime, window_end: datetime
+) -> list[ScheduledMission]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+
+    result = session.scalars(
+        select(ScheduledMission)
+        .where(ScheduledMission.organization_id == context.membership.organization_id)
+        .where(ScheduledMission.starts_at < as_utc(window_end))
+        .where(ScheduledMission.ends_at > as_utc(window_start))
+        .order_by(ScheduledMission.starts_at)
+    )
+    return list(result)
+
+
+def get_mission(session: Session, token_value: str, mission_id: str) -> ScheduledMission:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    return _get_mission_for_org(session, context.membership.organization_id, mission_id)
+
+
+def update_mission(
+    session: Session, token_value: str, mission_id: str, payload: ScheduledMissionUpdate
+) -> ScheduledMission:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+
+    mission = _get_mission_for_org(session, organization_id, mission_id)
+    data = payload.model_dump(exclude_unset=True)
+    before = mission_state(mission)
+    crew_before = {assignment.id: assignment_state(assignment) for assignment in mission.assignments}
+
+    if "project_id" in data:
+        mission.project = _load_project(session, organization_id, data["project_id"])
+    if "venue_id" in data:
+        mission.venue = _load_venue(session, organization_id, data["venue_id"])
+    if "team_size" in data:
+        _validate_team_size(data["team_size"])
+        if data["team_size"] < len(mission.assignments):
+            raise DomainError("Team size is below the number of assignments", status_code=409)
+        mission.team_size = data["team_size"]
+    if "notes" in data:
+        mission.notes = data["notes"]
+
+    old_start, old_end = mission.starts_at, mission.ends_at
+    starts_at = as_utc(data["starts_at"]) if data.get("starts_at") else old_start
+    ends_at = as_utc(data["ends_at"]) if data.get("ends_at") else old_end
+    _validate_span(starts_at, ends_at)
+    if (starts_at, ends_at) != (old_start, old_end):
+        shift = starts_at - old_start
+        for assignment in mission.assignments:
+            if (assignment.starts_at, assignment.ends_at) == (old_start, old_end):
+                assignment.starts_at, assignment.ends_at = starts_at, ends_at
+            else:
+                assignment.starts_at += shift
+                assignment.ends_at += shift
+        if mission.recurrence is not None:
+            for exception in mission.recurrence.exceptions:
+                exception.original_start += shift
+        mission.starts_at, mission.ends_at = starts_at, ends_at
+
+    session.add(mission)
+    session.flush()
+    record(
+        session,
+        organization_id,
+        "mission.update",
+        [row_change(MISSION, mission.id, before, mission_state(mission))]
+        + [
+            row_change(ASSIGNMENT, assignment.id, crew_before[assignment.id], assignment_state(assignment))
+            for assignment in mission.assignments
+        ],
+        actor_id=context.membership.user_id,
+    )
+    refresh_week_rows(session, [mission.id])
+    session.commit()
+    conflict_index_cache.invalidate(organization_id)
+    session.refresh(mission)
+    return mission
+
+
+def delete_mission(session: Session, token_value: str, mission_id: str) -> None:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+
+    mission = _get_mission_for_org(session, context.membership.organization_id, mission_id)
+    record(
+        session,
+        mission.organization_id,
+        "mission.delete",
+        [row_change(ASSIGNMENT, assignment.id, assignment_state(assignment), None) for assignment in mission.assignments]
+        + [row_change(MISSION, mission.id, mission_state(mission), None)],
+        actor_id=context.membership.user_id,
+    )
+    session.delete(mission)
+    refresh_week_rows(session, [mission_id])
+    session.commit()
+    conflict_index_cache.invalidate(context.membership.organization_id)
+
+
+def create_assignment(
+    session: Session, token_value: str, mission_id: str, payload: AssignmentCreate
+) -> tuple[Assignment, list[Conflict]]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+
+    mission = _get_mission_for_org(session, organization_id, mission_id)
+    ensure_member(session, organization_id, payload.user_id)
+    if any(existing.user_id == payload.user_id for existing in mission.assignments):
+        raise DomainError("Person is already assigned to this mission", status_code=409)
+    if len(mission.assignments) >= mission.team_size:
+        raise DomainError("Mission is fully staffed", status_code=409)
+
+    starts_at = as_utc(payload.starts_at) if payload.starts_at else mission.starts_at
+    ends_at = as_utc(payload.ends_at) if payload.ends_at else mission.ends_at
+    _validate_span(starts_at, ends_at)
+
+    assignment = Assignment(
+        organization_id=organization_id,
+        user_id=payload.user_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+    )
+    assignment.mission = mission
+
+    session.add(assignment)
+    session.flush()
+    record(
+        session,
+        organization_id,
+        "assignment.create",
+        [row_change(ASSIGNMENT, assignment.id, None, assignment_state(assignment))],
+        actor_id=context.membership.user_id,
+    )
+    notify_assignment_created(session, assignment, context.membership.user_id)
+    schedule_assignment(session, assignment, context.membership.user_id)
+    refresh_week_rows(session, [mission.id])
+    session.commit()
+    _invalidate_for(mission, starts_at, ends_at)
+    session.refresh(assignment)
+    return assignment, _assignment_conflicts(session, assignment)
+
+
+def update_assignment(
+    session: Session, token_value: str, assignment_id: str, payload: AssignmentUpdate
+) -> tuple[Assignment, list[Conflict]]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+
+    assignment = _get_assignment_for_org(session, context.membership.organization_id, assignment_id)
+    data = payload.model_dump(exclude_unset=True)
+    starts_at = as_utc(data["starts_at"]) if data.get("starts_at") else assignment.starts_at
+    ends_at = as_utc(data["ends_at"]) if data.get("ends_at") else assignment.ends_at
+    _validate_span(starts_at, ends_at)
+    touched = (min(starts_at, assignment.starts_at), max(ends_at, assignment.ends_at))
+    before = assignment_state(assignment)
+    previous = (assignment.starts_at, assignment.ends_at)
+    assignment.starts_at, assignment.ends_at = starts_at, ends_at
+
+    session.add(assignment)
+    record(
+        session,
+        assignment.organization_id,
+        "assignment.update",
+        [row_change(ASSIGNMENT, assignment.id, before, assignment_state(assignment))],
+        actor_id=context.membership.user_id,
+    )
+    notify_assignment_rescheduled(session, assignment, previous, context.membership.user_id)
+    schedule_assignment(session, assignment)
+    refresh_week_rows(session, [assignment.mission_id])
+    session.commit()
+    _invalidate_for(assignment.mission, *touched)
+    session.refresh(assignment)
+    return assignment, _assignment_conflicts(session, assignment)
+
+
+def move_assignment(
+    session: Session, token_value: str, assignment_id: str, payload: AssignmentMove
+) -> tuple[Assignment, ConflictDelta]:
+    """Move or resize one assignment and return only the conflicts that changed.
+
+    The person indexes of the weeks touched by the old and new spans are served
+    from :data:`conflict_index_cache` and patched in place, so a drop on the
+    timeline never re-audits the week. Moving the crew of a recurring mission
+    also moves it on every occurrence; the delta then only reports the first
+    occurrence and the organisation's cached windows are dropped.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+
+    assignment = _get_assignment_for_org(session, organization_id, assignment_id)
+    starts_at = as_utc(payload.starts_at)
+    ends_at = as_utc(payload.ends_at)
+    _validate_span(starts_at, ends_at)
+
+    previous = assignment_interval(assignment, assignment.mission.venue_id)
+    moved = replace(previous, start=starts_at, end=ends_at)
+    weeks = sorted(
+        set(weeks_touched(previous.start, previous.end)) | set(weeks_touched(starts_at, ends_at))
+    )
+
+    with conflict_index_cache.lock:
+        version = log_version(session, organization_id)
+        deltas = []
+        for week in weeks:
+            window_start, window_end = week_window(week)
+            engine = conflict_index_cache.get_or_load(
+                organization_id,
+                window_start,
+                window_end,
+                version,
+                lambda: load_conflict_engine(session, organization_id, window_start, window_end),
+            )
+            inside = moved.start < window_end and moved.end > window_start
+            deltas.append(engine.move_assignment(moved.key, moved if inside else None))
+        delta = ConflictDelta.merge(deltas)
+
+        before = assignment_state(assignment)
+        assignment.starts_at, assignment.ends_at = starts_at, ends_at
+        try:
+            session.add(assignment)
+            operation = record(
+                session,
+                organization_id,
+                "assignment.move",
+                [row_change(ASSIGNMENT, assignment.id, before, assignment_state(assignment))],
+                actor_id=context.membership.user_id,
+            )
+            notify_assignment_rescheduled(
+                session, assignment, (previous.start, previous.end), context.membership.user_id
+            )
+            schedule_assignment(session, assignment)
+            refresh_week_rows(session, [assignment.mission_id])
+            session.commit()
+        except Exception:
+            session.rollback()
+            conflict_index_cache.invalidate(organization_id)
+            raise
+        if assignment.mission.recurrence is not None:
+            conflict_index_cache.invalidate(organization_id)
+        elif operation is not None:
+            conflict_index_cache.restamp(organization_id, version, operation.sequence)
+
+    session.refresh(assignment)
+    return assignment, delta
+
+
+def delete_assignment(session: Session, token_value: str, assignment_id: str) -> None:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+
+    assignment = _get_assignment_for_org(session, context.membership.organization_id, assignment_id)
+    span = (assignment.starts_at, assignment.ends_at)
+    mission = assignment.mission
+    record(
+        session,
+        assignment.organization_id,
+        "assignment.delete",
+        [row_change(ASSIGNMENT, assignment.id, assignment_state(assignment), None)],
+        actor_id=context.membership.user_id,
+    )
+    cancel_assignment(session, assignment.id)
+    session.delete(assignment)
+    refresh_week_rows(session, [mission.id])
+    session.commit()
+    _invalidate_for(mission, *span)
+
+
+def list_conflicts(
+    session: Session, token_value: str, week_start: date
+) -> tuple[datetime, datetime, list[Conflict]]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+
+    organization_id = context.membership.organization_id
+    window_start, window_end = week_window(week_start)
+    with conflict_index_cache.lock:
+        engine = conflict_index_cache.get_or_load(
+            organization_id,
+            window_start,
+            window_end,
+            log_version(session, organization_id),
+            lambda: load_conflict_engine(session, organization_id, window_start, window_end),
+        )
+        return window_start, window_end, engine.audit()
+
+
+def update_person_planning(
+    session: Session, token_value: str, user_id: str, payload: PersonPlanningUpdate
+) -> UserOrganization:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    membership = ensure_member(session, context.membership.organization_id, user_id)
+    if payload.skills is not None:
+        membership.skills = sorted({skill.strip() for skill in payload.skills if skill.strip()})
+    if "max_weekly_hours" in payload.model_fields_set:
+        membership.max_weekly_hours = payload.max_weekly_hours
+    session.commit()
+    session.refresh(membership)
+    return membership
+
+
+def _mission_series(session: Session, mission: ScheduledMission) -> Series:
+    recurrence = mission.recurrence
+    if recurrence is None:
+        raise DomainError("Scheduled mission does not recur", status_code=404)
+    return Series(
+        mission_id=mission.id,
+        starts_at=mission.starts_at,
+        ends_at=mission.ends_at,
+        rule=rule_of(recurrence),
+        venue_id=mission.venue_id,
+        zone=organization_zone(session, mission.organization_id),
+    )
+
+
+def set_recurrence(
+    session: Session, token_value: str, mission_id: str, payload: MissionRecurrenceSet
+) -> MissionRecurrence:
+    """Make a mission recur, or change its rule.
+
+    Exceptions whose original start is no longer produced by the new rule are
+    dropped with it.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    mission = _get_mission_for_org(session, organization_id, mission_id)
+
+    rule = RecurrenceRule(
+        frequency=payload.frequency,
+        interval=payload.interval,
+        weekdays=tuple(sorted(set(payload.weekdays))),
+        count=payload.count,
+        until=payload.until,
+    )
+    try:
+        rule.validate()
+    except ValueError as error:
+        raise DomainError(str(error), status_code=422) from error
+    if rule.weekdays and mission.starts_at.weekday() not in rule.weekdays:
+        raise DomainError("Weekdays must include the weekday of the first occurrence", status_code=422)
+    if rule.until is not None and rule.until < mission.starts_at.date():
+        raise DomainError("Recurrence must end after the first occurrence", status_code=422)
+
+    recurrence = mission.recurrence
+    if recurrence is None:
+        recurrence = MissionRecurrence(organization_id=organization_id)
+        mission.recurrence = recurrence
+    recurrence.frequency = rule.frequency
+    recurrence.interval = rule.interval
+    recurrence.weekdays = list(rule.weekdays)
+    recurrence.count = rule.count
+    recurrence.until = rule.until
+
+    series = _mission_series(session, mission)
+    for exception in list(recurrence.exceptions):
+        if exception.original_start == mission.starts_at or not series.is_occurrence(exception.original_start):
+            recurrence.exceptions.remove(exception)
+
+    touch(session, organization_id, "mission.recurrence", actor_id=context.membership.user_id)
+    session.commit()
+    conflict_index_cache.invalidate(organization_id)
+    session.refresh(recurrence)
+    return recurrence
+
+
+def delete_recurrence(session: Session, token_value: str, mission_id: str) -> None:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    mission = _get_mission_for_org(session, organization_id, mission_id)
+    if mission.recurrence is None:
+        raise DomainError("Scheduled mission does not recur", status_code=404)
+    mission.recurrence = None
+    touch(session, organization_id, "mission.recurrence", actor_id=context.membership.user_id)
+    session.commit()
+    conflict_index_cache.invalidate(organization_id)
+
+
+def list_occurrences(
+    session: Session, token_value: str, mission_id: str, window_start: datetime, window_end: datetime
+) -> list[Occurrence]:
+    """Occurrences of a recurring mission overlapping the window, the first one included."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    window_start, window_end = as_utc(window_start), as_utc(window_end)
+    _validate_span(window_start, window_end)
+    if window_end - window_start > MAX_OCCURRENCE_WINDOW:
+        raise DomainError("Occurrence window cannot exceed 366 days", status_code=422)
+
+    mission = _get_mission_for_org(session, context.membership.organization_id, mission_id)
+    _mission_series(session, mission)
+    series = load_series(session, mission.organization_id, window_start, window_end, mission_ids=[mission.id])
+    if not series:
+        return []
+    return list(series[0].expand(window_start, window_end, include_first=True))
+
+
+def set_occurrence_exception(
+    session: Session, token_value: str, mission_id: str, payload: OccurrenceExceptionSet
+) -> tuple[Occurrence, bool]:
+    """Cancel, move or restore one occurrence; returns it and whether it is cancelled.
+
+    The first occurrence is the mission itself and is edited through the
+    mission. A payload that neither cancels nor moves restores the occurrence.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    mission = _get_mission_for_org(session, organization_id, mission_id)
+    series = _mission_series(session, mission)
+
+    original_start = as_utc(payload.original_start)
+    if original_start == mission.starts_at or not series.is_occurrence(original_start):
+        raise DomainError("Occurrence not found", status_code=404)
+    original = Occurrence(
+        mission_id=mission.id,
+        index=-1,
+        original_start=original_start,
+        starts_at=original_start,
+        ends_at=original_start + series.duration,
+    )
+
+    recurrence = mission.recurrence
+    exception = next(
+        (item for item in recurrence.exceptions if item.original_start == original_start), None
+    )
+    occurrence = original
+    if payload.cancelled or (payload.starts_at is not None or payload.ends_at is not None):
+        if exception is None:
+            exception = MissionOccurrenceException(original_start=original_start)
+            recurrence.exceptions.append(exception)
+        exception.cancelled = payload.cancelled
+        if payload.cancelled:
+            exception.starts_at = exception.ends_at = None
+        else:
+            starts_at = as_utc(payload.starts_at) if payload.starts_at else original.starts_at
+            ends_at = as_utc(payload.ends_at) if payload.ends_at else original.ends_at
+            _validate_span(starts_at, ends_at)
+            exception.starts_at, exception.ends_at = starts_at, ends_at
+            occurrence = replace(original, starts_at=starts_at, ends_at=ends_at, moved=True)
+    elif exception is not None:
+        recurrence.exceptions.remove(exception)
+
+    touch(session, organization_id, "mission.occurrence", actor_id=context.membership.user_id)
+    session.commit()
+    conflict_index_cache.invalidate(organization_id)
+    return occurrence, payload.cancelled
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import PlanningLogHead
+from .conflicts import ConflictEngine
+
+_CacheKey = tuple[str, datetime]
+_CacheEntry = tuple[datetime, int, ConflictEngine]
+
+
+def log_version(session: Session, organization_id: str) -> int:
+    """Head sequence of the organisation's planning log: a cheap version stamp for derived caches."""
+
+    return session.scalar(
+        select(PlanningLogHead.sequence).where(PlanningLogHead.organization_id == organization_id)
+    ) or 0
+
+
+def week_of(value: date | datetime) -> date:
+    """Monday of the ISO week containing ``value``."""
+
+    day = value.date() if isinstance(value, datetime) else value
+    return day - timedelta(days=day.weekday())
+
+
+def weeks_touched(start: datetime, end: datetime) -> list[date]:
+    """Mondays of every week intersecting the half-open span ``[start, end)``."""
+
+    first = week_of(start)
+    last = week_of(end - timedelta(microseconds=1)) if end > start else first
+    weeks = [first]
+    while weeks[-1] < last:
+        weeks.append(weeks[-1] + timedelta(days=7))
+    return weeks
+
+
+class ConflictIndexCache:
+    """Process-local LRU of conflict engines keyed by organisation and window start.
+
+    Each entry carries the planning log version it was built at and is only
+    served to a reader holding the same version, so writes made by another
+    process are seen on the next read. Callers mutating a cached engine
+    (incremental moves) must hold ``lock`` for the duration of the
+    read-modify cycle and :meth:`restamp` it once their write is logged.
+    Writes that cannot be applied in place call :meth:`invalidate` so the
+    next read rebuilds from the database.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.lock = threading.RLock()
+        self._max_entries = max_entries
+        self._entries: OrderedDict[_CacheKey, _CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(
+        self,
+        organization_id: str,
+        window_start: datetime,
+        window_end: datetime,
+        version: int,
+        loader: Callable[[], ConflictEngine],
+    ) -> ConflictEngine:
+        key = (organization_id, window_start)
+        with self.lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[:2] == (window_end, version):
+                self._entries.move_to_end(key)
+                return cached[2]
+            engine = loader()
+            self._entries[key] = (window_end, version, engine)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return engine
+
+    def restamp(self, organization_id: str, version: int, new_version: int) -> None:
+        """Carry the organisation's windows built at ``version`` over to the write logged as ``new_version``.
+
+        Only valid when that write was patched into every window it touches;
+        a gap in the sequence means another writer got in between, and the
+        windows are dropped instead.
+        """
+
+        with self.lock:
+            for key, (window_end, stamp, engine) in list(self._entries.items()):
+                if key[0] != organization_id or stamp != version:
+                    continue
+                if new_version == version + 1:
+                    self._entries[key] = (window_end, new_version, engine)
+                else:
+                    del self._entries[key]
+
+    def invalidate(
+        self,
+        organization_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> None:
+        """Drop cached windows of the organisation intersecting ``[start, end)`` (all when omitted)."""
+
+        with self.lock:
+            stale = [
+                key
+                for key, (window_end, _, _) in self._entries.items()
+                if key[0] == organization_id
+                and (start is None or window_end > start)
+                and (end is None or key[1] < end)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self._entries.clear()
+
+
+conflict_index_cache = ConflictIndexCache()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import ColumnElement, delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Assignment,
+    MissionTag,
+    MissionTemplate,
+    PlanningWeekRow,
+    Project,
+    ScheduledMission,
+    User,
+    Venue,
+    scheduled_mission_tags,
+)
+from ..rbac import Permission
+from .access import ensure_permission, resolve_context
+from .planning_cache import week_of, weeks_touched
+from .recurrence import Occurrence, Series, load_series, shift_into
+
+
+def refresh_week_rows(session: Session, mission_ids: Iterable[str]) -> None:
+    """Rebuild the read-model rows of the given missions inside the caller's transaction.
+
+    Missions that no longer exist simply lose their rows. Everything is read
+    with three set-based queries, so refreshing one mission or a whole bulk
+    import costs the same number of round trips.
+    """
+
+    ids = list(dict.fromkeys(mission_ids))
+    if not ids:
+        return
+    session.flush()
+    session.execute(delete(PlanningWeekRow).where(PlanningWeekRow.mission_id.in_(ids)))
+
+    missions = session.execute(
+        select(
+            ScheduledMission.id,
+            ScheduledMission.organization_id,
+            ScheduledMission.starts_at,
+            ScheduledMission.ends_at,
+            ScheduledMission.team_size,
+            MissionTemplate.id,
+            MissionTemplate.name,
+            Venue.id,
+            Venue.name,
+            Project.id,
+            Project.name,
+        )
+        .join(MissionTemplate, MissionTemplate.id == ScheduledMission.template_id)
+        .outerjoin(Venue, Venue.id == ScheduledMission.venue_id)
+        .outerjoin(Project, Project.id == ScheduledMission.project_id)
+        .where(ScheduledMission.id.in_(ids))
+    ).all()
+    if not missions:
+        return
+
+    crews: dict[str, list[dict]] = defaultdict(list)
+    crew_rows = session.execute(
+        select(
+            Assignment.mission_id,
+            Assignment.id,
+            Assignment.user_id,
+            User.email,
+            Assignment.starts_at,
+            Assignment.ends_at,
+        )
+        .join(User, User.id == Assignment.user_id)
+        .where(Assignment.mission_id.in_(ids))
+        .order_by(Assignment.starts_at)
+    )
+    for mission_id, assignment_id, user_id, email, starts_at, ends_at in crew_rows:
+        crews[mission_id].append(
+            {
+                "assignmentId": assignment_id,
+                "userId": user_id,
+                "email": email,
+                "startsAt": starts_at.isoformat(),
+                "endsAt": ends_at.isoformat(),
+            }
+        )
+
+    tags: dict[str, list[str]] = defaultdict(list)
+    tag_rows = session.execute(
+        select(scheduled_mission_tags.c.scheduled_mission_id, MissionTag.slug)
+        .join(MissionTag, MissionTag.id == scheduled_mission_tags.c.mission_tag_id)
+        .where(scheduled_mission_tags.c.scheduled_mission_id.in_(ids))
+        .order_by(MissionTag.slug)
+    )
+    for mission_id, slug in tag_rows:
+        tags[mission_id].append(slug)
+
+    values = []
+    for (
+        mission_id,
+        organization_id,
+        starts_at,
+        ends_at,
+        team_size,
+        template_id,
+        template_name,
+        venue_id,
+        venue_name,
+        project_id,
+        project_name,
+    ) in missions:
+        for week in weeks_touched(starts_at, ends_at):
+            values.append(
+                {
+                    "week_start": week,
+                    "mission_id": mission_id,
+                    "organization_id": organization_id,
+                    "starts_at": starts_at,
+                    "ends_at": ends_at,
+                    "team_size": team_size,
+                    "template_id": template_id,
+                    "template_name": template_name,
+                    "venue_id": venue_id,
+                    "venue_name": venue_name,
+                    "project_id": project_id,
+                    "project_name": project_name,
+                    "tags": tags[mission_id],
+                    "crew": crews[mission_id],
+                }
+            )
+    session.execute(insert(PlanningWeekRow), values)
+
+
+def refresh_week_rows_where(session: Session, condition: ColumnElement[bool]) -> None:
+    """Refresh every mission matching ``condition`` (e.g. after a venue rename)."""
+
+    refresh_week_rows(session, session.scalars(select(ScheduledMission.id).where(condition)).all())
+
+
+def get_week(session: Session, token_value: str, week_start: date) -> tuple[date, list[PlanningWeekRow]]:
+    """Stored rows of the week merged with the occurrences of recurring missions.
+
+    Occurrences are never stored: each one is a transient copy of its
+    series' stored row, shifted onto the occurrence and tagged with
+    ``occurrence_start`` (the start it would have had before any move).
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+
+    organization_id = context.membership.organization_id
+    monday = week_of(week_start)
+    rows = list(
+        session.scalars(
+            select(PlanningWeekRow)
+            .where(PlanningWeekRow.organization_id == organization_id)
+            .where(PlanningWeekRow.week_start == monday)
+            .order_by(PlanningWeekRow.starts_at)
+        )
+    )
+    window_start = datetime.combine(monday, datetime.min.time())
+    window_end = datetime.combine(monday + timedelta(days=7), datetime.min.time())
+    series = load_series(session, organization_id, window_start, window_end)
+    if not series:
+        return monday, rows
+
+    masters = {
+        row.mission_id: row
+        for row in session.scalars(
+            select(PlanningWeekRow)
+            .where(PlanningWeekRow.mission_id.in_([item.mission_id for item in series]))
+            .order_by(PlanningWeekRow.week_start.desc())
+        )
+    }
+    for item in series:
+        master = masters.get(item.mission_id)
+        if master is None:
+            continue
+        rows.extend(
+            _occurrence_row(master, item, occurrence, monday)
+            for occurrence in item.expand(window_start, window_end)
+        )
+    rows.sort(key=lambda row: row.starts_at)
+    return monday, rows
+
+
+def _occurrence_row(master: PlanningWeekRow, series: Series, occurrence: Occurrence, monday: date) -> PlanningWeekRow:
+    crew = []
+    for member in master.crew:
+        starts_at, ends_at = shift_into(
+            occurrence,
+            series,
+            datetime.fromisoformat(member["startsAt"]),
+            datetime.fromisoformat(member["endsAt"]),
+        )
+        crew.append({**member, "startsAt": starts_at.isoformat(), "endsAt": ends_at.isoformat()})
+    row = PlanningWeekRow(
+        week_start=monday,
+        mission_id=master.mission_id,
+        organization_id=master.organization_id,
+        starts_at=occurrence.starts_at,
+        ends_at=occurrence.ends_at,
+        team_size=master.team_size,
+        template_id=master.template_id,
+        template_name=master.template_name,
+        venue_id=master.venue_id,
+        venue_name=master.venue_name,
+        project_id=master.project_id,
+        project_name=master.project_name,
+        tags=list(master.tags),
+        crew=crew,
+    )
+    row.occurrence_start = occurrence.original_start
+    return row
@@ -5,11 +5,13 @@ from datetime import date
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..models import Project, Venue
+from ..models import Project, ScheduledMission, Venue
 from ..rbac import Permission
 from ..schemas import ProjectCreate, ProjectUpdate
 from .access import ensure_permission, resolve_context
 from .exceptions import DomainError
+from .oplog import touch
+from .planning_week import refresh_week_rows_where
 
 
 def _normalise_name(value: str) -> str:
@@ -125,6 +127,8 @@ def update_project(session: Session, token_value: str, project_id: str, payload:
         if duplicate:
             raise DomainError("Project with this name already exists", status_code=409)
         project.name = name
+        refresh_week_rows_where(session, ScheduledMission.project_id == project.id)
+        touch(session, project.organization_id, "project.update", actor_id=context.membership.user_id)
 
     start_date = data.get("start_date", project.start_date)
     end_date = data.get("end_date", project.end_date)
@@ -160,4 +164,5 @@ def delete_project(session: Session, token_value: str, project_id: str) -> None:
 
     project = _get_project_for_org(session, context.membership.organization_id, project_id)
     session.delete(project)
+    touch(session, project.organization_id, "project.delete", actor_id=context.membership.user_id)
     session.commit()
@@ -0,0 +1,313 @@
+"""Minimal QR code encoder: byte mode, error correction level M, versions 1 to 10.
+
+Only the standard library is used, like the PDF writer, so pool workers
+stay cheap. Codes are returned as module rows ("1" dark, "0" light) that
+both the PDF layout and the PNG writer draw from.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from collections.abc import Sequence
+
+MAX_VERSION = 10
+# Error correction codewords per block and number of blocks at level M, by version.
+ECC_PER_BLOCK = (0, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26)
+BLOCKS = (0, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5)
+FORMAT_LEVEL_M = 0
+QUIET_ZONE = 4
+
+QrRows = tuple[str, ...]
+
+
+def _gf_multiply(x: int, y: int) -> int:
+    z = 0
+    for i in reversed(range(8)):
+        z = (z << 1) ^ ((z >> 7) * 0x11D)
+        z ^= ((y >> i) & 1) * x
+    return z
+
+
+def _rs_divisor(degree: int) -> list[int]:
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _gf_multiply(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _gf_multiply(root, 0x02)
+    return result
+
+
+def _rs_remainder(data: Sequence[int], divisor: Sequence[int]) -> list[int]:
+    result = [0] * len(divisor)
+    for byte in data:
+        factor = byte ^ result.pop(0)
+        result.append(0)
+        for index, coefficient in enumerate(divisor):
+            result[index] ^= _gf_multiply(coefficient, factor)
+    return result
+
+
+def _raw_modules(version: int) -> int:
+    """Modules left for data and error correction once function patterns are drawn."""
+
+    result = (16 * version + 128) * version + 64
+    if version >= 2:
+        aligned = version // 7 + 2
+        result -= (25 * aligned - 10) * aligned - 55
+        if version >= 7:
+            result -= 36
+    return result
+
+
+def data_capacity(version: int) -> int:
+    return _raw_modules(version) // 8 - ECC_PER_BLOCK[version] * BLOCKS[version]
+
+
+def _alignment_positions(version: int, size: int) -> list[int]:
+    if version == 1:
+        return []
+    aligned = version // 7 + 2
+    step = (version * 8 + aligned * 3 + 5) // (aligned * 4 - 4) * 2
+    return [6] + sorted(size - 7 - index * step for index in range(aligned - 1))
+
+
+def _codewords(payload: bytes, version: int) -> list[int]:
+    """Data codewords (mode, length, payload, padding) followed by interleaved error correction."""
+
+    count_bits = 8 if version < 10 else 16
+    bits = [0, 1, 0, 0]
+    bits += [(len(payload) >> shift) & 1 for shift in reversed(range(count_bits))]
+    for byte in payload:
+        bits += [(byte >> shift) & 1 for shift in reversed(range(8))]
+    capacity = data_capacity(version) * 8
+    bits += [0] * min(4, capacity - len(bits))
+    bits += [0] * (-len(bits) % 8)
+    data = [int("".join(map(str, bits[index : index + 8])), 2) for index in range(0, len(bits), 8)]
+    pad = 0xEC
+    while len(data) < capacity // 8:
+        data.append(pad)
+        pad ^= 0xEC ^ 0x11
+
+    blocks_count, ecc_length = BLOCKS[version], ECC_PER_BLOCK[version]
+    raw_codewords = _raw_modules(version) // 8
+    short_blocks = blocks_count - raw_codewords % blocks_count
+    short_length = raw_codewords // blocks_count
+    divisor = _rs_divisor(ecc_length)
+    blocks, offset = [], 0
+    for index in range(blocks_count):
+        length = short_length - ecc_length + (0 if index < short_blocks else 1)
+        chunk = data[offset : offset + length]
+        offset += length
+        ecc = _rs_remainder(chunk, divisor)
+        if index < short_blocks:
+            chunk.append(0)
+        blocks.append(chunk + ecc)
+    result = []
+    for column in range(len(blocks[0])):
+        for index, block in enumerate(blocks):
+            # Short blocks carry a placeholder at the position of the long blocks' extra data byte.
+            if column != short_length - ecc_length or index >= short_blocks:
+                result.append(block[column])
+    return result
+
+
+class _Grid:
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.size = version * 4 + 17
+        self.dark = [[False] * self.size for _ in range(self.size)]
+        self.reserved = [[False] * self.size for _ in range(self.size)]
+
+    def set(self, x: int, y: int, dark: bool) -> None:
+        self.dark[y][x] = dark
+        self.reserved[y][x] = True
+
+    def draw_function_patterns(self) -> None:
+        size = self.size
+        for index in range(size):
+            self.set(6, index, index % 2 == 0)
+            self.set(index, 6, index % 2 == 0)
+        for x, y in ((3, 3), (size - 4, 3), (3, size - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    if 0 <= x + dx < size and 0 <= y + dy < size:
+                        self.set(x + dx, y + dy, max(abs(dx), abs(dy)) not in (2, 4))
+        positions = _alignment_positions(self.version, size)
+        last = len(positions) - 1
+        for i, x in enumerate(positions):
+            for j, y in enumerate(positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self.set(x + dx, y + dy, max(abs(dx), abs(dy)) != 1)
+        self.draw_format(0)
+        if self.version >= 7:
+            remainder = self.version
+            for _ in range(12):
+                remainder = (remainder << 1) ^ ((remainder >> 11) * 0x1F25)
+            bits = self.version << 12 | remainder
+            for index in range(18):
+                dark = (bits >> index) & 1 == 1
+                a, b = size - 11 + index % 3, index // 3
+                self.set(a, b, dark)
+                self.set(b, a, dark)
+
+    def draw_format(self, mask: int) -> None:
+        data = FORMAT_LEVEL_M << 3 | mask
+        remainder = data
+        for _ in range(10):
+            remainder = (remainder << 1) ^ ((remainder >> 9) * 0x537)
+        bits = (data << 10 | remainder) ^ 0x5412
+        bit = lambda index: (bits >> index) & 1 == 1  # noqa: E731
+        size = self.size
+        for index in range(6):
+            self.set(8, index, bit(index))
+        self.set(8, 7, bit(6))
+        self.set(8, 8, bit(7))
+        self.set(7, 8, bit(8))
+        for index in range(9, 15):
+            self.set(14 - index, 8, bit(index))
+        for index in range(8):
+            self.set(size - 1 - index, 8, bit(index))
+        for index in range(8, 15):
+            self.set(8, size - 15 + index, bit(index))
+        self.set(8, size - 8, True)
+
+    def draw_codewords(self, codewords: Sequence[int]) -> None:
+        size, position, total = self.size, 0, len(codewords) * 8
+        right = size - 1
+        while right >= 1:
+            if right == 6:
+                right = 5
+            upward = (right + 1) & 2 == 0
+            for vertical in range(size):
+                y = size - 1 - vertical if upward else vertical
+                for x in (right, right - 1):
+                    if not self.reserved[y][x] and position < total:
+                        self.dark[y][x] = (codewords[position >> 3] >> (7 - (position & 7))) & 1 == 1
+                        position += 1
+            right -= 2
+
+    def apply_mask(self, mask: int) -> None:
+        test = MASKS[mask]
+        for y in range(self.size):
+            row, reserved = self.dark[y], self.reserved[y]
+            for x in range(self.size):
+                if not reserved[x] and test(x, y):
+                    row[x] = not row[x]
+
+    def rows(self) -> QrRows:
+        return tuple("".join("1" if dark else "0" for dark in row) for row in self.dark)
+
+
+MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+_FINDER_LIKE = ("10111010000", "00001011101")
+
+
+def _line_penalty(line: str) -> int:
+    penalty = 0
+    run, previous = 0, ""
+    for module in line:
+        if module == previous:
+            run += 1
+        else:
+            if run >= 5:
+                penalty += run - 2
+            run, previous = 1, module
+    if run >= 5:
+        penalty += run - 2
+    for pattern in _FINDER_LIKE:
+        start = line.find(pattern)
+        while start != -1:
+            penalty += 40
+            start = line.find(pattern, start + 1)
+    return penalty
+
+
+def penalty(rows: QrRows) -> int:
+    """Standard mask penalty: long runs, 2x2 blocks, finder-like patterns and dark balance."""
+
+    size = len(rows)
+    columns = ["".join(row[x] for row in rows) for x in range(size)]
+    score = sum(_line_penalty(line) for line in rows) + sum(_line_penalty(line) for line in columns)
+    for y in range(size - 1):
+        upper, lower = rows[y], rows[y + 1]
+        for x in range(size - 1):
+            if upper[x] == upper[x + 1] == lower[x] == lower[x + 1]:
+                score += 3
+    dark = sum(row.count("1") for row in rows)
+    total = size * size
+    score += ((abs(dark * 20 - total * 10) + total - 1) // total - 1) * 10
+    return score
+
+
+def encode_qr(payload: str) -> QrRows:
+    """Smallest level-M QR code holding ``payload`` (UTF-8), masked with the lowest penalty."""
+
+    data = payload.encode("utf-8")
+    version = next(
+        (v for v in range(1, MAX_VERSION + 1) if 4 + (8 if v < 10 else 16) + len(data) * 8 <= data_capacity(v) * 8),
+        None,
+    )
+    if version is None:
+        raise ValueError(f"QR payload too long: {len(data)} bytes")
+    grid = _Grid(version)
+    grid.draw_function_patterns()
+    grid.draw_codewords(_codewords(data, version))
+    best: QrRows | None = None
+    best_score = 0
+    for mask in range(len(MASKS)):
+        grid.apply_mask(mask)
+        grid.draw_format(mask)
+        rows = grid.rows()
+        score = penalty(rows)
+        if best is None or score < best_score:
+            best, best_score = rows, score
+        grid.apply_mask(mask)  # masks are involutions: applying again restores the data
+    return best  # type: ignore[return-value]
+
+
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def qr_png(rows: QrRows, scale: int = 4) -> bytes:
+    """1-bit greyscale PNG of the code with its quiet zone; deterministic for given rows."""
+
+    size = (len(rows) + 2 * QUIET_ZONE) * scale
+    scanlines = bytearray()
+    blank = "0" * QUIET_ZONE
+    for row in (("0" * len(rows),) * QUIET_ZONE) + rows + (("0" * len(rows),) * QUIET_ZONE):
+        # PNG greyscale: 1 is white, so light modules become set bits.
+        pixels = "".join(("0" if module == "1" else "1") * scale for module in blank + row + blank)
+        pixels += "0" * (-len(pixels) % 8)
+        line = b"\x00" + int(pixels, 2).to_bytes(len(pixels) // 8, "big")
+        scanlines += line * scale
+    header = struct.pack(">IIBBBBB", size, size, 1, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(bytes(scanlines), 9))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def qr_label(payload: str) -> tuple[QrRows, bytes]:
+    """Module rows and PNG image of one payload: the unit of work handed to pool workers."""
+
+    rows = encode_qr(payload)
+    return rows, qr_png(rows)
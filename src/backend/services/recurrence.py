@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Collection, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Assignment, MissionOccurrenceException, MissionRecurrence, ScheduledMission
+from .access import local_time, organization_zone
+
+Frequency = Literal["daily", "weekly"]
+MAX_INTERVAL = 52
+
+
+UTC = ZoneInfo("UTC")
+
+
+def _wall(value: datetime, zone: ZoneInfo) -> datetime:
+    """Naive UTC to the naive wall-clock time of ``zone``."""
+
+    return local_time(value, zone).replace(tzinfo=None)
+
+
+def _utc(value: datetime, zone: ZoneInfo) -> datetime:
+    """Naive wall-clock time of ``zone`` to naive UTC; a time in a DST gap keeps the earlier offset."""
+
+    return value.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """Subset of RFC 5545 RRULE: ``FREQ=DAILY|WEEKLY;INTERVAL;BYDAY;COUNT;UNTIL``.
+
+    ``weekdays`` uses Python numbering (Monday is 0) and defaults to the
+    weekday of the first occurrence. ``count`` includes the first occurrence
+    and ``until`` is compared with occurrence start dates, inclusively.
+    Occurrences step on the wall clock of a zone, so a 20:00 series stays at
+    20:00 local time across DST changes; weekdays and ``until`` are local too.
+    """
+
+    frequency: Frequency
+    interval: int = 1
+    weekdays: tuple[int, ...] = ()
+    count: int | None = None
+    until: date | None = None
+
+    def validate(self) -> None:
+        if self.frequency not in ("daily", "weekly"):
+            raise ValueError("Frequency must be daily or weekly")
+        if not 1 <= self.interval <= MAX_INTERVAL:
+            raise ValueError(f"Interval must be between 1 and {MAX_INTERVAL}")
+        if self.weekdays and self.frequency != "weekly":
+            raise ValueError("Weekdays only apply to weekly recurrences")
+        if any(not 0 <= day <= 6 for day in self.weekdays):
+            raise ValueError("Weekdays must be between 0 (Monday) and 6 (Sunday)")
+        if self.count is not None and self.count < 1:
+            raise ValueError("Count must be at least 1")
+
+    def starts(
+        self, first_start: datetime, from_start: datetime, zone: ZoneInfo | None = None
+    ) -> Iterator[tuple[int, datetime]]:
+        """Yield ``(index, start)`` of every occurrence starting at or after ``from_start``.
+
+        Starts are naive UTC in and out; the steps are taken on the wall
+        clock of ``zone`` (UTC when omitted). The first yielded position is
+        computed arithmetically, so opening a window years after
+        ``first_start`` costs the same as opening the first week. The
+        generator is unbounded unless ``count`` or ``until`` stop it.
+        """
+
+        zone = zone or UTC
+        first = _wall(first_start, zone)
+        # A day of margin: the wall clock and UTC disagree by at most a few hours.
+        origin = _wall(from_start, zone) - timedelta(days=1)
+
+        if self.frequency == "daily":
+            step = timedelta(days=self.interval)
+            index = max(0, -((first - origin) // step))
+            while True:
+                local = first + index * step
+                if self._exhausted(index, local):
+                    return
+                start = _utc(local, zone)
+                if start >= from_start:
+                    yield index, start
+                index += 1
+
+        days = sorted(set(self.weekdays or (first.weekday(),)))
+        first_weekday = first.weekday()
+        skipped = sum(1 for day in days if day < first_weekday)
+        monday = first - timedelta(days=first_weekday)
+        period = timedelta(weeks=self.interval)
+        week = max(0, (origin - monday) // period)
+        while True:
+            for position, day in enumerate(days):
+                if week == 0 and day < first_weekday:
+                    continue
+                local = monday + week * period + timedelta(days=day)
+                index = position - skipped if week == 0 else len(days) - skipped + (week - 1) * len(days) + position
+                if self._exhausted(index, local):
+                    return
+                start = _utc(local, zone)
+                if start >= from_start:
+                    yield index, start
+            week += 1
+
+    def _exhausted(self, index: int, local_start: datetime) -> bool:
+        if self.count is not None and index >= self.count:
+            return True
+        return self.until is not None and local_start.date() > self.until
+
+
+@dataclass(frozen=True, slots=True)
+class Occurrence:
+    mission_id: str
+    index: int
+    original_start: datetime
+    starts_at: datetime
+    ends_at: datetime
+    moved: bool = False
+
+    @property
+    def key(self) -> str:
+        """Stable identity of the occurrence, independent of where it was moved."""
+
+        return occurrence_key(self.mission_id, self.original_start)
+
+
+def occurrence_key(base_key: str, original_start: datetime) -> str:
+    return f"{base_key}@{original_start:%Y%m%dT%H%M}"
+
+
+@dataclass(frozen=True)
+class OccurrenceOverride:
+    cancelled: bool = False
+    starts_at: datetime | None = None
+    ends_at: datetime | None = None
+
+
+@dataclass(frozen=True)
+class Series:
+    """A recurring mission as the expansion needs it: first span, rule, exceptions and clock."""
+
+    mission_id: str
+    starts_at: datetime
+    ends_at: datetime
+    rule: RecurrenceRule
+    venue_id: str | None = None
+    overrides: Mapping[datetime, OccurrenceOverride] = field(default_factory=dict)
+    zone: ZoneInfo | None = None
+
+    @property
+    def duration(self) -> timedelta:
+        return self.ends_at - self.starts_at
+
+    def is_occurrence(self, original_start: datetime) -> bool:
+        return any(start == original_start for _, start in self._starts_between(original_start, original_start))
+
+    def _starts_between(self, window_start: datetime, window_end: datetime) -> Iterator[tuple[int, datetime]]:
+        for index, start in self.rule.starts(self.starts_at, window_start, self.zone):
+            if start > window_end:
+                return
+            yield index, start
+
+    def expand(
+        self, window_start: datetime, window_end: datetime, *, include_first: bool = False
+    ) -> Iterator[Occurrence]:
+        """Lazily yield the occurrences overlapping ``[window_start, window_end)`` in start order.
+
+        The first occurrence is the scheduled mission row itself and is only
+        yielded with ``include_first``. Cancelled occurrences are skipped and
+        moved ones are yielded at their new span.
+        """
+
+        duration = self.duration
+        moved = sorted(
+            (
+                Occurrence(
+                    mission_id=self.mission_id,
+                    index=-1,
+                    original_start=original_start,
+                    starts_at=override.starts_at,
+                    ends_at=override.ends_at,
+                    moved=True,
+                )
+                for original_start, override in self.overrides.items()
+                if not override.cancelled
+                and override.starts_at is not None
+                and override.ends_at is not None
+                and override.starts_at < window_end
+                and override.ends_at > window_start
+            ),
+            key=lambda occurrence: occurrence.starts_at,
+        )
+
+        def regular() -> Iterator[Occurrence]:
+            for index, start in self.rule.starts(self.starts_at, window_start - duration, self.zone):
+                if start >= window_end:
+                    return
+                if start + duration <= window_start or (index == 0 and not include_first):
+                    continue
+                if start in self.overrides:
+                    continue
+                yield Occurrence(
+                    mission_id=self.mission_id,
+                    index=index,
+                    original_start=start,
+                    starts_at=start,
+                    ends_at=start + duration,
+                )
+
+        yield from heapq.merge(regular(), moved, key=lambda occurrence: occurrence.starts_at)
+
+
+def rule_of(recurrence: MissionRecurrence) -> RecurrenceRule:
+    return RecurrenceRule(
+        frequency=recurrence.frequency,  # type: ignore[arg-type]
+        interval=recurrence.interval,
+        weekdays=tuple(recurrence.weekdays or ()),
+        count=recurrence.count,
+        until=recurrence.until,
+    )
+
+
+def load_series(
+    session: Session,
+    organization_id: str,
+    window_start: datetime,
+    window_end: datetime,
+    mission_ids: Collection[str] | None = None,
+) -> list[Series]:
+    """Recurring missions of the organisation that may have occurrences in the window."""
+
+    query = (
+        select(
+            MissionRecurrence.id,
+            ScheduledMission.id,
+            ScheduledMission.starts_at,
+            ScheduledMission.ends_at,
+            ScheduledMission.venue_id,
+            MissionRecurrence.frequency,
+            MissionRecurrence.interval,
+            MissionRecurrence.weekdays,
+            MissionRecurrence.count,
+            MissionRecurrence.until,
+        )
+        .join(ScheduledMission, ScheduledMission.id == MissionRecurrence.mission_id)
+        .where(MissionRecurrence.organization_id == organization_id)
+        .where(ScheduledMission.starts_at < window_end)
+    )
+    if mission_ids is not None:
+        query = query.where(ScheduledMission.id.in_(list(mission_ids)))
+    rows = session.execute(query).all()
+    if not rows:
+        return []
+
+    overrides: dict[str, dict[datetime, OccurrenceOverride]] = {}
+    for recurrence_id, original_start, cancelled, starts_at, ends_at in session.execute(
+        select(
+            MissionOccurrenceException.recurrence_id,
+            MissionOccurrenceException.original_start,
+            MissionOccurrenceException.cancelled,
+            MissionOccurrenceException.starts_at,
+            MissionOccurrenceException.ends_at,
+        ).where(MissionOccurrenceException.recurrence_id.in_([row[0] for row in rows]))
+    ):
+        overrides.setdefault(recurrence_id, {})[original_start] = OccurrenceOverride(
+            cancelled=cancelled, starts_at=starts_at, ends_at=ends_at
+        )
+
+    zone = organization_zone(session, organization_id)
+    series = []
+    for recurrence_id, mission_id, starts_at, ends_at, venue_id, frequency, interval, weekdays, count, until in rows:
+        series.append(
+            Series(
+                mission_id=mission_id,
+                starts_at=starts_at,
+                ends_at=ends_at,
+                rule=RecurrenceRule(frequency, interval, tuple(weekdays or ()), count, until),
+                venue_id=venue_id,
+                overrides=overrides.get(recurrence_id, {}),
+                zone=zone,
+            )
+        )
+    return series
+
+
+def load_series_crews(
+    session: Session, mission_ids: Collection[str]
+) -> dict[str, list[tuple[str, str, datetime, datetime]]]:
+    """``(assignment_id, user_id, starts_at, ends_at)`` of the first occurrence, per series."""
+
+    crews: dict[str, list[tuple[str, str, datetime, datetime]]] = {}
+    if not mission_ids:
+        return crews
+    for mission_id, assignment_id, user_id, starts_at, ends_at in session.execute(
+        select(Assignment.mission_id, Assignment.id, Assignment.user_id, Assignment.starts_at, Assignment.ends_at)
+        .where(Assignment.mission_id.in_(list(mission_ids)))
+    ):
+        crews.setdefault(mission_id, []).append((assignment_id, user_id, starts_at, ends_at))
+    return crews
+
+
+def shift_into(occurrence: Occurrence, series: Series, start: datetime, end: datetime) -> tuple[datetime, datetime]:
+    """Carry a span of the first occurrence (e.g. a crew member's shift) onto ``occurrence``."""
+
+    offset = occurrence.starts_at - series.starts_at
+    return start + offset, min(end + offset, occurrence.ends_at)
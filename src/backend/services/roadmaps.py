@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Callable, Iterator
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import MissionTemplate, Project, Roadmap, ScheduledMission, User, Venue
+from ..rbac import Permission
+from ..security import now_utc
+from .access import ensure_permission, local_time, organization_zone, resolve_context
+from .documents import READ_CHUNK, DocumentRenderer, document_renderer
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .pdf import TEMPLATE_SOURCES
+from .recurrence import load_series, load_series_crews
+from .timesheets import local_midnight
+
+DAY = "day"
+VENUE = "venue"
+PROJECT = "project"
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+ROADMAP_JOB_KIND = "roadmap.render"
+
+
+def _scope_label(session: Session, organization_id: str, scope: str, scope_id: str) -> str:
+    if scope == DAY:
+        return "Toutes les missions"
+    model = Venue if scope == VENUE else Project
+    item = session.get(model, scope_id)
+    if item is None or item.organization_id != organization_id:
+        raise DomainError(f"{'Venue' if scope == VENUE else 'Project'} not found", status_code=404)
+    return f"{'Lieu' if scope == VENUE else 'Projet'} : {item.name}"
+
+
+def _span(start: datetime, end: datetime, zone: ZoneInfo) -> str:
+    return f"{local_time(start, zone):%H:%M}-{local_time(end, zone):%H:%M}"
+
+
+def load_inputs(session: Session, organization_id: str, scope: str, scope_id: str, day: date) -> dict:
+    """Everything a roadmap shows, as canonical plain data: missions, venues and crew contacts.
+
+    The day and every time shown are on the organisation's clock. Recurring
+    missions contribute their occurrence of the day. The result is both the
+    content hash input and, with the version stamp, the template context.
+    """
+
+    zone = organization_zone(session, organization_id)
+    window_start = local_midnight(day, zone)
+    window_end = local_midnight(day + timedelta(days=1), zone)
+    query = (
+        select(
+            ScheduledMission.id,
+            ScheduledMission.starts_at,
+            ScheduledMission.ends_at,
+            ScheduledMission.notes,
+            MissionTemplate.name,
+            Venue.id,
+            Venue.name,
+            Venue.address,
+            Venue.postal_code,
+            Venue.city,
+            Venue.notes,
+            Project.name,
+        )
+        .join(MissionTemplate, MissionTemplate.id == ScheduledMission.template_id)
+        .outerjoin(Venue, Venue.id == ScheduledMission.venue_id)
+        .outerjoin(Project, Project.id == ScheduledMission.project_id)
+        .where(ScheduledMission.organization_id == organization_id)
+    )
+    if scope == VENUE:
+        query = query.where(ScheduledMission.venue_id == scope_id)
+    elif scope == PROJECT:
+        query = query.where(ScheduledMission.project_id == scope_id)
+    series = {item.mission_id: item for item in load_series(session, organization_id, window_start, window_end)}
+    in_window = (ScheduledMission.starts_at < window_end) & (ScheduledMission.ends_at > window_start)
+    rows = session.execute(query.where(or_(in_window, ScheduledMission.id.in_(list(series))) if series else in_window))
+
+    spans: list[tuple[datetime, datetime, tuple]] = []
+    for row in rows:
+        recurring = series.get(row[0])
+        if recurring is None:
+            spans.append((row[1], row[2], row))
+            continue
+        for occurrence in recurring.expand(window_start, window_end, include_first=True):
+            spans.append((occurrence.starts_at, occurrence.ends_at, row))
+    spans.sort(key=lambda item: (item[0], item[2][4], item[2][0]))
+
+    crews = load_series_crews(session, {row[0] for _, _, row in spans})
+    emails = dict(
+        session.execute(
+            select(User.id, User.email).where(
+                User.id.in_({user_id for crew in crews.values() for _, user_id, _, _ in crew})
+            )
+        ).all()
+    )
+    missions, notes, venues, crew = [], [], {}, []
+    for starts_at, ends_at, row in spans:
+        mission_id, base_start, _, mission_notes, title, venue_id, venue, address, postal_code, city, access, project = row
+        missions.append(
+            {"time": _span(starts_at, ends_at, zone), "title": title, "venue": venue or "-", "project": project or "-"}
+        )
+        if mission_notes:
+            notes.append({"title": title, "notes": mission_notes})
+        if venue_id is not None:
+            venues[venue_id] = {
+                "name": venue,
+                "address": ", ".join(part for part in (address, " ".join(p for p in (postal_code, city) if p)) if part)
+                or "-",
+                "access": access or "-",
+            }
+        offset = starts_at - base_start
+        for _, user_id, shift_start, shift_end in sorted(crews.get(mission_id, [])):
+            shift_end = min(shift_end + offset, ends_at)
+            crew.append({"email": emails[user_id], "time": _span(shift_start + offset, shift_end, zone), "title": title})
+    crew.sort(key=lambda item: (item["email"], item["time"]))
+    return {
+        "scope": scope,
+        "scope_id": scope_id,
+        "day": day.strftime("%d/%m/%Y"),
+        "scope_label": _scope_label(session, organization_id, scope, scope_id),
+        "missions": missions,
+        "notes": notes,
+        "venues": sorted(venues.values(), key=lambda item: item["name"]),
+        "crew": crew,
+    }
+
+
+def content_hash(inputs: dict) -> str:
+    """Digest of the inputs and of the template source: equal hashes render equal roadmaps."""
+
+    payload = json.dumps({"template": TEMPLATE_SOURCES["roadmap"], "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def roadmap_path(storage_dir: str, roadmap: Roadmap) -> Path:
+    return Path(storage_dir) / roadmap.organization_id / "roadmaps" / f"{roadmap.id}.pdf"
+
+
+def _latest(session: Session, organization_id: str, scope: str, scope_id: str, day: date) -> Roadmap | None:
+    return session.scalar(
+        select(Roadmap)
+        .where(Roadmap.organization_id == organization_id)
+        .where(Roadmap.scope == scope)
+        .where(Roadmap.scope_id == scope_id)
+        .where(Roadmap.day == day)
+        .order_by(Roadmap.version.desc())
+        .limit(1)
+    )
+
+
+def _render_job(
+    roadmap_id: str,
+    path: Path,
+    context: dict,
+    created: datetime,
+    session_factory: sessionmaker[Session],
+    renderer: DocumentRenderer,
+) -> Callable[[Job], dict[str, int]]:
+    def work(job: Job) -> dict[str, int]:
+        try:
+            [pdf] = list(renderer.render("roadmap", [context], created))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(".part")
+            partial.write_bytes(pdf)
+            partial.replace(path)
+        except Exception as error:
+            _finish(session_factory, roadmap_id, FAILED, error=str(error) or error.__class__.__name__)
+            raise
+        _finish(session_factory, roadmap_id, READY, size=len(pdf))
+        return {"bytes": len(pdf)}
+
+    return work
+
+
+def _finish(
+    session_factory: sessionmaker[Session], roadmap_id: str, status: str, size: int | None = None, error: str | None = None
+) -> None:
+    session = session_factory()
+    try:
+        roadmap = session.get(Roadmap, roadmap_id)
+        if roadmap is not None:
+            roadmap.status, roadmap.size, roadmap.error = status, size, error
+            roadmap.generated_at = now_utc()
+            session.commit()
+    finally:
+        session.close()
+
+
+def request_roadmap(
+    session: Session,
+    token_value: str,
+    storage_dir: str,
+    session_factory: sessionmaker[Session],
+    scope: str,
+    scope_id: str | None,
+    day: date,
+    renderer: DocumentRenderer | None = None,
+) -> tuple[Roadmap, Job | None]:
+    """Latest roadmap of the scope and day, or a new version queued for rendering.
+
+    Inputs are read and hashed in the request; when the hash matches the
+    latest version (ready or still rendering) that version is returned and
+    nothing is rendered. Otherwise a version is added and the PDF is
+    rendered by a background job, so the request never waits on it.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    organization_id = context.membership.organization_id
+    scope_id = "" if scope == DAY else scope_id or ""
+    if scope != DAY and not scope_id:
+        raise DomainError("A venue or project roadmap needs a scope id", status_code=422)
+    inputs = load_inputs(session, organization_id, scope, scope_id, day)
+    digest = content_hash(inputs)
+    latest = _latest(session, organization_id, scope, scope_id, day)
+    if latest is not None and latest.content_hash == digest and latest.status != FAILED:
+        return latest, None
+
+    roadmap = Roadmap(
+        organization_id=organization_id,
+        scope=scope,
+        scope_id=scope_id,
+        day=day,
+        version=(latest.version if latest is not None else 0) + 1,
+        content_hash=digest,
+        status=PENDING,
+        requested_by=context.membership.user_id,
+        requested_at=now_utc().replace(microsecond=0),
+    )
+    session.add(roadmap)
+    try:
+        session.commit()
+    except IntegrityError:
+        # A concurrent request added this version first; hand back whatever it stored.
+        session.rollback()
+        return _latest(session, organization_id, scope, scope_id, day), None
+    created = roadmap.requested_at
+    render_context = {
+        **inputs,
+        "title": f"Feuille de route {inputs['day']} v{roadmap.version}",
+        "version": roadmap.version,
+        "generated": f"{created:%d/%m/%Y %H:%M} UTC",
+    }
+    work = _render_job(
+        roadmap.id,
+        roadmap_path(storage_dir, roadmap),
+        render_context,
+        created,
+        session_factory,
+        renderer or document_renderer,
+    )
+    return roadmap, job_registry.submit(ROADMAP_JOB_KIND, organization_id, work)
+
+
+def list_roadmaps(
+    session: Session, token_value: str, scope: str, scope_id: str | None, day: date
+) -> list[Roadmap]:
+    """Every stored version of a roadmap, newest first."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    return list(
+        session.scalars(
+            select(Roadmap)
+            .where(Roadmap.organization_id == context.membership.organization_id)
+            .where(Roadmap.scope == scope)
+            .where(Roadmap.scope_id == ("" if scope == DAY else scope_id or ""))
+            .where(Roadmap.day == day)
+            .order_by(Roadmap.version.desc())
+        )
+    )
+
+
+def get_roadmap(session: Session, token_value: str, roadmap_id: str) -> Roadmap:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_PLANNING)
+    roadmap = session.get(Roadmap, roadmap_id)
+    if roadmap is None or roadmap.organization_id != context.membership.organization_id:
+        raise DomainError("Roadmap not found", status_code=404)
+    return roadmap
+
+
+def open_roadmap(session: Session, token_value: str, storage_dir: str, roadmap_id: str) -> tuple[Roadmap, Iterator[bytes]]:
+    roadmap = get_roadmap(session, token_value, roadmap_id)
+    if roadmap.status != READY:
+        raise DomainError("Roadmap is not ready", status_code=409)
+    path = roadmap_path(storage_dir, roadmap)
+    if not path.exists():
+        raise DomainError("Roadmap file is missing", status_code=410)
+
+    def chunks() -> Iterator[bytes]:
+        with path.open("rb") as handle:
+            while chunk := handle.read(READ_CHUNK):
+                yield chunk
+
+    return roadmap, chunks()
@@ -0,0 +1,588 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Assignment,
+    PlanningScenario,
+    PlanningWeekRow,
+    ScenarioChange,
+    ScheduledMission,
+    User,
+    Venue,
+)
+from ..rbac import Permission
+from ..schemas import ScenarioAssignmentChange, ScenarioAssignmentCreate, ScenarioCreate, ScenarioMissionChange
+from ..security import now_utc
+from .access import ensure_permission, resolve_context
+from .conflicts import Conflict, ConflictEngine, Interval
+from .exceptions import DomainError
+from .oplog import ASSIGNMENT, MISSION, record, row_change, row_state
+from .planning import as_utc, ensure_member, load_conflict_engine, week_window
+from .planning_cache import conflict_index_cache, log_version, week_of
+from .planning_week import get_week, refresh_week_rows
+from .triggers import sync_assignment
+
+
+@dataclass
+class Overlay:
+    """A scenario's delta: the overridden state per key, ``None`` for a deletion."""
+
+    missions: dict[str, Interval | None] = field(default_factory=dict)
+    assignments: dict[str, Interval | None] = field(default_factory=dict)
+    deleted_assignment_missions: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_changes(cls, changes: list[ScenarioChange]) -> "Overlay":
+        overlay = cls()
+        for change in changes:
+            if change.entity == MISSION:
+                overlay.missions[change.entity_id] = None if change.deleted else Interval(
+                    key=change.entity_id,
+                    start=change.starts_at,
+                    end=change.ends_at,
+                    mission_id=change.entity_id,
+                    venue_id=change.venue_id,
+                )
+            elif change.deleted:
+                overlay.assignments[change.entity_id] = None
+                overlay.deleted_assignment_missions[change.entity_id] = change.mission_id
+            else:
+                overlay.assignments[change.entity_id] = Interval(
+                    key=change.entity_id,
+                    start=change.starts_at,
+                    end=change.ends_at,
+                    mission_id=change.mission_id,
+                    person_id=change.user_id,
+                    venue_id=change.venue_id,
+                )
+        return overlay
+
+    @property
+    def touched_missions(self) -> set[str]:
+        touched = set(self.missions)
+        touched.update(interval.mission_id for interval in self.assignments.values() if interval is not None)
+        touched.update(self.deleted_assignment_missions.values())
+        return touched
+
+
+def overlay_audit(
+    engine: ConflictEngine, overlay: Overlay, window_start: datetime, window_end: datetime
+) -> list[Conflict]:
+    """Audit ``engine`` as if ``overlay`` were applied, and leave the engine as it was.
+
+    Only the overridden keys are swapped in and out, so the cost on top of the
+    audit itself is proportional to the size of the scenario.
+    """
+
+    def inside(interval: Interval | None) -> bool:
+        return interval is not None and interval.start < window_end and interval.end > window_start
+
+    previous_missions: dict[str, Interval | None] = {}
+    previous_assignments: dict[str, Interval | None] = {}
+    try:
+        for key, interval in overlay.missions.items():
+            previous_missions[key] = engine.remove_mission(key)
+            if inside(interval):
+                engine.add_mission(interval)
+        for key, interval in overlay.assignments.items():
+            previous_assignments[key] = engine.remove_assignment(key)
+            if inside(interval):
+                engine.add_assignment(interval)
+        return engine.audit()
+    finally:
+        for key, interval in previous_missions.items():
+            engine.remove_mission(key)
+            if interval is not None:
+                engine.add_mission(interval)
+        for key, interval in previous_assignments.items():
+            engine.remove_assignment(key)
+            if interval is not None:
+                engine.add_assignment(interval)
+
+
+def _get_scenario_for_org(
+    session: Session, organization_id: str, scenario_id: str, *, editable: bool = True
+) -> PlanningScenario:
+    scenario = session.get(PlanningScenario, scenario_id)
+    if scenario is None or scenario.organization_id != organization_id:
+        raise DomainError("Scenario not found", status_code=404)
+    if editable and scenario.status != "open":
+        raise DomainError("Scenario was already applied", status_code=409)
+    return scenario
+
+
+def _change(scenario: PlanningScenario, entity: str, entity_id: str) -> ScenarioChange | None:
+    return next(
+        (change for change in scenario.changes if change.entity == entity and change.entity_id == entity_id),
+        None,
+    )
+
+
+def _record(session: Session, scenario: PlanningScenario, entity: str, entity_id: str, **state) -> ScenarioChange:
+    """Override one row in the scenario; the first override keeps the live row's state as its base."""
+
+    change = _change(scenario, entity, entity_id)
+    if change is None:
+        change = ScenarioChange(entity=entity, entity_id=entity_id, base=row_state(session, entity, entity_id))
+        scenario.changes.append(change)
+    change.deleted = state.pop("deleted", False)
+    for name in ("mission_id", "user_id", "venue_id", "starts_at", "ends_at"):
+        setattr(change, name, state.get(name))
+    return change
+
+
+def _mission_state(session: Session, scenario: PlanningScenario, mission_id: str) -> Interval:
+    change = _change(scenario, MISSION, mission_id)
+    if change is not None:
+        if change.deleted:
+            raise DomainError("Mission is deleted in this scenario", status_code=409)
+        return Interval(
+            key=mission_id, start=change.starts_at, end=change.ends_at, mission_id=mission_id, venue_id=change.venue_id
+        )
+    mission = session.get(ScheduledMission, mission_id)
+    if mission is None or mission.organization_id != scenario.organization_id:
+        raise DomainError("Scheduled mission not found", status_code=404)
+    return Interval(
+        key=mission.id, start=mission.starts_at, end=mission.ends_at, mission_id=mission.id, venue_id=mission.venue_id
+    )
+
+
+def _crew_state(session: Session, scenario: PlanningScenario, mission_id: str) -> dict[str, Interval]:
+    """Assignments of the mission as the scenario sees them, keyed by assignment id."""
+
+    crew = {
+        row[0]: Interval(key=row[0], start=row[2], end=row[3], mission_id=mission_id, person_id=row[1])
+        for row in session.execute(
+            select(Assignment.id, Assignment.user_id, Assignment.starts_at, Assignment.ends_at).where(
+                Assignment.mission_id == mission_id
+            )
+        )
+    }
+    for change in scenario.changes:
+        if change.entity != ASSIGNMENT or change.mission_id != mission_id:
+            continue
+        if change.deleted:
+            crew.pop(change.entity_id, None)
+        else:
+            crew[change.entity_id] = Interval(
+                key=change.entity_id,
+                start=change.starts_at,
+                end=change.ends_at,
+                mission_id=mission_id,
+                person_id=change.user_id,
+            )
+    return crew
+
+
+def _validate_span(start: datetime, end: datetime) -> None:
+    if end <= start:
+        raise DomainError("End must be after start", status_code=422)
+
+
+def _validate_crews(session: Session, scenario: PlanningScenario, overlay: Overlay) -> None:
+    """Check the final crew of every mission the scenario touches, as the live endpoints check one change."""
+
+    kept = [mission_id for mission_id in overlay.touched_missions if overlay.missions.get(mission_id, True) is not None]
+    team_sizes = dict(
+        session.execute(select(ScheduledMission.id, ScheduledMission.team_size).where(ScheduledMission.id.in_(kept))).all()
+    )
+    for mission_id, team_size in team_sizes.items():
+        people = [interval.person_id for interval in _crew_state(session, scenario, mission_id).values()]
+        if len(set(people)) != len(people):
+            raise DomainError("Person is already assigned to this mission", status_code=409)
+        if len(people) > team_size:
+            raise DomainError("Mission is fully staffed", status_code=409)
+
+
+def create_scenario(session: Session, token_value: str, payload: ScenarioCreate) -> PlanningScenario:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    name = payload.name.strip()
+    if not name:
+        raise DomainError("Scenario name cannot be empty", status_code=422)
+    scenario = PlanningScenario(organization_id=context.membership.organization_id, name=name)
+    session.add(scenario)
+    session.commit()
+    session.refresh(scenario)
+    return scenario
+
+
+def list_scenarios(session: Session, token_value: str) -> list[PlanningScenario]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    return list(
+        session.scalars(
+            select(PlanningScenario)
+            .where(PlanningScenario.organization_id == context.membership.organization_id)
+            .order_by(PlanningScenario.created_at)
+        )
+    )
+
+
+def discard_scenario(session: Session, token_value: str, scenario_id: str) -> None:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    scenario = _get_scenario_for_org(session, context.membership.organization_id, scenario_id, editable=False)
+    session.delete(scenario)
+    session.commit()
+
+
+def change_mission(
+    session: Session, token_value: str, scenario_id: str, mission_id: str, payload: ScenarioMissionChange
+) -> ScenarioChange:
+    """Move, relocate or delete a mission inside the scenario.
+
+    The mission's crew is rewritten into the scenario with it (shifted like a
+    live mission update does), so the delta stays self-contained.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    scenario = _get_scenario_for_org(session, organization_id, scenario_id)
+    current = _mission_state(session, scenario, mission_id)
+    crew = _crew_state(session, scenario, mission_id)
+
+    if payload.deleted:
+        change = _record(session, scenario, MISSION, mission_id, deleted=True)
+        for key, interval in crew.items():
+            _record(
+                session, scenario, ASSIGNMENT, key, deleted=True, mission_id=mission_id, user_id=interval.person_id
+            )
+        session.commit()
+        return change
+
+    fields = payload.model_fields_set
+    venue_id = current.venue_id
+    if "venue_id" in fields:
+        venue_id = payload.venue_id
+        if venue_id is not None:
+            venue = session.get(Venue, venue_id)
+            if venue is None or venue.organization_id != organization_id:
+                raise DomainError("Venue not found", status_code=404)
+    starts_at = as_utc(payload.starts_at) if payload.starts_at else current.start
+    ends_at = as_utc(payload.ends_at) if payload.ends_at else current.end
+    _validate_span(starts_at, ends_at)
+
+    change = _record(
+        session,
+        scenario,
+        MISSION,
+        mission_id,
+        mission_id=mission_id,
+        venue_id=venue_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+    )
+    shift = starts_at - current.start
+    for key, interval in crew.items():
+        if (interval.start, interval.end) == (current.start, current.end):
+            start, end = starts_at, ends_at
+        else:
+            start, end = interval.start + shift, interval.end + shift
+        _record(
+            session,
+            scenario,
+            ASSIGNMENT,
+            key,
+            mission_id=mission_id,
+            user_id=interval.person_id,
+            venue_id=venue_id,
+            starts_at=start,
+            ends_at=end,
+        )
+    session.commit()
+    return change
+
+
+def change_assignment(
+    session: Session, token_value: str, scenario_id: str, assignment_id: str, payload: ScenarioAssignmentChange
+) -> ScenarioChange:
+    """Move, reassign (swap crews) or delete one assignment inside the scenario.
+
+    A swap passes through a state where one person holds two places, so the
+    crew is only checked as a whole by :func:`apply_scenario`.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    scenario = _get_scenario_for_org(session, organization_id, scenario_id)
+
+    change = _change(scenario, ASSIGNMENT, assignment_id)
+    if change is not None:
+        if change.deleted:
+            raise DomainError("Assignment is deleted in this scenario", status_code=409)
+        mission_id = change.mission_id
+    else:
+        assignment = session.get(Assignment, assignment_id)
+        if assignment is None or assignment.organization_id != organization_id:
+            raise DomainError("Assignment not found", status_code=404)
+        mission_id = assignment.mission_id
+    mission = _mission_state(session, scenario, mission_id)
+    crew = _crew_state(session, scenario, mission_id)
+    current = crew[assignment_id]
+
+    if payload.deleted:
+        change = _record(session, scenario, ASSIGNMENT, assignment_id, deleted=True, mission_id=mission_id)
+        session.commit()
+        return change
+
+    user_id = payload.user_id or current.person_id
+    if user_id != current.person_id:
+        ensure_member(session, organization_id, user_id)
+    starts_at = as_utc(payload.starts_at) if payload.starts_at else current.start
+    ends_at = as_utc(payload.ends_at) if payload.ends_at else current.end
+    _validate_span(starts_at, ends_at)
+
+    change = _record(
+        session,
+        scenario,
+        ASSIGNMENT,
+        assignment_id,
+        mission_id=mission_id,
+        user_id=user_id,
+        venue_id=mission.venue_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+    )
+    session.commit()
+    return change
+
+
+def add_assignment(
+    session: Session, token_value: str, scenario_id: str, payload: ScenarioAssignmentCreate
+) -> ScenarioChange:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    scenario = _get_scenario_for_org(session, organization_id, scenario_id)
+    mission = _mission_state(session, scenario, payload.mission_id)
+    ensure_member(session, organization_id, payload.user_id)
+
+    starts_at = as_utc(payload.starts_at) if payload.starts_at else mission.start
+    ends_at = as_utc(payload.ends_at) if payload.ends_at else mission.end
+    _validate_span(starts_at, ends_at)
+
+    change = _record(
+        session,
+        scenario,
+        ASSIGNMENT,
+        str(uuid.uuid4()),
+        mission_id=mission.mission_id,
+        user_id=payload.user_id,
+        venue_id=mission.venue_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+    )
+    session.commit()
+    return change
+
+
+def scenario_conflicts(
+    session: Session, token_value: str, scenario_id: str, week_start: date
+) -> tuple[datetime, datetime, list[Conflict]]:
+    """Conflict report of a week as if the scenario were applied.
+
+    The live week's cached engine is patched with the scenario delta for the
+    duration of the audit only, so the base plan is never copied.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    scenario = _get_scenario_for_org(session, organization_id, scenario_id, editable=False)
+    overlay = Overlay.from_changes(scenario.changes)
+
+    window_start, window_end = week_window(week_of(week_start))
+    with conflict_index_cache.lock:
+        engine = conflict_index_cache.get_or_load(
+            organization_id,
+            window_start,
+            window_end,
+            log_version(session, organization_id),
+            lambda: load_conflict_engine(session, organization_id, window_start, window_end),
+        )
+        return window_start, window_end, overlay_audit(engine, overlay, window_start, window_end)
+
+
+def scenario_week(
+    session: Session, token_value: str, scenario_id: str, week_start: date
+) -> tuple[date, list[PlanningWeekRow]]:
+    """The week read model with the scenario delta merged in; stored rows are never modified."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    scenario = _get_scenario_for_org(session, context.membership.organization_id, scenario_id, editable=False)
+    monday, rows = get_week(session, token_value, week_start)
+    overlay = Overlay.from_changes(scenario.changes)
+    touched = overlay.touched_missions
+    if not touched:
+        return monday, rows
+
+    window_start, window_end = week_window(monday)
+    merged = [row for row in rows if row.mission_id not in touched or row.occurrence_start is not None]
+    bases = {
+        row.mission_id: row
+        for row in session.scalars(
+            select(PlanningWeekRow)
+            .where(PlanningWeekRow.mission_id.in_(touched))
+            .order_by(PlanningWeekRow.week_start.desc())
+        )
+    }
+    user_ids = {interval.person_id for interval in overlay.assignments.values() if interval is not None}
+    emails = dict(session.execute(select(User.id, User.email).where(User.id.in_(user_ids))).all()) if user_ids else {}
+    venue_ids = {interval.venue_id for interval in overlay.missions.values() if interval and interval.venue_id}
+    venue_names = (
+        dict(session.execute(select(Venue.id, Venue.name).where(Venue.id.in_(venue_ids))).all()) if venue_ids else {}
+    )
+
+    for mission_id in touched:
+        base = bases.get(mission_id)
+        if base is None or (mission_id in overlay.missions and overlay.missions[mission_id] is None):
+            continue
+        mission = overlay.missions.get(mission_id)
+        starts_at = mission.start if mission is not None else base.starts_at
+        ends_at = mission.end if mission is not None else base.ends_at
+        if not (starts_at < window_end and ends_at > window_start):
+            continue
+        crew = {member["assignmentId"]: member for member in base.crew}
+        for key, interval in overlay.assignments.items():
+            if interval is None:
+                crew.pop(key, None)
+            elif interval.mission_id == mission_id:
+                previous = crew.get(key, {})
+                crew[key] = {
+                    "assignmentId": key,
+                    "userId": interval.person_id,
+                    "email": emails.get(interval.person_id, previous.get("email", "")),
+                    "startsAt": interval.start.isoformat(),
+                    "endsAt": interval.end.isoformat(),
+                }
+        merged.append(
+            PlanningWeekRow(
+                week_start=monday,
+                mission_id=mission_id,
+                organization_id=base.organization_id,
+                starts_at=starts_at,
+                ends_at=ends_at,
+                team_size=base.team_size,
+                template_id=base.template_id,
+                template_name=base.template_name,
+                venue_id=mission.venue_id if mission is not None else base.venue_id,
+                venue_name=venue_names.get(mission.venue_id) if mission is not None else base.venue_name,
+                project_id=base.project_id,
+                project_name=base.project_name,
+                tags=list(base.tags),
+                crew=sorted(crew.values(), key=lambda member: member["startsAt"]),
+            )
+        )
+    merged.sort(key=lambda row: row.starts_at)
+    return monday, merged
+
+
+def apply_scenario(session: Session, token_value: str, scenario_id: str) -> PlanningScenario:
+    """Write the whole scenario delta to the live planning in one transaction.
+
+    Every mission the delta refers to must still exist and every row it
+    overrides must still be in the state the scenario first saw, or the
+    apply is refused as stale. The final crews are validated next; rows are
+    then written like the planning endpoints would, with the same
+    notification and trigger hooks.
+    A reassigned row is deleted and re-inserted under its id, so a swap
+    between two people of one mission never trips the per-mission unique key.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    scenario = _get_scenario_for_org(session, organization_id, scenario_id)
+    overlay = Overlay.from_changes(scenario.changes)
+
+    referenced = set(overlay.missions)
+    referenced.update(interval.mission_id for interval in overlay.assignments.values() if interval is not None)
+    missions = {
+        mission.id: mission
+        for mission in session.scalars(
+            select(ScheduledMission)
+            .where(ScheduledMission.organization_id == organization_id)
+            .where(ScheduledMission.id.in_(referenced))
+        )
+    }
+    assignments = {
+        assignment.id: assignment
+        for assignment in session.scalars(
+            select(Assignment)
+            .where(Assignment.organization_id == organization_id)
+            .where(Assignment.id.in_(overlay.assignments))
+        )
+    }
+    if len(missions) != len(referenced):
+        raise DomainError("Scenario is stale: a mission no longer exists", status_code=409)
+    rows = [(ASSIGNMENT, key) for key in overlay.assignments] + [(MISSION, key) for key in overlay.missions]
+    before = {row: row_state(session, *row) for row in rows}
+    if any(before[(change.entity, change.entity_id)] != change.base for change in scenario.changes):
+        raise DomainError("Scenario is stale: the live planning changed since it was edited", status_code=409)
+    _validate_crews(session, scenario, overlay)
+    previous = {
+        key: (assignment.user_id, assignment.starts_at, assignment.ends_at) for key, assignment in assignments.items()
+    }
+
+    for key, interval in overlay.assignments.items():
+        assignment = assignments.get(key)
+        if assignment is not None and (interval is None or interval.person_id != assignment.user_id):
+            session.delete(assignment)
+            assignments.pop(key)
+    session.flush()
+    for key, interval in overlay.assignments.items():
+        assignment = assignments.get(key)
+        if interval is None or overlay.missions.get(interval.mission_id, interval) is None:
+            continue
+        elif assignment is not None:
+            assignment.starts_at, assignment.ends_at = interval.start, interval.end
+        else:
+            session.add(
+                Assignment(
+                    id=key,
+                    organization_id=organization_id,
+                    mission_id=interval.mission_id,
+                    user_id=interval.person_id,
+                    starts_at=interval.start,
+                    ends_at=interval.end,
+                )
+            )
+    for key, interval in overlay.missions.items():
+        mission = missions[key]
+        if interval is None:
+            session.delete(mission)
+        else:
+            mission.starts_at, mission.ends_at = interval.start, interval.end
+            mission.venue_id = interval.venue_id
+
+    session.flush()
+    record(
+        session,
+        organization_id,
+        "scenario.apply",
+        [row_change(entity, key, before[(entity, key)], row_state(session, entity, key)) for entity, key in rows],
+        actor_id=context.membership.user_id,
+    )
+    for key in overlay.assignments:
+        sync_assignment(session, key, previous.get(key), context.membership.user_id)
+    scenario.status = "applied"
+    scenario.applied_at = now_utc()
+    try:
+        refresh_week_rows(session, overlay.touched_missions)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    conflict_index_cache.invalidate(organization_id)
+    session.refresh(scenario)
+    return scenario
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import threading
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import Settings
+from ..models import Assignment, ScheduledTrigger, User
+from ..security import now_utc
+from .access import local_time, organization_zone
+from .notifications import EMAIL, TELEGRAM, NotificationDispatcher, contact_targets, enqueue
+from .timeclock import PunchBuffer, find_late, flush_punches
+from .triggers import (
+    CANCELLED,
+    EVE_REMINDER,
+    EXPIRED,
+    FIRED,
+    LATE_PUNCH,
+    PENDING,
+    SKIPPED,
+    backfill_triggers,
+    due_times,
+)
+
+HORIZON = timedelta(hours=1)
+TOUCH_OVERLAP = timedelta(seconds=30)
+LOAD_PAGE = 1000
+LATE_GRACE = timedelta(hours=2)
+CLAIM_LEASE = timedelta(minutes=5)
+BACKFILL_AHEAD = timedelta(days=2)  # the D-1 reminder is due up to 30 h before the start
+
+
+def _line(kind: str, assignment: Assignment, person: str | None, zone: ZoneInfo) -> str:
+    mission = assignment.mission
+    venue = f", {mission.venue.name}" if mission.venue is not None else ""
+    starts_at, ends_at = local_time(assignment.starts_at, zone), local_time(assignment.ends_at, zone)
+    if kind == LATE_PUNCH:
+        who = f"{person} " if person else ""
+        return f"- {who}attendu(e) a {starts_at:%H:%M} ({mission.template.name}{venue})"
+    return f"- {starts_at:%H:%M}-{ends_at:%H:%M} {mission.template.name}{venue}"
+
+
+def _expired(trigger: ScheduledTrigger, assignment: Assignment, now: datetime) -> bool:
+    """Reminders are pointless once the work started; a late alert stays useful for a couple of hours."""
+
+    if trigger.kind == LATE_PUNCH:
+        return now - trigger.due_at > LATE_GRACE
+    return now >= assignment.starts_at
+
+
+def claim_triggers(session: Session, trigger_ids: Sequence[str], lease: timedelta = CLAIM_LEASE) -> str | None:
+    """Claim the still-pending rows among ``trigger_ids`` for this process; the claim, or ``None``.
+
+    Every worker's scheduler holds the same rows in its heap; the conditional
+    update lets only one of them fire each trigger. A claim left by a worker
+    that died is taken over once ``lease`` has passed.
+    """
+
+    claimed_at = now_utc()
+    claim = str(uuid.uuid4())
+    result = session.execute(
+        update(ScheduledTrigger)
+        .where(ScheduledTrigger.id.in_(list(trigger_ids)))
+        .where(ScheduledTrigger.status == PENDING)
+        .where(or_(ScheduledTrigger.claim.is_(None), ScheduledTrigger.claimed_at <= claimed_at - lease))
+        .values(claim=claim, claimed_at=claimed_at)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return claim if result.rowcount else None
+
+
+def release_triggers(session: Session, claim: str) -> None:
+    session.execute(
+        update(ScheduledTrigger)
+        .where(ScheduledTrigger.claim == claim)
+        .values(claim=None, claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def fire_triggers(session: Session, claim: str, now: datetime, punch_buffer: PunchBuffer | None = None) -> int:
+    """Settle the claimed triggers due at ``now`` and queue their notifications in one transaction.
+
+    Returns the number settled. Triggers due together for the same recipient
+    and kind are coalesced into one message whose event id hashes the
+    trigger ids, so replaying the same firing after a crash is dropped by
+    the queue's idempotency keys. A trigger whose assignment moved or went
+    to someone else without passing through the planning hooks is re-armed
+    at its new time, or re-targeted, instead of firing to the wrong person.
+    """
+
+    triggers = []
+    for trigger in session.scalars(
+        select(ScheduledTrigger)
+        .where(ScheduledTrigger.claim == claim)
+        .where(ScheduledTrigger.status == PENDING)
+        .order_by(ScheduledTrigger.due_at, ScheduledTrigger.id)
+    ):
+        trigger.claim = trigger.claimed_at = None
+        if trigger.due_at <= now:
+            triggers.append(trigger)
+    if not triggers:
+        session.commit()
+        return 0
+    assignments = {
+        assignment.id: assignment
+        for assignment in session.scalars(
+            select(Assignment).where(Assignment.id.in_({trigger.assignment_id for trigger in triggers}))
+        )
+    }
+    late: set[str] = set()
+    late_orgs = {trigger.organization_id for trigger in triggers if trigger.kind == LATE_PUNCH}
+    if late_orgs and punch_buffer is not None:
+        flush_punches(session, punch_buffer)
+    for organization_id in late_orgs:
+        late.update(sheet.assignment_id for sheet in find_late(session, organization_id, now))
+
+    groups: dict[tuple[str, str, str], list[tuple[ScheduledTrigger, Assignment]]] = defaultdict(list)
+    for trigger in triggers:
+        assignment = assignments.get(trigger.assignment_id)
+        if assignment is None:
+            trigger.status = CANCELLED
+            continue
+        expected = due_times(assignment.starts_at, organization_zone(session, trigger.organization_id))[trigger.kind]
+        if expected != trigger.due_at:
+            trigger.due_at, trigger.user_id, trigger.touched_at = expected, assignment.user_id, now_utc()
+            continue
+        trigger.user_id = assignment.user_id
+        trigger.fired_at = now
+        if _expired(trigger, assignment, now):
+            trigger.status = EXPIRED
+            continue
+        if trigger.kind == LATE_PUNCH and assignment.id not in late:
+            trigger.status = SKIPPED
+            continue
+        trigger.status = FIRED
+        groups[(trigger.organization_id, trigger.user_id, trigger.kind)].append((trigger, assignment))
+        if trigger.kind == LATE_PUNCH and trigger.manager_id and trigger.manager_id != trigger.user_id:
+            groups[(trigger.organization_id, trigger.manager_id, trigger.kind)].append((trigger, assignment))
+
+    user_ids = {recipient_id for _, recipient_id, _ in groups} | {trigger.user_id for trigger in triggers}
+    users = {user.id: user for user in session.scalars(select(User).where(User.id.in_(user_ids)))}
+    for (organization_id, recipient_id, kind), items in groups.items():
+        recipient = users[recipient_id]
+        items.sort(key=lambda item: (item[1].starts_at, item[0].id))
+        digest = hashlib.sha256("".join(trigger.id for trigger, _ in items).encode()).hexdigest()[:16]
+        event_id = f"{kind}:{recipient_id}:{items[0][0].due_at:%Y%m%d%H%M}:{digest}"
+        copy = any(trigger.user_id != recipient_id for trigger, _ in items)
+        zone = organization_zone(session, organization_id)
+        lines = [
+            _line(kind, assignment, users[trigger.user_id].email if copy else None, zone) for trigger, assignment in items
+        ]
+        if kind == EVE_REMINDER:
+            channels: tuple[str, ...] = (EMAIL,)
+        else:
+            channels = (TELEGRAM,) if recipient.telegram_chat_id else (EMAIL,)
+        payload = {
+            "count": len(items),
+            "day": f"{local_time(items[0][1].starts_at, zone):%d/%m/%Y}",
+            "lines": "\n".join(lines),
+            "userId": recipient_id,
+        }
+        enqueue(session, organization_id, event_id, kind, payload, contact_targets(recipient, channels))
+        for trigger, _ in items:
+            if trigger.user_id == recipient_id:
+                trigger.event_id = event_id
+    session.commit()
+    return len(triggers)
+
+
+class TriggerScheduler:
+    """In-process min-heap of the triggers due within the next hour.
+
+    The heap is filled incrementally: a keyset scan of ``(status, due_at)``
+    loads the next window whenever less than half of it is left, and each
+    tick reads only the rows touched since the previous one, which catches
+    triggers written into a window already held. Nothing in the heap is
+    authoritative: a restart reloads pending rows, and rows already fired
+    are never loaded again. Every worker process runs one; due rows are
+    claimed before firing, so each trigger fires once across them. Each
+    window extension also schedules the upcoming assignments that have no
+    trigger at all.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session],
+        settings: Settings,
+        notifier: NotificationDispatcher | None = None,
+        punch_buffer: PunchBuffer | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._settings = settings
+        self._notifier = notifier
+        self._punch_buffer = punch_buffer
+        self._heap: list[tuple[datetime, str]] = []
+        self._due: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.loaded_until: datetime | None = None
+        self.scanned_at: datetime | None = None
+        self.rows_loaded = 0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _push(self, rows: Sequence[tuple[str, datetime]]) -> None:
+        for trigger_id, due_at in rows:
+            if self._due.get(trigger_id) != due_at:
+                self._due[trigger_id] = due_at
+                heapq.heappush(self._heap, (due_at, trigger_id))
+
+    def _load_window(self, session: Session, lower: datetime | None, upper: datetime) -> None:
+        after: tuple[datetime, str] | None = None
+        while True:
+            query = (
+                select(ScheduledTrigger.id, ScheduledTrigger.due_at)
+                .where(ScheduledTrigger.status == PENDING)
+                .where(ScheduledTrigger.due_at < upper)
+            )
+            if lower is not None:
+                query = query.where(ScheduledTrigger.due_at >= lower)
+            if after is not None:
+                query = query.where(
+                    or_(
+                        ScheduledTrigger.due_at > after[0],
+                        and_(ScheduledTrigger.due_at == after[0], ScheduledTrigger.id > after[1]),
+                    )
+                )
+            rows = session.execute(query.order_by(ScheduledTrigger.due_at, ScheduledTrigger.id).limit(LOAD_PAGE)).all()
+            self._push([(trigger_id, due_at) for trigger_id, due_at in rows])
+            self.rows_loaded += len(rows)
+            if len(rows) < LOAD_PAGE:
+                return
+            after = (rows[-1][1], rows[-1][0])
+
+    def refill(self, session: Session, now: datetime) -> None:
+        """Extend the loaded window and pick up rows touched since the last scan."""
+
+        scanned_at = now_utc()
+        if self.loaded_until is None or self.loaded_until - now < HORIZON / 2:
+            upper = now + HORIZON
+            backfill_triggers(session, now - HORIZON, upper + BACKFILL_AHEAD)
+            self._load_window(session, self.loaded_until, upper)
+            self.loaded_until = upper
+        if self.scanned_at is not None:
+            rows = session.execute(
+                select(ScheduledTrigger.id, ScheduledTrigger.due_at)
+                .where(ScheduledTrigger.touched_at >= self.scanned_at - TOUCH_OVERLAP)
+                .where(ScheduledTrigger.status == PENDING)
+                .where(ScheduledTrigger.due_at < self.loaded_until)
+            ).all()
+            self._push([(trigger_id, due_at) for trigger_id, due_at in rows])
+            self.rows_loaded += len(rows)
+        self.scanned_at = scanned_at
+
+    def tick(self, now: datetime | None = None) -> int:
+        """Load, then fire everything due at ``now``; the number of triggers settled."""
+
+        now = now or now_utc()
+        session = self._session_factory()
+        try:
+            with self._lock:
+                self.refill(session, now)
+                due: list[tuple[datetime, str]] = []
+                while self._heap and self._heap[0][0] <= now:
+                    entry = heapq.heappop(self._heap)
+                    if self._due.get(entry[1]) == entry[0]:
+                        del self._due[entry[1]]
+                        due.append(entry)
+            if not due:
+                session.rollback()
+                return 0
+            claim = claim_triggers(session, [trigger_id for _, trigger_id in due])
+            if claim is None:
+                return 0
+            try:
+                settled = fire_triggers(session, claim, now, self._punch_buffer)
+            except Exception:
+                session.rollback()
+                release_triggers(session, claim)
+                with self._lock:
+                    self._push([(trigger_id, due_at) for due_at, trigger_id in due])
+                raise
+        finally:
+            session.close()
+        if settled and self._notifier is not None:
+            self._notifier.wake()
+        return settled
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="jmd-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _pause(self) -> float:
+        """Sleep until the next trigger, at most one tick."""
+
+        tick = self._settings.scheduler_tick_seconds
+        with self._lock:
+            if not self._heap:
+                return tick
+            until = (self._heap[0][0] - now_utc()).total_seconds()
+        return min(max(until, 0.0), tick)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.tick()
+            except Exception:  # noqa: BLE001 - the triggers stay pending and are retried next tick
+                self._stopping.wait(self._settings.scheduler_tick_seconds)
+                continue
+            self._stopping.wait(self._pause())
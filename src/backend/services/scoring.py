@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Assignment, MissionTemplate, ScheduledMission, UserOrganization
+from ..rbac import Permission
+from .access import ensure_permission, resolve_context
+from .availability import SLOT_MINUTES, SLOTS_PER_DAY, AvailabilityMatrix, cached_availability_matrix
+from .planning import TRAVEL_LOOKAROUND, week_window
+from .planning_cache import week_of
+from .recurrence import load_series, load_series_crews, shift_into
+
+REASON_CODES = ("skills", "availability", "familiarity", "workload")
+DEFAULT_WEIGHTS: Mapping[str, float] = {
+    "skills": 0.4,
+    "availability": 0.3,
+    "familiarity": 0.2,
+    "workload": 0.1,
+}
+HISTORY_WINDOW = timedelta(days=180)
+TOP_REASONS = 3
+
+_SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+@dataclass(frozen=True)
+class OpenSlot:
+    mission_id: str
+    template_id: str
+    starts_at: datetime
+    ends_at: datetime
+    required_skills: tuple[str, ...] = ()
+    open_seats: int = 1
+    assigned: frozenset[str] = frozenset()
+    venue_id: str | None = None
+    recurring: bool = False
+
+
+@dataclass(frozen=True)
+class Booking:
+    mission_id: str
+    user_id: str
+    starts_at: datetime
+    ends_at: datetime
+    venue_id: str | None = None
+
+
+@dataclass(frozen=True)
+class Reason:
+    code: str
+    contribution: float
+
+
+@dataclass(frozen=True)
+class Candidate:
+    user_id: str
+    score: float
+    reasons: tuple[Reason, ...]
+
+
+@dataclass(frozen=True)
+class SlotProposal:
+    slot: OpenSlot
+    candidates: tuple[Candidate, ...]
+
+
+@dataclass
+class CandidatePool:
+    """Per-person inputs shared by every slot scored in one pass.
+
+    ``availability`` and ``busy`` must list people in the same order; that
+    order defines the candidate axis of every matrix the engine builds.
+    """
+
+    availability: AvailabilityMatrix
+    busy: AvailabilityMatrix
+    skills: Mapping[str, Iterable[str]] = field(default_factory=dict)
+    familiarity: Mapping[tuple[str, str], int] = field(default_factory=dict)
+    workload_hours: Mapping[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.availability.user_ids != self.busy.user_ids:
+            raise ValueError("Availability and busy grids must list the same people")
+
+    @property
+    def user_ids(self) -> list[str]:
+        return self.availability.user_ids
+
+
+def busy_grid(
+    user_ids: Sequence[str], first_day: date, days: int, spans: Iterable[tuple[str, datetime, datetime]]
+) -> AvailabilityMatrix:
+    """Rasterise booked ``(user_id, start, end)`` spans; any touched slot counts as busy."""
+
+    rows = {user_id: row for row, user_id in enumerate(user_ids)}
+    bits = np.zeros((len(user_ids), days * SLOTS_PER_DAY), dtype=bool)
+    origin = datetime.combine(first_day, time.min)
+    for user_id, start, end in spans:
+        row = rows.get(user_id)
+        if row is None:
+            continue
+        first = max((start - origin) // _SLOT, 0)
+        last = min(-((origin - end) // _SLOT), bits.shape[1])
+        if last > first:
+            bits[row, first:last] = True
+    return AvailabilityMatrix(user_ids, first_day, bits)
+
+
+class ScoringEngine:
+    """Score every open slot against every candidate with a handful of matrix operations.
+
+    Each component yields a ``(slots, people)`` matrix in ``[0, 1]``; the score
+    is their weighted sum and the weighted terms double as the explanation
+    returned with each candidate. People already booked over a slot, or
+    already on its crew, are never proposed.
+    """
+
+    def __init__(self, pool: CandidatePool, weights: Mapping[str, float] = DEFAULT_WEIGHTS) -> None:
+        self.pool = pool
+        self.weights = np.array([weights.get(code, 0.0) for code in REASON_CODES])[:, None, None]
+
+    def skill_matrix(self, slots: Sequence[OpenSlot]) -> np.ndarray:
+        vocabulary = sorted({skill for slot in slots for skill in slot.required_skills})
+        if not vocabulary:
+            return np.ones((len(slots), len(self.pool.user_ids)))
+        columns = {skill: column for column, skill in enumerate(vocabulary)}
+        required = np.zeros((len(slots), len(vocabulary)), dtype=np.float32)
+        for row, slot in enumerate(slots):
+            required[row, [columns[skill] for skill in slot.required_skills]] = 1.0
+        held = np.zeros((len(vocabulary), len(self.pool.user_ids)), dtype=np.float32)
+        for person, user_id in enumerate(self.pool.user_ids):
+            known = [columns[skill] for skill in self.pool.skills.get(user_id, ()) if skill in columns]
+            held[known, person] = 1.0
+        needed = required.sum(axis=1, keepdims=True)
+        return np.divide(required @ held, needed, out=np.ones((len(slots), held.shape[1])), where=needed > 0)
+
+    def _familiarity_matrix(self, slots: Sequence[OpenSlot]) -> np.ndarray:
+        templates = sorted({slot.template_id for slot in slots})
+        positions = {template_id: row for row, template_id in enumerate(templates)}
+        people = {user_id: column for column, user_id in enumerate(self.pool.user_ids)}
+        counts = np.zeros((len(templates), len(people)))
+        for (user_id, template_id), count in self.pool.familiarity.items():
+            if template_id in positions and user_id in people:
+                counts[positions[template_id], people[user_id]] = count
+        scaled = np.log1p(counts)
+        ceiling = scaled.max(axis=1, keepdims=True)
+        normalised = np.divide(scaled, ceiling, out=np.zeros_like(scaled), where=ceiling > 0)
+        return normalised[[positions[slot.template_id] for slot in slots]]
+
+    def _workload_vector(self) -> np.ndarray:
+        hours = np.array([self.pool.workload_hours.get(user_id, 0.0) for user_id in self.pool.user_ids])
+        peak = hours.max(initial=0.0)
+        return 1.0 - hours / peak if peak > 0 else np.ones_like(hours)
+
+    def components(self, slots: Sequence[OpenSlot]) -> tuple[np.ndarray, np.ndarray]:
+        """Raw ``(components, slots, people)`` terms in ``[0, 1]`` and the ``(slots, people)`` eligibility mask."""
+
+        spans = [(slot.starts_at, slot.ends_at) for slot in slots]
+        components = np.stack(
+            [
+                self.skill_matrix(slots),
+                self.pool.availability.coverage(spans),
+                self._familiarity_matrix(slots),
+                np.broadcast_to(self._workload_vector(), (len(slots), len(self.pool.user_ids))),
+            ]
+        )
+        eligible = self.pool.busy.coverage(spans) == 0
+        for row, slot in enumerate(slots):
+            for user_id in slot.assigned:
+                column = self.pool.availability.row_of(user_id)
+                if column is not None:
+                    eligible[row, column] = False
+        return components, eligible
+
+    def contributions(self, slots: Sequence[OpenSlot]) -> tuple[np.ndarray, np.ndarray]:
+        """Weighted terms (the explanation of each score) and the eligibility mask."""
+
+        components, eligible = self.components(slots)
+        return components * self.weights, eligible
+
+    def propose(self, slots: Sequence[OpenSlot], limit: int = 5) -> list[SlotProposal]:
+        if not slots or not self.pool.user_ids:
+            return [SlotProposal(slot=slot, candidates=()) for slot in slots]
+        weighted, eligible = self.contributions(slots)
+        scores = np.where(eligible, weighted.sum(axis=0), -np.inf)
+
+        k = min(limit, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        terms = weighted[:, np.arange(len(slots))[:, None], top]
+        ranked_terms = np.argsort(-terms, axis=0, kind="stable")[:TOP_REASONS]
+
+        proposals = []
+        for row, slot in enumerate(slots):
+            candidates = []
+            for rank in range(k):
+                if not np.isfinite(top_scores[row, rank]):
+                    break
+                reasons = tuple(
+                    Reason(code=REASON_CODES[code], contribution=round(float(terms[code, row, rank]), 4))
+                    for code in ranked_terms[:, row, rank]
+                    if terms[code, row, rank] > 0
+                )
+                candidates.append(
+                    Candidate(
+                        user_id=self.pool.user_ids[top[row, rank]],
+                        score=round(float(top_scores[row, rank]), 4),
+                        reasons=reasons,
+                    )
+                )
+            proposals.append(SlotProposal(slot=slot, candidates=tuple(candidates)))
+        return proposals
+
+
+def load_open_slots(
+    session: Session, organization_id: str, window_start: datetime, window_end: datetime
+) -> tuple[list[OpenSlot], list[Booking]]:
+    """Missions of the window still short of crew, plus every assignment around them.
+
+    Bookings reach :data:`TRAVEL_LOOKAROUND` past the missions so callers can
+    check travel time against the neighbouring jobs of each person. Recurring
+    missions are expanded like the conflict engine does: each occurrence in
+    that span books the series crew at the same offsets.
+    """
+
+    missions = session.execute(
+        select(
+            ScheduledMission.id,
+            ScheduledMission.template_id,
+            ScheduledMission.starts_at,
+            ScheduledMission.ends_at,
+            ScheduledMission.team_size,
+            ScheduledMission.venue_id,
+            MissionTemplate.required_skills,
+        )
+        .join(MissionTemplate, MissionTemplate.id == ScheduledMission.template_id)
+        .where(ScheduledMission.organization_id == organization_id)
+        .where(ScheduledMission.starts_at < window_end)
+        .where(ScheduledMission.ends_at > window_start)
+        .order_by(ScheduledMission.starts_at, ScheduledMission.id)
+    ).all()
+    if not missions:
+        return [], []
+    horizon_start = min(row[2] for row in missions) - TRAVEL_LOOKAROUND
+    horizon_end = max(row[3] for row in missions) + TRAVEL_LOOKAROUND
+    rows = session.execute(
+        select(
+            Assignment.mission_id,
+            Assignment.user_id,
+            Assignment.starts_at,
+            Assignment.ends_at,
+            ScheduledMission.venue_id,
+        )
+        .join(ScheduledMission, ScheduledMission.id == Assignment.mission_id)
+        .where(Assignment.organization_id == organization_id)
+        .where(Assignment.starts_at < horizon_end)
+        .where(Assignment.ends_at > horizon_start)
+    )
+    bookings = [Booking(*row) for row in rows]
+    crews: dict[str, set[str]] = {}
+    for booking in bookings:
+        crews.setdefault(booking.mission_id, set()).add(booking.user_id)
+
+    series = load_series(session, organization_id, horizon_start, horizon_end)
+    if series:
+        series_crews = load_series_crews(session, [item.mission_id for item in series])
+        for item in series:
+            for occurrence in item.expand(horizon_start, horizon_end):
+                for _, user_id, starts_at, ends_at in series_crews.get(item.mission_id, ()):
+                    start, end = shift_into(occurrence, item, starts_at, ends_at)
+                    if end > start:
+                        bookings.append(Booking(item.mission_id, user_id, start, end, item.venue_id))
+    recurring = {item.mission_id for item in series}
+
+    slots = []
+    for mission_id, template_id, starts_at, ends_at, team_size, venue_id, required_skills in missions:
+        crew = crews.get(mission_id, set())
+        if len(crew) >= team_size:
+            continue
+        slots.append(
+            OpenSlot(
+                mission_id=mission_id,
+                template_id=template_id,
+                starts_at=starts_at,
+                ends_at=ends_at,
+                required_skills=tuple(required_skills or ()),
+                open_seats=team_size - len(crew),
+                assigned=frozenset(crew),
+                venue_id=venue_id,
+                recurring=mission_id in recurring,
+            )
+        )
+    return slots, bookings
+
+
+def load_candidate_pool(
+    session: Session,
+    organization_id: str,
+    slots: Sequence[OpenSlot],
+    bookings: Sequence[Booking],
+) -> CandidatePool:
+    first_day = min(slot.starts_at for slot in slots).date()
+    last_day = max(slot.ends_at - timedelta(microseconds=1) for slot in slots).date()
+    availability = cached_availability_matrix(session, organization_id, first_day, last_day)
+    busy = busy_grid(
+        availability.user_ids,
+        first_day,
+        availability.days,
+        ((booking.user_id, booking.starts_at, booking.ends_at) for booking in bookings),
+    )
+
+    workload: dict[str, float] = {}
+    for booking in bookings:
+        hours = (booking.ends_at - booking.starts_at).total_seconds() / 3600
+        workload[booking.user_id] = workload.get(booking.user_id, 0.0) + hours
+
+    history_end = datetime.combine(first_day, time.min)
+    familiarity = {
+        (user_id, template_id): count
+        for user_id, template_id, count in session.execute(
+            select(Assignment.user_id, ScheduledMission.template_id, func.count())
+            .join(ScheduledMission, ScheduledMission.id == Assignment.mission_id)
+            .where(Assignment.organization_id == organization_id)
+            .where(Assignment.ends_at <= history_end)
+            .where(Assignment.ends_at > history_end - HISTORY_WINDOW)
+            .group_by(Assignment.user_id, ScheduledMission.template_id)
+        )
+    }
+    skills = dict(
+        session.execute(
+            select(UserOrganization.user_id, UserOrganization.skills).where(
+                UserOrganization.organization_id == organization_id
+            )
+        ).all()
+    )
+    return CandidatePool(
+        availability=availability,
+        busy=busy,
+        skills=skills,
+        familiarity=familiarity,
+        workload_hours=workload,
+    )
+
+
+def propose_assignments(
+    session: Session, token_value: str, week_start: date, limit: int = 5
+) -> tuple[date, list[SlotProposal]]:
+    """Rank candidates for every understaffed mission of the week (WF-02)."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    organization_id = context.membership.organization_id
+    monday = week_of(week_start)
+    window_start, window_end = week_window(monday)
+
+    slots, bookings = load_open_slots(session, organization_id, window_start, window_end)
+    if not slots:
+        return monday, []
+    pool = load_candidate_pool(session, organization_id, slots, bookings)
+    return monday, ScoringEngine(pool).propose(slots, limit=limit)
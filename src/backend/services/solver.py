@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import UserOrganization
+from ..rbac import Permission
+from .access import ensure_permission, resolve_context
+from .availability import SLOTS_PER_DAY, AvailabilityMatrix
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .planning import week_window
+from .planning_cache import week_of
+from .scoring import (
+    DEFAULT_WEIGHTS,
+    Booking,
+    CandidatePool,
+    OpenSlot,
+    ScoringEngine,
+    load_candidate_pool,
+    load_open_slots,
+)
+from .travel import TravelMatrix, load_travel_matrix
+
+DEFAULT_WEEKLY_HOUR_CAP = 48.0
+MAX_TIME_BUDGET_SECONDS = 60.0
+SOLVER_JOB_KIND = "planning.solver"
+
+_INFEASIBLE = 1e9
+_MINUTE = timedelta(minutes=1)
+
+
+@dataclass(frozen=True)
+class Placement:
+    mission_id: str
+    user_id: str
+    score: float
+
+
+@dataclass
+class Solution:
+    placements: list[Placement] = field(default_factory=list)
+    unfilled: dict[str, int] = field(default_factory=dict)
+    total_score: float = 0.0
+    rounds: int = 0
+    complete: bool = True
+
+
+@dataclass
+class SolverProblem:
+    """Everything the solver needs, already loaded: it never touches the database."""
+
+    slots: Sequence[OpenSlot]
+    pool: CandidatePool
+    window_start: datetime
+    window_end: datetime
+    bookings: Sequence[Booking] = ()
+    travel: TravelMatrix | None = None
+    hour_caps: Mapping[str, float] = field(default_factory=dict)
+    default_hour_cap: float = DEFAULT_WEEKLY_HOUR_CAP
+
+
+def overlap_clusters(starts: np.ndarray, ends: np.ndarray) -> list[np.ndarray]:
+    """Group slot indexes into maximal runs of transitively overlapping spans, in start order."""
+
+    order = np.argsort(starts, kind="stable")
+    clusters: list[list[int]] = []
+    reach = None
+    for index in order.tolist():
+        if reach is None or starts[index] >= reach:
+            clusters.append([])
+            reach = ends[index]
+        clusters[-1].append(index)
+        reach = max(reach, ends[index])
+    return [np.array(cluster, dtype=np.intp) for cluster in clusters]
+
+
+class AssignmentSolver:
+    """Fill every open seat of a period with a sequence of min-cost matchings.
+
+    Slots are grouped into clusters of overlapping spans; inside a cluster a
+    person can hold at most one seat, so each cluster is an exact bipartite
+    matching where a mission with ``open_seats > 1`` contributes one row per
+    seat (a min-cost flow with capacity ``team_size`` unrolled). Clusters are
+    solved in time order against everything already accepted, and the pass
+    repeats until a round places nobody, so people can pick up further
+    non-overlapping work.
+
+    Hard stops are never relaxed: missing skills, existing bookings, crew
+    already on the mission, overlaps or too-short travel against accepted
+    work, and the person's weekly hour cap.
+    """
+
+    def __init__(self, problem: SolverProblem, weights: Mapping[str, float] = DEFAULT_WEIGHTS) -> None:
+        self.problem = problem
+        slots = problem.slots
+        people = problem.pool.user_ids
+        self._people = people
+        self._rows = {user_id: row for row, user_id in enumerate(people)}
+
+        if slots and people:
+            engine = ScoringEngine(problem.pool, weights)
+            components, eligible = engine.components(slots)
+            self._scores = (components * engine.weights).sum(axis=0)
+            self._hard = eligible & (components[0] >= 1.0)
+        else:
+            self._scores = np.zeros((len(slots), len(people)))
+            self._hard = np.zeros((len(slots), len(people)), dtype=bool)
+
+        origin = problem.window_start
+        self._start = np.array([(slot.starts_at - origin) // _MINUTE for slot in slots], dtype=np.int64)
+        self._end = np.array([(slot.ends_at - origin) // _MINUTE for slot in slots], dtype=np.int64)
+        self._hours = (self._end - self._start) / 60.0
+
+        travel = problem.travel
+        venue_ids = travel.venue_ids if travel is not None else []
+        self._venue_positions = {venue_id: position for position, venue_id in enumerate(venue_ids)}
+        self._unknown_venue = len(venue_ids)
+        dense = np.zeros((len(venue_ids) + 1, len(venue_ids) + 1), dtype=np.int64)
+        if travel is not None and venue_ids:
+            dense[:-1, :-1] = np.frombuffer(travel.to_bytes(), dtype=np.uint16).reshape(len(venue_ids), -1)
+        self._travel = dense
+        self._slot_venue = np.array([self._venue_of(slot.venue_id) for slot in slots], dtype=np.intp)
+
+        self._caps = np.array(
+            [float(problem.hour_caps.get(user_id, problem.default_hour_cap)) for user_id in people]
+        )
+        self._used = np.zeros(len(people))
+        self._accepted_person: list[int] = []
+        self._accepted_start: list[int] = []
+        self._accepted_end: list[int] = []
+        self._accepted_venue: list[int] = []
+        for booking in problem.bookings:
+            row = self._rows.get(booking.user_id)
+            if row is None:
+                continue
+            start = (booking.starts_at - origin) // _MINUTE
+            end = (booking.ends_at - origin) // _MINUTE
+            self._accept(row, start, end, self._venue_of(booking.venue_id))
+            clipped = min(booking.ends_at, problem.window_end) - max(booking.starts_at, problem.window_start)
+            self._used[row] += max(clipped.total_seconds(), 0.0) / 3600
+
+    def _venue_of(self, venue_id: str | None) -> int:
+        if venue_id is None:
+            return self._unknown_venue
+        return self._venue_positions.get(venue_id, self._unknown_venue)
+
+    def _accept(self, row: int, start: int, end: int, venue: int) -> None:
+        self._accepted_person.append(row)
+        self._accepted_start.append(start)
+        self._accepted_end.append(end)
+        self._accepted_venue.append(venue)
+
+    def feasible(self, cluster: np.ndarray) -> np.ndarray:
+        """``(len(cluster), people)`` mask of who may still take each slot of the cluster."""
+
+        mask = self._hard[cluster].copy()
+        mask &= self._used[None, :] + self._hours[cluster][:, None] <= self._caps[None, :] + 1e-9
+        if self._accepted_person:
+            person = np.array(self._accepted_person, dtype=np.intp)
+            start = np.array(self._accepted_start, dtype=np.int64)
+            end = np.array(self._accepted_end, dtype=np.int64)
+            venue = np.array(self._accepted_venue, dtype=np.intp)
+            gap = self._travel[venue[:, None], self._slot_venue[cluster][None, :]]
+            clash = (start[:, None] < self._end[cluster][None, :] + gap) & (
+                self._start[cluster][None, :] < end[:, None] + gap
+            )
+            accepted_index, cluster_index = np.nonzero(clash)
+            mask[cluster_index, person[accepted_index]] = False
+        return mask
+
+    def solve(
+        self,
+        deadline: float | None = None,
+        on_progress: Callable[[Solution, float], None] | None = None,
+    ) -> Solution:
+        """Run matching rounds until nothing improves or ``deadline`` (``time.monotonic``) passes.
+
+        ``on_progress`` receives a snapshot of the best solution after every
+        round, so an interrupted run still leaves a usable proposal behind.
+        """
+
+        slots = self.problem.slots
+        remaining = np.array([slot.open_seats for slot in slots], dtype=np.int64)
+        total_seats = int(remaining.sum())
+        placements: list[Placement] = []
+        clusters = overlap_clusters(self._start, self._end) if len(slots) else []
+        rounds = 0
+        complete = True
+
+        while True:
+            placed = 0
+            for cluster in clusters:
+                if deadline is not None and time.monotonic() >= deadline:
+                    complete = False
+                    break
+                open_slots = cluster[remaining[cluster] > 0]
+                if not open_slots.size:
+                    continue
+                mask = self.feasible(open_slots)
+                seat_rows = np.repeat(np.arange(open_slots.size), remaining[open_slots])
+                seat_mask = mask[seat_rows]
+                columns = np.flatnonzero(seat_mask.any(axis=0))
+                if not columns.size:
+                    continue
+                seats = open_slots[seat_rows]
+                cost = np.where(seat_mask[:, columns], -self._scores[seats][:, columns], _INFEASIBLE)
+                for seat, column in zip(*linear_sum_assignment(cost)):
+                    if cost[seat, column] >= _INFEASIBLE:
+                        continue
+                    slot_index = int(seats[seat])
+                    person = int(columns[column])
+                    remaining[slot_index] -= 1
+                    self._used[person] += self._hours[slot_index]
+                    self._accept(
+                        person,
+                        int(self._start[slot_index]),
+                        int(self._end[slot_index]),
+                        int(self._slot_venue[slot_index]),
+                    )
+                    placements.append(
+                        Placement(
+                            mission_id=slots[slot_index].mission_id,
+                            user_id=self._people[person],
+                            score=round(float(self._scores[slot_index, person]), 4),
+                        )
+                    )
+                    placed += 1
+            rounds += 1
+            solution = self._snapshot(placements, remaining, rounds, complete)
+            if on_progress is not None:
+                on_progress(solution, len(placements) / total_seats if total_seats else 1.0)
+            if not complete or placed == 0:
+                return solution
+
+    def _snapshot(self, placements: list[Placement], remaining: np.ndarray, rounds: int, complete: bool) -> Solution:
+        return Solution(
+            placements=list(placements),
+            unfilled={
+                slot.mission_id: int(left) for slot, left in zip(self.problem.slots, remaining.tolist()) if left > 0
+            },
+            total_score=round(sum(placement.score for placement in placements), 4),
+            rounds=rounds,
+            complete=complete,
+        )
+
+
+def load_solver_problem(session: Session, organization_id: str, week_start: date) -> SolverProblem:
+    """The week's open seats and everything they are checked against.
+
+    A recurring mission's crew works every occurrence of the series, which a
+    single week cannot check, so its seats are left to the planner; its
+    occurrences still count as bookings of the people already on it.
+    """
+
+    window_start, window_end = week_window(week_of(week_start))
+    slots, bookings = load_open_slots(session, organization_id, window_start, window_end)
+    slots = [slot for slot in slots if not slot.recurring]
+    if slots:
+        pool = load_candidate_pool(session, organization_id, slots, bookings)
+    else:
+        pool = CandidatePool(
+            availability=_empty_matrix(window_start),
+            busy=_empty_matrix(window_start),
+        )
+    hour_caps = dict(
+        session.execute(
+            select(UserOrganization.user_id, UserOrganization.max_weekly_hours)
+            .where(UserOrganization.organization_id == organization_id)
+            .where(UserOrganization.max_weekly_hours.is_not(None))
+        ).all()
+    )
+    return SolverProblem(
+        slots=slots,
+        pool=pool,
+        window_start=window_start,
+        window_end=window_end,
+        bookings=bookings,
+        travel=load_travel_matrix(session, organization_id),
+        hour_caps=hour_caps,
+    )
+
+
+def _empty_matrix(window_start: datetime) -> AvailabilityMatrix:
+    return AvailabilityMatrix([], window_start.date(), np.zeros((0, SLOTS_PER_DAY), dtype=bool))
+
+
+def start_solver_run(session: Session, token_value: str, week_start: date, time_budget: float) -> Job:
+    """Load the week synchronously, then solve it on the background worker pool."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    if not 0 < time_budget <= MAX_TIME_BUDGET_SECONDS:
+        raise DomainError(f"Time budget must be within (0, {MAX_TIME_BUDGET_SECONDS:g}] seconds", status_code=422)
+    organization_id = context.membership.organization_id
+    problem = load_solver_problem(session, organization_id, week_start)
+
+    def work(job: Job) -> Solution:
+        deadline = time.monotonic() + time_budget
+        solver = AssignmentSolver(problem)
+        return solver.solve(deadline=deadline, on_progress=job.publish)
+
+    return job_registry.submit(SOLVER_JOB_KIND, organization_id, work)
+
+
+def get_solver_run(session: Session, token_value: str, job_id: str) -> Job:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_PLANNING)
+    job = job_registry.get(context.membership.organization_id, job_id)
+    if job is None or job.kind != SOLVER_JOB_KIND:
+        raise DomainError("Solver run not found", status_code=404)
+    return job
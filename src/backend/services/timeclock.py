@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..models import TimePunch, Timesheet
+from ..rbac import Permission
+from ..schemas import PunchCreate
+from ..security import now_utc
+from .access import AuthContext, ensure_permission, resolve_context
+from .exceptions import DomainError
+from .jobs import Job, job_registry
+from .planning import as_utc, ensure_member
+from .timesheets import PLANNED, epoch_minutes, frozen_months
+
+PUNCH_IN = "in"
+PUNCH_OUT = "out"
+
+FLUSH_ROWS = 256
+FLUSH_DELAY_SECONDS = 0.5
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+MAX_BATCH = 1000
+
+# Matching windows: an "in" may precede the planned start, an "out" may follow the planned end.
+EARLY_IN = timedelta(hours=2)
+LATE_OUT = timedelta(hours=4)
+RECONCILE_CHUNK = 5000
+
+LATE_AFTER = timedelta(minutes=10)
+LATE_HORIZON = timedelta(hours=12)
+
+RECONCILE_JOB_KIND = "timeclock.reconcile"
+
+
+class PunchBuffer:
+    """Process-local write buffer for punches.
+
+    Requests append rows and get a batch back once ``max_rows`` are pending
+    or the oldest pending row is ``max_delay`` seconds old; the caller then
+    inserts that batch in one statement. Readers that need every punch call
+    :meth:`drain` first. Once started, a thread also flushes every
+    ``max_delay`` seconds, so a quiet worker's punches still reach the table
+    in time for the late checks and reconciliations run by other processes.
+    A batch whose write fails goes back to the buffer and is retried. Pending
+    rows are lost if the process dies before a flush, which bounds the
+    exposure to ``max_delay`` of traffic.
+    """
+
+    def __init__(self, max_rows: int = FLUSH_ROWS, max_delay: float = FLUSH_DELAY_SECONDS) -> None:
+        self._lock = threading.Lock()
+        self._max_rows = max_rows
+        self._max_delay = max_delay
+        self._rows: list[dict[str, Any]] = []
+        self._oldest = 0.0
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, rows: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Queue rows; returns the batch the caller must write now (often empty)."""
+
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.extend(rows)
+            if len(self._rows) < self._max_rows and time.monotonic() - self._oldest < self._max_delay:
+                return []
+            batch, self._rows = self._rows, []
+            return batch
+
+    def drain(self) -> list[dict[str, Any]]:
+        with self._lock:
+            batch, self._rows = self._rows, []
+            return batch
+
+    def requeue(self, batch: Sequence[dict[str, Any]]) -> None:
+        """Put back a batch whose write failed, ahead of the rows queued since."""
+
+        if not batch:
+            return
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows[:0] = batch
+
+    def start(self, session_factory: sessionmaker[Session]) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory,), name="jmd-punch-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self, session_factory: sessionmaker[Session]) -> None:
+        while not self._stopping.wait(self._max_delay):
+            session = session_factory()
+            try:
+                flush_punches(session, self)
+            except Exception:  # noqa: BLE001 - the batch is back in the buffer and retried next period
+                pass
+            finally:
+                session.close()
+
+
+def write_punches(session: Session, rows: list[dict[str, Any]]) -> int:
+    if rows:
+        session.execute(insert(TimePunch), rows)
+        session.commit()
+    return len(rows)
+
+
+def _write_batch(session: Session, buffer: PunchBuffer, batch: list[dict[str, Any]]) -> int:
+    try:
+        return write_punches(session, batch)
+    except Exception:
+        session.rollback()
+        buffer.requeue(batch)
+        raise
+
+
+def flush_punches(session: Session, buffer: PunchBuffer) -> int:
+    """Write every pending punch; a failed batch is requeued before the error propagates."""
+
+    return _write_batch(session, buffer, buffer.drain())
+
+
+def _can_manage(context: AuthContext) -> bool:
+    try:
+        ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    except DomainError:
+        return False
+    return True
+
+
+def ingest_punches(session: Session, token_value: str, buffer: PunchBuffer, punches: Sequence[PunchCreate]) -> int:
+    """Validate punches and queue them; the hot path is two lookups and a list append.
+
+    People punch for themselves at the current time (within the clock skew
+    allowance). Entering a punch for someone else or at another time is a
+    manual entry reserved to timesheet managers and tagged as such.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_TIMESHEETS)
+    if not punches:
+        return 0
+    if len(punches) > MAX_BATCH:
+        raise DomainError(f"At most {MAX_BATCH} punches per request", status_code=422)
+
+    organization_id = context.membership.organization_id
+    own_id = context.membership.user_id
+    now = now_utc()
+    manager = None
+    known: set[str] = {own_id}
+    rows = []
+    for punch in punches:
+        user_id = punch.user_id or own_id
+        punched_at = as_utc(punch.at) if punch.at is not None else now
+        manual = user_id != own_id or abs(punched_at - now) > MAX_CLOCK_SKEW
+        if manual:
+            if manager is None:
+                manager = _can_manage(context)
+            if not manager:
+                raise DomainError("Only timesheet managers can enter punches manually", status_code=403)
+            if punched_at > now + MAX_CLOCK_SKEW:
+                raise DomainError("Punches cannot be in the future", status_code=422)
+        if user_id not in known:
+            ensure_member(session, organization_id, user_id)
+            known.add(user_id)
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "organization_id": organization_id,
+                "user_id": user_id,
+                "kind": punch.kind,
+                "punched_at": punched_at,
+                "received_at": now,
+                "source": "manual" if manual else "clock",
+            }
+        )
+    try:
+        _write_batch(session, buffer, buffer.add(rows))
+    except SQLAlchemyError:
+        pass  # the batch is back in the buffer: the punches stay accepted and the next flush retries them
+    return len(rows)
+
+
+def list_punches(
+    session: Session,
+    token_value: str,
+    buffer: PunchBuffer,
+    start: datetime,
+    end: datetime,
+    user_id: str | None = None,
+) -> list[TimePunch]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_TIMESHEETS)
+    if user_id != context.membership.user_id and not _can_manage(context):
+        user_id = context.membership.user_id
+    flush_punches(session, buffer)
+    query = (
+        select(TimePunch)
+        .where(TimePunch.organization_id == context.membership.organization_id)
+        .where(TimePunch.punched_at >= as_utc(start))
+        .where(TimePunch.punched_at < as_utc(end))
+        .order_by(TimePunch.punched_at)
+    )
+    if user_id is not None:
+        query = query.where(TimePunch.user_id == user_id)
+    return list(session.scalars(query))
+
+
+def _match(
+    kinds: np.ndarray, moments: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> np.ndarray:
+    """Index of the timesheet each punch belongs to, or -1; ``starts`` must be sorted.
+
+    An "in" goes to the latest shift starting at most ``EARLY_IN`` after it
+    that has not ended yet; an "out" to the latest shift already started
+    that ended less than ``LATE_OUT`` before it.
+    """
+
+    early = int(EARLY_IN.total_seconds() // 60)
+    late = int(LATE_OUT.total_seconds() // 60)
+    is_in = kinds == PUNCH_IN
+    candidate = np.searchsorted(starts, np.where(is_in, moments + early, moments), side="right") - 1
+    valid = candidate >= 0
+    safe = np.where(valid, candidate, 0)
+    valid &= np.where(is_in, moments < ends[safe], moments <= ends[safe] + late)
+    return np.where(valid, candidate, -1)
+
+
+def reconcile_punches(session: Session, organization_id: str) -> dict[str, int]:
+    """Apply pending punches to timesheets: first "in" sets the actual start, last "out" the end.
+
+    Punches are processed in chunks ordered by time. Each chunk loads the
+    involved people's timesheets around the chunk once, then matches every
+    person's punches with one ``searchsorted`` over their planned starts.
+    A punch aimed at a validated sheet, or at one in a month whose payroll
+    close has started, is counted as ``locked`` and left off the sheet.
+    """
+
+    totals = {"punches": 0, "matched": 0, "unmatched": 0, "locked": 0, "late": 0}
+    while True:
+        pending = session.execute(
+            select(TimePunch.id, TimePunch.user_id, TimePunch.kind, TimePunch.punched_at)
+            .where(TimePunch.organization_id == organization_id)
+            .where(TimePunch.reconciled_at.is_(None))
+            .order_by(TimePunch.punched_at)
+            .limit(RECONCILE_CHUNK)
+        ).all()
+        if not pending:
+            return totals
+        earliest, latest = pending[0][3], pending[-1][3]
+        sheets = session.execute(
+            select(
+                Timesheet.id,
+                Timesheet.user_id,
+                Timesheet.planned_start,
+                Timesheet.planned_end,
+                Timesheet.actual_start,
+                Timesheet.actual_end,
+                Timesheet.status,
+                Timesheet.work_date,
+            )
+            .where(Timesheet.organization_id == organization_id)
+            .where(Timesheet.user_id.in_({row[1] for row in pending}))
+            .where(Timesheet.planned_start <= latest + EARLY_IN)
+            .where(Timesheet.planned_end >= earliest - LATE_OUT)
+            .order_by(Timesheet.user_id, Timesheet.planned_start)
+        ).all()
+        frozen = frozen_months(session, organization_id, {sheet[7] for sheet in sheets})
+        locked = {sheet[0] for sheet in sheets if sheet[6] != PLANNED or sheet[7].replace(day=1) in frozen}
+        by_user: dict[str, list[tuple]] = {}
+        for sheet in sheets:
+            by_user.setdefault(sheet[1], []).append(sheet)
+        punches_by_user: dict[str, list[tuple]] = {}
+        for punch in pending:
+            punches_by_user.setdefault(punch[1], []).append(punch)
+
+        now = now_utc()
+        actual: dict[str, dict[str, Any]] = {}
+        punch_rows = []
+        for user_id, punches in punches_by_user.items():
+            own = by_user.get(user_id, [])
+            matched = np.full(len(punches), -1)
+            if own:
+                matched = _match(
+                    np.array([punch[2] for punch in punches]),
+                    epoch_minutes([punch[3] for punch in punches]),
+                    epoch_minutes([sheet[2] for sheet in own]),
+                    epoch_minutes([sheet[3] for sheet in own]),
+                )
+            for punch, index in zip(punches, matched.tolist()):
+                if index < 0:
+                    punch_rows.append({"id": punch[0], "timesheet_id": None, "reconciled_at": now})
+                    totals["unmatched"] += 1
+                    continue
+                sheet_id, _, planned_start, _, actual_start, actual_end, _, _ = own[index]
+                if sheet_id in locked:
+                    punch_rows.append({"id": punch[0], "timesheet_id": None, "reconciled_at": now})
+                    totals["locked"] += 1
+                    continue
+                values = actual.setdefault(
+                    sheet_id, {"id": sheet_id, "actual_start": actual_start, "actual_end": actual_end}
+                )
+                if punch[2] == PUNCH_IN:
+                    if values["actual_start"] is None or punch[3] < values["actual_start"]:
+                        values["actual_start"] = punch[3]
+                elif values["actual_end"] is None or punch[3] > values["actual_end"]:
+                    values["actual_end"] = punch[3]
+                values["late_minutes"] = (
+                    max(0, (values["actual_start"] - planned_start) // timedelta(minutes=1))
+                    if values["actual_start"] is not None
+                    else None
+                )
+                punch_rows.append({"id": punch[0], "timesheet_id": sheet_id, "reconciled_at": now})
+                totals["matched"] += 1
+
+        if actual:
+            rows = list(actual.values())
+            session.execute(update(Timesheet), rows)
+            totals["late"] += sum(
+                1 for row in rows if (row["late_minutes"] or 0) >= LATE_AFTER // timedelta(minutes=1)
+            )
+        session.execute(update(TimePunch), punch_rows)
+        session.commit()
+        totals["punches"] += len(pending)
+
+
+def start_reconciliation(
+    session: Session, token_value: str, buffer: PunchBuffer, session_factory: sessionmaker[Session]
+) -> Job:
+    """Flush pending punches, then reconcile them on the job pool in a session of its own."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    organization_id = context.membership.organization_id
+    flush_punches(session, buffer)
+
+    def work(job: Job) -> dict[str, int]:
+        worker_session = session_factory()
+        try:
+            return reconcile_punches(worker_session, organization_id)
+        finally:
+            worker_session.close()
+
+    return job_registry.submit(RECONCILE_JOB_KIND, organization_id, work)
+
+
+def get_reconciliation(session: Session, token_value: str, job_id: str) -> Job:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    job = job_registry.get(context.membership.organization_id, job_id)
+    if job is None or job.kind != RECONCILE_JOB_KIND:
+        raise DomainError("Reconciliation not found", status_code=404)
+    return job
+
+
+def find_late(session: Session, organization_id: str, now: datetime) -> list[Timesheet]:
+    """Planned sheets started more than ``LATE_AFTER`` ago with no "in" punch yet.
+
+    The range scan on ``(organization_id, planned_start)`` is bounded by
+    ``LATE_HORIZON``, so the cost follows the shifts of the last hours, not
+    the size of the table. Punches still waiting for reconciliation count
+    as an arrival. Newly found sheets get ``late_detected_at`` stamped once.
+    """
+
+    sheets = list(
+        session.scalars(
+            select(Timesheet)
+            .where(Timesheet.organization_id == organization_id)
+            .where(Timesheet.planned_start > now - LATE_HORIZON)
+            .where(Timesheet.planned_start <= now - LATE_AFTER)
+            .where(Timesheet.status == PLANNED)
+            .where(Timesheet.actual_start.is_(None))
+            .order_by(Timesheet.planned_start)
+        )
+    )
+    if not sheets:
+        return []
+    arrived: dict[str, list[datetime]] = {}
+    for user_id, punched_at in session.execute(
+        select(TimePunch.user_id, TimePunch.punched_at)
+        .where(TimePunch.organization_id == organization_id)
+        .where(TimePunch.reconciled_at.is_(None))
+        .where(TimePunch.kind == PUNCH_IN)
+        .where(TimePunch.user_id.in_({sheet.user_id for sheet in sheets}))
+        .where(TimePunch.punched_at >= now - LATE_HORIZON - EARLY_IN)
+    ):
+        arrived.setdefault(user_id, []).append(punched_at)
+
+    late = [
+        sheet
+        for sheet in sheets
+        if not any(
+            sheet.planned_start - EARLY_IN <= moment < sheet.planned_end for moment in arrived.get(sheet.user_id, ())
+        )
+    ]
+    fresh = False
+    for sheet in late:
+        if sheet.late_detected_at is None:
+            sheet.late_detected_at = now
+            fresh = True
+    if fresh:
+        session.commit()
+    return late
+
+
+def list_late(session: Session, token_value: str, buffer: PunchBuffer) -> list[Timesheet]:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    flush_punches(session, buffer)
+    return find_late(session, context.membership.organization_id, now_utc())
@@ -0,0 +1,584 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Assignment, PayrollClose, ScheduledMission, Timesheet, TimesheetPolicy, TimesheetRun
+from ..rbac import Permission
+from ..schemas import TimesheetPolicyUpdate
+from ..security import now_utc
+from .access import ensure_permission, organization_zone, resolve_context
+from .exceptions import DomainError
+from .oplog import ASSIGNMENT, MAX_READ_LIMIT, read_operations
+from .planning import ensure_member
+from .planning_cache import log_version
+from .recurrence import load_series, load_series_crews, occurrence_key, shift_into
+
+MINUTES_PER_DAY = 24 * 60
+UPSERT_CHUNK = 1000
+MAX_PERIOD_DAYS = 366
+PLANNED = "planned"
+VALIDATED = "validated"
+MAX_DEVIATION = timedelta(minutes=15)
+
+# Log entries that change planned hours without row-level detail: regenerate the whole period.
+FULL_REBUILD_KINDS = frozenset({"mission.recurrence", "mission.occurrence", "template.delete", "project.delete"})
+
+# 1970-01-01 was a Thursday: weekday of an epoch day is ``(day + 3) % 7``.
+_EPOCH_WEEKDAY = 3
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+@dataclass(frozen=True)
+class PolicyRules:
+    """A timesheet policy compiled to the integers and arrays the vectorised pass needs."""
+
+    break_after: int
+    break_minutes: int
+    night_start: int
+    night_end: int
+    weekend_days: np.ndarray
+    holiday_days: np.ndarray
+    timezone: str = "UTC"
+
+    @classmethod
+    def compile(cls, policy: TimesheetPolicy, zone: ZoneInfo | None = None) -> PolicyRules:
+        holidays = sorted(date.fromisoformat(value) for value in policy.holidays or ())
+        return cls(
+            break_after=policy.break_after_minutes,
+            break_minutes=policy.break_minutes,
+            night_start=_minute_of_day(policy.night_start),
+            night_end=_minute_of_day(policy.night_end),
+            weekend_days=np.array(sorted(set(policy.weekend_days or ())), dtype=np.int64),
+            holiday_days=np.array(holidays, dtype="datetime64[D]").astype(np.int64),
+            timezone=zone.key if zone is not None else "UTC",
+        )
+
+    @property
+    def digest(self) -> str:
+        """Fingerprint stored with each run; a different policy forces a full regeneration."""
+
+        payload = [
+            self.break_after,
+            self.break_minutes,
+            self.night_start,
+            self.night_end,
+            self.weekend_days.tolist(),
+            self.holiday_days.tolist(),
+            self.timezone,
+        ]
+        return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+    def as_dict(self) -> dict:
+        """JSON form, frozen into a payroll close."""
+
+        return {
+            "break_after": self.break_after,
+            "break_minutes": self.break_minutes,
+            "night_start": self.night_start,
+            "night_end": self.night_end,
+            "weekend_days": self.weekend_days.tolist(),
+            "holiday_days": self.holiday_days.tolist(),
+            "timezone": self.timezone,
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict) -> PolicyRules:
+        return cls(
+            **{
+                **values,
+                "weekend_days": np.array(values["weekend_days"], dtype=np.int64),
+                "holiday_days": np.array(values["holiday_days"], dtype=np.int64),
+            }
+        )
+
+
+@dataclass(frozen=True)
+class PlannedHours:
+    """Column arrays aligned with the input spans."""
+
+    work_day: np.ndarray
+    break_minutes: np.ndarray
+    planned_minutes: np.ndarray
+    night_minutes: np.ndarray
+    weekend: np.ndarray
+    holiday: np.ndarray
+
+
+def _night_before(moments: np.ndarray, night_start: int, night_end: int) -> np.ndarray:
+    """Night minutes elapsed between the epoch and each moment (a cumulative step function)."""
+
+    days, minute = np.divmod(moments, MINUTES_PER_DAY)
+    if night_start > night_end:  # window wraps midnight, e.g. 22:00-06:00
+        per_day = night_end + MINUTES_PER_DAY - night_start
+        within = np.minimum(minute, night_end) + np.maximum(minute - night_start, 0)
+    else:
+        per_day = night_end - night_start
+        within = np.clip(minute - night_start, 0, per_day)
+    return days * per_day + within
+
+
+def local_minutes(moments: np.ndarray, zone: str) -> np.ndarray:
+    """UTC epoch minutes shifted to the wall clock of ``zone``.
+
+    The offset is looked up once per distinct moment; shifts start at a few
+    dozen distinct times a day, so this stays small next to the row count.
+    """
+
+    moments = np.asarray(moments, dtype=np.int64)
+    if zone == "UTC" or not len(moments):
+        return moments
+    tz = ZoneInfo(zone)
+    distinct, inverse = np.unique(moments, return_inverse=True)
+    offsets = np.array(
+        [
+            datetime.fromtimestamp(int(moment) * 60, timezone.utc).astimezone(tz).utcoffset() // timedelta(minutes=1)
+            for moment in distinct
+        ],
+        dtype=np.int64,
+    )
+    return moments + offsets[inverse]
+
+
+def compute_planned(starts: np.ndarray, ends: np.ndarray, rules: PolicyRules) -> PlannedHours:
+    """Apply break, night and calendar rules to spans given as UTC epoch minutes, all rows at once.
+
+    Paid minutes are elapsed time; the night window, the work day and its
+    weekend/holiday flags are read on the organisation's wall clock. Night
+    minutes are the difference of a cumulative function evaluated at both
+    ends, so spans covering several nights need no loop. They are capped at
+    the paid minutes since the break is taken out of the span.
+    """
+
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    duration = np.maximum(ends - starts, 0)
+    breaks = np.where(duration > rules.break_after, rules.break_minutes, 0)
+    breaks = np.minimum(breaks, duration)
+    planned = duration - breaks
+    local_starts = local_minutes(starts, rules.timezone)
+    if rules.night_start == rules.night_end:
+        night = np.zeros_like(planned)
+    else:
+        night = _night_before(local_minutes(ends, rules.timezone), rules.night_start, rules.night_end) - _night_before(
+            local_starts, rules.night_start, rules.night_end
+        )
+    work_day = local_starts // MINUTES_PER_DAY
+    return PlannedHours(
+        work_day=work_day,
+        break_minutes=breaks,
+        planned_minutes=planned,
+        night_minutes=np.minimum(night, planned),
+        weekend=np.isin((work_day + _EPOCH_WEEKDAY) % 7, rules.weekend_days),
+        holiday=np.isin(work_day, rules.holiday_days),
+    )
+
+
+def epoch_minutes(values: Sequence[datetime]) -> np.ndarray:
+    return np.array(values, dtype="datetime64[m]").astype(np.int64)
+
+
+def load_policy(session: Session, organization_id: str) -> TimesheetPolicy:
+    """Stored policy of the organisation, or an unsaved one holding the defaults."""
+
+    policy = session.get(TimesheetPolicy, organization_id)
+    if policy is None:
+        policy = TimesheetPolicy(
+            organization_id=organization_id,
+            break_after_minutes=360,
+            break_minutes=20,
+            night_start=time(22, 0),
+            night_end=time(6, 0),
+            weekend_days=[5, 6],
+            holidays=[],
+        )
+    return policy
+
+
+def load_rules(session: Session, organization_id: str) -> PolicyRules:
+    """The organisation's policy compiled with its time zone."""
+
+    return PolicyRules.compile(load_policy(session, organization_id), organization_zone(session, organization_id))
+
+
+def local_midnight(day: date, zone: ZoneInfo) -> datetime:
+    """Naive UTC instant at which ``day`` starts on the wall clock of ``zone``."""
+
+    return datetime.combine(day, time.min, zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def get_policy(session: Session, token_value: str) -> TimesheetPolicy:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_TIMESHEETS)
+    return load_policy(session, context.membership.organization_id)
+
+
+def update_policy(session: Session, token_value: str, payload: TimesheetPolicyUpdate) -> TimesheetPolicy:
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    policy = load_policy(session, context.membership.organization_id)
+    data = payload.model_dump(exclude_unset=True)
+    for field in ["break_after_minutes", "break_minutes", "night_start", "night_end"]:
+        if field in data:
+            setattr(policy, field, data[field])
+    if "weekend_days" in data:
+        if any(not 0 <= day <= 6 for day in data["weekend_days"]):
+            raise DomainError("Weekend days must be between 0 (Monday) and 6 (Sunday)", status_code=422)
+        policy.weekend_days = sorted(set(data["weekend_days"]))
+    if "holidays" in data:
+        policy.holidays = sorted({day.isoformat() for day in data["holidays"]})
+    session.add(policy)
+    session.commit()
+    session.refresh(policy)
+    return policy
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedEntry:
+    entry_key: str
+    assignment_id: str
+    mission_id: str
+    project_id: str | None
+    user_id: str
+    starts_at: datetime
+    ends_at: datetime
+
+
+def load_entries(
+    session: Session,
+    organization_id: str,
+    window_start: datetime,
+    window_end: datetime,
+    mission_ids: Collection[str] | None = None,
+) -> list[PlannedEntry]:
+    """Assignment spans starting in the window, occurrences of recurring missions included."""
+
+    query = (
+        select(
+            Assignment.id,
+            Assignment.mission_id,
+            ScheduledMission.project_id,
+            Assignment.user_id,
+            Assignment.starts_at,
+            Assignment.ends_at,
+        )
+        .join(ScheduledMission, ScheduledMission.id == Assignment.mission_id)
+        .where(Assignment.organization_id == organization_id)
+        .where(Assignment.starts_at >= window_start)
+        .where(Assignment.starts_at < window_end)
+    )
+    if mission_ids is not None:
+        query = query.where(Assignment.mission_id.in_(list(mission_ids)))
+    entries = [
+        PlannedEntry(assignment_id, assignment_id, mission_id, project_id, user_id, starts_at, ends_at)
+        for assignment_id, mission_id, project_id, user_id, starts_at, ends_at in session.execute(query)
+    ]
+
+    series = load_series(session, organization_id, window_start, window_end, mission_ids=mission_ids)
+    if not series:
+        return entries
+    projects = dict(
+        session.execute(
+            select(ScheduledMission.id, ScheduledMission.project_id).where(
+                ScheduledMission.id.in_([item.mission_id for item in series])
+            )
+        ).all()
+    )
+    crews = load_series_crews(session, [item.mission_id for item in series])
+    for item in series:
+        crew = crews.get(item.mission_id, [])
+        if not crew:
+            continue
+        for occurrence in item.expand(window_start - item.duration, window_end):
+            for assignment_id, user_id, starts_at, ends_at in crew:
+                start, end = shift_into(occurrence, item, starts_at, ends_at)
+                if not window_start <= start < window_end or start >= end:
+                    continue
+                entries.append(
+                    PlannedEntry(
+                        occurrence_key(assignment_id, occurrence.original_start),
+                        assignment_id,
+                        item.mission_id,
+                        projects.get(item.mission_id),
+                        user_id,
+                        start,
+                        end,
+                    )
+                )
+    return entries
+
+
+def _dirty_missions(session: Session, organization_id: str, after: int) -> set[str] | None:
+    """Missions touched by log entries after ``after``; ``None`` when the whole period must be rebuilt."""
+
+    dirty: set[str] = set()
+    while True:
+        try:
+            operations = read_operations(session, organization_id, after, MAX_READ_LIMIT)
+        except DomainError:
+            return None
+        if not operations:
+            return dirty
+        for operation in operations:
+            if operation.kind in FULL_REBUILD_KINDS:
+                return None
+            for change in operation.changes:
+                if change["entity"] != ASSIGNMENT:
+                    dirty.add(change["id"])
+                    continue
+                for state in (change["before"], change["after"]):
+                    if state is not None:
+                        dirty.add(state["mission_id"])
+        after = operations[-1].sequence
+
+
+def _upsert(session: Session, organization_id: str, entries: list[PlannedEntry], hours: PlannedHours) -> int:
+    """Write planned columns in chunks, one transaction each; validated sheets are left untouched."""
+
+    now = now_utc()
+    work_dates = hours.work_day.astype("datetime64[D]").astype(object)
+    written = 0
+    for offset in range(0, len(entries), UPSERT_CHUNK):
+        chunk = range(offset, min(offset + UPSERT_CHUNK, len(entries)))
+        existing = {
+            key: (timesheet_id, status)
+            for timesheet_id, key, status in session.execute(
+                select(Timesheet.id, Timesheet.entry_key, Timesheet.status)
+                .where(Timesheet.organization_id == organization_id)
+                .where(Timesheet.entry_key.in_([entries[index].entry_key for index in chunk]))
+            )
+        }
+        inserts, updates = [], []
+        for index in chunk:
+            entry = entries[index]
+            values = {
+                "assignment_id": entry.assignment_id,
+                "mission_id": entry.mission_id,
+                "project_id": entry.project_id,
+                "user_id": entry.user_id,
+                "work_date": work_dates[index],
+                "planned_start": entry.starts_at,
+                "planned_end": entry.ends_at,
+                "break_minutes": int(hours.break_minutes[index]),
+                "planned_minutes": int(hours.planned_minutes[index]),
+                "night_minutes": int(hours.night_minutes[index]),
+                "weekend": bool(hours.weekend[index]),
+                "holiday": bool(hours.holiday[index]),
+                "generated_at": now,
+                "updated_at": now,
+            }
+            current = existing.get(entry.entry_key)
+            if current is None:
+                inserts.append(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "organization_id": organization_id,
+                        "entry_key": entry.entry_key,
+                        "status": PLANNED,
+                        **values,
+                    }
+                )
+            elif current[1] == PLANNED:
+                updates.append({"id": current[0], **values})
+        if inserts:
+            session.execute(insert(Timesheet), inserts)
+        if updates:
+            session.execute(update(Timesheet), updates)
+        session.commit()
+        written += len(inserts) + len(updates)
+    return written
+
+
+def _remove_stale(
+    session: Session,
+    organization_id: str,
+    period_start: date,
+    period_end: date,
+    kept: set[str],
+    mission_ids: Collection[str] | None,
+) -> int:
+    """Delete planned sheets of the regenerated scope whose assignment occurrence is gone."""
+
+    query = (
+        select(Timesheet.id, Timesheet.entry_key)
+        .where(Timesheet.organization_id == organization_id)
+        .where(Timesheet.status == PLANNED)
+        .where(Timesheet.work_date >= period_start)
+        .where(Timesheet.work_date < period_end)
+    )
+    if mission_ids is not None:
+        query = query.where(
+            or_(Timesheet.mission_id.in_(list(mission_ids)), Timesheet.assignment_id.is_(None))
+        )
+    stale = [timesheet_id for timesheet_id, key in session.execute(query) if key not in kept]
+    for offset in range(0, len(stale), UPSERT_CHUNK):
+        session.execute(delete(Timesheet).where(Timesheet.id.in_(stale[offset : offset + UPSERT_CHUNK])))
+        session.commit()
+    return len(stale)
+
+
+def generate_timesheets(
+    session: Session, token_value: str, period_start: date, period_end: date, *, full: bool = False
+) -> TimesheetRun:
+    """Derive planned timesheets of the period from assignments (WF-03 step 1).
+
+    The first run of a period, a policy change or a log entry without row
+    detail regenerate everything; later runs only revisit the missions the
+    planning log reports as changed since the previous run's sequence. Both
+    paths converge on the same rows, so running twice changes nothing.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    if period_end <= period_start:
+        raise DomainError("Period end must be after its start", status_code=422)
+    if (period_end - period_start).days > MAX_PERIOD_DAYS:
+        raise DomainError(f"Period cannot exceed {MAX_PERIOD_DAYS} days", status_code=422)
+
+    organization_id = context.membership.organization_id
+    zone = organization_zone(session, organization_id)
+    rules = PolicyRules.compile(load_policy(session, organization_id), zone)
+    head = log_version(session, organization_id)
+    run = session.scalar(
+        select(TimesheetRun)
+        .where(TimesheetRun.organization_id == organization_id)
+        .where(TimesheetRun.period_start == period_start)
+        .where(TimesheetRun.period_end == period_end)
+    )
+    mission_ids: set[str] | None = None
+    if run is not None and not full and run.policy_digest == rules.digest:
+        mission_ids = _dirty_missions(session, organization_id, run.sequence)
+
+    window_start, window_end = local_midnight(period_start, zone), local_midnight(period_end, zone)
+    if mission_ids is not None and not mission_ids:
+        entries: list[PlannedEntry] = []
+    else:
+        entries = load_entries(session, organization_id, window_start, window_end, mission_ids)
+    hours = compute_planned(
+        epoch_minutes([entry.starts_at for entry in entries]),
+        epoch_minutes([entry.ends_at for entry in entries]),
+        rules,
+    )
+    generated = _upsert(session, organization_id, entries, hours)
+    removed = (
+        _remove_stale(
+            session, organization_id, period_start, period_end, {entry.entry_key for entry in entries}, mission_ids
+        )
+        if mission_ids is None or mission_ids
+        else 0
+    )
+
+    if run is None:
+        run = TimesheetRun(organization_id=organization_id, period_start=period_start, period_end=period_end)
+        session.add(run)
+    run.sequence = head
+    run.policy_digest = rules.digest
+    run.mode = "full" if mission_ids is None else "incremental"
+    run.generated = generated
+    run.removed = removed
+    run.finished_at = now_utc()
+    session.commit()
+    session.refresh(run)
+    return run
+
+
+def list_timesheets(
+    session: Session, token_value: str, start: date, end: date, user_id: str | None = None
+) -> list[Timesheet]:
+    """Sheets of the period; members without timesheet management only see their own."""
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.VIEW_TIMESHEETS)
+    if end <= start:
+        raise DomainError("Period end must be after its start", status_code=422)
+    organization_id = context.membership.organization_id
+    if user_id is None or user_id != context.membership.user_id:
+        try:
+            ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+        except DomainError:
+            user_id = context.membership.user_id
+    if user_id is not None:
+        ensure_member(session, organization_id, user_id)
+
+    query = (
+        select(Timesheet)
+        .where(Timesheet.organization_id == organization_id)
+        .where(Timesheet.work_date >= start)
+        .where(Timesheet.work_date < end)
+        .order_by(Timesheet.planned_start, Timesheet.user_id)
+    )
+    if user_id is not None:
+        query = query.where(Timesheet.user_id == user_id)
+    return list(session.scalars(query))
+
+
+def frozen_months(session: Session, organization_id: str, days: Collection[date]) -> set[date]:
+    """First days of the months among ``days`` whose payroll close has started."""
+
+    months = {day.replace(day=1) for day in days}
+    if not months:
+        return set()
+    return set(
+        session.scalars(
+            select(PayrollClose.period_start)
+            .where(PayrollClose.organization_id == organization_id)
+            .where(PayrollClose.period_start.in_(months))
+        )
+    )
+
+
+def validate_timesheets(
+    session: Session, token_value: str, timesheet_ids: Sequence[str], justification: str | None = None
+) -> list[Timesheet]:
+    """Lock sheets for payroll (WF-03 step 3).
+
+    A sheet whose clocked start or end deviates from the plan by more than
+    15 minutes needs a justification, which is stored with it.
+    """
+
+    context = resolve_context(session, token_value)
+    ensure_permission(context, Permission.MANAGE_TIMESHEETS)
+    timesheets = list(
+        session.scalars(
+            select(Timesheet)
+            .where(Timesheet.organization_id == context.membership.organization_id)
+            .where(Timesheet.id.in_(list(timesheet_ids)))
+        )
+    )
+    if len(timesheets) != len(set(timesheet_ids)):
+        raise DomainError("Timesheet not found", status_code=404)
+    if frozen_months(session, context.membership.organization_id, {sheet.work_date for sheet in timesheets}):
+        raise DomainError("Payroll period is closed", status_code=409)
+    justification = (justification or "").strip() or None
+    for timesheet in timesheets:
+        deviations = [
+            abs(actual - planned)
+            for actual, planned in (
+                (timesheet.actual_start, timesheet.planned_start),
+                (timesheet.actual_end, timesheet.planned_end),
+            )
+            if actual is not None
+        ]
+        if justification is None and any(deviation > MAX_DEVIATION for deviation in deviations):
+            raise DomainError("A justification is required for deviations over 15 minutes", status_code=422)
+    now = now_utc()
+    for timesheet in timesheets:
+        if timesheet.status == VALIDATED:
+            continue
+        timesheet.status = VALIDATED
+        timesheet.validated_at = now
+        timesheet.justification = justification
+    session.commit()
+    return sorted(timesheets, key=lambda timesheet: timesheet.planned_start)
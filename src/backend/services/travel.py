@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import math
+from array import array
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Organization, Venue, VenueTravelMatrix
+
+AVERAGE_SPEED_KMH = 60.0
+ROAD_DETOUR_FACTOR = 1.3
+EARTH_RADIUS_KM = 6371.0
+MAX_MINUTES = 0xFFFF
+
+Coordinates = tuple[float | None, float | None]
+
+
+def estimate_minutes(origin: Coordinates, destination: Coordinates) -> int:
+    """Straight-line travel estimate in minutes, inflated by a road detour factor.
+
+    Venues without coordinates cost nothing: the matrix cannot block what it
+    cannot locate.
+    """
+
+    lat1, lon1 = origin
+    lat2, lon2 = destination
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return 0
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    haversine = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    distance_km = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(haversine))
+    minutes = math.ceil(distance_km * ROAD_DETOUR_FACTOR / AVERAGE_SPEED_KMH * 60)
+    return min(minutes, MAX_MINUTES)
+
+
+class TravelMatrix:
+    """Square matrix of travel minutes between the venues of one organisation.
+
+    Stored row-major as unsigned 16-bit minutes so a lookup is two dict hits
+    and one array index.
+    """
+
+    __slots__ = ("venue_ids", "_positions", "_minutes")
+
+    def __init__(self, venue_ids: list[str] | None = None, minutes: array | None = None) -> None:
+        self.venue_ids: list[str] = list(venue_ids or [])
+        self._positions = {venue_id: position for position, venue_id in enumerate(self.venue_ids)}
+        size = len(self.venue_ids)
+        self._minutes = minutes if minutes is not None else array("H", bytes(2 * size * size))
+        if len(self._minutes) != size * size:
+            raise ValueError("Travel matrix payload does not match its venue list")
+
+    def __len__(self) -> int:
+        return len(self.venue_ids)
+
+    def __contains__(self, venue_id: object) -> bool:
+        return venue_id in self._positions
+
+    def minutes_between(self, origin: str | None, destination: str | None) -> int:
+        if origin is None or destination is None or origin == destination:
+            return 0
+        row = self._positions.get(origin)
+        column = self._positions.get(destination)
+        if row is None or column is None:
+            return 0
+        return self._minutes[row * len(self.venue_ids) + column]
+
+    def upsert(self, venue_id: str, minutes_to: dict[str, int]) -> None:
+        """Set the row and column of ``venue_id`` (appending it when new) in O(n)."""
+
+        if venue_id not in self._positions:
+            size = len(self.venue_ids)
+            grown = array("H", bytes(2 * (size + 1) * (size + 1)))
+            for row in range(size):
+                grown[row * (size + 1) : row * (size + 1) + size] = self._minutes[row * size : (row + 1) * size]
+            self._minutes = grown
+            self._positions[venue_id] = size
+            self.venue_ids.append(venue_id)
+
+        size = len(self.venue_ids)
+        position = self._positions[venue_id]
+        for other_id, other_position in self._positions.items():
+            value = 0 if other_id == venue_id else min(minutes_to.get(other_id, 0), MAX_MINUTES)
+            self._minutes[position * size + other_position] = value
+            self._minutes[other_position * size + position] = value
+
+    def remove(self, venue_id: str) -> None:
+        position = self._positions.get(venue_id)
+        if position is None:
+            return
+        size = len(self.venue_ids)
+        kept = [index for index in range(size) if index != position]
+        shrunk = array("H")
+        for row in kept:
+            base = row * size
+            shrunk.extend(self._minutes[base + column] for column in kept)
+        self._minutes = shrunk
+        self.venue_ids.pop(position)
+        self._positions = {other: index for index, other in enumerate(self.venue_ids)}
+
+    def to_bytes(self) -> bytes:
+        return self._minutes.tobytes()
+
+    @classmethod
+    def from_bytes(cls, venue_ids: list[str], payload: bytes) -> "TravelMatrix":
+        minutes = array("H")
+        minutes.frombytes(payload)
+        return cls(venue_ids, minutes)
+
+
+def _venue_coordinates(session: Session, organization_id: str) -> dict[str, Coordinates]:
+    rows = session.execute(
+        select(Venue.id, Venue.latitude, Venue.longitude).where(Venue.organization_id == organization_id)
+    )
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def _get_record(session: Session, organization_id: str) -> VenueTravelMatrix | None:
+    return session.get(VenueTravelMatrix, organization_id)
+
+
+def _locked_record(session: Session, organization_id: str) -> VenueTravelMatrix | None:
+    """Lock the matrix for a read-modify-write; the organisation row guards its first insert."""
+
+    statement = (
+        select(VenueTravelMatrix)
+        .where(VenueTravelMatrix.organization_id == organization_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    record = session.scalar(statement)
+    if record is None:
+        session.scalar(select(Organization.id).where(Organization.id == organization_id).with_for_update())
+        record = session.scalar(statement)
+    return record
+
+
+def load_travel_matrix(session: Session, organization_id: str) -> TravelMatrix | None:
+    record = _get_record(session, organization_id)
+    if record is None:
+        return None
+    return TravelMatrix.from_bytes(record.venue_ids, record.minutes)
+
+
+def _store(session: Session, organization_id: str, record: VenueTravelMatrix | None, matrix: TravelMatrix) -> None:
+    if record is None:
+        record = VenueTravelMatrix(organization_id=organization_id)
+    record.venue_ids = list(matrix.venue_ids)
+    record.minutes = matrix.to_bytes()
+    session.add(record)
+
+
+def rebuild_travel_matrix(session: Session, organization_id: str) -> TravelMatrix:
+    """Recompute the whole matrix from venue coordinates (offline backfill)."""
+
+    coordinates = _venue_coordinates(session, organization_id)
+    matrix = TravelMatrix()
+    for venue_id, origin in coordinates.items():
+        matrix.upsert(
+            venue_id,
+            {other_id: estimate_minutes(origin, destination) for other_id, destination in coordinates.items()},
+        )
+    _store(session, organization_id, _locked_record(session, organization_id), matrix)
+    return matrix
+
+
+def refresh_venue_travel(session: Session, venue: Venue) -> None:
+    """Recompute the row and column of one venue after it was created or moved."""
+
+    record = _locked_record(session, venue.organization_id)
+    if record is None:
+        rebuild_travel_matrix(session, venue.organization_id)
+        return
+    matrix = TravelMatrix.from_bytes(record.venue_ids, record.minutes)
+    origin = (venue.latitude, venue.longitude)
+    coordinates = _venue_coordinates(session, venue.organization_id)
+    matrix.upsert(
+        venue.id,
+        {other_id: estimate_minutes(origin, destination) for other_id, destination in coordinates.items()},
+    )
+    _store(session, venue.organization_id, record, matrix)
+
+
+def forget_venue_travel(session: Session, organization_id: str, venue_id: str) -> None:
+    record = _locked_record(session, organization_id)
+    if record is None:
+        return
+    matrix = TravelMatrix.from_bytes(record.venue_ids, record.minutes)
+    matrix.remove(venue_id)
+    _store(session, organization_id, record, matrix)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import Assignment, ScheduledTrigger
+from ..security import now_utc
+from .access import organization_zone
+from .notifications import notify_assignment_created, notify_assignment_rescheduled
+
+EVE_REMINDER = "reminder.d1"
+DAY_REMINDER = "reminder.d0"
+LATE_PUNCH = "late.punch"
+KINDS = (EVE_REMINDER, DAY_REMINDER, LATE_PUNCH)
+
+PENDING = "pending"
+FIRED = "fired"
+SKIPPED = "skipped"
+EXPIRED = "expired"
+CANCELLED = "cancelled"
+
+EVE_AT = time(18, 0)
+DAY_LEAD = timedelta(hours=2)
+LATE_AFTER = timedelta(minutes=10)  # same threshold as the timeclock's late list
+
+
+def due_times(starts_at: datetime, zone: ZoneInfo) -> dict[str, datetime]:
+    """D-1 at 18:00, D-0 two hours before the start and the late-punch check ten minutes after it.
+
+    The eve is the day before the start on the organisation's wall clock,
+    and 18:00 is read there too; every time returned is naive UTC.
+    """
+
+    local_day = starts_at.replace(tzinfo=timezone.utc).astimezone(zone).date()
+    eve = datetime.combine(local_day - timedelta(days=1), EVE_AT, zone).astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        EVE_REMINDER: eve,
+        DAY_REMINDER: starts_at - DAY_LEAD,
+        LATE_PUNCH: starts_at + LATE_AFTER,
+    }
+
+
+def schedule_assignment(session: Session, assignment: Assignment, manager_id: str | None = None) -> None:
+    """Upsert the assignment's triggers in the caller's transaction.
+
+    A trigger whose time and person are unchanged keeps its state, so moving
+    a shift within its day does not resend the D-1 reminder; one whose time
+    moved, whose assignment went to someone else or came back (undo, redo),
+    is re-armed for the current person. ``manager_id`` is the manager copied on late-punch alerts.
+    """
+
+    existing = {
+        trigger.kind: trigger
+        for trigger in session.scalars(select(ScheduledTrigger).where(ScheduledTrigger.assignment_id == assignment.id))
+    }
+    now = now_utc()
+    zone = organization_zone(session, assignment.organization_id)
+    for kind, due_at in due_times(assignment.starts_at, zone).items():
+        trigger = existing.get(kind)
+        if trigger is None:
+            session.add(
+                ScheduledTrigger(
+                    organization_id=assignment.organization_id,
+                    assignment_id=assignment.id,
+                    kind=kind,
+                    user_id=assignment.user_id,
+                    manager_id=manager_id,
+                    due_at=due_at,
+                    status=PENDING,
+                    touched_at=now,
+                )
+            )
+        elif trigger.due_at != due_at or trigger.user_id != assignment.user_id or trigger.status == CANCELLED:
+            trigger.due_at, trigger.user_id, trigger.status, trigger.touched_at = (
+                due_at,
+                assignment.user_id,
+                PENDING,
+                now,
+            )
+            trigger.fired_at = trigger.event_id = trigger.claim = trigger.claimed_at = None
+
+
+def cancel_assignment(session: Session, assignment_id: str) -> None:
+    session.execute(
+        update(ScheduledTrigger)
+        .where(ScheduledTrigger.assignment_id == assignment_id)
+        .where(ScheduledTrigger.status == PENDING)
+        .values(status=CANCELLED, touched_at=now_utc())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reschedule_organization(session: Session, organization_id: str) -> None:
+    """Move the pending triggers of an organisation to the due times of its current time zone.
+
+    Fired and settled triggers are left alone, so a zone change never
+    resends a reminder.
+    """
+
+    zone = organization_zone(session, organization_id)
+    now = now_utc()
+    for trigger, starts_at in session.execute(
+        select(ScheduledTrigger, Assignment.starts_at)
+        .join(Assignment, Assignment.id == ScheduledTrigger.assignment_id)
+        .where(ScheduledTrigger.organization_id == organization_id)
+        .where(ScheduledTrigger.status == PENDING)
+    ):
+        due_at = due_times(starts_at, zone)[trigger.kind]
+        if due_at != trigger.due_at:
+            trigger.due_at, trigger.touched_at = due_at, now
+            trigger.claim = trigger.claimed_at = None
+
+
+def sync_assignment(
+    session: Session,
+    assignment_id: str,
+    previous: tuple[str, datetime, datetime] | None,
+    actor_id: str | None,
+) -> None:
+    """Run the planning hooks for an assignment written in bulk.
+
+    ``previous`` is the ``(user_id, starts_at, ends_at)`` the row had before
+    the write, ``None`` if it did not exist. A new or reassigned row notifies
+    its person as a creation, a moved one as a reschedule, and a row gone
+    cancels its triggers, exactly like the single-row planning endpoints.
+    """
+
+    assignment = session.get(Assignment, assignment_id)
+    if assignment is None:
+        if previous is not None:
+            cancel_assignment(session, assignment_id)
+        return
+    if previous is None or previous[0] != assignment.user_id:
+        notify_assignment_created(session, assignment, actor_id)
+        schedule_assignment(session, assignment, actor_id)
+    else:
+        notify_assignment_rescheduled(session, assignment, previous[1:], actor_id)
+        schedule_assignment(session, assignment)
+
+
+def backfill_triggers(session: Session, start: datetime, end: datetime) -> int:
+    """Schedule the assignments starting in ``[start, end)`` that have no trigger yet; the number scheduled.
+
+    A safety net for rows written outside the planning hooks. Two processes
+    backfilling the same assignment collide on the unique key, and the loser
+    simply rolls back: the other one already scheduled it.
+    """
+
+    missing = list(
+        session.scalars(
+            select(Assignment)
+            .outerjoin(ScheduledTrigger, ScheduledTrigger.assignment_id == Assignment.id)
+            .where(Assignment.starts_at >= start)
+            .where(Assignment.starts_at < end)
+            .where(ScheduledTrigger.id.is_(None))
+        )
+    )
+    if not missing:
+        session.rollback()
+        return 0
+    for assignment in missing:
+        schedule_assignment(session, assignment)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return 0
+    return len(missing)
@@ -3,11 +3,15 @@ from __future__ import annotations
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..models import Venue
+from ..models import ScheduledMission, Venue
 from ..rbac import Permission
 from ..schemas import VenueCreate, VenueUpdate
 from .access import ensure_permission, resolve_context
 from .exceptions import DomainError
+from .oplog import touch
+from .planning_week import refresh_week_rows_where
+from .planning_cache import conflict_index_cache
+from .travel import forget_venue_travel, refresh_venue_travel
 
 
 def _normalise_name(value: str) -> str:
@@ -46,9 +50,12 @@ def create_venue(session: Session, token_value: str, payload: VenueCreate) -> Ve
         postal_code=payload.postal_code,
         capacity=payload.capacity,
         notes=payload.notes,
+        latitude=payload.latitude,
+        longitude=payload.longitude,
     )
     session.add(venue)
     session.flush()
+    refresh_venue_travel(session, venue)
     session.commit()
     session.refresh(venue)
     return venue
@@ -92,13 +99,25 @@ def update_venue(session: Session, token_value: str, venue_id: str, payload: Ven
         if duplicate:
             raise DomainError("Venue with this name already exists", status_code=409)
         venue.name = name
+        refresh_week_rows_where(session, ScheduledMission.venue_id == venue.id)
 
     for field in ["address", "city", "country", "postal_code", "capacity", "notes"]:
         if field in data:
             setattr(venue, field, data[field])
 
+    moved = False
+    for field in ["latitude", "longitude"]:
+        if field in data and data[field] != getattr(venue, field):
+            setattr(venue, field, data[field])
+            moved = True
+    if moved:
+        refresh_venue_travel(session, venue)
+
     session.add(venue)
+    touch(session, venue.organization_id, "venue.update", actor_id=context.membership.user_id)
     session.commit()
+    if moved:
+        conflict_index_cache.invalidate(venue.organization_id)
     session.refresh(venue)
     return venue
 
@@ -108,5 +127,8 @@ def delete_venue(session: Session, token_value: str, venue_id: str) -> None:
     ensure_permission(context, Permission.MANAGE_VENUES)
 
     venue = _get_venue_for_org(session, context.membership.organization_id, venue_id)
+    forget_venue_travel(session, venue.organization_id, venue.id)
     session.delete(venue)
+    touch(session, venue.organization_id, "venue.delete", actor_id=context.membership.user_id)
     session.commit()
+    conflict_index_cache.invalidate(venue.organization_id)
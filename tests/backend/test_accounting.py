@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import Timesheet
+from backend.rbac import Role
+from backend.services.jobs import job_registry
+
+
+@pytest.fixture()
+def app(tmp_path: Path) -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _close_month(client: TestClient, headers: dict[str, str], people: list[dict[str, str]], month: str) -> None:
+    template = client.post("/api/v1/mission-templates", headers=headers, json={"name": f"Montage {month}", "teamSize": 4})
+    for day in ("03", "08"):
+        mission = client.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={
+                "templateId": template.json()["id"],
+                "startsAt": f"{month}-{day}T14:00:00",
+                "endsAt": f"{month}-{day}T23:30:00",
+            },
+        ).json()
+        for person in people:
+            client.post(
+                f"/api/v1/planning/missions/{mission['id']}/assignments",
+                headers=headers,
+                json={"userId": person["userId"]},
+            )
+    year, number = (int(part) for part in month.split("-"))
+    period_end = f"{year + number // 12}-{number % 12 + 1:02d}-01"
+    client.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": f"{month}-01", "periodEnd": period_end})
+    with session_scope(client.app.state.session_factory) as session:
+        ids = list(session.scalars(select(Timesheet.id).where(Timesheet.status != "validated")))
+    client.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids})
+    started = client.post("/api/v1/payroll/closes", headers=headers, json={"month": f"{month}-01"})
+    assert started.status_code == 202, started.text
+    job_registry.wait(started.json()["jobId"], timeout=30)
+
+
+def test_streamed_exports_balance_and_match_their_record(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    crew = [_invite(app, owner, email=f"tech{index}@example.com", role=Role.MEMBER) for index in range(2)]
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    for index, person in enumerate([owner, *crew]):
+        app.put(f"/api/v1/payroll/rates/{person['userId']}", headers=headers, json={"hourlyRateCents": 1200 + index * 100})
+    _close_month(app, headers, [owner, *crew], "2025-03")
+    _close_month(app, headers, [owner, *crew], "2025-04")
+
+    assert app.get(
+        "/api/v1/accounting/exports/stream/csv", headers={"X-Session-Token": crew[0]["sessionToken"]}, params={"year": 2025}
+    ).status_code == 403
+    chart = app.put(
+        "/api/v1/accounting/chart",
+        headers=headers,
+        json={"journalCode": "PA", "accounts": {"payable": {"number": "421100", "label": "Salaires a payer"}}},
+    )
+    assert chart.status_code == 200, chart.text
+    assert chart.json()["accounts"]["payable"]["number"] == "421100"
+    assert chart.json()["accounts"]["salaries"]["number"] == "641100"
+    assert app.put(
+        "/api/v1/accounting/chart", headers=headers, json={"accounts": {"bonus": {"number": "1", "label": "x"}}}
+    ).status_code == 422
+
+    streamed = app.get("/api/v1/accounting/exports/stream/csv", headers=headers, params={"year": 2025})
+    assert streamed.status_code == 200, streamed.text
+    rows = list(csv.reader(io.StringIO(streamed.content.decode()), delimiter=";"))
+    assert rows[0][-1] == "Solde"
+    cents = lambda text: int(text.replace(",", "").replace("-", "")) * (-1 if text.startswith("-") else 1)  # noqa: E731
+    debit = sum(cents(row[6]) for row in rows[1:])
+    credit = sum(cents(row[7]) for row in rows[1:])
+    assert debit == credit > 0
+    payable = [row for row in rows[1:] if row[3] == "421100"]
+    assert len(payable) == 6 and {row[2] for row in payable} == {"PA-202503", "PA-202504"}
+    assert payable[-1][8] == "-" + f"{credit // 100},{credit % 100:02d}"
+
+    record = app.get(f"/api/v1/accounting/exports/{streamed.headers['X-Export-Id']}", headers=headers).json()
+    assert record["status"] == "ready"
+    assert (record["months"], record["lines"], record["size"]) == (2, len(rows) - 1, len(streamed.content))
+    assert record["sha256"] == hashlib.sha256(streamed.content).hexdigest()
+    assert record["debitCents"] == record["creditCents"] == debit
+    assert record["downloadUrl"] is None
+
+    fec = app.get("/api/v1/accounting/exports/stream/fec", headers=headers, params={"year": 2025})
+    lines = [line.split("|") for line in fec.content.decode().splitlines()]
+    assert lines[0][0] == "JournalCode" and len(lines[0]) == 18
+    assert all(len(line) == 18 for line in lines)
+    assert {line[3] for line in lines[1:]} == {"20250331", "20250430"}
+    assert len({line[2] for line in lines[1:]}) == 6
+    empty = app.get("/api/v1/accounting/exports/stream/fec", headers=headers, params={"year": 2024})
+    assert empty.content.decode().count("\r\n") == 1
+
+    queued = app.post("/api/v1/accounting/exports", headers=headers, json={"format": "fec", "fiscalYear": 2025})
+    assert queued.status_code == 202, queued.text
+    job = job_registry.wait(queued.json()["jobId"], timeout=30)
+    assert job.result == {"bytes": len(fec.content)}
+    stored = app.get(f"/api/v1/accounting/exports/{queued.json()['id']}", headers=headers).json()
+    downloaded = app.get(stored["downloadUrl"], headers=headers)
+    assert downloaded.content == fec.content
+    assert downloaded.headers["etag"] == f'"{stored["sha256"]}"'
+    assert len(app.get("/api/v1/accounting/exports", headers=headers, params={"year": 2025}).json()) == 3
+    assert app.get(
+        f"/api/v1/accounting/exports/{streamed.headers['X-Export-Id']}/file", headers=headers
+    ).status_code == 409
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import AvailabilityDay, User, UserOrganization
+from backend.rbac import Role
+from backend.services.availability import (
+    SLOTS_PER_DAY,
+    AvailabilityMatrix,
+    bitmap_to_intervals,
+    intervals_to_bitmap,
+    load_availability_matrix,
+    pack_day,
+    unpack_days,
+)
+from backend.services.oplog import touch
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _at(day: int, hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(MONDAY, datetime.min.time()) + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def test_interval_bitmap_roundtrip_rounds_inwards() -> None:
+    bits = intervals_to_bitmap(MONDAY, 2, [(_at(0, 8, 10), _at(0, 12, 5)), (_at(0, 22), _at(1, 2))])
+    assert bits.shape == (2, SLOTS_PER_DAY)
+    assert bits[0, 33] and not bits[0, 32]
+    assert bits[0, 47] and not bits[0, 48]
+    assert bitmap_to_intervals(MONDAY, bits) == [
+        (_at(0, 8, 15), _at(0, 12)),
+        (_at(0, 22), _at(1, 2)),
+    ]
+
+    restored = unpack_days([pack_day(row) for row in bits])
+    assert np.array_equal(restored, bits)
+    assert len(pack_day(bits[0])) == 12
+
+
+def test_matrix_range_checks_match_brute_force() -> None:
+    rng = np.random.default_rng(7)
+    bits = rng.random((40, 3 * SLOTS_PER_DAY)) < 0.8
+    bits[0, :] = True
+    matrix = AvailabilityMatrix([f"p{row}" for row in range(40)], MONDAY, bits)
+    for _ in range(50):
+        first = int(rng.integers(0, bits.shape[1] - 8))
+        last = first + int(rng.integers(1, 8))
+        start = _at(0, 0) + timedelta(minutes=15 * first + 5)
+        end = _at(0, 0) + timedelta(minutes=15 * last)
+        expected = bits[:, first:last].all(axis=1)
+        assert np.array_equal(matrix.free_mask(start, end), expected)
+
+    assert "p0" in matrix.free_people(_at(1, 9), _at(1, 17))
+    assert not matrix.free_mask(_at(2, 20), _at(3, 4))[0]
+    coverage = matrix.coverage([(_at(0, 9), _at(0, 10)), (_at(2, 23), _at(3, 1))])
+    assert coverage.shape == (2, 40)
+    assert coverage[1, 0] == pytest.approx(0.5)
+    team = matrix.common_slots(["p1", "p2", "unknown"])
+    assert np.array_equal(team, bits[1] & bits[2])
+
+
+def test_availability_api_submit_read_and_free(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    member = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    other = _invite(app, owner, email="other@example.com", role=Role.MEMBER)
+    member_headers = {"X-Session-Token": member["sessionToken"]}
+
+    submitted = app.put(
+        f"/api/v1/availability/people/{member['userId']}",
+        headers=member_headers,
+        json={
+            "startDay": "2025-03-03",
+            "endDay": "2025-03-04",
+            "intervals": [
+                {"startsAt": "2025-03-03T08:00:00", "endsAt": "2025-03-03T12:00:00"},
+                {"startsAt": "2025-03-03T11:00:00", "endsAt": "2025-03-03T18:07:00"},
+            ],
+        },
+    )
+    assert submitted.status_code == 200, submitted.text
+    assert submitted.json()["intervals"] == [{"startsAt": "2025-03-03T08:00:00", "endsAt": "2025-03-03T18:00:00"}]
+
+    forbidden = app.put(
+        f"/api/v1/availability/people/{other['userId']}",
+        headers=member_headers,
+        json={"startDay": "2025-03-03", "endDay": "2025-03-03", "intervals": []},
+    )
+    assert forbidden.status_code == 403
+    outside = app.put(
+        f"/api/v1/availability/people/{member['userId']}",
+        headers=member_headers,
+        json={
+            "startDay": "2025-03-03",
+            "endDay": "2025-03-03",
+            "intervals": [{"startsAt": "2025-03-04T08:00:00", "endsAt": "2025-03-04T09:00:00"}],
+        },
+    )
+    assert outside.status_code == 422
+
+    owner_headers = {"X-Session-Token": owner["sessionToken"]}
+    free = app.get(
+        "/api/v1/availability/free",
+        headers=owner_headers,
+        params={"start": "2025-03-03T09:00:00", "end": "2025-03-03T10:00:00"},
+    )
+    assert free.json()["userIds"] == [member["userId"]]
+
+    by_owner = app.put(
+        f"/api/v1/availability/people/{other['userId']}",
+        headers=owner_headers,
+        json={
+            "startDay": "2025-03-03",
+            "endDay": "2025-03-03",
+            "intervals": [{"startsAt": "2025-03-03T09:00:00", "endsAt": "2025-03-03T10:00:00"}],
+        },
+    )
+    assert by_owner.status_code == 200
+    free = app.get(
+        "/api/v1/availability/free",
+        headers=owner_headers,
+        params={"start": "2025-03-03T09:00:00", "end": "2025-03-03T10:00:00"},
+    )
+    assert sorted(free.json()["userIds"]) == sorted([member["userId"], other["userId"]])
+
+    # A member joining and a submission made by another worker: this process never invalidated its cache.
+    newcomer = _invite(app, owner, email="new@example.com", role=Role.MEMBER)
+    session = app.app.state.session_factory()
+    try:
+        bits = intervals_to_bitmap(MONDAY, 1, [(_at(0, 8), _at(0, 12))])
+        session.add(
+            AvailabilityDay(
+                organization_id=owner["organizationId"], user_id=newcomer["userId"], day=MONDAY, slots=pack_day(bits[0])
+            )
+        )
+        touch(session, owner["organizationId"], "availability.update")
+        session.commit()
+    finally:
+        session.close()
+    free = app.get(
+        "/api/v1/availability/free",
+        headers=owner_headers,
+        params={"start": "2025-03-03T09:00:00", "end": "2025-03-03T10:00:00"},
+    )
+    assert sorted(free.json()["userIds"]) == sorted([member["userId"], other["userId"], newcomer["userId"]])
+
+    read = app.get(
+        f"/api/v1/availability/people/{member['userId']}",
+        headers=owner_headers,
+        params={"startDay": "2025-03-04", "endDay": "2025-03-05"},
+    )
+    assert read.status_code == 200
+    assert read.json()["intervals"] == []
+
+
+def test_month_of_availability_for_thousand_people_benchmark(app: TestClient) -> None:
+    owner = _register(app, email="bench@example.com", organization_slug="bench")
+    organization_id = owner["organizationId"]
+    rng = np.random.default_rng(11)
+    days = 30
+
+    with session_scope(app.app.state.session_factory) as session:
+        users = [User(email=f"tech{number}@example.com", hashed_password="x") for number in range(999)]
+        session.add_all(users)
+        session.flush()
+        session.add_all(
+            UserOrganization(user_id=user.id, organization_id=organization_id, role=Role.MEMBER) for user in users
+        )
+        grid = rng.random((len(users), days, SLOTS_PER_DAY)) < 0.7
+        session.execute(
+            insert(AvailabilityDay),
+            [
+                {
+                    "organization_id": organization_id,
+                    "user_id": user.id,
+                    "day": MONDAY + timedelta(days=offset),
+                    "slots": pack_day(grid[row, offset]),
+                }
+                for row, user in enumerate(users)
+                for offset in range(days)
+            ],
+        )
+
+    with session_scope(app.app.state.session_factory) as session:
+        started = time.perf_counter()
+        matrix = load_availability_matrix(session, organization_id, MONDAY, MONDAY + timedelta(days=days - 1))
+        load_seconds = time.perf_counter() - started
+    assert matrix.bits.shape == (1000, days * SLOTS_PER_DAY)
+
+    spans = [(_at(day % days, 8), _at(day % days, 12)) for day in range(500)]
+    started = time.perf_counter()
+    coverage = matrix.coverage(spans)
+    free_counts = [int(matrix.free_mask(start, end).sum()) for start, end in spans[:100]]
+    query_seconds = time.perf_counter() - started
+
+    assert coverage.shape == (500, 1000)
+    assert free_counts[0] == int((coverage[0] >= 1.0).sum())
+    assert load_seconds < 2.0
+    assert query_seconds < 0.5
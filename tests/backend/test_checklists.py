@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import io
+import re
+import struct
+import zipfile
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.rbac import Role
+from backend.services import qr
+from backend.services.checklists import QrLabelCache, item_payload, qr_label_cache
+from backend.services.jobs import job_registry
+
+DAY = datetime(2027, 5, 1)
+
+
+@pytest.fixture()
+def app(tmp_path: Path) -> TestClient:
+    qr_label_cache.clear()
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _at(day: int, hour: int) -> str:
+    return (DAY + timedelta(days=day, hours=hour)).isoformat()
+
+
+def _read_back(rows: tuple[str, ...]) -> bytes:
+    """Decode a byte-mode level-M code: format bits, unmasking, de-interleaving and RS check."""
+
+    size = len(rows)
+    version = (size - 17) // 4
+    module = lambda x, y: rows[y][x] == "1"  # noqa: E731
+    positions = [(8, index) for index in range(6)] + [(8, 7), (8, 8), (7, 8)] + [(14 - i, 8) for i in range(9, 15)]
+    bits = sum(module(x, y) << index for index, (x, y) in enumerate(positions)) ^ 0x5412
+    remainder = bits
+    for shift in range(14, 9, -1):
+        if remainder >> shift & 1:
+            remainder ^= 0x537 << (shift - 10)
+    assert remainder == 0, "format bits fail their BCH check"
+    assert bits >> 13 == 0, "error correction level is not M"
+    mask = bits >> 10 & 7
+
+    grid = qr._Grid(version)
+    grid.draw_function_patterns()
+    stream = []
+    right = size - 1
+    while right >= 1:
+        if right == 6:
+            right = 5
+        for vertical in range(size):
+            y = size - 1 - vertical if (right + 1) & 2 == 0 else vertical
+            for x in (right, right - 1):
+                if not grid.reserved[y][x]:
+                    stream.append(module(x, y) ^ qr.MASKS[mask](x, y))
+        right -= 2
+    codewords = [int("".join(map(str, map(int, stream[i : i + 8]))), 2) for i in range(0, len(stream) - 7, 8)]
+
+    blocks, ecc_length = qr.BLOCKS[version], qr.ECC_PER_BLOCK[version]
+    total = qr._raw_modules(version) // 8
+    assert total % blocks == 0, "test decoder only handles equal blocks"
+    data_length = total // blocks - ecc_length
+    data, ecc = codewords[: data_length * blocks], codewords[data_length * blocks : total]
+    payload_codewords = []
+    for block in range(blocks):
+        block_data = data[block::blocks]
+        assert qr._rs_remainder(block_data, qr._rs_divisor(ecc_length)) == ecc[block::blocks]
+        payload_codewords += block_data
+    bitstring = "".join(f"{byte:08b}" for byte in payload_codewords)
+    assert bitstring[:4] == "0100"
+    length = int(bitstring[4:12], 2)
+    return bytes(int(bitstring[12 + 8 * i : 20 + 8 * i], 2) for i in range(length))
+
+
+def test_qr_encoder_reads_back_and_matches_reference_codewords() -> None:
+    # "HELLO WORLD" at 1-M from the standard's worked example.
+    data = [32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236, 17, 236, 17]
+    assert qr._rs_remainder(data, qr._rs_divisor(10)) == [196, 35, 39, 119, 235, 215, 231, 226, 93, 23]
+
+    payload = item_payload("0b6f7c1e-2d4a-4f7e-9a51-3c8d2e6f1a90")
+    rows = qr.encode_qr(payload)
+    assert len(rows) == 33  # 50 bytes need version 4 at level M
+    assert rows[0][:7] == rows[6][:7] == "1111111" and rows[2][:7] == "1011101"
+    assert _read_back(rows) == payload.encode()
+    assert _read_back(qr.encode_qr("x")) == b"x" and len(qr.encode_qr("x")) == 21
+    with pytest.raises(ValueError):
+        qr.encode_qr("x" * 300)
+
+    png = qr.qr_png(rows, scale=2)
+    width, height, depth = struct.unpack(">IIB", png[16:25])
+    assert png.startswith(b"\x89PNG") and width == height == (33 + 8) * 2 and depth == 1
+    idat = png.index(b"IDAT")
+    pixels = zlib.decompress(png[idat + 4 : idat + 4 + struct.unpack(">I", png[idat - 4 : idat])[0]])
+    stride = 1 + (width + 7) // 8
+    first_dark = pixels[stride * 8 : stride * 9]  # first finder row after the 4-module quiet zone
+    assert first_dark[1] == 0xFF and first_dark[2] == 0x00
+
+
+def _pdf_text(pdf: bytes) -> bytes:
+    return b"".join(zlib.decompress(stream) for stream in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S))
+
+
+def test_mission_checklists_bundle_pdf_and_deduplicated_labels(app: TestClient, tmp_path: Path) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    member = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    items = [
+        app.post(
+            "/api/v1/equipment/items",
+            headers=headers,
+            json={"name": f"Micro HF {number}", "category": "hf", "serialNumber": f"HF-{number}"},
+        ).json()
+        for number in range(4)
+    ]
+    kit = app.post(
+        "/api/v1/equipment/kits", headers=headers, json={"name": "Kit HF", "itemIds": [item["id"] for item in items[:3]]}
+    ).json()
+    venue = app.post("/api/v1/venues/", headers=headers, json={"name": "Zenith"}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 2}).json()
+    missions = [
+        app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "venueId": venue["id"], "startsAt": _at(day, 14), "endsAt": _at(day, 23)},
+        ).json()
+        for day in range(2)
+    ]
+    for mission in missions:
+        booked = app.post("/api/v1/equipment/reservations", headers=headers, json={"kitId": kit["id"], "missionId": mission["id"]})
+        assert booked.status_code == 201, booked.text
+    extra = app.post(
+        "/api/v1/equipment/reservations", headers=headers, json={"itemIds": [items[3]["id"]], "missionId": missions[1]["id"]}
+    )
+    assert extra.status_code == 201, extra.text
+
+    assert app.post(
+        "/api/v1/equipment/checklists", headers={"X-Session-Token": member["sessionToken"]}, json={"missionIds": []}
+    ).status_code == 403
+    assert app.post("/api/v1/equipment/checklists", headers=headers, json={}).status_code == 422
+
+    started = app.post("/api/v1/equipment/checklists", headers=headers, json={"start": _at(0, 0), "end": _at(3, 0)})
+    assert started.status_code == 202, started.text
+    job_registry.wait(started.json()["jobId"], timeout=60)
+    batch = app.get(f"/api/v1/equipment/checklists/{started.json()['jobId']}", headers=headers).json()
+    assert batch["status"] == "succeeded", batch
+    # Seven checklist lines, but the kit's items are shared: four distinct labels, each encoded once.
+    assert (batch["missions"], batch["items"], batch["labels"], batch["encoded"]) == (2, 7, 4, 4)
+    assert [bundle["missionId"] for bundle in batch["bundles"]] == [mission["id"] for mission in missions]
+    assert len(list((tmp_path / "qr").rglob("*.txt"))) == 4
+
+    download = app.get(batch["bundles"][1]["url"], headers={"X-Session-Token": member["sessionToken"]})
+    assert download.status_code == 200 and download.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(download.content)) as archive:
+        names = archive.namelist()
+        pdf = archive.read(names[0])
+        assert names[0].endswith(".pdf") and sorted(names[1:]) == [f"qr/hf-{n}-{items[n]['id'][:8]}.png" for n in range(4)]
+        assert archive.read(names[1]).startswith(b"\x89PNG")
+    content = _pdf_text(pdf)
+    assert b"Liste de chargement" in content and b"Micro HF 3" in content and b"Kit HF" in content
+    assert content.count(b" re f") > 4 * 100  # four drawn codes of dark module runs
+
+    # Labels now come from the cache: the single-mission bundle encodes nothing.
+    qr_label_cache.clear()
+    hits = QrLabelCache.path(str(tmp_path), next(iter((tmp_path / "qr").rglob("*.txt"))).stem)
+    assert hits.exists()
+    single = app.get(f"/api/v1/equipment/missions/{missions[0]['id']}/checklist", headers=headers)
+    assert single.status_code == 200, single.text
+    assert single.headers["content-disposition"].startswith('attachment; filename="chargement-2027-05-01-concert-')
+    with zipfile.ZipFile(io.BytesIO(single.content)) as archive:
+        assert len(archive.namelist()) == 4 and archive.testzip() is None
+    assert (qr_label_cache.hits, qr_label_cache.misses) == (3, 0)
+
+    again = app.post("/api/v1/equipment/checklists", headers=headers, json={"missionIds": [missions[1]["id"]]})
+    job_registry.wait(again.json()["jobId"], timeout=60)
+    assert app.get(f"/api/v1/equipment/checklists/{again.json()['jobId']}", headers=headers).json()["encoded"] == 0
+    assert app.get("/api/v1/equipment/missions/unknown/checklist", headers=headers).status_code == 404
+    assert app.get(f"/api/v1/equipment/checklists/{again.json()['jobId']}/missions/unknown", headers=headers).status_code == 409
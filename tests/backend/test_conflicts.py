@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from backend.services.conflicts import ConflictEngine, Interval, IntervalIndex
+from backend.services.planning_cache import ConflictIndexCache, weeks_touched
+
+WEEK_START = datetime(2025, 3, 3)
+
+
+def _interval(key: str, start_hour: float, end_hour: float, *, person: str | None = "p1", venue: str | None = None) -> Interval:
+    return Interval(
+        key=key,
+        start=WEEK_START + timedelta(hours=start_hour),
+        end=WEEK_START + timedelta(hours=end_hour),
+        mission_id=f"m-{key}",
+        person_id=person,
+        venue_id=venue,
+    )
+
+
+def _brute_force_pairs(intervals: list[Interval]) -> set[tuple[str, str]]:
+    pairs: set[tuple[str, str]] = set()
+    for index, left in enumerate(intervals):
+        for right in intervals[index + 1 :]:
+            if left.person_id == right.person_id and left.start < right.end and right.start < left.end:
+                pairs.add(tuple(sorted((left.key, right.key))))
+    return pairs
+
+
+def test_interval_index_overlap_queries() -> None:
+    index = IntervalIndex()
+    wide = _interval("b", 0, 30)
+    index.add(_interval("a", 8, 12))
+    index.add(wide)
+    index.add(_interval("c", 13, 14))
+    index.add(_interval("d", 12, 13))
+
+    assert {item.key for item in index.overlapping(WEEK_START + timedelta(hours=11), WEEK_START + timedelta(hours=12))} == {"a", "b"}
+    assert {item.key for item in index.overlapping(WEEK_START + timedelta(hours=14), WEEK_START + timedelta(hours=15))} == {"b"}
+    assert {item.key for item in index.overlapping(WEEK_START + timedelta(hours=12), WEEK_START + timedelta(hours=13), exclude="d")} == {"b"}
+
+    assert index.remove(wide) is True
+    assert index.remove(_interval("missing", 8, 12)) is False
+    assert index.overlapping(WEEK_START + timedelta(hours=14), WEEK_START + timedelta(hours=15)) == []
+    assert len(index) == 3
+
+
+def test_engine_audit_matches_brute_force() -> None:
+    rng = random.Random(7)
+    intervals = []
+    for number in range(400):
+        start = rng.uniform(0, 160)
+        intervals.append(_interval(f"a{number}", start, start + rng.uniform(0.5, 6), person=f"p{number % 20}"))
+
+    engine = ConflictEngine.from_intervals(intervals)
+    audited = {(conflict.first_key, conflict.second_key) for conflict in engine.audit()}
+    assert audited == _brute_force_pairs(intervals)
+
+    for probe in intervals[:50]:
+        expected = {pair for pair in audited if probe.key in pair}
+        found = {(conflict.first_key, conflict.second_key) for conflict in engine.check_assignment(probe)}
+        assert found == expected
+
+
+def test_engine_venue_conflicts_ignore_people() -> None:
+    engine = ConflictEngine.from_intervals(
+        [],
+        [
+            _interval("m1", 8, 12, person=None, venue="v1"),
+            _interval("m2", 10, 14, person=None, venue="v1"),
+            _interval("m3", 10, 14, person=None, venue="v2"),
+            _interval("m4", 10, 14, person=None, venue=None),
+        ],
+    )
+    conflicts = engine.audit()
+    assert [(c.kind, c.resource_id, c.first_key, c.second_key) for c in conflicts] == [("venue", "v1", "m1", "m2")]
+    assert engine.check_mission(_interval("m5", 13, 15, person=None, venue="v2"))[0].second_key == "m5"
+
+    engine.remove_mission("m2")
+    assert engine.audit() == []
+
+
+def test_conflict_engine_benchmark_week() -> None:
+    """100 people x 5 missions x 7 days: audit and single checks stay interactive."""
+
+    rng = random.Random(42)
+    intervals = []
+    for person in range(100):
+        for day in range(7):
+            for slot in range(5):
+                start = day * 24 + 6 + slot * 3 + rng.uniform(-0.5, 0.5)
+                intervals.append(
+                    _interval(f"{person}-{day}-{slot}", start, start + rng.uniform(2, 3.5), person=f"p{person}")
+                )
+
+    started = time.perf_counter()
+    engine = ConflictEngine.from_intervals(intervals)
+    conflicts = engine.audit()
+    audit_elapsed = time.perf_counter() - started
+    assert engine.assignment_count == 3500
+    assert conflicts
+    assert audit_elapsed < 1.0
+
+    probes = rng.sample(intervals, 500)
+    started = time.perf_counter()
+    for probe in probes:
+        engine.check_assignment(probe)
+    per_check = (time.perf_counter() - started) / len(probes)
+    assert per_check < 0.002
+
+
+def test_move_assignment_reports_added_and_resolved() -> None:
+    engine = ConflictEngine.from_intervals(
+        [
+            _interval("a", 8, 12),
+            _interval("b", 13, 17),
+            _interval("c", 9, 10, person="p2"),
+        ]
+    )
+
+    delta = engine.move_assignment("b", _interval("b", 11, 15))
+    assert [(c.first_key, c.second_key) for c in delta.added] == [("a", "b")]
+    assert delta.resolved == []
+
+    delta = engine.move_assignment("b", _interval("b", 11, 16))
+    assert delta.added == [] and delta.resolved == []
+    assert len(delta.current) == 1
+
+    delta = engine.move_assignment("b", None)
+    assert [(c.first_key, c.second_key) for c in delta.resolved] == [("a", "b")]
+    assert engine.assignment_count == 2
+
+
+def test_conflict_index_cache_invalidation() -> None:
+    cache = ConflictIndexCache(max_entries=2)
+    loads: list[datetime] = []
+
+    def loader(start: datetime) -> ConflictEngine:
+        loads.append(start)
+        return ConflictEngine()
+
+    first_week = WEEK_START
+    second_week = WEEK_START + timedelta(days=7)
+    engine = cache.get_or_load("org", first_week, second_week, 1, lambda: loader(first_week))
+    assert cache.get_or_load("org", first_week, second_week, 1, lambda: loader(first_week)) is engine
+    cache.get_or_load("org", second_week, second_week + timedelta(days=7), 1, lambda: loader(second_week))
+    assert len(loads) == 2
+
+    cache.invalidate("other")
+    cache.invalidate("org", second_week + timedelta(hours=1), second_week + timedelta(hours=2))
+    assert len(cache) == 1
+    assert cache.get_or_load("org", first_week, second_week, 1, lambda: loader(first_week)) is engine
+
+    # A write this process patched in place carries the window over; anything else is a newer version.
+    cache.restamp("org", 1, 2)
+    assert cache.get_or_load("org", first_week, second_week, 2, lambda: loader(first_week)) is engine
+    cache.restamp("org", 2, 4)
+    assert len(cache) == 0
+    reloaded = cache.get_or_load("org", first_week, second_week, 4, lambda: loader(first_week))
+    assert cache.get_or_load("org", first_week, second_week, 5, lambda: loader(first_week)) is not reloaded
+    assert len(loads) == 4
+
+    cache.invalidate("org")
+    assert len(cache) == 0
+    assert weeks_touched(first_week + timedelta(days=6, hours=22), second_week + timedelta(hours=2)) == [
+        first_week.date(),
+        second_week.date(),
+    ]
+    assert weeks_touched(first_week, second_week) == [first_week.date()]
+
+
+def test_incremental_move_benchmark_p99() -> None:
+    """5k assignments in a week: each drop is answered well under the 200 ms target at p99."""
+
+    rng = random.Random(11)
+    intervals = []
+    for number in range(5000):
+        start = rng.uniform(0, 160)
+        intervals.append(_interval(f"a{number}", start, start + rng.uniform(1, 4), person=f"p{number % 150}"))
+    engine = ConflictEngine.from_intervals(intervals)
+
+    timings = []
+    for probe in rng.sample(intervals, 1000):
+        offset = rng.uniform(-6, 6)
+        moved = Interval(
+            key=probe.key,
+            start=probe.start + timedelta(hours=offset),
+            end=probe.end + timedelta(hours=offset),
+            mission_id=probe.mission_id,
+            person_id=probe.person_id,
+        )
+        started = time.perf_counter()
+        engine.move_assignment(probe.key, moved)
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    assert p99 < 0.2
+    assert engine.assignment_count == 5000
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import io
+import re
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import Timesheet
+from backend.rbac import Role
+from backend.services.documents import (
+    DocumentRenderer,
+    DocumentSpec,
+    aem_specs,
+    purge_expired_archives,
+    timesheet_specs,
+    write_archive,
+)
+from backend.services.jobs import job_registry
+from backend.services.pdf import TemplateError, encode_text, layout, parse_template, render_document, write_pdf
+
+
+@pytest.fixture()
+def app(tmp_path: Path) -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _assert_valid_pdf(pdf: bytes) -> None:
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    xref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[xref:].startswith(b"xref\n")
+    offsets = re.findall(rb"(\d{10}) 00000 n ", pdf[xref:])
+    for number, offset in enumerate(offsets, start=1):
+        assert pdf[int(offset) :].startswith(b"%d 0 obj" % number)
+
+
+def _aem_context(index: int) -> dict:
+    return {
+        "title": f"AEM {index}",
+        "employer": "Orbit",
+        "employee": f"tech{index}@example.com",
+        "period_start": "01/03/2025",
+        "period_end": "31/03/2025",
+        "contract": "Heures",
+        "lines": [
+            {"date": f"{day:02d}/03/2025", "start": "09:00", "hours": "7h00", "gross": "84,00 €"} for day in range(1, 21)
+        ],
+        "days": 20,
+        "hours": "140h00",
+        "gross": "1 680,00 €",
+        "cachets": 0,
+        "generated": "01/04/2025 08:00 UTC",
+    }
+
+
+def test_templates_parse_once_and_reject_malformed_sources() -> None:
+    template = parse_template("t", "# {title}\n[each rows]\n| {a} | {b}\n[end]\n_ Signature")
+    lines = list(template.lines({"title": "Relevé", "rows": [{"a": 1, "b": 2}, {"a": 3, "b": 4}]}))
+    assert lines == [("#", ("Relevé",)), ("|", ("1", "2")), ("|", ("3", "4")), ("_", ("Signature",))]
+    with pytest.raises(TemplateError):
+        parse_template("t", "[each rows]\n| {a}")
+    with pytest.raises(TemplateError):
+        parse_template("t", "[end]")
+    with pytest.raises(TemplateError):
+        parse_template("t", "Total {hours")
+
+    assert encode_text("(é) \\") == b"\\(\\351\\) \\\\"
+    pages = layout(("|", (str(index), "x")) for index in range(200))
+    assert len(pages) == 4
+
+    created = datetime(2025, 4, 1, 8)
+    pdf = write_pdf(pages, title="Relevé", created=created)
+    _assert_valid_pdf(pdf)
+    assert pdf.count(b"/Type /Page ") == 4
+    assert render_document("aem", _aem_context(1), created) == render_document("aem", _aem_context(1), created)
+
+
+def test_hundred_aem_batch_benchmark(tmp_path: Path) -> None:
+    renderer = DocumentRenderer(max_workers=2)
+    specs = [DocumentSpec(f"aem-{index}.pdf", _aem_context(index)) for index in range(100)]
+    reports: list[dict[str, int]] = []
+    target = tmp_path / "bench.zip"
+    try:
+        started = time.perf_counter()
+        totals = write_archive(reports.append, specs, "aem", target, datetime(2025, 4, 1, 8), renderer)
+        elapsed = time.perf_counter() - started
+    finally:
+        renderer.shutdown()
+
+    # WF-03 budget: 100 AEM in under 60 s.
+    assert elapsed < 30
+    assert totals["documents"] == 100 and [report["documents"] for report in reports] == list(range(101))
+    with zipfile.ZipFile(target) as archive:
+        names = archive.namelist()
+        assert names[:2] == ["aem-0.pdf", "aem-1.pdf"] and len(names) == 100
+        _assert_valid_pdf(archive.read("aem-42.pdf"))
+    assert not target.with_suffix(".part").exists()
+
+
+def test_batches_render_aem_and_signable_timesheets(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    for day in ("2025-03-03", "2025-03-04"):
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "startsAt": f"{day}T09:00:00", "endsAt": f"{day}T17:00:00"},
+        ).json()
+        for person in (owner, tech):
+            app.post(
+                f"/api/v1/planning/missions/{mission['id']}/assignments",
+                headers=headers,
+                json={"userId": person["userId"]},
+            )
+    app.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-01", "periodEnd": "2025-04-01"})
+    with session_scope(app.app.state.session_factory) as session:
+        ids = list(session.scalars(select(Timesheet.id).where(Timesheet.user_id == tech["userId"])))
+    app.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids})
+    app.put(f"/api/v1/payroll/rates/{tech['userId']}", headers=headers, json={"hourlyRateCents": 1200})
+
+    aem = {"kind": "aem", "periodStart": "2025-03-01", "periodEnd": "2025-04-01"}
+    assert app.post(
+        "/api/v1/documents/batches", headers={"X-Session-Token": tech["sessionToken"]}, json=aem
+    ).status_code == 403
+    assert app.post(
+        "/api/v1/documents/batches", headers=headers, json={**aem, "periodStart": "2025-03-02"}
+    ).status_code == 422
+    assert app.post(
+        "/api/v1/documents/batches", headers=headers, json={**aem, "periodStart": "2025-02-01", "periodEnd": "2025-03-01"}
+    ).status_code == 404
+
+    started = app.post("/api/v1/documents/batches", headers=headers, json=aem)
+    assert started.status_code == 202, started.text
+    job_id = started.json()["jobId"]
+    job_registry.wait(job_id, timeout=30)
+    done = app.get(f"/api/v1/documents/batches/{job_id}", headers=headers).json()
+    assert (done["status"], done["documents"], done["total"], done["progress"]) == ("succeeded", 1, 1, 1.0)
+    archive = app.get(done["archiveUrl"], headers=headers)
+    assert archive.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(archive.content)) as bundle:
+        [name] = bundle.namelist()
+        assert name.startswith("aem-2025-03-tech-")
+        pdf = bundle.read(name)
+    _assert_valid_pdf(pdf)
+    assert b"/Title (AEM 03/2025 tech@example.com)" in pdf
+
+    sheets = app.post(
+        "/api/v1/documents/batches",
+        headers=headers,
+        json={"kind": "timesheet", "periodStart": "2025-03-01", "periodEnd": "2025-03-31"},
+    ).json()
+    job_registry.wait(sheets["jobId"], timeout=30)
+    archive = app.get(f"/api/v1/documents/batches/{sheets['jobId']}/archive", headers=headers)
+    with zipfile.ZipFile(io.BytesIO(archive.content)) as bundle:
+        assert len(bundle.namelist()) == 2
+    assert app.get("/api/v1/documents/batches/unknown", headers=headers).status_code == 404
+
+
+def test_document_lines_are_printed_on_the_organisation_clock(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    assert app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Europe/Paris"}).status_code == 200
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Nuit", "teamSize": 1}).json()
+    # 00:30-04:00 in Paris on the 15th.
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-14T23:30:00", "endsAt": "2025-03-15T03:00:00"},
+    ).json()
+    app.post(f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]})
+    app.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-01", "periodEnd": "2025-04-01"})
+    with session_scope(app.app.state.session_factory) as session:
+        ids = list(session.scalars(select(Timesheet.id)))
+    app.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids})
+    app.put(f"/api/v1/payroll/rates/{owner['userId']}", headers=headers, json={"hourlyRateCents": 1200})
+
+    generated = datetime(2025, 4, 1)
+    with session_scope(app.app.state.session_factory) as session:
+        organization_id = owner["organizationId"]
+        [aem] = aem_specs(session, organization_id, date(2025, 3, 1), date(2025, 4, 1), None, generated)
+        [sheet] = timesheet_specs(session, organization_id, date(2025, 3, 1), date(2025, 4, 1), None, generated)
+    assert [(line["date"], line["start"]) for line in aem.context["lines"]] == [("15/03/2025", "00:30")]
+    assert [(line["date"], line["planned"]) for line in sheet.context["lines"]] == [("15/03/2025", "00:30-04:00")]
+
+
+def test_batch_status_is_shared_across_workers_and_archives_expire(tmp_path: Path) -> None:
+    settings = Settings(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'documents.db'}", document_dir=str(tmp_path / "archives")
+    )
+    # Two workers of one deployment: same database, same storage, separate processes' registries.
+    with TestClient(create_app(settings=settings)) as first, TestClient(create_app(settings=settings)) as second:
+        owner = _register(first, email="owner@example.com", organization_slug="orbit")
+        headers = {"X-Session-Token": owner["sessionToken"]}
+        template = first.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 1}).json()
+        mission = first.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "startsAt": "2025-03-03T09:00:00", "endsAt": "2025-03-03T17:00:00"},
+        ).json()
+        first.post(f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]})
+        first.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-01", "periodEnd": "2025-04-01"})
+
+        started = first.post(
+            "/api/v1/documents/batches",
+            headers=headers,
+            json={"kind": "timesheet", "periodStart": "2025-03-01", "periodEnd": "2025-04-01"},
+        )
+        batch_id = started.json()["jobId"]
+        job_registry.wait(batch_id, timeout=30)
+        done = second.get(f"/api/v1/documents/batches/{batch_id}", headers=headers).json()
+        assert (done["status"], done["documents"], done["progress"]) == ("succeeded", 1, 1.0)
+        assert second.get(done["archiveUrl"], headers=headers).status_code == 200
+
+        expires_at = datetime.fromisoformat(done["expiresAt"])
+        with session_scope(second.app.state.session_factory) as session:
+            assert purge_expired_archives(session, settings.document_dir, expires_at - timedelta(seconds=1)) == 0
+            assert purge_expired_archives(session, settings.document_dir, expires_at) == 1
+        assert not any((tmp_path / "archives").rglob("*.zip"))
+        assert first.get(f"/api/v1/documents/batches/{batch_id}", headers=headers).json()["status"] == "expired"
+        assert first.get(done["archiveUrl"], headers=headers).status_code == 410
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import insert, select
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import (
+    EquipmentCalendarHead,
+    EquipmentItem,
+    EquipmentKitCheckpoint,
+    EquipmentReservation,
+    EquipmentReservationItem,
+)
+from backend.rbac import Role
+from backend.services import equipment_movements
+from backend.services.equipment import ItemCalendar, intersect, inventory_index_cache
+
+DAY = datetime(2027, 3, 1)
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _at(day: int, hour: int) -> str:
+    return (DAY + timedelta(days=day, hours=hour)).isoformat()
+
+
+def test_item_calendar_free_spans_and_intersection() -> None:
+    calendar = ItemCalendar()
+    calendar.add(DAY + timedelta(hours=10), DAY + timedelta(hours=12), "b")
+    calendar.add(DAY + timedelta(hours=2), DAY + timedelta(hours=4), "a")
+    assert calendar.is_free(DAY + timedelta(hours=4), DAY + timedelta(hours=10))
+    assert not calendar.is_free(DAY + timedelta(hours=3), DAY + timedelta(hours=5))
+    hours = lambda spans: [((start - DAY).seconds // 3600, (end - DAY).seconds // 3600) for start, end in spans]  # noqa: E731
+    assert hours(calendar.free(DAY, DAY + timedelta(hours=20))) == [(0, 2), (4, 10), (12, 20)]
+    assert hours(calendar.free(DAY + timedelta(hours=3), DAY + timedelta(hours=11))) == [(4, 10)]
+    other = [(DAY + timedelta(hours=1), DAY + timedelta(hours=5)), (DAY + timedelta(hours=9), DAY + timedelta(hours=14))]
+    assert hours(intersect(calendar.free(DAY, DAY + timedelta(hours=20)), other)) == [(1, 2), (4, 5), (9, 10), (12, 14)]
+    assert calendar.remove("a") and not calendar.remove("a")
+    assert calendar.is_free(DAY + timedelta(hours=3), DAY + timedelta(hours=5))
+
+
+def test_kit_reservation_is_atomic_and_drives_availability(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    member = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    items = [
+        app.post(
+            "/api/v1/equipment/items",
+            headers=headers,
+            json={"name": f"Micro HF {number}", "category": "hf", "serialNumber": f"HF-{number}"},
+        ).json()
+        for number in range(3)
+    ]
+    assert app.post(
+        "/api/v1/equipment/items", headers=headers, json={"name": "Doublon", "serialNumber": "HF-0"}
+    ).status_code == 409
+    spare = app.post("/api/v1/equipment/items", headers=headers, json={"name": "Recepteur", "category": "hf"}).json()
+    kit = app.post(
+        "/api/v1/equipment/kits", headers=headers, json={"name": "Kit HF", "itemIds": [item["id"] for item in items[:2]]}
+    )
+    assert kit.status_code == 201, kit.text
+    kit_id = kit.json()["id"]
+    assert [item["serialNumber"] for item in kit.json()["items"]] == ["HF-0", "HF-1"]
+
+    venue = app.post("/api/v1/venues/", headers=headers, json={"name": "Zenith"}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 2}).json()
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "venueId": venue["id"], "startsAt": _at(0, 14), "endsAt": _at(0, 23)},
+    ).json()
+    assert app.post(
+        "/api/v1/equipment/reservations",
+        headers={"X-Session-Token": member["sessionToken"]},
+        json={"kitId": kit_id, "missionId": mission["id"]},
+    ).status_code == 403
+    booked = app.post("/api/v1/equipment/reservations", headers=headers, json={"kitId": kit_id, "missionId": mission["id"]})
+    assert booked.status_code == 201, booked.text
+    assert booked.json()["venueId"] == venue["id"]
+    assert booked.json()["startsAt"].startswith("2027-03-01T14:00")
+    assert sorted(booked.json()["itemIds"]) == sorted(item["id"] for item in items[:2])
+
+    # One taken item makes the whole batch fail: the free ones are not booked either.
+    clash = app.post(
+        "/api/v1/equipment/reservations",
+        headers=headers,
+        json={"itemIds": [spare["id"], items[1]["id"]], "startsAt": _at(0, 20), "endsAt": _at(1, 2)},
+    )
+    assert clash.status_code == 409 and "Micro HF 1" in clash.json()["detail"]
+    window = {"start": _at(0, 0), "end": _at(1, 0)}
+    free = app.get("/api/v1/equipment/items/availability", headers=headers, params={**window, "onlyAvailable": True})
+    assert sorted(entry["name"] for entry in free.json()) == ["Micro HF 2", "Recepteur"]
+
+    partial = app.get(f"/api/v1/equipment/kits/{kit_id}/availability", headers=headers, params=window).json()
+    assert partial["available"] is False
+    assert [(span["startsAt"][11:16], span["endsAt"][11:16]) for span in partial["free"]] == [("00:00", "14:00"), ("23:00", "00:00")]
+    assert sorted(partial["busyItemIds"]) == sorted(item["id"] for item in items[:2])
+    later = {"start": _at(0, 23), "end": _at(1, 6)}
+    assert app.get(f"/api/v1/equipment/kits/{kit_id}/availability", headers=headers, params=later).json()["available"]
+    after = app.post(
+        "/api/v1/equipment/reservations", headers=headers, json={"kitId": kit_id, "startsAt": later["start"], "endsAt": later["end"]}
+    )
+    assert after.status_code == 201, after.text
+    listed = app.get("/api/v1/equipment/reservations", headers=headers, params={"itemId": items[0]["id"]}).json()
+    assert [entry["id"] for entry in listed] == [booked.json()["id"], after.json()["id"]]
+
+    assert app.delete(f"/api/v1/equipment/reservations/{booked.json()['id']}", headers=headers).status_code == 204
+    window = {"start": _at(0, 0), "end": _at(0, 23)}
+    assert app.get(f"/api/v1/equipment/kits/{kit_id}/availability", headers=headers, params=window).json()["available"]
+    retired = app.put(f"/api/v1/equipment/items/{items[0]['id']}", headers=headers, json={"condition": "retired"})
+    assert retired.json()["condition"] == "retired"
+    assert app.get(f"/api/v1/equipment/kits/{kit_id}/availability", headers=headers, params=window).json()["free"] == []
+    assert app.post(
+        "/api/v1/equipment/reservations", headers=headers, json={"kitId": kit_id, "startsAt": _at(5, 0), "endsAt": _at(5, 4)}
+    ).status_code == 409
+
+    # Another process booked behind this one's back: the revision check reloads the index.
+    with session_scope(app.app.state.session_factory) as session:
+        reservation = EquipmentReservation(
+            organization_id=owner["organizationId"], starts_at=DAY + timedelta(days=3), ends_at=DAY + timedelta(days=4)
+        )
+        session.add(reservation)
+        session.flush()
+        session.add(
+            EquipmentReservationItem(
+                reservation_id=reservation.id,
+                item_id=spare["id"],
+                organization_id=owner["organizationId"],
+                starts_at=reservation.starts_at,
+                ends_at=reservation.ends_at,
+            )
+        )
+        session.get(EquipmentCalendarHead, owner["organizationId"]).revision += 1
+    assert app.post(
+        "/api/v1/equipment/reservations", headers=headers, json={"itemIds": [spare["id"]], "startsAt": _at(3, 8), "endsAt": _at(3, 9)}
+    ).status_code == 409
+    past = app.get(
+        "/api/v1/equipment/items/availability",
+        headers=headers,
+        params={"start": "2025-01-01T00:00:00", "end": "2025-01-02T00:00:00", "category": "hf"},
+    ).json()
+    assert len(past) == 4 and sum(entry["available"] for entry in past) == 3
+
+
+def test_kit_availability_across_ten_thousand_items_benchmark(app: TestClient) -> None:
+    owner = _register(app, email="bench@example.com", organization_slug="bench")
+    organization_id = owner["organizationId"]
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    with session_scope(app.app.state.session_factory) as session:
+        session.execute(
+            insert(EquipmentItem),
+            [
+                {"id": f"item-{number:05d}", "organization_id": organization_id, "name": f"Item {number:05d}", "category": f"c{number % 20}"}
+                for number in range(10_000)
+            ],
+        )
+        session.execute(
+            insert(EquipmentReservation),
+            [
+                {"id": f"res-{day}", "organization_id": organization_id, "starts_at": DAY, "ends_at": DAY}
+                for day in range(30)
+            ],
+        )
+        # Every item is booked one day in three over the month, each on its own rotation.
+        session.execute(
+            insert(EquipmentReservationItem),
+            [
+                {
+                    "reservation_id": f"res-{day}",
+                    "item_id": f"item-{number:05d}",
+                    "organization_id": organization_id,
+                    "starts_at": DAY + timedelta(days=day, hours=8),
+                    "ends_at": DAY + timedelta(days=day, hours=20),
+                }
+                for number in range(10_000)
+                for day in range(number % 3, 30, 3)
+            ],
+        )
+        kit_items = [f"item-{number:05d}" for number in range(200)]
+    kit_id = app.post("/api/v1/equipment/kits", headers=headers, json={"name": "Kit plateau", "itemIds": kit_items}).json()["id"]
+    with session_scope(app.app.state.session_factory) as session:
+        assert len(list(session.scalars(select(EquipmentReservationItem.item_id)))) == 100_000
+
+    inventory_index_cache.invalidate(organization_id)
+    started = time.perf_counter()
+    month = {"start": DAY.isoformat(), "end": (DAY + timedelta(days=30)).isoformat()}
+    report = app.get(f"/api/v1/equipment/kits/{kit_id}/availability", headers=headers, params=month).json()
+    cold_seconds = time.perf_counter() - started
+    assert len(report["free"]) == 31 and len(report["busyItemIds"]) == 200
+
+    started = time.perf_counter()
+    for day in range(30):
+        window = {"start": (DAY + timedelta(days=day)).isoformat(), "end": (DAY + timedelta(days=day + 1)).isoformat()}
+        daily = app.get(f"/api/v1/equipment/kits/{kit_id}/availability", headers=headers, params=window).json()
+        assert daily["available"] is False
+    per_query = (time.perf_counter() - started) / 30
+    evening = {"start": (DAY + timedelta(days=1, hours=20)).isoformat(), "end": (DAY + timedelta(days=2, hours=8)).isoformat()}
+    started = time.perf_counter()
+    free_items = app.get(
+        "/api/v1/equipment/items/availability", headers=headers, params={**evening, "onlyAvailable": True}
+    ).json()
+    search_seconds = time.perf_counter() - started
+    assert len(free_items) == 10_000
+    started = time.perf_counter()
+    booked = app.post("/api/v1/equipment/reservations", headers=headers, json={"kitId": kit_id, **{"startsAt": evening["start"], "endsAt": evening["end"]}})
+    reserve_seconds = time.perf_counter() - started
+    assert booked.status_code == 201 and len(booked.json()["itemIds"]) == 200
+
+    assert cold_seconds < 5.0
+    assert per_query < 0.1
+    assert search_seconds < 3.0
+    assert reserve_seconds < 1.0
+
+
+def test_movement_ledger_answers_as_of_queries_and_keeps_kpis(app: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(equipment_movements, "KIT_CHECKPOINT_EVERY", 4)
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    items = [
+        app.post("/api/v1/equipment/items", headers=headers, json={"name": f"Enceinte {number}"}).json()
+        for number in range(3)
+    ]
+    kit_id = app.post(
+        "/api/v1/equipment/kits", headers=headers, json={"name": "Kit son", "itemIds": [item["id"] for item in items]}
+    ).json()["id"]
+
+    def move(kind: str, day: int, **extra: object) -> object:
+        return app.post("/api/v1/equipment/movements", headers=headers, json={"kind": kind, "occurredAt": _at(day, 9), **extra})
+
+    stand = app.post("/api/v1/equipment/items", headers=headers, json={"name": "Pied"}).json()
+
+    # Three outings of the kit; after the third, two pieces come back alone, one of them damaged.
+    for day in (0, 10):
+        # A stand goes along the first time: it travels with the kit but is not one of its members.
+        extra = {"itemIds": [stand["id"]]} if day == 0 else {}
+        assert move("check_out", day, kitId=kit_id, **extra).status_code == 201
+        assert move("return", day + 2, kitId=kit_id, **extra).status_code == 201
+    out = move("check_out", 40, kitId=kit_id)
+    assert [entry["sequence"] for entry in out.json()] == [5, 5, 5]
+    assert move("check_out", 41, itemIds=[items[0]["id"]]).status_code == 409
+    assert move("return", 39, itemIds=[items[0]["id"]]).status_code == 422
+    assert move("return", 42, itemIds=[items[0]["id"], items[1]["id"]], kitId=None).status_code == 201
+    damaged = move("incident", 42, itemIds=[items[1]["id"]], condition="damaged", note="Membrane percee")
+    assert damaged.json()[0]["state"] == "in" and damaged.json()[0]["incidents"] == 1
+    assert app.get("/api/v1/equipment/items", headers=headers).json()[1]["condition"] == "damaged"
+
+    now = app.get(f"/api/v1/equipment/items/{items[2]['id']}/state", headers=headers).json()
+    assert (now["state"], now["checkouts"], now["returns"]) == ("out", 3, 2)
+    assert now["since"].startswith("2027-04-10")
+    during = app.get(f"/api/v1/equipment/items/{items[2]['id']}/state", headers=headers, params={"at": _at(11, 0)}).json()
+    assert (during["state"], during["checkouts"], during["returns"]) == ("out", 2, 1)
+    before = app.get(f"/api/v1/equipment/items/{items[2]['id']}/state", headers=headers, params={"at": _at(-1, 0)}).json()
+    assert (before["state"], before["checkouts"]) == ("in", 0)
+
+    # 18 kit movements, the members' own included, with a checkpoint every 4: each as-of read is a checkpoint
+    # plus a short replay.
+    with session_scope(app.app.state.session_factory) as session:
+        assert [cp.sequence for cp in session.scalars(select(EquipmentKitCheckpoint).order_by(EquipmentKitCheckpoint.sequence))] == [4, 8, 12, 16]
+    expected = {-1: (0, 0, 0), 1: (3, 3, 0), 5: (0, 3, 3), 11: (3, 6, 3), 20: (0, 6, 6), 41: (3, 9, 6), 45: (1, 9, 8)}
+    for day, (items_out, checkouts, returns) in expected.items():
+        state = app.get(f"/api/v1/equipment/kits/{kit_id}/state", headers=headers, params={"at": _at(day, 0)}).json()
+        assert (state["itemsOut"], state["checkouts"], state["returns"]) == (items_out, checkouts, returns), day
+    current = app.get(f"/api/v1/equipment/kits/{kit_id}/state", headers=headers).json()
+    assert (current["itemsTotal"], current["itemsOut"], current["checkouts"], current["returns"]) == (3, 1, 9, 8)
+    assert current["incidents"] == 1
+    under_kit = app.get("/api/v1/equipment/movements", headers=headers, params={"kitId": kit_id, "limit": 500}).json()
+    assert len(under_kit) == 15 and stand["id"] not in {entry["itemId"] for entry in under_kit}
+
+    kpis = app.get("/api/v1/equipment/kpis", headers=headers, params={"start": "2027-03-01", "end": "2027-05-01"}).json()
+    assert (kpis["checkouts"], kpis["returns"], kpis["incidents"], kpis["itemsOut"]) == (10, 9, 1, 1)
+    assert kpis["returnRate"] == pytest.approx(9 / 10) and kpis["incidentRate"] == pytest.approx(1 / 10)
+    march = app.get("/api/v1/equipment/kpis", headers=headers, params={"start": "2027-03-01", "end": "2027-04-01"}).json()
+    assert (march["checkouts"], march["returns"]) == (7, 7) and march["returnRate"] == 1.0
+    history = app.get("/api/v1/equipment/movements", headers=headers, params={"itemId": items[1]["id"], "limit": 2}).json()
+    assert [entry["kind"] for entry in history] == ["incident", "return"]
+
+    # A kit made of a piece already out counts it from the start, before and after its first movement.
+    regie = app.post(
+        "/api/v1/equipment/kits", headers=headers, json={"name": "Kit regie", "itemIds": [items[2]["id"], stand["id"]]}
+    ).json()["id"]
+    assert app.get(f"/api/v1/equipment/kits/{regie}/state", headers=headers).json()["itemsOut"] == 1
+    assert move("return", 46, itemIds=[items[2]["id"]]).status_code == 201
+    current = app.get(f"/api/v1/equipment/kits/{regie}/state", headers=headers).json()
+    assert (current["itemsOut"], current["checkouts"], current["returns"]) == (0, 0, 1)
+    for day, items_out in ((45, 1), (47, 0)):
+        state = app.get(f"/api/v1/equipment/kits/{regie}/state", headers=headers, params={"at": _at(day, 0)}).json()
+        assert state["itemsOut"] == items_out, day
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import delete
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.models import UserOrganization
+from backend.rbac import Role
+from backend.services.exceptions import DomainError
+from backend.services.ics import FeedRef, escape_text, fold, sign_feed, verify_feed
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _unfold(body: str) -> list[str]:
+    return body.replace("\r\n ", "").split("\r\n")
+
+
+def test_signed_tokens_and_text_encoding() -> None:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    ref = FeedRef("org", "project", "p1", "u1", date(2025, 1, 10))
+    token = sign_feed(settings, ref)
+    assert verify_feed(settings, token, date(2025, 6, 1)) == ref
+    with pytest.raises(DomainError):
+        verify_feed(Settings(database_url="sqlite+pysqlite:///:memory:", secret_key="other"), token)
+    with pytest.raises(DomainError) as expired:
+        verify_feed(settings, token, date(2026, 1, 11))
+    assert expired.value.status_code == 410
+
+    assert escape_text("Salle 1, étage; A\\B\nfin") == "Salle 1\\, étage\\; A\\\\B\\nfin"
+    folded = fold("DESCRIPTION:" + "é" * 60)
+    assert all(len(line) <= 75 for line in folded.split(b"\r\n"))
+    assert folded.replace(b"\r\n ", b"").decode() == "DESCRIPTION:" + "é" * 60 + "\r\n"
+
+
+def test_feeds_stream_events_and_revalidate_on_planning_version(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    tech_headers = {"X-Session-Token": tech["sessionToken"]}
+    venue = app.post(
+        "/api/v1/venues",
+        headers=headers,
+        json={"name": "Studio", "address": "12 rue Oberkampf", "postalCode": "75011", "city": "Paris"},
+    ).json()
+    team = app.post("/api/v1/mission-tags", headers=headers, json={"slug": "son", "label": "Son"}).json()
+    project = app.post("/api/v1/projects", headers=headers, json={"name": "Tournée"}).json()
+    template = app.post(
+        "/api/v1/mission-templates",
+        headers=headers,
+        json={"name": "Balance, son", "teamSize": 2, "tagIds": [team["id"]]},
+    ).json()
+    day = datetime.combine(datetime.utcnow().date() + timedelta(days=7), datetime.min.time())
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "projectId": project["id"],
+            "venueId": venue["id"],
+            "startsAt": (day + timedelta(hours=14)).isoformat(),
+            "endsAt": (day + timedelta(hours=18)).isoformat(),
+        },
+    ).json()
+    app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments",
+        headers=headers,
+        json={
+            "userId": tech["userId"],
+            "startsAt": (day + timedelta(hours=15)).isoformat(),
+            "endsAt": (day + timedelta(hours=18)).isoformat(),
+        },
+    )
+
+    forbidden = app.post("/api/v1/ics/feeds", headers=tech_headers, json={"scope": "person", "scopeId": owner["userId"]})
+    assert forbidden.status_code == 403
+    missing = app.post("/api/v1/ics/feeds", headers=headers, json={"scope": "team", "scopeId": "nope"})
+    assert missing.status_code == 404
+    person = app.post("/api/v1/ics/feeds", headers=tech_headers, json={"scope": "person", "scopeId": tech["userId"]})
+    assert person.status_code == 201, person.text
+    assert person.json()["url"].endswith(f"/api/v1/ics/{person.json()['token']}.ics")
+
+    feed = app.get(f"/api/v1/ics/{person.json()['token']}.ics")
+    assert feed.status_code == 200, feed.text
+    assert feed.headers["content-type"].startswith("text/calendar")
+    lines = _unfold(feed.text)
+    assert lines[0] == "BEGIN:VCALENDAR" and lines[-2] == "END:VCALENDAR"
+    assert "SUMMARY:Balance\\, son" in lines
+    assert "LOCATION:Studio\\, 12 rue Oberkampf\\, 75011 Paris" in lines
+    assert "DESCRIPTION:Projet : Tournée" in lines
+    assert f"DTSTART:{day + timedelta(hours=15):%Y%m%dT%H%M%S}Z" in lines
+
+    etag = feed.headers["etag"]
+    assert app.get(f"/api/v1/ics/{person.json()['token']}.ics", headers={"If-None-Match": etag}).status_code == 304
+    replay = app.get(f"/api/v1/ics/{person.json()['token']}.ics")
+    assert replay.headers["etag"] == etag and replay.text.count("BEGIN:VEVENT") == 1
+
+    for scope, scope_id in (("project", project["id"]), ("team", team["id"])):
+        token = app.post("/api/v1/ics/feeds", headers=tech_headers, json={"scope": scope, "scopeId": scope_id}).json()
+        events = _unfold(app.get(f"/api/v1/ics/{token['token']}.ics").text)
+        assert f"UID:{mission['id']}@jmd" in events
+        assert f"DTSTART:{day + timedelta(hours=14):%Y%m%dT%H%M%S}Z" in events
+
+    app.put(
+        f"/api/v1/planning/missions/{mission['id']}/recurrence",
+        headers=headers,
+        json={"frequency": "daily", "count": 3},
+    )
+    changed = app.get(f"/api/v1/ics/{person.json()['token']}.ics", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.text.count("BEGIN:VEVENT") == 3
+
+    app.put(f"/api/v1/venues/{venue['id']}", headers=headers, json={"address": "1 quai de Seine"})
+    moved = app.get(f"/api/v1/ics/{person.json()['token']}.ics", headers={"If-None-Match": changed.headers["etag"]})
+    assert "LOCATION:Studio\\, 1 quai de Seine\\, 75011 Paris" in _unfold(moved.text)
+
+    # Renaming a team changes its feed's name, so the feed revalidates.
+    team_token = app.post("/api/v1/ics/feeds", headers=tech_headers, json={"scope": "team", "scopeId": team["id"]}).json()
+    team_feed = app.get(f"/api/v1/ics/{team_token['token']}.ics")
+    app.put(f"/api/v1/mission-tags/{team['id']}", headers=headers, json={"label": "Sonorisation"})
+    renamed = app.get(f"/api/v1/ics/{team_token['token']}.ics", headers={"If-None-Match": team_feed.headers["etag"]})
+    assert renamed.status_code == 200 and "X-WR-CALNAME:Planning – Sonorisation" in _unfold(renamed.text)
+
+    token = person.json()["token"]
+    tampered = token[:-1] + ("A" if token[-1] != "A" else "B")
+    assert app.get(f"/api/v1/ics/{tampered}.ics").status_code == 404
+
+    # Links die with their issuer's membership, even for a client holding the current version.
+    session = app.app.state.session_factory()
+    try:
+        session.execute(delete(UserOrganization).where(UserOrganization.user_id == tech["userId"]))
+        session.commit()
+    finally:
+        session.close()
+    revoked = app.get(f"/api/v1/ics/{team_token['token']}.ics", headers={"If-None-Match": renamed.headers["etag"]})
+    assert revoked.status_code == 410
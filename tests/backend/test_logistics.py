@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import io
+import itertools
+import random
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.rbac import Role
+from backend.services.checklists import qr_label_cache
+from backend.services.jobs import job_registry
+from backend.services.logistics import Load, RoutePlanner, TruckLoadingSolver, TruckSpec
+from backend.services.travel import TravelMatrix
+
+DAY = datetime(2027, 6, 4)
+
+
+@pytest.fixture()
+def app(tmp_path) -> TestClient:
+    qr_label_cache.clear()
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _grid_matrix(points: dict[str, tuple[int, int]]) -> TravelMatrix:
+    """Manhattan minutes between points of a grid."""
+
+    matrix = TravelMatrix()
+    for name, (x, y) in points.items():
+        matrix.upsert(name, {other: abs(x - ox) + abs(y - oy) for other, (ox, oy) in points.items()})
+    return matrix
+
+
+def _check_capacities(plan, loads: dict[str, Load], trucks: dict[str, TruckSpec]) -> None:
+    seen = [key for route in plan.routes for key in route.loads]
+    assert len(seen) == len(set(seen)) and set(seen) | set(plan.unassigned) == set(loads)
+    for route in plan.routes:
+        spec = trucks[route.truck_id]
+        assert sum(loads[key].weight for key in route.loads) <= spec.max_weight + 1e-6
+        assert sum(loads[key].volume for key in route.loads) <= spec.max_volume + 1e-6
+        assert set(route.stops) == {loads[key].venue_id for key in route.loads if loads[key].venue_id}
+
+
+def test_route_planner_two_opt_matches_brute_force_on_small_tours() -> None:
+    generator = random.Random(7)
+    for _ in range(20):
+        points = {f"v{index}": (generator.randrange(60), generator.randrange(60)) for index in range(7)}
+        planner = RoutePlanner(_grid_matrix(points))
+        stops = frozenset(list(points)[1:])
+        order, minutes = planner.tour("v0", stops)
+        assert sorted(order) == sorted(stops) and minutes == planner.length("v0", order)
+        best = min(planner.length("v0", permutation) for permutation in itertools.permutations(stops))
+        assert minutes <= best * 1.2
+    # Without a depot the path is open: a straight line is driven end to end once.
+    line = RoutePlanner(_grid_matrix({"a": (0, 0), "b": (10, 0), "c": (20, 0), "d": (30, 0)}))
+    assert line.tour(None, frozenset("dbca"))[1] == 30
+
+    # A spent deadline returns the nearest-neighbour tour as it stands, and it is not memoised.
+    points = {"depot": (0, 0), "a": (10, 0), "b": (0, 12), "c": (11, 1), "d": (1, 11)}
+    planner = RoutePlanner(_grid_matrix(points))
+    order, minutes = planner.tour("depot", frozenset("abcd"), deadline=time.monotonic() - 1)
+    assert order == tuple(planner._nearest_neighbour("depot", "abcd")) and minutes == planner.length("depot", order)
+    assert not planner._tours and planner.tour("depot", frozenset("abcd"))[1] <= minutes
+
+
+def test_first_fit_decreasing_then_local_search_and_warm_start() -> None:
+    points = {"depot": (0, 0), "north": (0, 40), "south": (0, -40)}
+    travel = _grid_matrix(points)
+    trucks = {
+        "big": TruckSpec("big", "depot", 100.0, 12.0),
+        "small": TruckSpec("small", "depot", 100.0, 10.0),
+        "spare": TruckSpec("spare", "depot", 30.0, 3.0),
+    }
+    loads = {
+        load.key: load
+        for load in [
+            Load("r1", "k1", "north", 60.0, 1.0),
+            Load("r2", "k2", "south", 50.0, 1.0),
+            Load("r3", "k3", "north", 40.0, 1.0),
+            Load("r4", "k4", "south", 30.0, 1.0),
+            Load("r5", "k5", "south", 20.0, 1.0),
+        ]
+    }
+    plan = TruckLoadingSolver(list(loads.values()), list(trucks.values()), travel).solve()
+    _check_capacities(plan, loads, trucks)
+    assert plan.complete and plan.unassigned == [] and plan.trucks_used == 2
+    # Each truck serves one side: two round trips of 80 minutes, never a truck visiting both.
+    assert plan.total_minutes == 160 and all(len(route.stops) == 1 for route in plan.routes)
+
+    # Volume binds too: a bulky load forces a third truck, and one too big for any truck stays unplaced.
+    bulky = {**loads, "r6": Load("r6", "k6", "north", 5.0, 9.5), "r7": Load("r7", None, None, 500.0, 1.0)}
+    plan = TruckLoadingSolver(list(bulky.values()), list(trucks.values()), travel).solve()
+    _check_capacities(plan, bulky, trucks)
+    assert plan.unassigned == ["r7"] and plan.trucks_used == 3
+
+    # Re-solving after one kit grew keeps every other load on its truck.
+    first = TruckLoadingSolver(list(loads.values()), list(trucks.values()), travel).solve()
+    grown = {**loads, "r4": Load("r4", "k4", "south", 30.0, 6.0)}
+    warm = {key: truck for key, truck in first.assignment.items() if key != "r4"}
+    second = TruckLoadingSolver(list(grown.values()), list(trucks.values()), travel, warm).solve()
+    _check_capacities(second, grown, trucks)
+    assert {key: truck for key, truck in second.assignment.items() if key != "r4"} == warm
+    assert second.unassigned == []
+
+    # A spent budget keeps the warm start and stops there: the other loads wait, flagged incomplete.
+    late = TruckLoadingSolver(list(grown.values()), list(trucks.values()), travel, warm).solve(
+        deadline=time.monotonic() - 1
+    )
+    _check_capacities(late, grown, trucks)
+    assert not late.complete and late.unassigned == ["r4"]
+    assert late.assignment == warm
+
+
+def test_loading_solver_benchmark_respects_budget() -> None:
+    generator = random.Random(11)
+    points = {f"venue-{index}": (generator.randrange(300), generator.randrange(300)) for index in range(40)}
+    points["depot"] = (150, 150)
+    travel = _grid_matrix(points)
+    trucks = {f"truck-{index}": TruckSpec(f"truck-{index}", "depot", 3500.0, 20.0) for index in range(60)}
+    loads = {
+        f"load-{index}": Load(
+            f"load-{index}",
+            f"kit-{index}",
+            f"venue-{generator.randrange(40)}",
+            generator.uniform(20, 600),
+            generator.uniform(0.1, 4.0),
+        )
+        for index in range(400)
+    }
+    budget = 2.0
+    started = time.perf_counter()
+    plan = TruckLoadingSolver(list(loads.values()), list(trucks.values()), travel).solve(time.monotonic() + budget)
+    elapsed = time.perf_counter() - started
+    _check_capacities(plan, loads, trucks)
+    assert plan.unassigned == []
+    assert elapsed < budget + 1.0, elapsed
+    lower_bound = max(
+        sum(load.weight for load in loads.values()) / 3500.0, sum(load.volume for load in loads.values()) / 20.0
+    )
+    assert plan.trucks_used <= lower_bound * 1.25 + 1
+
+
+def test_logistics_plan_api_solves_resolves_one_kit_and_bundles_truck_checklists(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    member = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    depot = app.post("/api/v1/venues/", headers=headers, json={"name": "Entrepot", "latitude": 48.85, "longitude": 2.35}).json()
+    venues = [
+        app.post(
+            "/api/v1/venues/", headers=headers, json={"name": name, "latitude": latitude, "longitude": 2.35}
+        ).json()
+        for name, latitude in (("Nord", 49.35), ("Sud", 48.35))
+    ]
+    truck = app.post(
+        "/api/v1/logistics/trucks",
+        headers=headers,
+        json={"name": "Porteur 12t", "maxWeightKg": 500, "maxVolumeM3": 10, "depotVenueId": depot["id"]},
+    )
+    assert truck.status_code == 201, truck.text
+    assert app.post(
+        "/api/v1/logistics/trucks",
+        headers={"X-Session-Token": member["sessionToken"]},
+        json={"name": "Fourgon", "maxWeightKg": 300, "maxVolumeM3": 6},
+    ).status_code == 403
+    van = app.post(
+        "/api/v1/logistics/trucks", headers=headers, json={"name": "Fourgon", "maxWeightKg": 300, "maxVolumeM3": 6}
+    ).json()
+    assert app.put(
+        f"/api/v1/logistics/trucks/{van['id']}", headers=headers, json={"depotVenueId": depot["id"]}
+    ).json()["depotVenueId"] == depot["id"]
+
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 2}).json()
+    kits = []
+    for number, (venue, weight) in enumerate(zip(venues * 2, (200, 150, 120, 100))):
+        items = [
+            app.post(
+                "/api/v1/equipment/items",
+                headers=headers,
+                json={"name": f"Caisse {number}-{index}", "serialNumber": f"C-{number}-{index}", "weightKg": weight / 2, "volumeM3": 1},
+            ).json()
+            for index in range(2)
+        ]
+        assert items[0]["weightKg"] == weight / 2
+        kit = app.post(
+            "/api/v1/equipment/kits", headers=headers, json={"name": f"Kit {number}", "itemIds": [item["id"] for item in items]}
+        ).json()
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={
+                "templateId": template["id"],
+                "venueId": venue["id"],
+                "startsAt": (DAY + timedelta(hours=8 + number)).isoformat(),
+                "endsAt": (DAY + timedelta(hours=20)).isoformat(),
+            },
+        ).json()
+        booked = app.post("/api/v1/equipment/reservations", headers=headers, json={"kitId": kit["id"], "missionId": mission["id"]})
+        assert booked.status_code == 201, booked.text
+        kits.append((kit, items, booked.json()["id"]))
+
+    requested = app.post("/api/v1/logistics/plans", headers=headers, json={"day": DAY.date().isoformat()})
+    assert requested.status_code == 202, requested.text
+    assert requested.json()["status"] == "pending" and requested.json()["revision"] == 1
+    job_registry.wait(requested.json()["jobId"], timeout=30)
+    plan = app.get(f"/api/v1/logistics/plans/{requested.json()['id']}", headers=headers).json()
+    assert plan["status"] == "ready" and plan["complete"] and plan["unassigned"] == []
+    # 570 kg cannot fit the 500 kg truck alone: both trucks leave, each serving one venue.
+    assert plan["trucksUsed"] == 2 and sorted(len(route["stops"]) for route in plan["routes"]) == [1, 1]
+    assert all(route["weightKg"] <= 500 for route in plan["routes"]) and plan["totalMinutes"] > 0
+    assignment = {load: route["truckId"] for route in plan["routes"] for load in route["loads"]}
+    assert app.get("/api/v1/logistics/plans", headers=headers, params={"day": DAY.date().isoformat()}).json()["id"] == plan["id"]
+
+    route = plan["routes"][0]
+    bundle = app.get(route["checklistUrl"], headers={"X-Session-Token": member["sessionToken"]})
+    assert bundle.status_code == 200, bundle.text
+    with zipfile.ZipFile(io.BytesIO(bundle.content)) as archive:
+        names = archive.namelist()
+    assert names[0].startswith("chargement-2027-06-04-") and len(names) == 1 + 2 * len(route["loads"])
+
+    # One kit gets heavier: only its load is packed again, the others stay on their trucks.
+    changed_kit, changed_items, changed_reservation = kits[3]
+    for item in changed_items:
+        assert app.put(f"/api/v1/equipment/items/{item['id']}", headers=headers, json={"weightKg": 90}).status_code == 200
+    again = app.post(
+        "/api/v1/logistics/plans", headers=headers, json={"day": DAY.date().isoformat(), "kitId": changed_kit["id"]}
+    ).json()
+    assert again["id"] == plan["id"] and again["revision"] == 2
+    job_registry.wait(again["jobId"], timeout=30)
+    resolved = app.get(f"/api/v1/logistics/plans/{plan['id']}", headers=headers).json()
+    assert resolved["status"] == "ready" and resolved["unassigned"] == []
+    moved = {load: route["truckId"] for route in resolved["routes"] for load in route["loads"]}
+    assert {key: truck for key, truck in moved.items() if key != changed_reservation} == {
+        key: truck for key, truck in assignment.items() if key != changed_reservation
+    }
+    assert all(route["weightKg"] <= 500 for route in resolved["routes"])
+
+    assert app.post(
+        "/api/v1/logistics/plans", headers=headers, json={"day": DAY.date().isoformat(), "timeBudgetSeconds": 60}
+    ).status_code == 422
+    assert app.get(f"/api/v1/logistics/plans/{plan['id']}/trucks/unknown/checklist", headers=headers).status_code == 404
+    assert app.get("/api/v1/logistics/plans", headers=headers, params={"day": "2027-06-05"}).status_code == 404
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import json
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.models import Notification
+from backend.rbac import Role
+from backend.security import now_utc
+from backend.services.notifications import (
+    SENDING,
+    HttpProvider,
+    Message,
+    backoff,
+    release_stale_claims,
+)
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Local SMTP server keeping every message; ``refuse`` recipients get a 550 at RCPT."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _SmtpSession)
+        self.messages: list[tuple[str, bytes]] = []
+        self.connections = 0
+        self.refuse: set[str] = set()
+
+
+class _SmtpSession(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        sink: SmtpSink = self.server  # type: ignore[assignment]
+        sink.connections += 1
+        self._reply("220 sink ready")
+        recipients: list[str] = []
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 sink")
+            elif verb == "MAIL":
+                recipients = []
+                self._reply("250 ok")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address in sink.refuse:
+                    self._reply("550 no such user")
+                else:
+                    recipients.append(address)
+                    self._reply("250 ok")
+            elif verb == "DATA":
+                self._reply("354 end with .")
+                data = b""
+                while (chunk := self.rfile.readline()) != b".\r\n":
+                    data += chunk
+                sink.messages.extend((recipient, data) for recipient in recipients)
+                self._reply("250 queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 ok")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("502 unknown")
+
+
+class FakeGateway(ThreadingHTTPServer):
+    """HTTP provider stand-in: answers ``failures`` times 503 first, dedupes by ``Idempotency-Key``."""
+
+    daemon_threads = True
+
+    def __init__(self, failures: int = 0, hang_up: bool = False) -> None:
+        super().__init__(("127.0.0.1", 0), _GatewayHandler)
+        self.failures, self.hang_up = failures, hang_up
+        self.requests: list[tuple[str, dict]] = []
+        self.delivered: dict[str, dict] = {}
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/send"
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1  # type: ignore[attr-defined]
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        gateway: FakeGateway = self.server  # type: ignore[assignment]
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        key = self.headers["Idempotency-Key"]
+        gateway.requests.append((key, body))
+        if gateway.failures:
+            gateway.failures -= 1
+            status, reply = 503, b"busy"
+        else:
+            gateway.delivered.setdefault(key, body)
+            status, reply = 200, b"{}"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+        # Drop the keep-alive connection without announcing it, as an idle timeout would.
+        self.close_connection = gateway.hang_up
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def _serve(server: socketserver.BaseServer) -> socketserver.BaseServer:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture()
+def services():
+    smtp, telegram, sms = _serve(SmtpSink()), _serve(FakeGateway(failures=1)), _serve(FakeGateway())
+    yield smtp, telegram, sms
+    for server in (smtp, telegram, sms):
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture()
+def app(tmp_path, services) -> TestClient:
+    smtp, telegram, sms = services
+    # A file database gives the dispatcher workers connections of their own.
+    settings = Settings(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'jmd.db'}",
+        document_dir=str(tmp_path),
+        smtp_host="127.0.0.1",
+        smtp_port=smtp.server_address[1],
+        telegram_api_url=telegram.url,
+        sms_api_url=sms.url,
+        notification_workers=1,
+        notification_backoff_seconds=0.05,
+        notification_poll_seconds=0.05,
+    )
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _settled(client: TestClient, headers: dict[str, str], event_id: str, count: int) -> list[dict]:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        rows = client.get("/api/v1/notifications/", headers=headers, params={"eventId": event_id}).json()
+        if len(rows) == count and all(row["status"] in ("sent", "failed") for row in rows):
+            return sorted(rows, key=lambda row: (row["channel"], row["target"]))
+        time.sleep(0.05)
+    raise AssertionError(f"{event_id} not settled: {rows}")
+
+
+def test_assignment_fans_out_batched_retried_and_deduplicated(app: TestClient, services) -> None:
+    smtp, telegram, sms = services
+    owner = _register(app, email="rg@example.com", organization_slug="orbit")
+    member = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    bounce = _invite(app, owner, email="bounce@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    contact = app.put(
+        "/api/v1/notifications/contact",
+        headers={"X-Session-Token": member["sessionToken"]},
+        json={"phone": "+33 6 12 34 56 78", "telegramChatId": "4242"},
+    )
+    assert contact.status_code == 200 and contact.json()["telegramChatId"] == "4242"
+
+    venue = app.post("/api/v1/venues/", headers=headers, json={"name": "Zenith"}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 2}).json()
+    tomorrow = (now_utc() + timedelta(days=1)).replace(hour=14, minute=0, second=0, microsecond=0)
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "venueId": venue["id"],
+            "startsAt": tomorrow.isoformat(),
+            "endsAt": (tomorrow + timedelta(hours=8)).isoformat(),
+        },
+    ).json()
+    validated = time.monotonic()
+    assignment = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": member["userId"]}
+    ).json()
+
+    # WF-02: email and Telegram to the technician, email copy to the manager, well within 30 s.
+    rows = _settled(app, headers, f"assignment.created:{assignment['id']}", 3)
+    assert time.monotonic() - validated < 30
+    assert [(row["channel"], row["target"], row["status"]) for row in rows] == [
+        ("email", "rg@example.com", "sent"),
+        ("email", "tech@example.com", "sent"),
+        ("telegram", "4242", "sent"),
+    ]
+    assert all(row["latencyMs"] < 30_000 for row in rows)
+    emails = {recipient: message_from_bytes(data) for recipient, data in smtp.messages}
+    assert emails["tech@example.com"]["Subject"].startswith("Affectation: Concert le ")
+    assert "http://localhost:8000/api/v1/ics/" in emails["tech@example.com"].get_payload()
+    assert smtp.connections == 1
+
+    # The gateway answered 503 once: the Telegram row was retried after a backoff and the log shows both tries.
+    detail = app.get(f"/api/v1/notifications/{rows[2]['id']}", headers=headers).json()
+    assert detail["attempts"] == 2 and [entry["status"] for entry in detail["log"]] == ["retry", "sent"]
+    assert detail["log"][0]["error"].startswith("HTTP 503")
+    assert len(telegram.requests) == 2 and telegram.requests[0][0] == telegram.requests[1][0]
+    assert list(telegram.delivered.values())[0]["to"] == "4242"
+
+    # Moving tomorrow's shift by two hours adds an SMS; a 10-minute nudge sends nothing.
+    moved = app.put(
+        f"/api/v1/planning/assignments/{assignment['id']}",
+        headers=headers,
+        json={"startsAt": (tomorrow + timedelta(hours=2)).isoformat()},
+    )
+    assert moved.status_code == 200, moved.text
+    span = f"{tomorrow + timedelta(hours=2):%Y%m%d%H%M}:{tomorrow + timedelta(hours=8):%Y%m%d%H%M}"
+    changed = _settled(app, headers, f"assignment.rescheduled:{assignment['id']}:{span}", 2)
+    assert [(row["channel"], row["status"]) for row in changed] == [("email", "sent"), ("sms", "sent")]
+    assert list(sms.delivered.values())[0]["text"].startswith("Changement horaire: Concert")
+    before = len(app.get("/api/v1/notifications/", headers=headers).json())
+    app.put(
+        f"/api/v1/planning/assignments/{assignment['id']}",
+        headers=headers,
+        json={"startsAt": (tomorrow + timedelta(hours=2, minutes=10)).isoformat()},
+    )
+    assert len(app.get("/api/v1/notifications/", headers=headers).json()) == before
+
+    # A retried request with the same idempotency key queues nothing new; a refused address fails for good.
+    message = {"userIds": [member["userId"], bounce["userId"]], "subject": "Brief", "body": "18h loge", "idempotencyKey": "brief-1"}
+    smtp.refuse.add("bounce@example.com")
+    first = app.post("/api/v1/notifications/", headers=headers, json=message)
+    assert first.status_code == 202 and len(first.json()) == 2
+    assert app.post("/api/v1/notifications/", headers=headers, json=message).json() == []
+    brief = _settled(app, headers, "message:brief-1", 2)
+    assert [(row["target"], row["status"], row["attempts"]) for row in brief] == [
+        ("bounce@example.com", "failed", 1),
+        ("tech@example.com", "sent", 1),
+    ]
+    assert "550" in brief[0]["error"]
+    assert sum(recipient == "tech@example.com" and b"Brief" in data for recipient, data in smtp.messages) == 1
+    assert smtp.connections == 1
+
+    assert app.get("/api/v1/notifications/", headers={"X-Session-Token": member["sessionToken"]}).status_code == 403
+    outsider = {**message, "userIds": ["unknown"], "idempotencyKey": "brief-2"}
+    assert app.post("/api/v1/notifications/", headers=headers, json=outsider).status_code == 404
+
+
+def test_assignment_messages_use_the_organisation_clock(app: TestClient) -> None:
+    owner = _register(app, email="rg@example.com", organization_slug="orbit")
+    member = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    app.put("/api/v1/notifications/contact", headers={"X-Session-Token": member["sessionToken"]}, json={"phone": "+33 6 12 34 56 78"})
+    assert app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Europe/Paris"}).status_code == 200
+    paris = ZoneInfo("Europe/Paris")
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 1}).json()
+    # 00:30 in Paris the day after tomorrow: still tomorrow in UTC, so no SMS on the organisation's clock.
+    local_start = datetime.combine(datetime.now(paris).date() + timedelta(days=2), datetime.min.time(), paris)
+    starts_at = (local_start + timedelta(minutes=30)).astimezone(timezone.utc).replace(tzinfo=None)
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "startsAt": (starts_at + timedelta(days=7)).isoformat(),
+            "endsAt": (starts_at + timedelta(days=7, hours=4)).isoformat(),
+        },
+    ).json()
+    assignment = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": member["userId"]}
+    ).json()
+    moved = app.put(
+        f"/api/v1/planning/assignments/{assignment['id']}",
+        headers=headers,
+        json={"startsAt": starts_at.isoformat(), "endsAt": (starts_at + timedelta(hours=4)).isoformat()},
+    )
+    assert moved.status_code == 200, moved.text
+
+    session = app.app.state.session_factory()
+    try:
+        created = session.scalar(select(Notification.payload).where(Notification.template == "assignment.created"))
+        changed = session.execute(
+            select(Notification.channel, Notification.payload).where(Notification.template == "assignment.rescheduled")
+        ).all()
+    finally:
+        session.close()
+    first = (starts_at + timedelta(days=7)).replace(tzinfo=timezone.utc).astimezone(paris)
+    assert created["starts"] == f"{first:%d/%m/%Y %H:%M}"
+    assert [channel for channel, _ in changed] == ["email"]
+    assert changed[0][1]["day"] == f"{local_start:%d/%m/%Y}"
+    assert changed[0][1]["starts"] == f"{local_start:%d/%m/%Y} 00:30"
+    assert changed[0][1]["previous"].startswith(f"{first:%d/%m/%Y %H:%M} - ")
+
+
+def test_pooled_gateway_replays_after_hang_up_and_stale_claims_are_released(app: TestClient) -> None:
+    gateway = _serve(FakeGateway(hang_up=True))
+    try:
+        provider = HttpProvider(gateway.url)
+        messages = [Message(key=f"k{index}", target="+33600000000", subject="", body=f"m{index}") for index in range(3)]
+        assert [delivery.ok for delivery in provider.send_batch(messages)] == [True] * 3
+        # Every reply hangs up silently: the stale connection is replaced and each message sent once.
+        assert sorted(gateway.delivered) == ["k0", "k1", "k2"] and provider.connections == 3
+        provider.close()
+    finally:
+        gateway.shutdown()
+        gateway.server_close()
+
+    keep_alive = _serve(FakeGateway())
+    try:
+        provider = HttpProvider(keep_alive.url)
+        assert all(delivery.ok for delivery in provider.send_batch(messages))
+        assert all(delivery.ok for delivery in provider.send_batch(messages[:1]))
+        assert provider.connections == keep_alive.connections == 1
+        provider.close()
+    finally:
+        keep_alive.shutdown()
+        keep_alive.server_close()
+
+    settings = app.app.state.settings
+    assert [backoff(settings, attempt).total_seconds() for attempt in (1, 2, 3)] == [0.05, 0.1, 0.2]
+    assert backoff(settings.model_copy(update={"notification_backoff_seconds": 60}), 20) == timedelta(hours=1)
+
+    # The running workers release stale claims themselves; stop them so the release below is the only one.
+    app.app.state.notifier.stop()
+    session = app.app.state.session_factory()
+    try:
+        owner = _register(app, email="rg@example.com", organization_slug="orbit")
+        row = Notification(
+            organization_id=owner["organizationId"],
+            event_id="crash",
+            idempotency_key="crash",
+            channel="sms",
+            target="+33600000000",
+            template="message",
+            payload={"subject": "", "body": "x"},
+            status=SENDING,
+            claimed_at=now_utc() - timedelta(minutes=10),
+        )
+        fresh = Notification(
+            organization_id=row.organization_id,
+            event_id="busy",
+            idempotency_key="busy",
+            channel="sms",
+            target="+33600000000",
+            template="message",
+            payload={"subject": "", "body": "x"},
+            status=SENDING,
+            claimed_at=now_utc(),
+        )
+        session.add_all([row, fresh])
+        session.commit()
+        # A worker that died mid-batch leaves its rows claimed; only claims past the lease go back to the queue.
+        assert release_stale_claims(session) == 1
+        session.refresh(row)
+        session.refresh(fresh)
+        assert (row.status, fresh.status) == ("queued", SENDING)
+    finally:
+        session.close()
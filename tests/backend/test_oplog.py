@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import ScheduledTrigger
+from backend.services import oplog
+from backend.services.jobs import job_registry
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _plan(client: TestClient, headers: dict[str, str]) -> tuple[dict, dict]:
+    template = client.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    mission = client.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-03T08:00:00", "endsAt": "2025-03-03T12:00:00"},
+    ).json()
+    return template, mission
+
+
+def _trigger_states(client: TestClient, assignment_id: str) -> set[str]:
+    with session_scope(client.app.state.session_factory) as session:
+        return set(session.scalars(select(ScheduledTrigger.status).where(ScheduledTrigger.assignment_id == assignment_id)))
+
+
+def test_undo_redo_replays_inverse_deltas(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    _, mission = _plan(app, headers)
+    assignment = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]}
+    ).json()
+    app.post(
+        f"/api/v1/planning/assignments/{assignment['id']}/move",
+        headers=headers,
+        json={"startsAt": "2025-03-03T09:00:00", "endsAt": "2025-03-03T13:00:00"},
+    )
+
+    log = app.get("/api/v1/planning/log", headers=headers).json()
+    assert [entry["kind"] for entry in log] == ["mission.create", "assignment.create", "assignment.move"]
+    assert log[2]["changes"][0]["before"]["starts_at"] == "2025-03-03T08:00:00"
+
+    undone = app.post("/api/v1/planning/undo", headers=headers)
+    assert undone.status_code == 200, undone.text
+    assert (undone.json()["kind"], undone.json()["targetSequence"]) == ("undo", 3)
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert week["rows"][0]["crew"][0]["startsAt"] == "2025-03-03T08:00:00"
+
+    app.post("/api/v1/planning/undo", headers=headers)
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert week["rows"][0]["crew"] == []
+    assert _trigger_states(app, assignment["id"]) == {"cancelled"}
+
+    redone = app.post("/api/v1/planning/redo", headers=headers)
+    assert redone.json()["targetSequence"] == 2
+    assert _trigger_states(app, assignment["id"]) == {"pending"}
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert [member["assignmentId"] for member in week["rows"][0]["crew"]] == [assignment["id"]]
+
+    app.put(f"/api/v1/planning/missions/{mission['id']}", headers=headers, json={"notes": "Quai B"})
+    assert app.post("/api/v1/planning/redo", headers=headers).status_code == 409
+
+    assert app.delete(f"/api/v1/planning/missions/{mission['id']}", headers=headers).status_code == 204
+    assert app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()["rows"] == []
+    app.post("/api/v1/planning/undo", headers=headers)
+    restored = app.get(f"/api/v1/planning/missions/{mission['id']}", headers=headers).json()
+    assert restored["notes"] == "Quai B"
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert [member["assignmentId"] for member in week["rows"][0]["crew"]] == [assignment["id"]]
+
+    cursor = app.put("/api/v1/planning/log/cursors/ics", headers=headers, json={"sequence": 7})
+    assert cursor.json() == {"consumer": "ics", "sequence": 7}
+    assert app.put("/api/v1/planning/log/cursors/ics", headers=headers, json={"sequence": 2}).status_code == 409
+    tail = app.get("/api/v1/planning/log", headers=headers, params={"after": 7}).json()
+    assert [entry["kind"] for entry in tail] == ["mission.delete", "undo"]
+    with session_scope(app.app.state.session_factory) as session:
+        pending = oplog.consume(session, owner["organizationId"], "ics")
+        assert [entry.sequence for entry in pending] == [8, 9]
+
+
+def test_snapshots_compact_the_log_and_replay_matches(app: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(oplog, "SNAPSHOT_EVERY", 5)
+    monkeypatch.setattr(oplog, "UNDO_DEPTH", 3)
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    _, mission = _plan(app, headers)
+    assignment = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]}
+    ).json()
+    for hour in range(9, 21):
+        app.post(
+            f"/api/v1/planning/assignments/{assignment['id']}/move",
+            headers=headers,
+            json={"startsAt": f"2025-03-03T{hour:02d}:00:00", "endsAt": f"2025-03-03T{hour + 1:02d}:00:00"},
+        )
+        # Snapshots run on the job pool once the crossing write commits.
+        for job in job_registry.jobs(oplog.SNAPSHOT_JOB_KIND):
+            assert job_registry.wait(job.id).error is None
+
+    organization_id = owner["organizationId"]
+    with session_scope(app.app.state.session_factory) as session:
+        assert oplog.log_version(session, organization_id) == 14
+        retained = oplog.read_operations(session, organization_id, after=10)
+        assert [entry.sequence for entry in retained] == [11, 12, 13, 14]
+        with pytest.raises(oplog.DomainError):
+            oplog.read_operations(session, organization_id, after=0)
+        assert oplog.replay(session, organization_id) == oplog.current_state(session, organization_id)
+        at_twelve = oplog.replay(session, organization_id, upto=12)
+        assert at_twelve["assignment"][assignment["id"]]["starts_at"] == "2025-03-03T18:00:00"
+
+    for _ in range(3):
+        assert app.post("/api/v1/planning/undo", headers=headers).status_code == 200
+    moved = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert moved["rows"][0]["crew"][0]["startsAt"] == "2025-03-03T17:00:00"
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import PayrollPolicy, Timesheet
+from backend.rbac import Role
+from backend.services.payroll import PayrollBatch, PayrollRules, _weekly_overtime, compute_payroll
+from backend.services.timesheets import epoch_minutes
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _rules(**overrides: int) -> PayrollRules:
+    policy = PayrollPolicy(
+        night_premium_pct=25,
+        weekend_premium_pct=0,
+        holiday_premium_pct=100,
+        overtime_after_minutes=35 * 60,
+        overtime_premium_pct=25,
+        overtime_high_after_minutes=43 * 60,
+        overtime_high_premium_pct=50,
+        meal_after_minutes=360,
+        meal_allowance_cents=500,
+        transport_allowance_cents=300,
+    )
+    for field, value in overrides.items():
+        setattr(policy, field, value)
+    return PayrollRules.compile(policy)
+
+
+def _batch(
+    person: list[int],
+    project: list[int],
+    starts: list[datetime],
+    minutes: list[int],
+    *,
+    night: list[int],
+    holiday: list[bool],
+    hourly_cents: list[int],
+    cachet_cents: list[int],
+) -> PayrollBatch:
+    person_array = np.array(person, dtype=np.int64)
+    cachet = np.array(cachet_cents, dtype=np.int64)[person_array]
+    return PayrollBatch(
+        person_ids=[f"p{index}" for index in range(len(hourly_cents))],
+        project_ids=[f"j{index}" for index in range(max(project) + 1)],
+        person=person_array,
+        project=np.array(project, dtype=np.int64),
+        start=epoch_minutes(starts),
+        minutes=np.array(minutes, dtype=np.int64),
+        night_minutes=np.array(night, dtype=np.int64),
+        weekend=np.zeros(len(minutes), dtype=bool),
+        holiday=np.array(holiday, dtype=bool),
+        work_day=np.array([start.date() for start in starts], dtype="datetime64[D]").astype(np.int64),
+        hourly_cents=np.array(hourly_cents, dtype=np.int64)[person_array],
+        cachet_cents=cachet,
+        cachet=cachet > 0,
+    )
+
+
+def test_engine_prices_premiums_weekly_overtime_and_cachets() -> None:
+    monday = datetime(2025, 3, 3, 8)
+    starts = [monday + timedelta(days=day) for day in range(5)] + [monday + timedelta(days=7), monday]
+    batch = _batch(
+        [0, 0, 0, 0, 0, 0, 1],
+        [0, 0, 0, 1, 1, 1, 1],
+        # listed out of order: the running weekly total follows start times
+        [starts[4], starts[1], starts[2], starts[3], starts[0], starts[5], starts[6]],
+        [540, 540, 540, 540, 540, 540, 300],
+        night=[0, 0, 0, 0, 60, 0, 60],
+        holiday=[False] * 6 + [True],
+        hourly_cents=[1200, 0],
+        cachet_cents=[0, 15000],
+    )
+    result = compute_payroll(batch, _rules())
+
+    # Friday closes a 45 h week: 420 min past 35 h and 120 min past 43 h.
+    assert result.lines["overtime_premium"].tolist() == [3300, 0, 0, 300, 0, 0, 0]
+    assert result.lines["base"].tolist() == [10800] * 6 + [15000]
+    assert result.lines["night_premium"].tolist() == [0, 0, 0, 0, 300, 0, 0]
+    assert result.lines["holiday_premium"].tolist() == [0] * 7
+    assert result.lines["allowances"].tolist() == [800] * 6 + [300]
+    assert result.per_person["gross"].tolist() == [64800 + 3600 + 300 + 4800, 15300]
+    assert result.per_project["gross"].tolist() == [10800 * 3 + 3300 + 2400, 10800 * 3 + 300 + 300 + 2400 + 15300]
+    assert result.person_minutes.tolist() == [3240, 300]
+
+
+def test_payroll_benchmark_ten_thousand_lines() -> None:
+    generator = np.random.default_rng(7)
+    size, people = 10_000, 400
+    person = generator.integers(0, people, size)
+    day = generator.integers(20_000, 20_060, size)
+    minutes = generator.integers(60, 720, size)
+    cachet_people = generator.random(people) < 0.2
+    batch = PayrollBatch(
+        person_ids=[f"p{index}" for index in range(people)],
+        project_ids=[f"j{index}" for index in range(50)],
+        person=person,
+        project=generator.integers(0, 50, size),
+        start=day * 1440 + generator.integers(0, 1440, size),
+        minutes=minutes,
+        night_minutes=generator.integers(0, 60, size),
+        weekend=generator.random(size) < 0.3,
+        holiday=generator.random(size) < 0.05,
+        work_day=day,
+        hourly_cents=generator.integers(1100, 3000, people)[person],
+        cachet_cents=np.where(cachet_people, 20000, 0)[person],
+        cachet=cachet_people[person],
+    )
+    rules = _rules(weekend_premium_pct=10)
+
+    started = time.perf_counter()
+    result = compute_payroll(batch, rules)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.1
+    assert result.per_person["gross"].sum() == result.lines["gross"].sum() == result.per_project["gross"].sum()
+    first, high = _weekly_overtime(batch, rules)
+    week = (day + 3) // 7
+    for index in generator.choice(size, 25, replace=False):
+        same = (person == person[index]) & (week == week[index]) & (batch.start <= batch.start[index])
+        cumulative = int(minutes[same].sum())
+        expected = min(max(cumulative - rules.overtime_after, 0), int(minutes[index]))
+        assert int(first[index] + high[index]) == expected
+
+
+def test_validation_rates_and_period_summary(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    tech_headers = {"X-Session-Token": tech["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-03T09:00:00", "endsAt": "2025-03-03T17:00:00"},
+    ).json()
+    for person in (owner, tech):
+        app.post(
+            f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": person["userId"]}
+        )
+    app.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-01", "periodEnd": "2025-04-01"})
+    with session_scope(app.app.state.session_factory) as session:
+        late = session.scalars(select(Timesheet).where(Timesheet.user_id == tech["userId"])).one()
+        late.actual_start, late.actual_end = datetime(2025, 3, 3, 9, 30), datetime(2025, 3, 3, 17)
+        ids = list(session.scalars(select(Timesheet.id)))
+
+    query = {"start": "2025-03-01", "end": "2025-04-01"}
+    assert app.get("/api/v1/payroll/summary", headers=headers, params=query).json()["lines"] == 0
+    assert app.post("/api/v1/timesheets/validate", headers=tech_headers, json={"timesheetIds": ids}).status_code == 403
+    unjustified = app.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids})
+    assert unjustified.status_code == 422
+    assert app.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ["nope"]}).status_code == 404
+    validated = app.post(
+        "/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids, "justification": "Retard train"}
+    )
+    assert validated.status_code == 200, validated.text
+    assert {sheet["status"] for sheet in validated.json()} == {"validated"}
+
+    unpriced = app.get("/api/v1/payroll/summary", headers=headers, params=query)
+    assert unpriced.status_code == 422
+    assert unpriced.json()["detail"] == "No pay rate set for owner@example.com, tech@example.com"
+    assert app.put(
+        f"/api/v1/payroll/rates/{owner['userId']}", headers=headers, json={"hourlyRateCents": 1200}
+    ).status_code == 200
+    assert app.post("/api/v1/payroll/closes", headers=headers, json={"month": "2025-03-01"}).status_code == 422
+    assert app.put(
+        f"/api/v1/payroll/rates/{tech['userId']}", headers=headers, json={"mode": "cachet"}
+    ).status_code == 422
+    app.put(f"/api/v1/payroll/rates/{tech['userId']}", headers=headers, json={"mode": "cachet", "cachetCents": 15000})
+    assert len(app.get("/api/v1/payroll/rates", headers=headers).json()) == 2
+    assert app.get("/api/v1/payroll/summary", headers=tech_headers, params=query).status_code == 403
+    assert app.get(
+        "/api/v1/payroll/summary", headers=headers, params={"start": "2025-03-01", "end": "2025-06-01"}
+    ).status_code == 422
+
+    summary = app.get("/api/v1/payroll/summary", headers=headers, params=query).json()
+    people = {row["key"]: row for row in summary["people"]}
+    # clocked span 09:30-17:00 minus the 20 minute break
+    assert people[tech["userId"]]["minutes"] == 430
+    assert people[tech["userId"]]["amounts"]["gross"] == 15000
+    assert people[owner["userId"]]["amounts"]["base"] == 460 * 20
+    assert summary["totals"]["gross"] == 24200
+    assert [(row["key"], row["minutes"]) for row in summary["projects"]] == [(None, 890)]
+
+    policy = app.put("/api/v1/payroll/policy", headers=headers, json={"mealAllowanceCents": 500})
+    assert policy.json()["mealAllowanceCents"] == 500
+    assert app.put(
+        "/api/v1/payroll/policy", headers=headers, json={"overtimeHighAfterMinutes": 60}
+    ).status_code == 422
+    summary = app.get("/api/v1/payroll/summary", headers=headers, params=query).json()
+    assert summary["totals"]["allowances"] == 1000 and summary["totals"]["gross"] == 25200
+
+
+def test_overtime_counts_the_week_before_the_period(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 1}).json()
+    # Monday 31 March and Tuesday 1 April share an ISO week across the month boundary.
+    for day in ("2025-03-31", "2025-04-01"):
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "startsAt": f"{day}T09:00:00", "endsAt": f"{day}T17:00:00"},
+        ).json()
+        app.post(f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]})
+    app.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-31", "periodEnd": "2025-04-02"})
+    with session_scope(app.app.state.session_factory) as session:
+        ids = list(session.scalars(select(Timesheet.id)))
+    assert app.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids}).status_code == 200
+    app.put(f"/api/v1/payroll/rates/{owner['userId']}", headers=headers, json={"hourlyRateCents": 1200})
+    app.put("/api/v1/payroll/policy", headers=headers, json={"overtimeAfterMinutes": 600})
+
+    march = app.get("/api/v1/payroll/summary", headers=headers, params={"start": "2025-03-01", "end": "2025-04-01"}).json()
+    april = app.get("/api/v1/payroll/summary", headers=headers, params={"start": "2025-04-01", "end": "2025-05-01"}).json()
+    assert (march["lines"], march["totals"]["overtimePremium"]) == (1, 0)
+    # 460 min on Monday carry into April: Tuesday runs from 460 to 920, 320 min past 10 h at 25 %.
+    assert (april["lines"], april["totals"]["overtimePremium"]) == (1, 320 * 20 // 4)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import delete, select
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import PayrollClose, PayrollSnapshotProject, Timesheet
+from backend.rbac import Role
+from backend.services import payroll_close
+from backend.services.jobs import job_registry
+from backend.services.payroll_close import claim_close, close_step, resume_payroll_closes
+
+
+@pytest.fixture()
+def app(tmp_path: Path) -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def test_interrupted_close_resumes_and_reports_read_snapshots(app: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    crew = [_invite(app, owner, email=f"tech{index}@example.com", role=Role.MEMBER) for index in range(3)]
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    project = app.post("/api/v1/projects/", headers=headers, json={"name": "Tournee"}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 4}).json()
+    for day, project_id in (("03", project["id"]), ("04", None), ("29", project["id"])):
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={
+                "templateId": template["id"],
+                "projectId": project_id,
+                "startsAt": f"2025-03-{day}T14:00:00",
+                "endsAt": f"2025-03-{day}T23:30:00",
+            },
+        ).json()
+        for person in [owner, *crew]:
+            app.post(
+                f"/api/v1/planning/missions/{mission['id']}/assignments",
+                headers=headers,
+                json={"userId": person["userId"]},
+            )
+    app.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-01", "periodEnd": "2025-04-01"})
+    with session_scope(app.app.state.session_factory) as session:
+        ids = list(session.scalars(select(Timesheet.id)))
+    app.post("/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids})
+    for index, person in enumerate([owner, *crew]):
+        app.put(f"/api/v1/payroll/rates/{person['userId']}", headers=headers, json={"hourlyRateCents": 1100 + index * 100})
+    query = {"start": "2025-03-01", "end": "2025-04-01"}
+    live = app.get("/api/v1/payroll/summary", headers=headers, params=query).json()
+    assert live["lines"] == 12 and live["totals"]["nightPremium"] > 0
+
+    assert app.post(
+        "/api/v1/payroll/closes", headers={"X-Session-Token": crew[0]["sessionToken"]}, json={"month": "2025-03-10"}
+    ).status_code == 403
+    # The first process dies after snapshotting two people, one chunk each.
+    monkeypatch.setattr(payroll_close, "_submit", lambda session_factory, close: job_registry.submit(
+        payroll_close.CLOSE_JOB_KIND, close.organization_id, lambda job: None
+    ))
+    started = app.post("/api/v1/payroll/closes", headers=headers, json={"month": "2025-03-10"})
+    assert started.status_code == 202, started.text
+    close_id = started.json()["id"]
+    assert (started.json()["periodStart"], started.json()["peopleTotal"]) == ("2025-03-01", 4)
+    with session_scope(app.app.state.session_factory) as session:
+        assert close_step(session, close_id, chunk_size=1) is False
+        assert close_step(session, close_id, chunk_size=1) is False
+        close = session.get(PayrollClose, close_id)
+        assert (close.status, close.people_done, close.lines) == ("running", 2, 6)
+        assert close.checkpoint is not None
+    assert app.post("/api/v1/payroll/closes", headers=headers, json={"month": "2025-03-01"}).status_code == 409
+    assert app.post(
+        "/api/v1/timesheets/validate", headers=headers, json={"timesheetIds": ids[:1]}
+    ).status_code == 409
+
+    # The rules were frozen at start: a later time zone change does not reach the remaining chunks.
+    zoned = app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Pacific/Auckland"})
+    assert zoned.status_code == 200, zoned.text
+
+    monkeypatch.undo()
+    # Another worker holds the close: restarting workers leave it alone until its lease lapses.
+    with session_scope(app.app.state.session_factory) as session:
+        assert claim_close(session, close_id) is not None and claim_close(session, close_id) is None
+    assert resume_payroll_closes(app.app.state.session_factory) == []
+    with session_scope(app.app.state.session_factory) as session:
+        session.get(PayrollClose, close_id).claimed_at -= payroll_close.CLOSE_LEASE
+    [job] = resume_payroll_closes(app.app.state.session_factory)
+    assert job_registry.wait(job.id, timeout=30).result == {"people": 4, "lines": 12}
+    closed = app.get(f"/api/v1/payroll/closes/{close_id}", headers=headers).json()
+    assert (closed["status"], closed["peopleDone"]) == ("closed", 4) and closed["closedAt"] is not None
+    assert [item["id"] for item in app.get("/api/v1/payroll/closes", headers=headers).json()] == [close_id]
+    assert app.post("/api/v1/payroll/closes", headers=headers, json={"month": "2025-03-01"}).status_code == 409
+    with session_scope(app.app.state.session_factory) as session:
+        projects = {row.project_key: row.lines for row in session.scalars(select(PayrollSnapshotProject))}
+        assert projects == {project["id"]: 8, "": 4}
+        # Reports for the closed month no longer need the timesheets at all.
+        session.execute(delete(Timesheet))
+
+    frozen = app.get("/api/v1/payroll/summary", headers=headers, params=query).json()
+    assert frozen == live
+    aem = app.post(
+        "/api/v1/documents/batches",
+        headers=headers,
+        json={"kind": "aem", "periodStart": "2025-03-01", "periodEnd": "2025-04-01"},
+    ).json()
+    assert job_registry.wait(aem["jobId"], timeout=30).result["documents"] == 4
+    assert app.get("/api/v1/payroll/summary", headers=headers, params={"start": "2025-03-01", "end": "2025-03-15"}).json()[
+        "lines"
+    ] == 0
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.rbac import Role
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(
+    client: TestClient,
+    *,
+    email: str,
+    password: str,
+    organization_name: str,
+    organization_slug: str,
+) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": password,
+            "organizationName": organization_name,
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    )
+    assert invitation.status_code == 201, invitation.text
+    acceptance = client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation.json()["token"], "email": email, "password": "MemberPass123!"},
+    )
+    assert acceptance.status_code == 200, acceptance.text
+    return acceptance.json()
+
+
+def _setup_catalogue(client: TestClient, owner: dict[str, str]) -> dict[str, str]:
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    venue = client.post("/api/v1/venues", headers=headers, json={"name": "Grand Theatre"}).json()
+    other_venue = client.post("/api/v1/venues", headers=headers, json={"name": "Club Delta"}).json()
+    tag = client.post("/api/v1/mission-tags", headers=headers, json={"slug": "son", "label": "Son"}).json()
+    template = client.post(
+        "/api/v1/mission-templates",
+        headers=headers,
+        json={
+            "name": "Montage",
+            "teamSize": 2,
+            "requiredSkills": ["rigging"],
+            "defaultStartTime": "08:00:00",
+            "defaultEndTime": "12:00:00",
+            "defaultVenueId": venue["id"],
+            "tagIds": [tag["id"]],
+        },
+    )
+    assert template.status_code == 201, template.text
+    return {
+        "venue": venue["id"],
+        "other_venue": other_venue["id"],
+        "tag": tag["id"],
+        "template": template.json()["id"],
+    }
+
+
+def test_scheduled_mission_inherits_template_defaults(app: TestClient) -> None:
+    owner = _register(
+        app,
+        email="owner@example.com",
+        password="Password123!",
+        organization_name="Orbit",
+        organization_slug="orbit",
+    )
+    catalogue = _setup_catalogue(app, owner)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+
+    response = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "startsAt": "2025-03-03T08:00:00",
+            "endsAt": "2025-03-03T12:00:00",
+        },
+    )
+    assert response.status_code == 201, response.text
+    mission = response.json()
+    assert mission["venueId"] == catalogue["venue"]
+    assert mission["teamSize"] == 2
+    assert [tag["id"] for tag in mission["tags"]] == [catalogue["tag"]]
+
+    listing = app.get(
+        "/api/v1/planning/missions",
+        headers=headers,
+        params={"start": "2025-03-03T00:00:00", "end": "2025-03-04T00:00:00"},
+    )
+    assert listing.status_code == 200
+    assert [item["id"] for item in listing.json()] == [mission["id"]]
+
+    invalid = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "startsAt": "2025-03-03T12:00:00",
+            "endsAt": "2025-03-03T08:00:00",
+        },
+    )
+    assert invalid.status_code == 422
+
+
+def test_assignment_conflicts_per_person_and_venue(app: TestClient) -> None:
+    owner = _register(
+        app,
+        email="lead@example.com",
+        password="Password123!",
+        organization_name="Nova",
+        organization_slug="nova",
+    )
+    technician = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    catalogue = _setup_catalogue(app, owner)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+
+    first = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "startsAt": "2025-03-03T08:00:00",
+            "endsAt": "2025-03-03T12:00:00",
+        },
+    ).json()
+    second = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "venueId": catalogue["venue"],
+            "startsAt": "2025-03-03T11:00:00",
+            "endsAt": "2025-03-03T15:00:00",
+        },
+    ).json()
+
+    assigned = app.post(
+        f"/api/v1/planning/missions/{first['id']}/assignments",
+        headers=headers,
+        json={"userId": technician["userId"]},
+    )
+    assert assigned.status_code == 201, assigned.text
+    assert assigned.json()["conflicts"] == []
+
+    duplicate = app.post(
+        f"/api/v1/planning/missions/{first['id']}/assignments",
+        headers=headers,
+        json={"userId": technician["userId"]},
+    )
+    assert duplicate.status_code == 409
+
+    double_booked = app.post(
+        f"/api/v1/planning/missions/{second['id']}/assignments",
+        headers=headers,
+        json={"userId": technician["userId"]},
+    )
+    assert double_booked.status_code == 201
+    conflicts = double_booked.json()["conflicts"]
+    assert len(conflicts) == 1
+    assert conflicts[0]["kind"] == "person"
+    assert conflicts[0]["overlapStart"] == "2025-03-03T11:00:00"
+    assert conflicts[0]["overlapEnd"] == "2025-03-03T12:00:00"
+
+    report = app.get(
+        "/api/v1/planning/conflicts",
+        headers=headers,
+        params={"weekStart": "2025-03-03"},
+    )
+    assert report.status_code == 200
+    kinds = sorted(conflict["kind"] for conflict in report.json()["conflicts"])
+    assert kinds == ["person", "venue"]
+
+    moved = app.put(
+        f"/api/v1/planning/assignments/{double_booked.json()['id']}",
+        headers=headers,
+        json={"startsAt": "2025-03-03T12:00:00"},
+    )
+    assert moved.status_code == 200
+    assert moved.json()["conflicts"] == []
+
+    shifted = app.put(
+        f"/api/v1/planning/missions/{second['id']}",
+        headers=headers,
+        json={"startsAt": "2025-03-03T16:00:00", "endsAt": "2025-03-03T20:00:00", "venueId": catalogue["other_venue"]},
+    )
+    assert shifted.status_code == 200
+    report = app.get(
+        "/api/v1/planning/conflicts",
+        headers=headers,
+        params={"weekStart": "2025-03-03"},
+    )
+    assert report.json()["conflicts"] == []
+
+    removed = app.delete(
+        f"/api/v1/planning/assignments/{assigned.json()['id']}",
+        headers=headers,
+    )
+    assert removed.status_code == 204
+    deleted = app.delete(f"/api/v1/planning/missions/{second['id']}", headers=headers)
+    assert deleted.status_code == 204
+
+
+def test_planning_permissions_and_membership(app: TestClient) -> None:
+    owner = _register(
+        app,
+        email="boss@example.com",
+        password="Password123!",
+        organization_name="Gamma",
+        organization_slug="gamma",
+    )
+    outsider = _register(
+        app,
+        email="outsider@example.com",
+        password="Password123!",
+        organization_name="Other",
+        organization_slug="other",
+    )
+    viewer = _invite(app, owner, email="viewer@example.com", role=Role.VIEWER)
+    catalogue = _setup_catalogue(app, owner)
+
+    forbidden = app.post(
+        "/api/v1/planning/missions",
+        headers={"X-Session-Token": viewer["sessionToken"]},
+        json={
+            "templateId": catalogue["template"],
+            "startsAt": "2025-03-03T08:00:00",
+            "endsAt": "2025-03-03T12:00:00",
+        },
+    )
+    assert forbidden.status_code == 403
+
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={
+            "templateId": catalogue["template"],
+            "startsAt": "2025-03-03T08:00:00",
+            "endsAt": "2025-03-03T12:00:00",
+        },
+    ).json()
+
+    not_member = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"userId": outsider["userId"]},
+    )
+    assert not_member.status_code == 404
+
+    hidden = app.get(
+        f"/api/v1/planning/missions/{mission['id']}",
+        headers={"X-Session-Token": outsider["sessionToken"]},
+    )
+    assert hidden.status_code == 404
+
+    visible = app.get(
+        f"/api/v1/planning/missions/{mission['id']}",
+        headers={"X-Session-Token": viewer["sessionToken"]},
+    )
+    assert visible.status_code == 200
+
+
+def test_move_assignment_returns_conflict_delta(app: TestClient) -> None:
+    owner = _register(
+        app,
+        email="planner@example.com",
+        password="Password123!",
+        organization_name="Delta",
+        organization_slug="delta",
+    )
+    technician = _invite(app, owner, email="rigger@example.com", role=Role.MEMBER)
+    catalogue = _setup_catalogue(app, owner)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+
+    missions = []
+    for start, end, venue in [
+        ("2025-03-03T08:00:00", "2025-03-03T12:00:00", catalogue["venue"]),
+        ("2025-03-03T14:00:00", "2025-03-03T18:00:00", catalogue["other_venue"]),
+    ]:
+        missions.append(
+            app.post(
+                "/api/v1/planning/missions",
+                headers=headers,
+                json={"templateId": catalogue["template"], "venueId": venue, "startsAt": start, "endsAt": end},
+            ).json()
+        )
+    assignments = [
+        app.post(
+            f"/api/v1/planning/missions/{mission['id']}/assignments",
+            headers=headers,
+            json={"userId": technician["userId"]},
+        ).json()
+        for mission in missions
+    ]
+
+    warm = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"})
+    assert warm.json()["conflicts"] == []
+
+    dropped = app.post(
+        f"/api/v1/planning/assignments/{assignments[1]['id']}/move",
+        headers=headers,
+        json={"startsAt": "2025-03-03T10:00:00", "endsAt": "2025-03-03T14:00:00"},
+    )
+    assert dropped.status_code == 200, dropped.text
+    delta = dropped.json()
+    assert [conflict["kind"] for conflict in delta["added"]] == ["person"]
+    assert delta["resolved"] == []
+    assert len(delta["assignment"]["conflicts"]) == 1
+
+    cached = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"})
+    assert len(cached.json()["conflicts"]) == 1
+
+    next_week = app.post(
+        f"/api/v1/planning/assignments/{assignments[1]['id']}/move",
+        headers=headers,
+        json={"startsAt": "2025-03-10T10:00:00", "endsAt": "2025-03-10T14:00:00"},
+    )
+    assert next_week.status_code == 200
+    assert next_week.json()["added"] == []
+    assert len(next_week.json()["resolved"]) == 1
+
+    after = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"})
+    assert after.json()["conflicts"] == []
+
+    invalid = app.post(
+        f"/api/v1/planning/assignments/{assignments[1]['id']}/move",
+        headers=headers,
+        json={"startsAt": "2025-03-10T14:00:00", "endsAt": "2025-03-10T10:00:00"},
+    )
+    assert invalid.status_code == 422
+
+
+def test_bulk_instantiation_across_venues_and_dates(app: TestClient) -> None:
+    owner = _register(
+        app,
+        email="owner@example.com",
+        password="Password123!",
+        organization_name="Orbit",
+        organization_slug="orbit",
+    )
+    catalogue = _setup_catalogue(app, owner)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    existing = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": catalogue["template"], "startsAt": "2025-03-04T10:00:00", "endsAt": "2025-03-04T11:00:00"},
+    ).json()
+
+    response = app.post(
+        "/api/v1/planning/missions/bulk",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "venueIds": [catalogue["venue"], catalogue["other_venue"]],
+            "dates": ["2025-03-05", "2025-03-03", "2025-03-04", "2025-03-03"],
+        },
+    )
+    assert response.status_code == 201, response.text
+    batch = response.json()
+    assert batch["created"] == 6
+    assert {(mission["startsAt"], mission["endsAt"]) for mission in batch["missions"]} == {
+        (f"2025-03-0{day}T08:00:00", f"2025-03-0{day}T12:00:00") for day in (3, 4, 5)
+    }
+    assert all(mission["teamSize"] == 2 for mission in batch["missions"])
+    assert all([tag["id"] for tag in mission["tags"]] == [catalogue["tag"]] for mission in batch["missions"])
+    [conflict] = batch["conflicts"]
+    assert conflict["kind"] == "venue"
+    assert existing["id"] in (conflict["firstId"], conflict["secondId"])
+
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert len(week["rows"]) == 7
+
+    unknown = app.post(
+        "/api/v1/planning/missions/bulk",
+        headers=headers,
+        json={"templateId": catalogue["template"], "venueIds": [catalogue["venue"], "missing"], "dates": ["2025-03-10"]},
+    )
+    assert unknown.status_code == 404
+    overridden = app.post(
+        "/api/v1/planning/missions/bulk",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "venueIds": [catalogue["venue"]],
+            "dates": ["2025-03-10"],
+            "startTime": "14:00:00",
+            "endTime": "09:00:00",
+        },
+    )
+    assert overridden.status_code == 422
+    listing = app.get(
+        "/api/v1/planning/missions",
+        headers=headers,
+        params={"start": "2025-03-10T00:00:00", "end": "2025-03-11T00:00:00"},
+    )
+    assert listing.json() == []
+
+    # Template times are the organisation's wall clock: 08:00 in Paris is 07:00 UTC before the DST switch, 06:00 after.
+    assert app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Europe/Paris"}).status_code == 200
+    paris = app.post(
+        "/api/v1/planning/missions/bulk",
+        headers=headers,
+        json={"templateId": catalogue["template"], "venueIds": [catalogue["venue"]], "dates": ["2025-03-29", "2025-03-31"]},
+    )
+    assert paris.status_code == 201, paris.text
+    assert sorted((mission["startsAt"], mission["endsAt"]) for mission in paris.json()["missions"]) == [
+        ("2025-03-29T07:00:00", "2025-03-29T11:00:00"),
+        ("2025-03-31T06:00:00", "2025-03-31T10:00:00"),
+    ]
+    # 02:30-03:00 is a valid span on the 29th but not on the 30th, when 02:30 falls in the DST gap.
+    gap = app.post(
+        "/api/v1/planning/missions/bulk",
+        headers=headers,
+        json={
+            "templateId": catalogue["template"],
+            "venueIds": [catalogue["venue"]],
+            "dates": ["2025-03-29", "2025-03-30"],
+            "startTime": "02:30:00",
+            "endTime": "03:00:00",
+        },
+    )
+    assert gap.status_code == 422
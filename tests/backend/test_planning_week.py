@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import Assignment, MissionTemplate, ScheduledMission, User, UserOrganization, Venue
+from backend.rbac import Role
+from backend.services.planning_week import refresh_week_rows
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_week_read_model_tracks_planning_writes(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    venue = app.post("/api/v1/venues", headers=headers, json={"name": "Studio"}).json()
+    tag = app.post("/api/v1/mission-tags", headers=headers, json={"slug": "lumiere", "label": "Lumiere"}).json()
+    template = app.post(
+        "/api/v1/mission-templates",
+        headers=headers,
+        json={"name": "Montage", "teamSize": 3, "defaultVenueId": venue["id"], "tagIds": [tag["id"]]},
+    ).json()
+
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-09T20:00:00", "endsAt": "2025-03-10T02:00:00"},
+    ).json()
+    assignment = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments",
+        headers=headers,
+        json={"userId": owner["userId"]},
+    ).json()
+
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-05"})
+    assert week.status_code == 200, week.text
+    payload = week.json()
+    assert payload["weekStart"] == "2025-03-03"
+    [row] = payload["rows"]
+    assert row["templateName"] == "Montage"
+    assert row["venueName"] == "Studio"
+    assert row["tags"] == ["lumiere"]
+    assert row["teamSize"] == 3
+    assert [member["email"] for member in row["crew"]] == ["owner@example.com"]
+
+    following = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-10"}).json()
+    assert [item["missionId"] for item in following["rows"]] == [mission["id"]]
+
+    app.put(f"/api/v1/venues/{venue['id']}", headers=headers, json={"name": "Grand Studio"})
+    app.post(
+        f"/api/v1/planning/assignments/{assignment['id']}/move",
+        headers=headers,
+        json={"startsAt": "2025-03-09T21:00:00", "endsAt": "2025-03-10T01:00:00"},
+    )
+    row = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()["rows"][0]
+    assert row["venueName"] == "Grand Studio"
+    assert row["crew"][0]["startsAt"] == "2025-03-09T21:00:00"
+
+    app.delete(f"/api/v1/planning/assignments/{assignment['id']}", headers=headers)
+    row = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()["rows"][0]
+    assert row["crew"] == []
+
+    app.put(
+        f"/api/v1/planning/missions/{mission['id']}",
+        headers=headers,
+        json={"startsAt": "2025-03-04T08:00:00", "endsAt": "2025-03-04T12:00:00"},
+    )
+    following = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-10"}).json()
+    assert following["rows"] == []
+
+    app.delete(f"/api/v1/planning/missions/{mission['id']}", headers=headers)
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert week["rows"] == []
+
+
+def test_week_read_benchmark_p95_under_budget(app: TestClient) -> None:
+    """Spec NFR: p95 < 200 ms reading a week of 100 people x 5 missions."""
+
+    owner = _register(app, email="bench@example.com", organization_slug="bench")
+    organization_id = owner["organizationId"]
+    monday = datetime(2025, 3, 3)
+
+    with session_scope(app.app.state.session_factory) as session:
+        venue = Venue(organization_id=organization_id, name="Arena")
+        template = MissionTemplate(organization_id=organization_id, name="Explo", team_size=5)
+        session.add_all([venue, template])
+        people = []
+        for number in range(100):
+            user = User(email=f"tech{number}@example.com", hashed_password="x")
+            session.add(user)
+            session.add(UserOrganization(user=user, organization_id=organization_id, role=Role.MEMBER))
+            people.append(user)
+        session.flush()
+
+        missions = []
+        for number in range(100):
+            start = monday + timedelta(days=number % 5, hours=8 + 2 * (number // 5 % 5))
+            mission = ScheduledMission(
+                organization_id=organization_id,
+                template_id=template.id,
+                venue_id=venue.id,
+                starts_at=start,
+                ends_at=start + timedelta(hours=2),
+                team_size=5,
+            )
+            session.add(mission)
+            missions.append(mission)
+        session.flush()
+        for number, mission in enumerate(missions):
+            for seat in range(5):
+                person = people[(number * 5 + seat) % 100]
+                session.add(
+                    Assignment(
+                        organization_id=organization_id,
+                        mission_id=mission.id,
+                        user_id=person.id,
+                        starts_at=mission.starts_at,
+                        ends_at=mission.ends_at,
+                    )
+                )
+        refresh_week_rows(session, [mission.id for mission in missions])
+
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    timings = []
+    for _ in range(40):
+        started = time.perf_counter()
+        response = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"})
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    assert len(response.json()["rows"]) == 100
+    assert sum(len(row["crew"]) for row in response.json()["rows"]) == 500
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    assert p95 < 0.2
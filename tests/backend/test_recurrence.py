@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import itertools
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.services.recurrence import OccurrenceOverride, RecurrenceRule, Series
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_daily_rule_jumps_to_window_and_stops_on_count() -> None:
+    first = datetime(2025, 1, 1, 9)
+    rule = RecurrenceRule("daily", interval=2)
+    starts = list(itertools.islice(rule.starts(first, datetime(2030, 1, 1)), 2))
+    assert starts[0] == (913, datetime(2030, 1, 1, 9))
+    assert starts[1] == (914, datetime(2030, 1, 3, 9))
+
+    bounded = RecurrenceRule("daily", count=3)
+    assert [start.day for _, start in bounded.starts(first, first)] == [1, 2, 3]
+
+
+def test_weekly_rule_on_several_weekdays_respects_until() -> None:
+    first = datetime(2025, 3, 4, 18)  # Tuesday
+    rule = RecurrenceRule("weekly", interval=2, weekdays=(1, 3), until=date(2025, 3, 20))
+    assert list(rule.starts(first, first)) == [
+        (0, datetime(2025, 3, 4, 18)),
+        (1, datetime(2025, 3, 6, 18)),
+        (2, datetime(2025, 3, 18, 18)),
+        (3, datetime(2025, 3, 20, 18)),
+    ]
+    assert list(rule.starts(first, datetime(2025, 3, 7)))[0] == (2, datetime(2025, 3, 18, 18))
+
+
+def test_weekly_rule_keeps_the_local_time_across_dst() -> None:
+    paris = ZoneInfo("Europe/Paris")
+    # Thursdays 20:00 in Paris: 19:00 UTC in winter, 18:00 UTC once DST starts on 30 March, and back in October.
+    first = datetime(2025, 3, 20, 19)
+    rule = RecurrenceRule("weekly")
+    assert [start for _, start in itertools.islice(rule.starts(first, first, paris), 3)] == [
+        datetime(2025, 3, 20, 19),
+        datetime(2025, 3, 27, 19),
+        datetime(2025, 4, 3, 18),
+    ]
+    # Jumping to a window far after the first week lands on the right occurrence and index.
+    assert next(rule.starts(first, datetime(2025, 10, 27), paris)) == (32, datetime(2025, 10, 30, 19))
+    # A Monday 00:30 in Paris is a Sunday in UTC: weekdays and ``until`` are read locally.
+    late = RecurrenceRule("weekly", weekdays=(0,), until=date(2025, 3, 17))
+    assert list(late.starts(datetime(2025, 3, 9, 23, 30), datetime(2025, 3, 1), paris)) == [
+        (0, datetime(2025, 3, 9, 23, 30)),
+        (1, datetime(2025, 3, 16, 23, 30)),
+    ]
+
+
+def test_series_expansion_applies_exceptions_in_start_order() -> None:
+    first = datetime(2025, 3, 3, 8)
+    series = Series(
+        mission_id="m",
+        starts_at=first,
+        ends_at=first + timedelta(hours=4),
+        rule=RecurrenceRule("daily"),
+        overrides={
+            datetime(2025, 3, 4, 8): OccurrenceOverride(cancelled=True),
+            datetime(2025, 3, 5, 8): OccurrenceOverride(
+                starts_at=datetime(2025, 3, 6, 14), ends_at=datetime(2025, 3, 6, 16)
+            ),
+        },
+    )
+    occurrences = list(series.expand(datetime(2025, 3, 3), datetime(2025, 3, 8)))
+    assert [(item.starts_at.day, item.starts_at.hour, item.moved) for item in occurrences] == [
+        (6, 8, False),
+        (6, 14, True),
+        (7, 8, False),
+    ]
+    assert occurrences[1].key == "m@20250305T0800"
+    assert next(series.expand(datetime(2025, 3, 3), datetime(2025, 3, 4), include_first=True)).index == 0
+
+
+def test_recurring_mission_feeds_week_reads_and_conflicts(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    venue = app.post("/api/v1/venues", headers=headers, json={"name": "Studio"}).json()
+    template = app.post(
+        "/api/v1/mission-templates",
+        headers=headers,
+        json={"name": "Répétition", "teamSize": 2, "defaultVenueId": venue["id"]},
+    ).json()
+    weekly = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-03T09:00:00", "endsAt": "2025-03-03T12:00:00"},
+    ).json()
+    app.post(
+        f"/api/v1/planning/missions/{weekly['id']}/assignments",
+        headers=headers,
+        json={"userId": owner["userId"], "startsAt": "2025-03-03T10:00:00", "endsAt": "2025-03-03T12:00:00"},
+    )
+
+    invalid = app.put(
+        f"/api/v1/planning/missions/{weekly['id']}/recurrence",
+        headers=headers,
+        json={"frequency": "weekly", "weekdays": [2]},
+    )
+    assert invalid.status_code == 422
+    recurrence = app.put(
+        f"/api/v1/planning/missions/{weekly['id']}/recurrence",
+        headers=headers,
+        json={"frequency": "weekly", "weekdays": [0, 2], "count": 6},
+    )
+    assert recurrence.status_code == 200, recurrence.text
+    assert recurrence.json()["weekdays"] == [0, 2]
+
+    later = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-10"}).json()
+    assert [(row["startsAt"], row["occurrenceStart"]) for row in later["rows"]] == [
+        ("2025-03-10T09:00:00", "2025-03-10T09:00:00"),
+        ("2025-03-12T09:00:00", "2025-03-12T09:00:00"),
+    ]
+    assert later["rows"][0]["crew"][0]["startsAt"] == "2025-03-10T10:00:00"
+    first = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert [row["occurrenceStart"] for row in first["rows"]] == [None, "2025-03-05T09:00:00"]
+    beyond = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-24"}).json()
+    assert beyond["rows"] == []
+
+    clash = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-12T11:00:00", "endsAt": "2025-03-12T13:00:00"},
+    ).json()
+    app.post(f"/api/v1/planning/missions/{clash['id']}/assignments", headers=headers, json={"userId": owner["userId"]})
+    report = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-10"}).json()
+    assert sorted(conflict["kind"] for conflict in report["conflicts"]) == ["person", "venue"]
+    venue_conflict = next(conflict for conflict in report["conflicts"] if conflict["kind"] == "venue")
+    assert f"{weekly['id']}@20250312T0900" in (venue_conflict["firstId"], venue_conflict["secondId"])
+
+    moved = app.put(
+        f"/api/v1/planning/missions/{weekly['id']}/occurrences",
+        headers=headers,
+        json={"originalStart": "2025-03-12T09:00:00", "startsAt": "2025-03-13T09:00:00", "endsAt": "2025-03-13T12:00:00"},
+    )
+    assert moved.status_code == 200, moved.text
+    assert moved.json()["moved"] is True
+    report = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-10"}).json()
+    assert report["conflicts"] == []
+
+    cancelled = app.put(
+        f"/api/v1/planning/missions/{weekly['id']}/occurrences",
+        headers=headers,
+        json={"originalStart": "2025-03-10T09:00:00", "cancelled": True},
+    )
+    assert cancelled.json()["cancelled"] is True
+    occurrences = app.get(
+        f"/api/v1/planning/missions/{weekly['id']}/occurrences",
+        headers=headers,
+        params={"start": "2025-03-01T00:00:00", "end": "2025-04-01T00:00:00"},
+    ).json()
+    assert [item["startsAt"] for item in occurrences] == [
+        "2025-03-03T09:00:00",
+        "2025-03-05T09:00:00",
+        "2025-03-13T09:00:00",
+        "2025-03-17T09:00:00",
+        "2025-03-19T09:00:00",
+    ]
+
+    unknown = app.put(
+        f"/api/v1/planning/missions/{weekly['id']}/occurrences",
+        headers=headers,
+        json={"originalStart": "2025-03-11T09:00:00", "cancelled": True},
+    )
+    assert unknown.status_code == 404
+    restored = app.put(
+        f"/api/v1/planning/missions/{weekly['id']}/occurrences",
+        headers=headers,
+        json={"originalStart": "2025-03-10T09:00:00"},
+    )
+    assert restored.json()["cancelled"] is False
+
+    assert app.delete(f"/api/v1/planning/missions/{weekly['id']}/recurrence", headers=headers).status_code == 204
+    later = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-10"}).json()
+    assert [row["missionId"] for row in later["rows"]] == [clash["id"]]
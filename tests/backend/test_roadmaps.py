@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import re
+from datetime import date
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.rbac import Role
+from backend.services.jobs import job_registry
+from backend.services.roadmaps import DAY, load_inputs
+
+
+@pytest.fixture()
+def app(tmp_path: Path) -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def test_roadmaps_are_cached_by_content_hash_and_versioned(app: TestClient, tmp_path: Path) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    venue = app.post(
+        "/api/v1/venues/",
+        headers=headers,
+        json={"name": "Zenith", "address": "1 rue du Port", "city": "Lille", "notes": "Quai 3, badge a l'accueil"},
+    ).json()
+    project = app.post("/api/v1/projects/", headers=headers, json={"name": "Tournee", "venueIds": [venue["id"]]}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "venueId": venue["id"],
+            "projectId": project["id"],
+            "startsAt": "2025-03-07T08:00:00",
+            "endsAt": "2025-03-07T16:00:00",
+        },
+    ).json()
+    app.post(f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": tech["userId"]})
+
+    request = {"scope": "venue", "scopeId": venue["id"], "day": "2025-03-07"}
+    first = app.post("/api/v1/roadmaps/", headers={"X-Session-Token": tech["sessionToken"]}, json=request)
+    assert first.status_code == 202, first.text
+    assert (first.json()["version"], first.json()["status"]) == (1, "pending")
+    job_registry.wait(first.json()["jobId"], timeout=30)
+
+    ready = app.get(f"/api/v1/roadmaps/{first.json()['id']}", headers=headers).json()
+    assert ready["status"] == "ready" and ready["generatedAt"] is not None
+    pdf = app.get(ready["downloadUrl"], headers=headers)
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.headers["etag"] == f'"{ready["contentHash"]}"'
+    assert pdf.content.startswith(b"%PDF-1.4") and len(pdf.content) == ready["size"]
+    assert re.search(rb"/Title \(Feuille de route 07/03/2025 v1\)", pdf.content)
+
+    cached = app.post("/api/v1/roadmaps/", headers=headers, json=request)
+    assert cached.status_code == 200
+    assert (cached.json()["id"], cached.json()["jobId"]) == (ready["id"], None)
+
+    app.put(f"/api/v1/venues/{venue['id']}", headers=headers, json={"notes": "Quai 5"})
+    changed = app.post("/api/v1/roadmaps/", headers=headers, json=request)
+    assert changed.status_code == 202
+    assert changed.json()["version"] == 2 and changed.json()["contentHash"] != ready["contentHash"]
+    job_registry.wait(changed.json()["jobId"], timeout=30)
+    versions = app.get(
+        "/api/v1/roadmaps/", headers=headers, params={"scope": "venue", "scopeId": venue["id"], "day": "2025-03-07"}
+    ).json()
+    assert [(item["version"], item["status"]) for item in versions] == [(2, "ready"), (1, "ready")]
+    assert len(list((tmp_path / venue["organizationId"] / "roadmaps").glob("*.pdf"))) == 2
+
+    # Other scopes and days hash their own inputs.
+    day = app.post("/api/v1/roadmaps/", headers=headers, json={"scope": "day", "day": "2025-03-07"})
+    by_project = app.post(
+        "/api/v1/roadmaps/", headers=headers, json={"scope": "project", "scopeId": project["id"], "day": "2025-03-07"}
+    )
+    empty = app.post("/api/v1/roadmaps/", headers=headers, json={"scope": "day", "day": "2025-03-08"})
+    assert {day.json()["version"], by_project.json()["version"], empty.json()["version"]} == {1}
+    assert empty.json()["contentHash"] != day.json()["contentHash"]
+    for response in (day, by_project, empty):
+        job_registry.wait(response.json()["jobId"], timeout=30)
+
+    assert app.post(
+        "/api/v1/roadmaps/", headers=headers, json={"scope": "venue", "scopeId": "missing", "day": "2025-03-07"}
+    ).status_code == 404
+    assert app.post("/api/v1/roadmaps/", headers=headers, json={"scope": "project", "day": "2025-03-07"}).status_code == 422
+    other = _register(app, email="other@example.com", organization_slug="other")
+    assert app.get(f"/api/v1/roadmaps/{ready['id']}", headers={"X-Session-Token": other["sessionToken"]}).status_code == 404
+
+
+def test_roadmap_day_and_times_follow_the_organisation_clock(app: TestClient) -> None:
+    owner = _register(app, email="rg@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    assert app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Europe/Paris"}).status_code == 200
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 1}).json()
+    # In Paris: 00:30 and 23:30 on the 15th, then 00:30 on the 16th.
+    for starts_at in ("2025-03-14T23:30:00", "2025-03-15T22:30:00", "2025-03-15T23:30:00"):
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "startsAt": starts_at, "endsAt": starts_at.replace(":30:", ":45:")},
+        ).json()
+        app.post(f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]})
+
+    with session_scope(app.app.state.session_factory) as session:
+        inputs = load_inputs(session, owner["organizationId"], DAY, "", date(2025, 3, 15))
+    assert [mission["time"] for mission in inputs["missions"]] == ["00:30-00:45", "23:30-23:45"]
+    assert [member["time"] for member in inputs["crew"]] == ["00:30-00:45", "23:30-23:45"]
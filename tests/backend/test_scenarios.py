@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.models import Assignment, Notification, ScheduledTrigger
+from backend.rbac import Role
+from backend.services.conflicts import ConflictEngine, Interval
+from backend.services.scenarios import Overlay, overlay_audit
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def test_overlay_audit_leaves_the_base_engine_untouched() -> None:
+    base = Interval("a1", datetime(2025, 3, 3, 8), datetime(2025, 3, 3, 12), "m1", person_id="ana")
+    other = Interval("a2", datetime(2025, 3, 3, 14), datetime(2025, 3, 3, 18), "m2", person_id="ben")
+    engine = ConflictEngine.from_intervals([base, other])
+    overlay = Overlay(assignments={"a2": Interval("a2", other.start, other.end, "m2", person_id="ana"), "a1": None})
+    assert overlay_audit(engine, overlay, datetime(2025, 3, 3), datetime(2025, 3, 10)) == []
+
+    overlay.assignments["a1"] = Interval("a1", datetime(2025, 3, 3, 13), datetime(2025, 3, 3, 15), "m1", person_id="ana")
+    [conflict] = overlay_audit(engine, overlay, datetime(2025, 3, 3), datetime(2025, 3, 10))
+    assert (conflict.kind, conflict.resource_id) == ("person", "ana")
+    assert engine.get_assignment("a1") == base
+    assert engine.get_assignment("a2") == other
+    assert engine.audit() == []
+
+
+def test_scenario_delta_reads_and_batched_apply(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    studio = app.post("/api/v1/venues", headers=headers, json={"name": "Studio"}).json()
+    club = app.post("/api/v1/venues", headers=headers, json={"name": "Club"}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    get_in = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "venueId": studio["id"],
+            "startsAt": "2025-03-03T08:00:00",
+            "endsAt": "2025-03-03T12:00:00",
+        },
+    ).json()
+    show = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "venueId": club["id"],
+            "startsAt": "2025-03-03T14:00:00",
+            "endsAt": "2025-03-03T18:00:00",
+        },
+    ).json()
+    owner_on_get_in = app.post(
+        f"/api/v1/planning/missions/{get_in['id']}/assignments", headers=headers, json={"userId": owner["userId"]}
+    ).json()
+    tech_on_show = app.post(
+        f"/api/v1/planning/missions/{show['id']}/assignments", headers=headers, json={"userId": tech["userId"]}
+    ).json()
+    assert app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"}).json()[
+        "conflicts"
+    ] == []
+
+    scenario = app.post("/api/v1/planning/scenarios", headers=headers, json={"name": "Get-in tardif"})
+    assert scenario.status_code == 201, scenario.text
+    scenario_id = scenario.json()["id"]
+    base = f"/api/v1/planning/scenarios/{scenario_id}"
+
+    moved = app.put(
+        f"{base}/missions/{get_in['id']}",
+        headers=headers,
+        json={"startsAt": "2025-03-03T12:00:00", "endsAt": "2025-03-03T16:00:00"},
+    )
+    assert moved.status_code == 200, moved.text
+    swapped = app.put(f"{base}/assignments/{tech_on_show['id']}", headers=headers, json={"userId": owner["userId"]})
+    assert swapped.json()["userId"] == owner["userId"]
+    added = app.post(f"{base}/assignments", headers=headers, json={"missionId": get_in["id"], "userId": tech["userId"]})
+    assert added.status_code == 201, added.text
+
+    what_if = app.get(f"{base}/conflicts", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert [(conflict["kind"], conflict["resourceId"]) for conflict in what_if["conflicts"]] == [
+        ("person", owner["userId"])
+    ]
+    live = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert live["conflicts"] == []
+
+    week = app.get(f"{base}/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    by_mission = {row["missionId"]: row for row in week["rows"]}
+    assert by_mission[get_in["id"]]["startsAt"] == "2025-03-03T12:00:00"
+    assert {member["email"] for member in by_mission[get_in["id"]]["crew"]} == {
+        "owner@example.com",
+        "tech@example.com",
+    }
+    assert [member["email"] for member in by_mission[show["id"]]["crew"]] == ["owner@example.com"]
+    live_week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert live_week["rows"][0]["startsAt"] == "2025-03-03T08:00:00"
+
+    listing = app.get("/api/v1/planning/scenarios", headers=headers).json()
+    assert [(item["name"], item["changeCount"]) for item in listing] == [("Get-in tardif", 4)]
+
+    # The crew is checked as a whole when applying, not change by change.
+    duplicate = app.post(
+        f"{base}/assignments", headers=headers, json={"missionId": get_in["id"], "userId": tech["userId"]}
+    )
+    assert duplicate.status_code == 201, duplicate.text
+    assert app.post(f"{base}/apply", headers=headers).status_code == 409
+    dropped = app.put(f"{base}/assignments/{duplicate.json()['entityId']}", headers=headers, json={"deleted": True})
+    assert dropped.status_code == 200, dropped.text
+
+    applied = app.post(f"{base}/apply", headers=headers)
+    assert applied.status_code == 200, applied.text
+    assert applied.json()["status"] == "applied"
+    live = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert [conflict["kind"] for conflict in live["conflicts"]] == ["person"]
+    assignment = app.get(f"/api/v1/planning/missions/{get_in['id']}", headers=headers).json()
+    assert assignment["startsAt"] == "2025-03-03T12:00:00"
+    live_week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert [len(row["crew"]) for row in live_week["rows"]] == [2, 1]
+    owner_shift = next(
+        member for member in live_week["rows"][0]["crew"] if member["assignmentId"] == owner_on_get_in["id"]
+    )
+    assert owner_shift["startsAt"] == "2025-03-03T12:00:00"
+
+    again = app.put(f"{base}/missions/{get_in['id']}", headers=headers, json={"deleted": True})
+    assert again.status_code == 409
+    assert app.delete(base, headers=headers).status_code == 204
+    assert app.get("/api/v1/planning/scenarios", headers=headers).json() == []
+
+
+def test_applying_a_crew_swap_runs_the_planning_hooks(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    first = _invite(app, owner, email="first@example.com", role=Role.MEMBER)
+    second = _invite(app, owner, email="second@example.com", role=Role.MEMBER)
+    third = _invite(app, owner, email="third@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-03T08:00:00", "endsAt": "2025-03-03T12:00:00"},
+    ).json()
+    morning, late = (
+        app.post(
+            f"/api/v1/planning/missions/{mission['id']}/assignments",
+            headers=headers,
+            json={"userId": person["userId"], "startsAt": starts_at, "endsAt": "2025-03-03T12:00:00"},
+        ).json()
+        for person, starts_at in ((first, "2025-03-03T08:00:00"), (second, "2025-03-03T10:00:00"))
+    )
+
+    scenario_id = app.post("/api/v1/planning/scenarios", headers=headers, json={"name": "Swap"}).json()["id"]
+    base = f"/api/v1/planning/scenarios/{scenario_id}"
+    for assignment, person in ((morning, second), (late, first)):
+        swapped = app.put(f"{base}/assignments/{assignment['id']}", headers=headers, json={"userId": person["userId"]})
+        assert swapped.status_code == 200, swapped.text
+    added = app.post(f"{base}/assignments", headers=headers, json={"missionId": mission["id"], "userId": third["userId"]})
+    assert added.status_code == 201, added.text
+    assert app.post(f"{base}/apply", headers=headers).status_code == 409  # three people for a team of two
+
+    other_id = app.post("/api/v1/planning/scenarios", headers=headers, json={"name": "Swap only"}).json()["id"]
+    for assignment, person in ((morning, second), (late, first)):
+        app.put(
+            f"/api/v1/planning/scenarios/{other_id}/assignments/{assignment['id']}",
+            headers=headers,
+            json={"userId": person["userId"]},
+        )
+    applied = app.post(f"/api/v1/planning/scenarios/{other_id}/apply", headers=headers)
+    assert applied.status_code == 200, applied.text
+
+    week = app.get("/api/v1/planning/week", headers=headers, params={"weekStart": "2025-03-03"}).json()
+    assert {(member["assignmentId"], member["userId"]) for member in week["rows"][0]["crew"]} == {
+        (morning["id"], second["userId"]),
+        (late["id"], first["userId"]),
+    }
+    session = app.app.state.session_factory()
+    try:
+        triggers = session.execute(
+            select(ScheduledTrigger.assignment_id, ScheduledTrigger.user_id).where(ScheduledTrigger.kind == "reminder.d0")
+        ).all()
+        assert set(triggers) == {(morning["id"], second["userId"]), (late["id"], first["userId"])}
+        created = session.scalars(
+            select(Notification.target).where(Notification.template == "assignment.created").where(
+                Notification.event_id == f"assignment.created:{morning['id']}"
+            )
+        ).all()
+        assert sorted(created) == ["first@example.com", "owner@example.com", "second@example.com"]
+    finally:
+        session.close()
+
+
+def test_applying_a_scenario_over_changed_live_rows_is_refused(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    missions = [
+        app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "startsAt": f"2025-03-0{day}T08:00:00", "endsAt": f"2025-03-0{day}T12:00:00"},
+        ).json()
+        for day in (3, 4, 5)
+    ]
+    shifts = [
+        app.post(
+            f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": tech["userId"]}
+        ).json()
+        for mission in missions
+    ]
+
+    def scenario(name: str, shift: dict) -> str:
+        scenario_id = app.post("/api/v1/planning/scenarios", headers=headers, json={"name": name}).json()["id"]
+        moved = app.put(
+            f"/api/v1/planning/scenarios/{scenario_id}/assignments/{shift['id']}",
+            headers=headers,
+            json={"startsAt": shift["startsAt"].replace("T08", "T09")},
+        )
+        assert moved.status_code == 200, moved.text
+        return scenario_id
+
+    orphaned, revived, overwritten = (scenario(name, shift) for name, shift in zip(("a", "b", "c"), shifts))
+    assert app.delete(f"/api/v1/planning/missions/{missions[0]['id']}", headers=headers).status_code == 204
+    assert app.delete(f"/api/v1/planning/assignments/{shifts[1]['id']}", headers=headers).status_code == 204
+    edited = app.put(
+        f"/api/v1/planning/assignments/{shifts[2]['id']}", headers=headers, json={"startsAt": "2025-03-05T10:00:00"}
+    )
+    assert edited.status_code == 200, edited.text
+
+    for scenario_id in (orphaned, revived, overwritten):
+        stale = app.post(f"/api/v1/planning/scenarios/{scenario_id}/apply", headers=headers)
+        assert stale.status_code == 409, stale.text
+    session = app.app.state.session_factory()
+    try:
+        kept = session.scalars(select(Assignment.starts_at).order_by(Assignment.starts_at)).all()
+        assert [moment.isoformat() for moment in kept] == ["2025-03-05T10:00:00"]
+    finally:
+        session.close()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.models import Assignment, Notification, ScheduledTrigger
+from backend.rbac import Role
+from backend.services.scheduler import TriggerScheduler, claim_triggers
+
+DAY = datetime(2025, 3, 12)
+
+
+@pytest.fixture()
+def app(tmp_path) -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:", document_dir=str(tmp_path))
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _at(hours: float) -> datetime:
+    return DAY + timedelta(hours=hours)
+
+
+def _sent(client: TestClient, template: str) -> list[Notification]:
+    session = client.app.state.session_factory()
+    try:
+        return list(
+            session.scalars(
+                select(Notification).where(Notification.template == template).order_by(Notification.target)
+            )
+        )
+    finally:
+        session.close()
+
+
+def test_scheduler_loads_incrementally_coalesces_and_survives_restart(app: TestClient) -> None:
+    owner = _register(app, email="rg@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    other = _invite(app, owner, email="other@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    app.put("/api/v1/notifications/contact", headers={"X-Session-Token": tech["sessionToken"]}, json={"telegramChatId": "77"})
+    venue = app.post("/api/v1/venues/", headers=headers, json={"name": "Zenith"}).json()
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 2}).json()
+
+    def assign(user: dict[str, str], start: float, end: float) -> dict:
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={
+                "templateId": template["id"],
+                "venueId": venue["id"],
+                "startsAt": _at(start).isoformat(),
+                "endsAt": _at(end).isoformat(),
+            },
+        ).json()
+        response = app.post(
+            f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": user["userId"]}
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    assign(tech, 9, 12)
+    afternoon = assign(tech, 14, 18)
+    morning = assign(other, 9, 12)
+
+    scheduler = TriggerScheduler(app.app.state.session_factory, app.app.state.settings, punch_buffer=app.app.state.punch_buffer)
+    # Nothing is due within the hour: the table is not read beyond the loaded window.
+    assert scheduler.tick(_at(-12)) == 0 and len(scheduler) == 0 and scheduler.rows_loaded == 0
+    assert scheduler.tick(_at(-6.5)) == 0 and len(scheduler) == 3  # the three D-1 reminders of 18:00
+
+    # D-1 18:00: the technician's two missions make one message.
+    assert scheduler.tick(_at(-6)) == 3
+    reminders = _sent(app, "reminder.d1")
+    assert [(row.target, row.channel, row.payload["count"]) for row in reminders] == [
+        ("other@example.com", "email", 1),
+        ("tech@example.com", "email", 2),
+    ]
+    assert reminders[1].payload["lines"] == "- 09:00-12:00 Concert, Zenith\n- 14:00-18:00 Concert, Zenith"
+    assert scheduler.tick(_at(-6)) == 0
+
+    # A restarted scheduler reloads only what is still pending: nothing fires twice.
+    restarted = TriggerScheduler(app.app.state.session_factory, app.app.state.settings, punch_buffer=app.app.state.punch_buffer)
+    assert restarted.tick(_at(-6)) == 0 and len(_sent(app, "reminder.d1")) == 2
+
+    # An assignment made after its D-1 time still gets its reminder, caught up on the next tick.
+    evening = assign(other, 20, 23)
+    assert restarted.tick(_at(6.75)) == 1
+    assert [row.payload["count"] for row in _sent(app, "reminder.d1")] == [1, 1, 2]
+
+    # Moving a shift re-arms its triggers inside the window already held.
+    moved = app.put(
+        f"/api/v1/planning/assignments/{morning['id']}", headers=headers, json={"startsAt": _at(9.5).isoformat()}
+    )
+    assert moved.status_code == 200, moved.text
+    assert restarted.tick(_at(7)) == 1
+    assert [(row.target, row.channel) for row in _sent(app, "reminder.d0")] == [("77", "telegram")]
+    assert restarted.tick(_at(7.5)) == 1
+    assert [row.target for row in _sent(app, "reminder.d0")] == ["77", "other@example.com"]
+
+    # Late punch: the technician punched in for the morning, the other person never did.
+    generated = app.post("/api/v1/timesheets/generate", headers=headers, json={"periodStart": "2025-03-12", "periodEnd": "2025-03-13"})
+    assert generated.status_code == 200, generated.text
+    punched = app.post(
+        "/api/v1/timeclock/punches", headers=headers, json={"kind": "in", "at": _at(8.9).isoformat(), "userId": tech["userId"]}
+    )
+    assert punched.status_code == 202, punched.text
+    assert restarted.tick(_at(9 + 10 / 60)) == 1 and _sent(app, "late.punch") == []
+    assert restarted.tick(_at(9.5 + 10 / 60)) == 1
+    late = _sent(app, "late.punch")
+    assert [(row.target, row.channel) for row in late] == [("other@example.com", "email"), ("rg@example.com", "email")]
+    assert late[1].payload["lines"] == "- other@example.com attendu(e) a 09:30 (Concert, Zenith)"
+    assert "other@example.com" not in late[0].payload["lines"]
+    assert restarted.tick(_at(14 + 10 / 60)) == 2  # the late alert, and a D-0 reminder now stale
+    assert [row.target for row in _sent(app, "reminder.d0")] == ["77", "other@example.com"]
+    assert [row.target for row in _sent(app, "late.punch")] == ["77", "other@example.com", "rg@example.com", "rg@example.com"]
+
+    # Long after the evening shift started its remaining triggers expire instead of firing.
+    session = app.app.state.session_factory()
+    try:
+        assert TriggerScheduler(app.app.state.session_factory, app.app.state.settings).tick(_at(24)) == 2
+        states = dict(
+            session.execute(
+                select(ScheduledTrigger.kind, ScheduledTrigger.status).where(ScheduledTrigger.assignment_id == evening["id"])
+            ).all()
+        )
+        assert states == {"reminder.d1": "fired", "reminder.d0": "expired", "late.punch": "expired"}
+        statuses = dict(
+            session.execute(
+                select(ScheduledTrigger.kind, ScheduledTrigger.status).where(ScheduledTrigger.assignment_id == afternoon["id"])
+            ).all()
+        )
+        assert statuses == {"reminder.d1": "fired", "reminder.d0": "expired", "late.punch": "fired"}
+    finally:
+        session.close()
+
+    deleted = app.delete(f"/api/v1/planning/assignments/{morning['id']}", headers=headers)
+    assert deleted.status_code == 204
+
+
+def test_schedulers_share_triggers_retarget_swaps_and_backfill(app: TestClient) -> None:
+    owner = _register(app, email="rg@example.com", organization_slug="orbit")
+    first = _invite(app, owner, email="first@example.com", role=Role.MEMBER)
+    second = _invite(app, owner, email="second@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 2}).json()
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": _at(9).isoformat(), "endsAt": _at(12).isoformat()},
+    ).json()
+    assignment = app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": first["userId"]}
+    ).json()
+
+    # Rows written behind the planning hooks: the crew is swapped and a second shift has no trigger at all.
+    session = app.app.state.session_factory()
+    try:
+        session.get(Assignment, assignment["id"]).user_id = second["userId"]
+        session.add(
+            Assignment(
+                organization_id=owner["organizationId"],
+                mission_id=mission["id"],
+                user_id=first["userId"],
+                starts_at=_at(14),
+                ends_at=_at(16),
+            )
+        )
+        session.commit()
+    finally:
+        session.close()
+
+    # Two workers, each with its own scheduler over the same table.
+    workers = [TriggerScheduler(app.app.state.session_factory, app.app.state.settings) for _ in range(2)]
+    for worker in workers:
+        worker.tick(_at(-6.5))
+    assert [len(worker) for worker in workers] == [2, 2]
+    assert sum(worker.tick(_at(-6)) for worker in workers) == 2
+    assert [row.target for row in _sent(app, "reminder.d1")] == ["first@example.com", "second@example.com"]
+
+    session = app.app.state.session_factory()
+    try:
+        pending = session.scalars(
+            select(ScheduledTrigger.id).where(ScheduledTrigger.status == "pending").order_by(ScheduledTrigger.id)
+        ).all()
+        assert len(pending) == 4
+        claim = claim_triggers(session, pending)
+        assert claim is not None and claim_triggers(session, pending) is None
+        # A claim left by a dead worker is taken over once the lease has passed.
+        assert claim_triggers(session, pending, lease=timedelta(0)) is not None
+    finally:
+        session.close()
+
+
+def test_reminders_follow_the_organisation_time_zone(app: TestClient) -> None:
+    owner = _register(app, email="rg@example.com", organization_slug="orbit")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Concert", "teamSize": 1}).json()
+    # 00:30 in Paris on the 13th: the eve is the 12th, at 18:00 Paris time.
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": _at(23.5).isoformat(), "endsAt": _at(26).isoformat()},
+    ).json()
+    app.post(f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": owner["userId"]})
+
+    scheduler = TriggerScheduler(app.app.state.session_factory, app.app.state.settings)
+    assert scheduler.tick(_at(-7)) == 0
+    # The pending reminder was armed for the UTC eve (the 11th); the new zone moves it.
+    zoned = app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Europe/Paris"})
+    assert zoned.status_code == 200, zoned.text
+    assert scheduler.tick(_at(-6)) == 0 and scheduler.tick(_at(16.5)) == 0
+    assert scheduler.tick(_at(17)) == 1
+    [reminder] = _sent(app, "reminder.d1")
+    assert (reminder.payload["day"], reminder.payload["lines"]) == ("13/03/2025", "- 00:30-03:00 Concert")
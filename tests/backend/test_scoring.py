@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.rbac import Role
+from backend.services.availability import SLOTS_PER_DAY, AvailabilityMatrix, intervals_to_bitmap
+from backend.services.scoring import CandidatePool, OpenSlot, ScoringEngine, busy_grid
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _at(day: int, hour: int) -> datetime:
+    return datetime.combine(MONDAY, datetime.min.time()) + timedelta(days=day, hours=hour)
+
+
+def test_engine_ranks_and_explains_candidates() -> None:
+    people = ["ana", "ben", "cid", "dan"]
+    availability = AvailabilityMatrix(
+        people,
+        MONDAY,
+        np.concatenate(
+            [
+                intervals_to_bitmap(MONDAY, 1, [(_at(0, 8), _at(0, 18))]).reshape(1, -1),
+                intervals_to_bitmap(MONDAY, 1, [(_at(0, 8), _at(0, 10))]).reshape(1, -1),
+                intervals_to_bitmap(MONDAY, 1, [(_at(0, 0), _at(1, 0))]).reshape(1, -1),
+                intervals_to_bitmap(MONDAY, 1, [(_at(0, 0), _at(1, 0))]).reshape(1, -1),
+            ]
+        ),
+    )
+    busy = busy_grid(people, MONDAY, 1, [("cid", _at(0, 11), _at(0, 13))])
+    pool = CandidatePool(
+        availability=availability,
+        busy=busy,
+        skills={"ana": ["rigging", "son"], "ben": ["rigging"], "dan": []},
+        familiarity={("ben", "tpl"): 4, ("ana", "tpl"): 1},
+        workload_hours={"ana": 10.0, "ben": 0.0},
+    )
+    slot = OpenSlot(
+        mission_id="m1",
+        template_id="tpl",
+        starts_at=_at(0, 9),
+        ends_at=_at(0, 12),
+        required_skills=("rigging", "son"),
+        open_seats=2,
+        assigned=frozenset({"dan"}),
+    )
+
+    [proposal] = ScoringEngine(pool).propose([slot], limit=3)
+    assert [candidate.user_id for candidate in proposal.candidates] == ["ana", "ben"]
+    best = proposal.candidates[0]
+    assert [reason.code for reason in best.reasons] == ["skills", "availability", "familiarity"]
+    assert best.score == pytest.approx(0.4 + 0.3 + 0.2 * np.log1p(1) / np.log1p(4), abs=1e-4)
+    assert len(best.reasons) <= 3
+
+    weighted, eligible = ScoringEngine(pool).contributions([slot])
+    assert weighted.shape == (4, 1, 4)
+    assert eligible.tolist() == [[True, True, False, False]]
+
+
+def test_proposals_api_uses_skills_availability_and_crew(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    rigger = _invite(app, owner, email="rigger@example.com", role=Role.MEMBER)
+    novice = _invite(app, owner, email="novice@example.com", role=Role.MEMBER)
+    viewer = _invite(app, owner, email="viewer@example.com", role=Role.VIEWER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+
+    skills = app.put(
+        f"/api/v1/planning/people/{rigger['userId']}",
+        headers=headers,
+        json={"skills": ["rigging", " rigging ", ""]},
+    )
+    assert skills.status_code == 200, skills.text
+    assert skills.json() == {"userId": rigger["userId"], "skills": ["rigging"], "maxWeeklyHours": None}
+    for person in (rigger, novice):
+        app.put(
+            f"/api/v1/availability/people/{person['userId']}",
+            headers={"X-Session-Token": person["sessionToken"]},
+            json={
+                "startDay": "2025-03-03",
+                "endDay": "2025-03-03",
+                "intervals": [{"startsAt": "2025-03-03T06:00:00", "endsAt": "2025-03-03T20:00:00"}],
+            },
+        )
+
+    template = app.post(
+        "/api/v1/mission-templates",
+        headers=headers,
+        json={"name": "Accroche", "teamSize": 2, "requiredSkills": ["rigging"]},
+    ).json()
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-03T08:00:00", "endsAt": "2025-03-03T12:00:00"},
+    ).json()
+
+    report = app.get("/api/v1/planning/proposals", headers=headers, params={"weekStart": "2025-03-05"})
+    assert report.status_code == 200, report.text
+    [slot] = report.json()["slots"]
+    assert slot["missionId"] == mission["id"]
+    assert slot["openSeats"] == 2
+    ranked = [candidate["userId"] for candidate in slot["candidates"]]
+    assert ranked[:2] == [rigger["userId"], novice["userId"]]
+    assert slot["candidates"][0]["reasons"][0]["code"] == "skills"
+
+    app.post(
+        f"/api/v1/planning/missions/{mission['id']}/assignments",
+        headers=headers,
+        json={"userId": rigger["userId"]},
+    )
+    [slot] = app.get("/api/v1/planning/proposals", headers=headers, params={"weekStart": "2025-03-03"}).json()["slots"]
+    assert slot["openSeats"] == 1
+    assert rigger["userId"] not in [candidate["userId"] for candidate in slot["candidates"]]
+
+    forbidden = app.get(
+        "/api/v1/planning/proposals",
+        headers={"X-Session-Token": viewer["sessionToken"]},
+        params={"weekStart": "2025-03-03"},
+    )
+    assert forbidden.status_code == 403
+    missing = app.put(
+        "/api/v1/planning/people/unknown",
+        headers=headers,
+        json={"skills": ["son"]},
+    )
+    assert missing.status_code == 404
+
+
+def test_scoring_benchmark_500_slots_by_1000_people() -> None:
+    rng = np.random.default_rng(3)
+    people = [f"p{number}" for number in range(1000)]
+    days = 7
+    availability = AvailabilityMatrix(people, MONDAY, rng.random((1000, days * SLOTS_PER_DAY)) < 0.7)
+    bookings = [
+        (people[int(rng.integers(1000))], _at(day, hour), _at(day, hour + 3))
+        for day in range(days)
+        for hour in range(6, 20, 4)
+        for _ in range(50)
+    ]
+    busy = busy_grid(people, MONDAY, days, bookings)
+    vocabulary = [f"skill{number}" for number in range(20)]
+    pool = CandidatePool(
+        availability=availability,
+        busy=busy,
+        skills={person: list(rng.choice(vocabulary, size=3, replace=False)) for person in people},
+        familiarity={(people[int(rng.integers(1000))], f"tpl{number % 10}"): int(rng.integers(1, 9)) for number in range(3000)},
+        workload_hours={person: float(rng.integers(0, 40)) for person in people},
+    )
+    slots = [
+        OpenSlot(
+            mission_id=f"m{number}",
+            template_id=f"tpl{number % 10}",
+            starts_at=_at(number % days, 6 + number % 12),
+            ends_at=_at(number % days, 10 + number % 12),
+            required_skills=tuple(rng.choice(vocabulary, size=2, replace=False)),
+            open_seats=3,
+        )
+        for number in range(500)
+    ]
+
+    started = time.perf_counter()
+    proposals = ScoringEngine(pool).propose(slots, limit=5)
+    elapsed = time.perf_counter() - started
+
+    assert len(proposals) == 500
+    assert all(len(proposal.candidates) == 5 for proposal in proposals)
+    scores = [candidate.score for candidate in proposals[0].candidates]
+    assert scores == sorted(scores, reverse=True)
+    assert elapsed < 2.0
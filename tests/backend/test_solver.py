@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.rbac import Role
+from backend.services.availability import SLOTS_PER_DAY, AvailabilityMatrix
+from backend.services.scoring import Booking, CandidatePool, OpenSlot, busy_grid
+from backend.services.solver import AssignmentSolver, SolverProblem, load_solver_problem, overlap_clusters
+from backend.services.travel import TravelMatrix
+
+MONDAY = date(2025, 3, 3)
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def _at(day: int, hour: float) -> datetime:
+    return datetime.combine(MONDAY, datetime.min.time()) + timedelta(days=day, hours=hour)
+
+
+def _problem(people: list[str], slots: list[OpenSlot], **kwargs) -> SolverProblem:
+    availability = AvailabilityMatrix(people, MONDAY, np.ones((len(people), 7 * SLOTS_PER_DAY), dtype=bool))
+    bookings = kwargs.pop("bookings", [])
+    pool = CandidatePool(
+        availability=availability,
+        busy=busy_grid(people, MONDAY, 7, [(b.user_id, b.starts_at, b.ends_at) for b in bookings]),
+        skills=kwargs.pop("skills", {}),
+        familiarity=kwargs.pop("familiarity", {}),
+    )
+    return SolverProblem(
+        slots=slots,
+        pool=pool,
+        window_start=_at(0, 0),
+        window_end=_at(7, 0),
+        bookings=bookings,
+        **kwargs,
+    )
+
+
+def test_overlap_clusters_group_transitive_overlaps() -> None:
+    starts = np.array([0, 10, 5, 30, 35])
+    ends = np.array([6, 20, 12, 40, 36])
+    assert [cluster.tolist() for cluster in overlap_clusters(starts, ends)] == [[0, 2, 1], [3, 4]]
+
+
+def test_global_matching_beats_greedy_and_respects_skills() -> None:
+    slots = [
+        OpenSlot("rig", "tpl-rig", _at(0, 8), _at(0, 12), required_skills=("rigging",)),
+        OpenSlot("sound", "tpl-sound", _at(0, 7), _at(0, 11), required_skills=("son",)),
+    ]
+    problem = _problem(
+        ["ana", "ben"],
+        slots,
+        skills={"ana": ["rigging", "son"], "ben": ["son"]},
+        familiarity={("ana", "tpl-rig"): 1, ("ana", "tpl-sound"): 9},
+    )
+    solution = AssignmentSolver(problem).solve()
+    assert sorted((p.mission_id, p.user_id) for p in solution.placements) == [("rig", "ana"), ("sound", "ben")]
+    assert solution.unfilled == {}
+    assert solution.complete
+
+
+def test_hard_stops_team_size_hour_caps_and_travel() -> None:
+    matrix = TravelMatrix()
+    matrix.upsert("paris", {})
+    matrix.upsert("lyon", {"paris": 300})
+    slots = [
+        OpenSlot("crew", "tpl", _at(0, 8), _at(0, 12), open_seats=2, venue_id="paris"),
+        OpenSlot("late", "tpl", _at(0, 13), _at(0, 17), venue_id="lyon"),
+        OpenSlot("tuesday", "tpl", _at(1, 8), _at(1, 12), venue_id="paris"),
+    ]
+    problem = _problem(
+        ["ana", "ben", "cid"],
+        slots,
+        travel=matrix,
+        hour_caps={"ana": 4, "ben": 8},
+        bookings=[Booking("other", "cid", _at(1, 6), _at(1, 9), "paris")],
+    )
+    solution = AssignmentSolver(problem).solve()
+    by_mission: dict[str, list[str]] = {}
+    for placement in solution.placements:
+        by_mission.setdefault(placement.mission_id, []).append(placement.user_id)
+
+    assert len(by_mission["crew"]) == 2
+    assert len(set(by_mission["crew"])) == 2
+    assert "late" not in by_mission or not set(by_mission["late"]) & set(by_mission["crew"])
+    hours = {person: 0 for person in ["ana", "ben", "cid"]}
+    for placement in solution.placements:
+        hours[placement.user_id] += 4
+    assert hours["ana"] <= 4 and hours["ben"] <= 8
+    assert "cid" not in by_mission.get("tuesday", [])
+    assert solution.unfilled == {}
+
+    # An explicit cap of zero hours is a cap, not a missing one.
+    idle = AssignmentSolver(_problem(["ana"], slots[:1], hour_caps={"ana": 0})).solve()
+    assert idle.placements == [] and idle.unfilled == {"crew": 2}
+
+
+def test_expired_budget_returns_partial_solution() -> None:
+    slots = [OpenSlot(f"m{day}", "tpl", _at(day, 8), _at(day, 12)) for day in range(3)]
+    progress = []
+    solution = AssignmentSolver(_problem(["ana"], slots)).solve(
+        deadline=time.monotonic() - 1,
+        on_progress=lambda snapshot, done: progress.append(done),
+    )
+    assert not solution.complete
+    assert solution.placements == []
+    assert solution.unfilled == {"m0": 1, "m1": 1, "m2": 1}
+    assert progress == [0.0]
+
+
+def test_solver_run_api_background_job(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    technicians = [_invite(app, owner, email=f"tech{n}@example.com", role=Role.MEMBER) for n in range(3)]
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    capped = app.put(
+        f"/api/v1/planning/people/{technicians[0]['userId']}",
+        headers=headers,
+        json={"maxWeeklyHours": 4},
+    )
+    assert capped.json()["maxWeeklyHours"] == 4
+    template = app.post(
+        "/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}
+    ).json()
+    for day in ("2025-03-03", "2025-03-04"):
+        app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "startsAt": f"{day}T08:00:00", "endsAt": f"{day}T12:00:00"},
+        )
+
+    started = app.post("/api/v1/planning/solver/runs", headers=headers, json={"weekStart": "2025-03-03"})
+    assert started.status_code == 202, started.text
+    job_id = started.json()["jobId"]
+    for _ in range(200):
+        run = app.get(f"/api/v1/planning/solver/runs/{job_id}", headers=headers).json()
+        if run["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.01)
+    assert run["status"] == "succeeded", run
+    solution = run["solution"]
+    assert solution["complete"] is True
+    assert solution["unfilled"] == []
+    assert len(solution["placements"]) == 4
+    capped_count = sum(1 for placement in solution["placements"] if placement["userId"] == technicians[0]["userId"])
+    assert capped_count <= 1
+    assert run["progress"] == 1.0
+
+    missing = app.get("/api/v1/planning/solver/runs/unknown", headers=headers)
+    assert missing.status_code == 404
+    too_long = app.post(
+        "/api/v1/planning/solver/runs",
+        headers=headers,
+        json={"weekStart": "2025-03-03", "timeBudgetSeconds": 600},
+    )
+    assert too_long.status_code == 422
+
+
+def test_solver_books_people_on_recurring_occurrences(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Accueil", "teamSize": 1}).json()
+
+    def mission(starts_at: datetime, ends_at: datetime, team_size: int = 1) -> str:
+        return app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={
+                "templateId": template["id"],
+                "startsAt": starts_at.isoformat(),
+                "endsAt": ends_at.isoformat(),
+                "teamSize": team_size,
+            },
+        ).json()["id"]
+
+    # A daily series started the Friday before, crewed by the technician: Monday 08-12 is an occurrence.
+    series = mission(_at(-3, 8), _at(-3, 12))
+    app.post(f"/api/v1/planning/missions/{series}/assignments", headers=headers, json={"userId": tech["userId"]})
+    assert app.put(f"/api/v1/planning/missions/{series}/recurrence", headers=headers, json={"frequency": "daily"}).status_code == 200
+    overlapping = mission(_at(0, 9), _at(0, 11))
+    open_series = mission(_at(2, 14), _at(2, 16), team_size=2)
+    app.put(f"/api/v1/planning/missions/{open_series}/recurrence", headers=headers, json={"frequency": "weekly"})
+
+    session = app.app.state.session_factory()
+    try:
+        problem = load_solver_problem(session, owner["organizationId"], MONDAY)
+    finally:
+        session.close()
+    assert Booking(series, tech["userId"], _at(0, 8), _at(0, 12)) in problem.bookings
+    assert [slot.mission_id for slot in problem.slots] == [overlapping]
+    solution = AssignmentSolver(problem).solve()
+    assert [placement.user_id for placement in solution.placements] == [owner["userId"]]
+
+
+def test_solver_full_week_benchmark() -> None:
+    rng = np.random.default_rng(5)
+    people = [f"p{number}" for number in range(1000)]
+    vocabulary = [f"skill{number}" for number in range(8)]
+    slots = [
+        OpenSlot(
+            mission_id=f"m{number}",
+            template_id=f"tpl{number % 10}",
+            starts_at=_at(number % 7, 6 + number % 14),
+            ends_at=_at(number % 7, 10 + number % 14),
+            required_skills=(vocabulary[number % 8],),
+            open_seats=int(rng.integers(1, 4)),
+        )
+        for number in range(500)
+    ]
+    problem = _problem(
+        people,
+        slots,
+        skills={person: list(rng.choice(vocabulary, size=3, replace=False)) for person in people},
+    )
+
+    started = time.perf_counter()
+    solution = AssignmentSolver(problem).solve(deadline=time.monotonic() + 10)
+    elapsed = time.perf_counter() - started
+
+    assert solution.complete
+    assert solution.unfilled == {}
+    assert elapsed < 5
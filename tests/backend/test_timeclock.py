@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import OperationalError
+
+from backend.config import Settings
+from backend.db import session_scope
+from backend.main import create_app
+from backend.models import TimePunch
+from backend.rbac import Role
+from backend.schemas import PunchCreate
+from backend.services import timeclock
+from backend.services.jobs import job_registry
+from backend.services.timeclock import PunchBuffer, _match, flush_punches, ingest_punches
+from backend.services.timesheets import epoch_minutes
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def test_buffer_releases_batches_by_size_and_age() -> None:
+    buffer = PunchBuffer(max_rows=3, max_delay=60)
+    assert buffer.add([{"n": 1}, {"n": 2}]) == []
+    assert [row["n"] for row in buffer.add([{"n": 3}])] == [1, 2, 3]
+    assert len(buffer) == 0
+
+    stale = PunchBuffer(max_rows=100, max_delay=0)
+    assert len(stale.add([{"n": 1}])) == 1
+    buffer.add([{"n": 4}])
+    assert buffer.drain() == [{"n": 4}] and buffer.drain() == []
+
+
+def test_punches_match_the_shift_they_belong_to() -> None:
+    starts = epoch_minutes([datetime(2025, 3, 3, 8), datetime(2025, 3, 3, 14)])
+    ends = epoch_minutes([datetime(2025, 3, 3, 12), datetime(2025, 3, 3, 18)])
+    punches = [
+        ("in", datetime(2025, 3, 3, 7, 50)),
+        ("out", datetime(2025, 3, 3, 12, 5)),
+        ("in", datetime(2025, 3, 3, 12, 30)),  # early for the afternoon
+        ("out", datetime(2025, 3, 3, 23, 0)),  # too long after the end
+        ("in", datetime(2025, 3, 3, 4, 0)),  # far too early
+    ]
+    matched = _match(
+        np.array([kind for kind, _ in punches]), epoch_minutes([moment for _, moment in punches]), starts, ends
+    )
+    assert matched.tolist() == [0, 0, 1, -1, -1]
+
+
+def test_punches_are_buffered_reconciled_and_late_shifts_detected(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    tech_headers = {"X-Session-Token": tech["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Accueil", "teamSize": 2}).json()
+    start = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=30)
+    mission = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={
+            "templateId": template["id"],
+            "startsAt": start.isoformat(),
+            "endsAt": (start + timedelta(hours=4)).isoformat(),
+        },
+    ).json()
+    for person in (owner, tech):
+        app.post(
+            f"/api/v1/planning/missions/{mission['id']}/assignments", headers=headers, json={"userId": person["userId"]}
+        )
+    period = {
+        "periodStart": (start.date() - timedelta(days=1)).isoformat(),
+        "periodEnd": (start.date() + timedelta(days=2)).isoformat(),
+    }
+    assert app.post("/api/v1/timesheets/generate", headers=headers, json=period).json()["generated"] == 2
+
+    punched = app.post("/api/v1/timeclock/punches", headers=tech_headers, json={"kind": "in"})
+    assert punched.status_code == 202, punched.text
+    backdated = app.post(
+        "/api/v1/timeclock/punches",
+        headers=tech_headers,
+        json={"kind": "in", "at": (start - timedelta(hours=1)).isoformat()},
+    )
+    assert backdated.status_code == 403
+    future = app.post(
+        "/api/v1/timeclock/punches",
+        headers=headers,
+        json={"kind": "out", "userId": tech["userId"], "at": (start + timedelta(hours=5)).isoformat()},
+    )
+    assert future.status_code == 422
+    assert len(app.app.state.punch_buffer) == 1
+
+    late = app.get("/api/v1/timeclock/late", headers=headers).json()
+    assert [sheet["userId"] for sheet in late] == [owner["userId"]]
+    assert late[0]["lateDetectedAt"] is not None
+    assert app.get("/api/v1/timeclock/late", headers=tech_headers).status_code == 403
+
+    manual = app.post(
+        "/api/v1/timeclock/punches/batch",
+        headers=headers,
+        json=[{"kind": "in", "userId": owner["userId"], "at": (start + timedelta(minutes=20)).isoformat()}],
+    )
+    assert manual.json() == {"accepted": 1}
+    run = app.post("/api/v1/timeclock/reconcile", headers=headers)
+    assert run.status_code == 202, run.text
+    job_registry.wait(run.json()["jobId"], timeout=10)
+    done = app.get(f"/api/v1/timeclock/reconcile/{run.json()['jobId']}", headers=headers).json()
+    assert done["status"] == "succeeded"
+    assert done["totals"] == {"punches": 2, "matched": 2, "unmatched": 0, "locked": 0, "late": 2}
+
+    sheets = app.get("/api/v1/timesheets/", headers=headers, params={"start": period["periodStart"], "end": period["periodEnd"]})
+    by_user = {sheet["userId"]: sheet for sheet in sheets.json()}
+    assert by_user[owner["userId"]]["lateMinutes"] == 20
+    assert by_user[tech["userId"]]["lateMinutes"] >= 30
+    assert app.get("/api/v1/timeclock/late", headers=headers).json() == []
+
+    # Once validated, a sheet is left alone: a later punch is counted as locked, not applied.
+    validated = app.post(
+        "/api/v1/timesheets/validate",
+        headers=headers,
+        json={"timesheetIds": [by_user[owner["userId"]]["id"]], "justification": "Retard signale"},
+    )
+    assert validated.status_code == 200, validated.text
+    app.post(
+        "/api/v1/timeclock/punches/batch",
+        headers=headers,
+        json=[{"kind": "in", "userId": owner["userId"], "at": (start - timedelta(minutes=5)).isoformat()}],
+    )
+    run = app.post("/api/v1/timeclock/reconcile", headers=headers)
+    job_registry.wait(run.json()["jobId"], timeout=10)
+    done = app.get(f"/api/v1/timeclock/reconcile/{run.json()['jobId']}", headers=headers).json()
+    assert done["totals"] == {"punches": 1, "matched": 0, "unmatched": 0, "locked": 1, "late": 0}
+    sheets = app.get("/api/v1/timesheets/", headers=headers, params={"start": period["periodStart"], "end": period["periodEnd"]})
+    after = {sheet["userId"]: sheet for sheet in sheets.json()}[owner["userId"]]
+    assert after["lateMinutes"] == 20 and after["actualStart"] == by_user[owner["userId"]]["actualStart"]
+
+    own = app.get(
+        "/api/v1/timeclock/punches",
+        headers=tech_headers,
+        params={"start": (start - timedelta(days=1)).isoformat(), "end": (start + timedelta(days=1)).isoformat()},
+    ).json()
+    assert [(punch["kind"], punch["source"], punch["timesheetId"] is not None) for punch in own] == [
+        ("in", "clock", True)
+    ]
+
+
+def test_thousand_punches_per_second_benchmark(app: TestClient) -> None:
+    owner = _register(app, email="bench@example.com", organization_slug="bench")
+    # No time-based flush: the batches depend on the row count alone.
+    buffer = PunchBuffer(max_delay=3600)
+    punch = PunchCreate(kind="in")
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement.split(None, 1)[0].upper())
+
+    engine = app.app.state.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with session_scope(app.app.state.session_factory) as session:
+            per_call = []
+            for _ in range(1000):
+                before = len(statements)
+                ingest_punches(session, owner["sessionToken"], buffer, [punch])
+                per_call.append(len(statements) - before)
+            flush_punches(session, buffer)
+            stored = session.scalar(select(func.count()).select_from(TimePunch))
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert stored == 1000
+    # One insert per 256 punches plus the final flush; a punch otherwise costs the token lookups only.
+    assert statements.count("INSERT") == 4
+    assert max(per_call) <= min(per_call) + 1
+    assert sum(per_call) <= 1000 * min(per_call) + 3
+
+
+@pytest.mark.benchmark
+def test_punch_ingestion_latency_benchmark(app: TestClient) -> None:
+    owner = _register(app, email="bench@example.com", organization_slug="bench")
+    buffer = PunchBuffer(max_delay=3600)
+    punch = PunchCreate(kind="in")
+    latencies = []
+    with session_scope(app.app.state.session_factory) as session:
+        started = time.perf_counter()
+        for _ in range(1000):
+            before = time.perf_counter()
+            ingest_punches(session, owner["sessionToken"], buffer, [punch])
+            latencies.append(time.perf_counter() - before)
+        flush_punches(session, buffer)
+        elapsed = time.perf_counter() - started
+
+    # 1000 punches within a second, p99 under 20 ms per call, batch writes included.
+    assert elapsed < 1.0, elapsed
+    assert np.percentile(latencies, 99) < 0.02
+
+
+def test_punch_buffer_flushes_on_a_timer_and_requeues_failed_batches(tmp_path, monkeypatch) -> None:
+    settings = Settings(database_url=f"sqlite+pysqlite:///{tmp_path / 'punches.db'}")
+    with TestClient(create_app(settings=settings)) as client:
+        owner = _register(client, email="clock@example.com", organization_slug="clock")
+        session_factory = client.app.state.session_factory
+        buffer = PunchBuffer(max_delay=0.05)
+
+        def stored() -> int:
+            with session_scope(session_factory) as session:
+                return session.scalar(select(func.count()).select_from(TimePunch))
+
+        failures = []
+
+        def unavailable(session, rows):
+            if not rows:
+                return 0
+            failures.append(len(rows))
+            raise OperationalError("INSERT INTO time_punches", {}, Exception("database is locked"))
+
+        with session_scope(session_factory) as session:
+            monkeypatch.setattr(timeclock, "write_punches", unavailable)
+            ingest_punches(session, owner["sessionToken"], buffer, [PunchCreate(kind="in")])
+            time.sleep(0.06)
+            # The write fails: the punch is still accepted and waits in the buffer.
+            assert ingest_punches(session, owner["sessionToken"], buffer, [PunchCreate(kind="out")]) == 1
+        assert failures == [2] and len(buffer) == 2 and stored() == 0
+
+        monkeypatch.undo()
+        buffer.start(session_factory)
+        try:
+            deadline = time.monotonic() + 5
+            while stored() < 2 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            buffer.stop()
+        assert stored() == 2 and len(buffer) == 0
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+import numpy as np
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.models import TimesheetPolicy
+from backend.rbac import Role
+from backend.services.timesheets import PolicyRules, compute_planned, epoch_minutes
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _invite(client: TestClient, owner: dict[str, str], *, email: str, role: Role) -> dict[str, str]:
+    invitation = client.post(
+        "/api/v1/auth/invitations",
+        headers={"X-Session-Token": owner["sessionToken"]},
+        json={"email": email, "role": role.value},
+    ).json()
+    return client.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": email, "password": "MemberPass123!"},
+    ).json()
+
+
+def test_vectorised_rules_split_nights_breaks_and_calendar() -> None:
+    rules = PolicyRules.compile(
+        TimesheetPolicy(
+            break_after_minutes=360,
+            break_minutes=20,
+            night_start=time(22, 0),
+            night_end=time(6, 0),
+            weekend_days=[5, 6],
+            holidays=["2025-07-14"],
+        )
+    )
+    spans = [
+        (datetime(2025, 3, 3, 9), datetime(2025, 3, 3, 13)),  # Monday morning
+        (datetime(2025, 3, 7, 20), datetime(2025, 3, 8, 4)),  # Friday night, past midnight
+        (datetime(2025, 3, 8, 21), datetime(2025, 3, 10, 7)),  # two nights
+        (datetime(2025, 7, 14, 5), datetime(2025, 7, 14, 12)),  # holiday, early start
+    ]
+    hours = compute_planned(
+        epoch_minutes([start for start, _ in spans]), epoch_minutes([end for _, end in spans]), rules
+    )
+    assert hours.break_minutes.tolist() == [0, 20, 20, 20]
+    assert hours.planned_minutes.tolist() == [240, 460, 2020, 400]
+    assert hours.night_minutes.tolist() == [0, 360, 960, 60]
+    assert hours.weekend.tolist() == [False, False, True, False]
+    assert hours.holiday.tolist() == [False, False, False, True]
+    assert hours.work_day.astype("datetime64[D]").astype(object).tolist()[1] == date(2025, 3, 7)
+
+    daytime = PolicyRules.compile(
+        TimesheetPolicy(
+            break_after_minutes=0,
+            break_minutes=0,
+            night_start=time(1, 0),
+            night_end=time(5, 0),
+            weekend_days=[],
+            holidays=[],
+        )
+    )
+    [night] = compute_planned(np.array([0]), np.array([3 * 24 * 60]), daytime).night_minutes.tolist()
+    assert night == 3 * 4 * 60
+
+
+def test_rules_read_the_organisation_wall_clock() -> None:
+    policy = TimesheetPolicy(
+        break_after_minutes=360,
+        break_minutes=20,
+        night_start=time(22, 0),
+        night_end=time(6, 0),
+        weekend_days=[5, 6],
+        holidays=[],
+    )
+    spans = [
+        (datetime(2025, 3, 9, 23, 30), datetime(2025, 3, 10, 2)),  # Monday 00:30-03:00 in Paris
+        (datetime(2025, 3, 9, 20), datetime(2025, 3, 9, 22)),  # Sunday 21:00-23:00
+        (datetime(2025, 3, 30), datetime(2025, 3, 30, 4)),  # across the spring-forward gap
+    ]
+    starts, ends = epoch_minutes([start for start, _ in spans]), epoch_minutes([end for _, end in spans])
+    utc = compute_planned(starts, ends, PolicyRules.compile(policy))
+    paris = compute_planned(starts, ends, PolicyRules.compile(policy, ZoneInfo("Europe/Paris")))
+    assert utc.weekend.tolist() == [True, True, True] and paris.weekend.tolist() == [False, True, True]
+    assert paris.work_day.astype("datetime64[D]").astype(object).tolist()[0] == date(2025, 3, 10)
+    assert utc.night_minutes.tolist() == [150, 0, 240] and paris.night_minutes.tolist() == [150, 60, 240]
+    assert paris.planned_minutes.tolist() == utc.planned_minutes.tolist() == [150, 120, 240]
+    assert PolicyRules.compile(policy).digest != PolicyRules.compile(policy, ZoneInfo("Europe/Paris")).digest
+
+
+def test_generation_is_idempotent_and_incremental(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="orbit")
+    tech = _invite(app, owner, email="tech@example.com", role=Role.MEMBER)
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    template = app.post("/api/v1/mission-templates", headers=headers, json={"name": "Montage", "teamSize": 2}).json()
+    show = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-07T18:00:00", "endsAt": "2025-03-08T01:00:00"},
+    ).json()
+    owner_shift = app.post(
+        f"/api/v1/planning/missions/{show['id']}/assignments", headers=headers, json={"userId": owner["userId"]}
+    ).json()
+    app.post(f"/api/v1/planning/missions/{show['id']}/assignments", headers=headers, json={"userId": tech["userId"]})
+    rehearsal = app.post(
+        "/api/v1/planning/missions",
+        headers=headers,
+        json={"templateId": template["id"], "startsAt": "2025-03-03T09:00:00", "endsAt": "2025-03-03T12:00:00"},
+    ).json()
+    app.post(
+        f"/api/v1/planning/missions/{rehearsal['id']}/assignments", headers=headers, json={"userId": tech["userId"]}
+    )
+    period = {"periodStart": "2025-03-01", "periodEnd": "2025-04-01"}
+
+    forbidden = app.post(
+        "/api/v1/timesheets/generate", headers={"X-Session-Token": tech["sessionToken"]}, json=period
+    )
+    assert forbidden.status_code == 403
+    first = app.post("/api/v1/timesheets/generate", headers=headers, json=period)
+    assert first.status_code == 200, first.text
+    assert (first.json()["mode"], first.json()["generated"], first.json()["removed"]) == ("full", 3, 0)
+    again = app.post("/api/v1/timesheets/generate", headers=headers, json=period).json()
+    assert (again["mode"], again["generated"], again["removed"]) == ("incremental", 0, 0)
+
+    sheets = app.get("/api/v1/timesheets/", headers=headers, params={"start": "2025-03-01", "end": "2025-04-01"})
+    night_shift = next(sheet for sheet in sheets.json() if sheet["entryKey"] == owner_shift["id"])
+    assert night_shift["workDate"] == "2025-03-07"
+    assert (night_shift["plannedMinutes"], night_shift["breakMinutes"], night_shift["nightMinutes"]) == (400, 20, 180)
+    own = app.get(
+        "/api/v1/timesheets/",
+        headers={"X-Session-Token": tech["sessionToken"]},
+        params={"start": "2025-03-01", "end": "2025-04-01", "userId": owner["userId"]},
+    ).json()
+    assert {sheet["userId"] for sheet in own} == {tech["userId"]}
+
+    app.put(
+        f"/api/v1/planning/missions/{rehearsal['id']}",
+        headers=headers,
+        json={"startsAt": "2025-03-08T09:00:00", "endsAt": "2025-03-08T12:00:00"},
+    )
+    app.delete(f"/api/v1/planning/assignments/{owner_shift['id']}", headers=headers)
+    changed = app.post("/api/v1/timesheets/generate", headers=headers, json=period).json()
+    assert (changed["mode"], changed["generated"], changed["removed"]) == ("incremental", 2, 1)
+    sheets = app.get("/api/v1/timesheets/", headers=headers, params={"start": "2025-03-01", "end": "2025-04-01"}).json()
+    assert [(sheet["workDate"], sheet["weekend"]) for sheet in sheets] == [("2025-03-07", False), ("2025-03-08", True)]
+
+    policy = app.put(
+        "/api/v1/timesheets/policy", headers=headers, json={"holidays": ["2025-03-07"], "nightStart": "23:00:00"}
+    )
+    assert policy.json()["holidays"] == ["2025-03-07"]
+    app.put(
+        f"/api/v1/planning/missions/{rehearsal['id']}/recurrence",
+        headers=headers,
+        json={"frequency": "weekly", "count": 3},
+    )
+    rebuilt = app.post("/api/v1/timesheets/generate", headers=headers, json=period).json()
+    assert (rebuilt["mode"], rebuilt["generated"]) == ("full", 4)
+    sheets = app.get("/api/v1/timesheets/", headers=headers, params={"start": "2025-03-01", "end": "2025-04-01"}).json()
+    assert [sheet["workDate"] for sheet in sheets] == ["2025-03-07", "2025-03-08", "2025-03-15", "2025-03-22"]
+    assert sheets[0]["holiday"] is True and sheets[0]["nightMinutes"] == 120
+    assert sheets[2]["entryKey"].endswith("@20250315T0900")
+
+    # Rules follow the organisation's wall clock: 19:00-02:00 in Paris has three hours past 23:00.
+    zoned = app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Europe/Paris"})
+    assert zoned.status_code == 200 and zoned.json()["timezone"] == "Europe/Paris"
+    tech_headers = {"X-Session-Token": tech["sessionToken"]}
+    assert app.put("/api/v1/auth/organization", headers=tech_headers, json={"timezone": "UTC"}).status_code == 403
+    assert app.put("/api/v1/auth/organization", headers=headers, json={"timezone": "Mars/Olympus"}).status_code == 422
+    local = app.post("/api/v1/timesheets/generate", headers=headers, json=period).json()
+    assert (local["mode"], local["generated"]) == ("full", 4)
+    sheets = app.get("/api/v1/timesheets/", headers=headers, params={"start": "2025-03-01", "end": "2025-04-01"}).json()
+    assert sheets[0]["nightMinutes"] == 180
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+
+from backend.config import Settings
+from backend.main import create_app
+from backend.rbac import Role
+from backend.services.conflicts import ConflictEngine, Interval
+from backend.db import session_scope
+from backend.models import Venue, VenueTravelMatrix
+from backend.services.travel import TravelMatrix, estimate_minutes, load_travel_matrix, refresh_venue_travel
+
+PARIS = (48.8566, 2.3522)
+VERSAILLES = (48.8049, 2.1204)
+LYON = (45.7640, 4.8357)
+MONDAY = datetime(2025, 3, 3)
+
+
+@pytest.fixture()
+def app() -> TestClient:
+    settings = Settings(database_url="sqlite+pysqlite:///:memory:")
+    application = create_app(settings=settings)
+    with TestClient(application) as client:
+        yield client
+
+
+def _register(client: TestClient, *, email: str, organization_slug: str) -> dict[str, str]:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Password123!",
+            "organizationName": organization_slug.title(),
+            "organizationSlug": organization_slug,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _interval(key: str, start_hour: float, end_hour: float, venue: str) -> Interval:
+    return Interval(
+        key=key,
+        start=MONDAY + timedelta(hours=start_hour),
+        end=MONDAY + timedelta(hours=end_hour),
+        mission_id=f"m-{key}",
+        person_id="p1",
+        venue_id=venue,
+    )
+
+
+def test_estimate_minutes_uses_straight_line_with_detour() -> None:
+    paris_lyon = estimate_minutes(PARIS, LYON)
+    assert 450 < paris_lyon < 560
+    assert estimate_minutes(PARIS, PARIS) == 0
+    assert estimate_minutes(PARIS, (None, None)) == 0
+
+
+def test_travel_matrix_incremental_updates_roundtrip() -> None:
+    matrix = TravelMatrix()
+    matrix.upsert("paris", {})
+    matrix.upsert("lyon", {"paris": 500})
+    matrix.upsert("versailles", {"paris": 25, "lyon": 510})
+    assert matrix.minutes_between("paris", "lyon") == 500
+    assert matrix.minutes_between("lyon", "paris") == 500
+    assert matrix.minutes_between("versailles", "paris") == 25
+    assert matrix.minutes_between("paris", "unknown") == 0
+    assert matrix.minutes_between(None, "paris") == 0
+
+    matrix.upsert("paris", {"lyon": 480, "versailles": 30})
+    restored = TravelMatrix.from_bytes(matrix.venue_ids, matrix.to_bytes())
+    assert restored.minutes_between("lyon", "paris") == 480
+    assert restored.minutes_between("paris", "versailles") == 30
+
+    restored.remove("paris")
+    assert len(restored) == 2
+    assert "paris" not in restored
+    assert restored.minutes_between("lyon", "versailles") == 510
+
+    with pytest.raises(ValueError):
+        TravelMatrix.from_bytes(["a", "b"], b"\x00\x00")
+
+
+def test_engine_travel_conflicts_and_move_delta() -> None:
+    matrix = TravelMatrix()
+    matrix.upsert("paris", {})
+    matrix.upsert("lyon", {"paris": 500})
+    engine = ConflictEngine.from_intervals(
+        [
+            _interval("a", 8, 12, "paris"),
+            _interval("b", 13, 15, "lyon"),
+            _interval("c", 16, 18, "paris"),
+        ],
+        travel=matrix.minutes_between,
+    )
+    assert sorted((c.kind, c.first_key, c.second_key) for c in engine.audit()) == [
+        ("travel", "a", "b"),
+        ("travel", "b", "c"),
+    ]
+
+    delta = engine.move_assignment("b", _interval("b", 40, 42, "lyon"))
+    assert sorted((c.first_key, c.second_key) for c in delta.resolved) == [("a", "b"), ("b", "c")]
+    assert delta.added == []
+    assert delta.current == []
+
+    probe = _interval("d", 12.5, 13, "lyon")
+    assert [c.kind for c in engine.check_assignment(probe)] == ["travel", "travel"]
+
+
+def test_venue_coordinates_drive_travel_conflicts(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="tour")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    invitation = app.post(
+        "/api/v1/auth/invitations",
+        headers=headers,
+        json={"email": "tech@example.com", "role": Role.MEMBER.value},
+    ).json()
+    technician = app.post(
+        "/api/v1/auth/invitations/accept",
+        json={"token": invitation["token"], "email": "tech@example.com", "password": "MemberPass123!"},
+    ).json()
+
+    paris = app.post(
+        "/api/v1/venues",
+        headers=headers,
+        json={"name": "Olympia", "latitude": PARIS[0], "longitude": PARIS[1]},
+    ).json()
+    lyon = app.post(
+        "/api/v1/venues",
+        headers=headers,
+        json={"name": "Transbordeur", "latitude": LYON[0], "longitude": LYON[1]},
+    )
+    assert lyon.status_code == 201, lyon.text
+    lyon = lyon.json()
+    assert lyon["latitude"] == LYON[0]
+    template = app.post(
+        "/api/v1/mission-templates", headers=headers, json={"name": "Explo", "teamSize": 1}
+    ).json()
+
+    assignments = []
+    for venue, start, end in [
+        (paris["id"], "2025-03-03T08:00:00", "2025-03-03T12:00:00"),
+        (lyon["id"], "2025-03-03T13:00:00", "2025-03-03T17:00:00"),
+    ]:
+        mission = app.post(
+            "/api/v1/planning/missions",
+            headers=headers,
+            json={"templateId": template["id"], "venueId": venue, "startsAt": start, "endsAt": end},
+        ).json()
+        assignments.append(
+            app.post(
+                f"/api/v1/planning/missions/{mission['id']}/assignments",
+                headers=headers,
+                json={"userId": technician["userId"]},
+            ).json()
+        )
+    assert [conflict["kind"] for conflict in assignments[1]["conflicts"]] == ["travel"]
+
+    report = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"})
+    assert [conflict["kind"] for conflict in report.json()["conflicts"]] == ["travel"]
+
+    relocated = app.put(
+        f"/api/v1/venues/{lyon['id']}",
+        headers=headers,
+        json={"latitude": VERSAILLES[0], "longitude": VERSAILLES[1]},
+    )
+    assert relocated.status_code == 200
+    report = app.get("/api/v1/planning/conflicts", headers=headers, params={"weekStart": "2025-03-03"})
+    assert report.json()["conflicts"] == []
+
+    invalid = app.post("/api/v1/venues", headers=headers, json={"name": "Nowhere", "latitude": 120})
+    assert invalid.status_code == 422
+
+    deleted = app.delete(f"/api/v1/venues/{paris['id']}", headers=headers)
+    assert deleted.status_code == 204
+
+
+def test_venue_refresh_rereads_a_matrix_written_concurrently(app: TestClient) -> None:
+    owner = _register(app, email="owner@example.com", organization_slug="tour")
+    headers = {"X-Session-Token": owner["sessionToken"]}
+    paris = app.post(
+        "/api/v1/venues", headers=headers, json={"name": "Olympia", "latitude": PARIS[0], "longitude": PARIS[1]}
+    ).json()
+
+    with session_scope(app.app.state.session_factory) as session:
+        seen = session.get(VenueTravelMatrix, owner["organizationId"])
+        assert seen.venue_ids == [paris["id"]]
+        lyon = app.post(
+            "/api/v1/venues", headers=headers, json={"name": "Transbordeur", "latitude": LYON[0], "longitude": LYON[1]}
+        ).json()
+        versailles = Venue(
+            organization_id=owner["organizationId"],
+            name="Chateau",
+            latitude=VERSAILLES[0],
+            longitude=VERSAILLES[1],
+        )
+        session.add(versailles)
+        session.flush()
+        refresh_venue_travel(session, versailles)
+
+    with session_scope(app.app.state.session_factory) as session:
+        matrix = load_travel_matrix(session, owner["organizationId"])
+    assert set(matrix.venue_ids) == {paris["id"], lyon["id"], versailles.id}
+    assert matrix.minutes_between(lyon["id"], paris["id"]) == estimate_minutes(LYON, PARIS)